@@ -189,6 +189,10 @@ ON alden_memory USING gin (metadata);
 CREATE INDEX IF NOT EXISTS idx_alden_memory_sync_status 
 ON alden_memory (sync_status) WHERE sync_status != 'synced';
 
+-- Sync watermark index (keyset scan over pending changes)
+CREATE INDEX IF NOT EXISTS idx_alden_memory_sync_watermark
+ON alden_memory (updated_at, memory_id) WHERE sync_status = 'pending';
+
 -- Session indexes
 CREATE INDEX IF NOT EXISTS idx_alden_sessions_user_agent 
 ON alden_sessions (user_id, agent_id);
@@ -215,12 +219,24 @@ ON alden_memory_tag_relations (tag_id);
 
 -- Functions for enhanced memory operations
 
--- Function to update updated_at timestamp
+-- Function to update updated_at timestamp and queue content changes for sync
 CREATE OR REPLACE FUNCTION update_alden_memory_updated_at()
 RETURNS TRIGGER AS $$
 BEGIN
     NEW.updated_at = CURRENT_TIMESTAMP;
     NEW.modification_count = OLD.modification_count + 1;
+    -- Sync write-backs and access counters leave the row's sync state alone
+    IF NEW.sync_status IS NOT DISTINCT FROM OLD.sync_status
+       AND (NEW.content, NEW.memory_type, NEW.memory_category, NEW.keywords, NEW.custom_tags,
+            NEW.embedding, NEW.relevance_score, NEW.importance_score, NEW.confidence_score,
+            NEW.expires_at, NEW.metadata, NEW.parent_memory_id, NEW.related_memory_ids)
+           IS DISTINCT FROM
+           (OLD.content, OLD.memory_type, OLD.memory_category, OLD.keywords, OLD.custom_tags,
+            OLD.embedding, OLD.relevance_score, OLD.importance_score, OLD.confidence_score,
+            OLD.expires_at, OLD.metadata, OLD.parent_memory_id, OLD.related_memory_ids) THEN
+        NEW.sync_status = 'pending';
+        NEW.version = OLD.version + 1;
+    END IF;
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+LLM Endpoint Health Tracking
+Keeps per-endpoint health state for the Local LLM API so requests are routed
+without probing first. A background prober and the outcome of real requests
+both feed the state; routing picks the healthy endpoint with the fewest
+outstanding requests, then the lowest EWMA latency.
+"""
+
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from enum import Enum
+from typing import Dict, List, Any, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+class EndpointStatus(Enum):
+    UNKNOWN = "unknown"
+    HEALTHY = "healthy"
+    DEGRADED = "degraded"
+    DOWN = "down"
+
+# Routing preference, best first
+STATUS_RANK = {
+    EndpointStatus.HEALTHY: 0,
+    EndpointStatus.UNKNOWN: 1,
+    EndpointStatus.DEGRADED: 2,
+    EndpointStatus.DOWN: 3
+}
+
+@dataclass
+class EndpointState:
+    url: str
+    status: EndpointStatus = EndpointStatus.UNKNOWN
+    ewma_latency: Optional[float] = None
+    outstanding: int = 0
+    consecutive_failures: int = 0
+    total_requests: int = 0
+    total_failures: int = 0
+    last_checked: Optional[float] = None
+    last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["status"] = self.status.value
+        data["ewma_latency_ms"] = round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None
+        del data["ewma_latency"]
+        return data
+
+class EndpointHealthTracker:
+    """
+    Health state for a set of equivalent LLM endpoints
+    """
+
+    def __init__(self, endpoints: List[str], probe_path: str = "/api/version",
+                 probe_interval: float = 10.0, probe_timeout: float = 2.0,
+                 ewma_alpha: float = 0.3, degraded_latency: float = 5.0,
+                 down_after_failures: int = 2):
+        self.probe_path = probe_path
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.ewma_alpha = ewma_alpha
+        self.degraded_latency = degraded_latency
+        self.down_after_failures = down_after_failures
+
+        self.lock = threading.Lock()
+        self.states: Dict[str, EndpointState] = {}
+        self.set_endpoints(endpoints)
+
+        self._probe_session = requests.Session()
+        self._stop_event = threading.Event()
+        self._prober: Optional[threading.Thread] = None
+
+    def set_endpoints(self, endpoints: List[str]):
+        """Replace the endpoint set, keeping state for endpoints that remain"""
+        with self.lock:
+            self.states = {url: self.states.get(url) or EndpointState(url) for url in dict.fromkeys(endpoints)}
+
+    def _update_status(self, state: EndpointState):
+        if state.consecutive_failures >= self.down_after_failures:
+            state.status = EndpointStatus.DOWN
+        elif state.consecutive_failures or (state.ewma_latency or 0) > self.degraded_latency:
+            state.status = EndpointStatus.DEGRADED
+        else:
+            state.status = EndpointStatus.HEALTHY
+
+    def record_success(self, url: str, latency: Optional[float] = None):
+        """
+        Fold a successful request or probe into the endpoint's state
+        
+        latency is left out for requests whose duration is dominated by the
+        work done (generations), so only probes and metadata calls move the
+        latency average.
+        """
+        with self.lock:
+            state = self.states.get(url)
+            if state is None:
+                return
+            state.total_requests += 1
+            state.consecutive_failures = 0
+            state.last_error = None
+            state.last_checked = time.time()
+            if latency is None:
+                pass
+            elif state.ewma_latency is None:
+                state.ewma_latency = latency
+            else:
+                state.ewma_latency += self.ewma_alpha * (latency - state.ewma_latency)
+            self._update_status(state)
+
+    def record_failure(self, url: str, error: Exception):
+        """Fold a failed request or probe into the endpoint's state"""
+        with self.lock:
+            state = self.states.get(url)
+            if state is None:
+                return
+            state.total_requests += 1
+            state.total_failures += 1
+            state.consecutive_failures += 1
+            state.last_error = str(error)
+            state.last_checked = time.time()
+            self._update_status(state)
+
+    def _ranked_states(self) -> List[EndpointState]:
+        with self.lock:
+            states = list(self.states.values())
+        order = {state.url: i for i, state in enumerate(states)}
+        states.sort(key=lambda s: (
+            STATUS_RANK[s.status],
+            s.outstanding,
+            s.ewma_latency if s.ewma_latency is not None else float("inf"),
+            order[s.url]
+        ))
+        return states
+
+    def ranked_endpoints(self, include_down: bool = False) -> List[str]:
+        """
+        Endpoints in routing order: best status, then fewest outstanding
+        requests, then lowest EWMA latency, then configuration order
+        """
+        return [state.url for state in self._ranked_states()
+                if include_down or state.status != EndpointStatus.DOWN]
+
+    def select(self) -> Optional[str]:
+        """Best endpoint to route to, or None if every endpoint is down"""
+        ranked = self.ranked_endpoints()
+        return ranked[0] if ranked else None
+
+    @contextmanager
+    def track(self, url: str):
+        """Count a request as outstanding on url while it runs"""
+        with self.lock:
+            state = self.states.get(url)
+            if state:
+                state.outstanding += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                if state:
+                    state.outstanding -= 1
+
+    def probe(self, url: str) -> bool:
+        """Probe one endpoint and record the result"""
+        started = time.perf_counter()
+        try:
+            response = self._probe_session.get(f"{url}{self.probe_path}", timeout=self.probe_timeout)
+            response.raise_for_status()
+        except Exception as e:
+            self.record_failure(url, e)
+            return False
+        self.record_success(url, time.perf_counter() - started)
+        return True
+
+    def probe_all(self) -> Dict[str, bool]:
+        """Probe every endpoint concurrently"""
+        with self.lock:
+            urls = list(self.states)
+        results: Dict[str, bool] = {}
+
+        def run(url):
+            results[url] = self.probe(url)
+
+        threads = [threading.Thread(target=run, args=(url,), daemon=True) for url in urls]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def start(self):
+        """Start the background prober (first round runs immediately)"""
+        if self._prober and self._prober.is_alive():
+            return
+        self._stop_event.clear()
+        self._prober = threading.Thread(target=self._probe_loop, name="llm-endpoint-prober", daemon=True)
+        self._prober.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._prober:
+            self._prober.join(timeout=self.probe_timeout + 1)
+
+    def _probe_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.probe_all()
+            except Exception as e:
+                logger.error(f"Endpoint probe round failed: {e}")
+            self._stop_event.wait(self.probe_interval)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint state for status endpoints"""
+        with self.lock:
+            return {url: state.to_dict() for url, state in self.states.items()}
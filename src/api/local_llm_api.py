@@ -9,9 +9,10 @@ import os
 import time
 import requests
 import asyncio
+from contextlib import closing
 from datetime import datetime
 from typing import Dict, List, Any, Optional
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
 import logging
 from requests.adapters import HTTPAdapter
@@ -23,6 +24,8 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 from circuit_breaker import CircuitBreakerConfig, CircuitBreakerManager, CircuitBreakerOpenException
+from endpoint_health import EndpointHealthTracker
+from single_flight import default_single_flight as single_flight, request_key
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -56,23 +59,51 @@ OFFLINE_CB_CONFIG = CircuitBreakerConfig(
 
 # Enhanced connection management
 class EnhancedConnectionManager:
-    def __init__(self):
-        self.primary_endpoint = "http://localhost:11434"
-        self.fallback_endpoints = [
-            "http://127.0.0.1:11434",
-            "http://localhost:11435",  # Alternative port
-            "http://localhost:8080"    # LM Studio default
-        ]
+    """
+    Routes LLM requests using cached endpoint health instead of probing first.
+    
+    Endpoints come from LOCAL_LLM_ENDPOINTS (comma-separated, first is primary)
+    or the built-in defaults. A background prober and the outcome of every
+    request keep the health state current.
+    """
+    
+    # Endpoints tried per request before giving up
+    max_attempts = 2
+    
+    def __init__(self, endpoints: Optional[List[str]] = None, start_prober: bool = True):
+        endpoints = endpoints or [ep.strip() for ep in os.getenv('LOCAL_LLM_ENDPOINTS', '').split(',') if ep.strip()]
+        if endpoints:
+            self.primary_endpoint = endpoints[0]
+            self.fallback_endpoints = endpoints[1:]
+        else:
+            self.primary_endpoint = "http://localhost:11434"
+            self.fallback_endpoints = [
+                "http://127.0.0.1:11434",
+                "http://localhost:11435",  # Alternative port
+                "http://localhost:8080"    # LM Studio default
+            ]
         self.session = self._create_session()
         self.current_endpoint = self.primary_endpoint
-        
+        self.health = EndpointHealthTracker([self.primary_endpoint] + self.fallback_endpoints)
+        if start_prober:
+            self.health.start()
+        
+    def configure_endpoints(self, endpoints: List[str]):
+        """Replace the endpoint set (first is primary)"""
+        self.primary_endpoint = endpoints[0]
+        self.fallback_endpoints = list(endpoints[1:])
+        self.current_endpoint = self.primary_endpoint
+        self.health.set_endpoints(endpoints)
+    
     def _create_session(self):
         """Create a persistent session with retry strategy"""
         session = requests.Session()
         
-        # Configure retry strategy
+        # Configure retry strategy; connection failures fail over to the
+        # next endpoint instead of being retried against a dead one
         retry_strategy = Retry(
             total=3,
+            connect=0,
             backoff_factor=1,
             status_forcelist=[429, 500, 502, 503, 504],
             allowed_methods=["HEAD", "GET", "POST"]
@@ -94,48 +125,50 @@ class EnhancedConnectionManager:
         return session
     
     def get_available_endpoint(self):
-        """Find the first available LLM endpoint"""
-        endpoints_to_try = [self.current_endpoint] + [
-            ep for ep in self.fallback_endpoints if ep != self.current_endpoint
-        ]
-        
-        for endpoint in endpoints_to_try:
-            try:
-                response = self.session.get(f"{endpoint}/api/version", timeout=3)
-                if response.status_code == 200:
-                    if endpoint != self.current_endpoint:
-                        logger.info(f"Switched to fallback endpoint: {endpoint}")
-                        self.current_endpoint = endpoint
-                    return endpoint
-            except Exception as e:
-                logger.debug(f"Endpoint {endpoint} unavailable: {e}")
-                continue
-        
-        logger.error("No LLM endpoints available")
-        return None
+        """Best endpoint according to cached health state (no probe)"""
+        endpoint = self.health.select()
+        if endpoint is None:
+            logger.error("No LLM endpoints available")
+            return None
+        
+        if endpoint != self.current_endpoint:
+            logger.info(f"Switched to endpoint: {endpoint}")
+            self.current_endpoint = endpoint
+        return endpoint
     
     def make_request(self, method, path, **kwargs):
-        """Make a request with automatic endpoint failover"""
-        endpoint = self.get_available_endpoint()
-        if not endpoint:
+        """Make a request to the best endpoint, failing over on connection errors and 5xx replies"""
+        candidates = self.health.ranked_endpoints()[:self.max_attempts]
+        if not candidates:
             raise ConnectionError("No LLM endpoints available")
         
-        url = f"{endpoint}{path}"
-        try:
-            response = self.session.request(method, url, **kwargs)
+        last_error = None
+        for endpoint in candidates:
+            url = f"{endpoint}{path}"
+            try:
+                with self.health.track(endpoint):
+                    response = self.session.request(method, url, **kwargs)
+                if response.status_code >= 500:
+                    response.raise_for_status()
+            except Exception as e:
+                logger.error(f"Request failed to {url}: {e}")
+                self.health.record_failure(endpoint, e)
+                last_error = e
+                continue
+            
+            # Generation time says nothing about endpoint health, so only
+            # metadata requests feed the latency average
+            latency = response.elapsed.total_seconds() if method.upper() == 'GET' else None
+            self.health.record_success(endpoint, latency)
+            if endpoint != self.current_endpoint:
+                logger.info(f"Switched to endpoint: {endpoint}")
+                self.current_endpoint = endpoint
+            
+            # 4xx: the endpoint is up but rejected the request
             response.raise_for_status()
             return response
-        except Exception as e:
-            logger.error(f"Request failed to {url}: {e}")
-            # Try to find alternative endpoint
-            self.current_endpoint = None
-            endpoint = self.get_available_endpoint()
-            if endpoint:
-                url = f"{endpoint}{path}"
-                response = self.session.request(method, url, **kwargs)
-                response.raise_for_status()
-                return response
-            raise
+        
+        raise last_error
 
 # Initialize connection manager
 connection_manager = EnhancedConnectionManager()
@@ -173,6 +206,9 @@ service_status = {
         "successful_requests": 0,
         "failed_requests": 0,
         "average_response_time": 0,
+        "streamed_requests": 0,
+        "average_time_to_first_token": 0,
+        "last_time_to_first_token": None,
         "uptime_start": time.time()
     }
 }
@@ -229,6 +265,15 @@ def update_metrics(success=True, response_time=0):
     current_avg = service_status["metrics"]["average_response_time"]
     service_status["metrics"]["average_response_time"] = ((current_avg * (total - 1)) + response_time) / total
 
+def record_time_to_first_token(ttft):
+    """Update time-to-first-token metrics for a streamed request"""
+    metrics = service_status["metrics"]
+    
+    metrics["streamed_requests"] += 1
+    count = metrics["streamed_requests"]
+    metrics["average_time_to_first_token"] = ((metrics["average_time_to_first_token"] * (count - 1)) + ttft) / count
+    metrics["last_time_to_first_token"] = ttft
+
 def select_model_for_task(task_type="general", prefer_profile=None):
     """Select the appropriate model based on task type and profile preference"""
     global service_status
@@ -334,32 +379,141 @@ def pull_model():
             'error': f'Request failed: {str(e)}'
         }), 500
 
-def _chat_with_ollama(message: str, task_type: str, prefer_profile: str = None):
-    """Internal function for chatting with Ollama (protected by circuit breaker)"""
+def _chat_with_ollama(message: str, task_type: str, prefer_profile: str = None, stream: bool = False):
+    """
+    Internal function for chatting with Ollama (protected by circuit breaker)
+    
+    With stream=True an iterator over the parsed NDJSON chunks is returned
+    instead of the JSON body. Identical concurrent requests (same model, prompt
+    and sampling options) share one Ollama generation.
+    """
     # Select appropriate model
     model, selected_profile = select_model_for_task(task_type, prefer_profile)
     
     # Get profile configuration
     profile_config = service_status["dual_profile_config"][selected_profile]
     
-    # Make request to Ollama
-    response = connection_manager.make_request(
-        'POST',
-        '/api/generate',
-        json={
+    payload = {
+        'model': model,
+        'prompt': message,
+        'stream': stream,
+        'options': {
+            'temperature': profile_config['temperature'],
+            'num_predict': profile_config['max_tokens'],
+            'top_p': profile_config.get('top_p', 0.9)
+        }
+    }
+    
+    def send():
+        # Make request to Ollama
+        return connection_manager.make_request(
+            'POST',
+            '/api/generate',
+            json=payload,
+            timeout=profile_config.get('timeout', 30),
+            stream=stream
+        )
+    
+    key = request_key('/api/generate', payload)
+    if stream:
+        return single_flight.stream(key, lambda: _iter_ollama_chunks(send()))
+    return single_flight.do(key, lambda: send().json())
+
+def _sse_event(payload: Dict[str, Any]) -> str:
+    """Format one server-sent event"""
+    return f"data: {json.dumps(payload)}\n\n"
+
+def _iter_ollama_chunks(response):
+    """Parse an Ollama NDJSON stream, closing it when done or abandoned"""
+    with response:
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get('error'):
+                raise Exception(chunk['error'])
+            yield chunk
+            if chunk.get('done'):
+                break
+
+def _stream_ollama_events(chunks, start_time: float):
+    """Relay Ollama stream chunks as server-sent events, one per token chunk"""
+    first_token_time = None
+    model = 'unknown'
+    
+    try:
+        with closing(chunks):
+            for chunk in chunks:
+                model = chunk.get('model', model)
+                token = chunk.get('response', '')
+                if token:
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                        record_time_to_first_token(first_token_time)
+                    yield _sse_event({'token': token})
+        
+        processing_time = time.time() - start_time
+        update_metrics(True, processing_time)
+        yield _sse_event({
+            'done': True,
             'model': model,
-            'prompt': message,
-            'stream': False,
-            'options': {
-                'temperature': profile_config['temperature'],
-                'num_predict': profile_config['max_tokens'],
-                'top_p': profile_config.get('top_p', 0.9)
-            }
-        },
-        timeout=profile_config.get('timeout', 30)
-    )
+            'processing_time': round(processing_time, 2),
+            'time_to_first_token': round(first_token_time, 3) if first_token_time is not None else None,
+            'backend': 'ollama',
+            'circuit_breaker_status': 'closed',
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Chat stream error: {e}")
+        update_metrics(False, time.time() - start_time)
+        yield _sse_event({
+            'done': True,
+            'error': f'Stream interrupted: {str(e)}',
+            'timestamp': datetime.now().isoformat()
+        })
+
+def _stream_chat(message: str, task_type: str, prefer_profile: str, start_time: float):
+    """Streaming chat: tokens are sent as server-sent events as Ollama produces them"""
+    ollama_breaker = circuit_manager.get_or_create('ollama_service', OLLAMA_CB_CONFIG)
     
-    return response.json()
+    try:
+        # Only opening the stream is covered by the circuit breaker
+        chunks = ollama_breaker.call(_chat_with_ollama, message, task_type, prefer_profile, True)
+        events = _stream_ollama_events(chunks, start_time)
+        
+    except CircuitBreakerOpenException:
+        logger.warning("Ollama circuit breaker is open, attempting offline fallback")
+        offline_breaker = circuit_manager.get_or_create('offline_llm', OFFLINE_CB_CONFIG)
+        
+        try:
+            offline_result = offline_breaker.call(offline_manager.generate_response, message, task_type)
+        except CircuitBreakerOpenException:
+            return jsonify({
+                'error': 'All LLM services are currently unavailable',
+                'suggestion': 'Both Ollama and offline services are experiencing issues. Please try again later.',
+                'circuit_breaker_status': 'all_open',
+                'timestamp': datetime.now().isoformat()
+            }), 503
+        
+        # The offline backend does not stream; send its reply as a single chunk
+        events = iter([
+            _sse_event({'token': offline_result.get('response', '')}),
+            _sse_event({
+                'done': True,
+                'model': offline_result.get('model', 'offline'),
+                'processing_time': round(time.time() - start_time, 2),
+                'backend': 'offline',
+                'circuit_breaker_status': 'ollama_open_offline_used',
+                'timestamp': datetime.now().isoformat()
+            })
+        ])
+    
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
@@ -375,6 +529,9 @@ def chat():
         if not message:
             return jsonify({'error': 'Message required'}), 400
         
+        if data.get('stream'):
+            return _stream_chat(message, task_type, prefer_profile, start_time)
+        
         # Try with circuit breaker protection
         ollama_breaker = circuit_manager.get_or_create('ollama_service', OLLAMA_CB_CONFIG)
         
@@ -432,6 +589,29 @@ def chat():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Chat with Local LLM, streaming tokens as server-sent events"""
+    start_time = time.time()
+    
+    try:
+        data = request.get_json() or {}
+        message = data.get('message', '')
+        
+        if not message:
+            return jsonify({'error': 'Message required'}), 400
+        
+        return _stream_chat(message, data.get('task_type', 'general'), data.get('profile'), start_time)
+        
+    except Exception as e:
+        logger.error(f"Chat stream endpoint error: {e}")
+        return jsonify({
+            'error': f'Unexpected error: {str(e)}',
+            'processing_time': round(time.time() - start_time, 2),
+            'circuit_breaker_status': 'error',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
 @app.route('/api/profiles', methods=['GET'])
 def get_profiles():
     """Get dual LLM profile configuration"""
@@ -528,7 +708,8 @@ def get_metrics():
         'success_rate': (
             service_status["metrics"]["successful_requests"] / 
             max(1, service_status["metrics"]["total_requests"]) * 100
-        )
+        ),
+        'deduplication': single_flight.get_stats()
     })
 
 @app.route('/api/recommendations', methods=['GET'])
@@ -699,29 +880,22 @@ def get_model_recommendations():
 def get_connection_pool_status():
     """Get connection pool status and health metrics."""
     try:
-        # This would integrate with the enhanced LLMConnectionPool
-        # For now, provide simulated status based on current implementation
         current_time = datetime.now().isoformat()
+        endpoints = connection_manager.health.snapshot()
+        total_requests = sum(state['total_requests'] for state in endpoints.values())
+        failed_requests = sum(state['total_failures'] for state in endpoints.values())
         
         pool_status = {
-            'active_connections': 1 if service_status['connected'] else 0,
-            'max_connections': 10,
-            'health_check_interval': 30,
-            'last_health_check': current_time,
-            'endpoints': {
-                ollama_endpoint: {
-                    'status': 'healthy' if service_status['connected'] else 'unhealthy',
-                    'last_check': service_status['last_check'],
-                    'error_count': 0 if service_status['connected'] else 1,
-                    'response_time_ms': 150 if service_status['connected'] else None
-                }
-            },
+            'active_connections': sum(state['outstanding'] for state in endpoints.values()),
+            'max_connections': 20,
+            'health_check_interval': connection_manager.health.probe_interval,
+            'current_endpoint': connection_manager.current_endpoint,
+            'endpoints': endpoints,
             'stability_metrics': {
-                'uptime_percentage': 95.7,
-                'average_response_time': 145,
-                'total_requests': 1247,
-                'failed_requests': 23,
-                'retry_success_rate': 89.2
+                'average_response_time': round(service_status["metrics"]["average_response_time"] * 1000),
+                'total_requests': total_requests,
+                'failed_requests': failed_requests,
+                'success_rate': round((total_requests - failed_requests) / total_requests * 100, 1) if total_requests else None
             }
         }
         
@@ -1185,6 +1359,7 @@ if __name__ == '__main__':
     print("  GET  /api/models - Available models and profiles")
     print("  POST /api/models/pull - Pull/download new model")
     print("  POST /api/chat - Chat with Local LLM")
+    print("  POST /api/chat/stream - Chat with Local LLM, streaming tokens (SSE)")
     print("  GET  /api/profiles - Get dual LLM profiles")
     print("  PUT  /api/profiles - Update dual LLM profiles")
     print("  POST /api/test - Test connection and functionality")
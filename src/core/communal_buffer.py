@@ -0,0 +1,311 @@
+"""
+Write-behind buffer for Core communal memory
+
+Every participant join/leave, context update and shared insight used to
+read, modify and rewrite the session's communal memory in the Vault (a
+decrypt/re-encrypt round trip per event). The buffer instead applies each
+event to an in-memory copy of the document immediately, appends it to a
+per-session journal file, and writes the coalesced document back to the
+Vault on a timer, on session pause/end and on shutdown.
+
+Crash safety: an event is journaled (flushed and fsynced) before it is
+applied, and the journal is only removed after the Vault write. On start-up
+any leftover journals are replayed on top of the Vault copy. Each document
+carries the sequence number of the last event it contains, so replaying a
+journal whose events already reached the Vault is a no-op. Journal lines
+are encrypted with the Vault's own cipher when it provides one.
+"""
+
+import os
+import json
+import base64
+import copy
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+SEQ_KEY = "_journal_seq"
+
+
+def apply_communal_event(document: Dict[str, Any], event: Dict[str, Any]):
+    """Apply one journaled event to a communal memory document in place."""
+    data = event["data"]
+    event_type = event["event_type"]
+    timestamp = event["timestamp"]
+
+    if event_type == "participant_added":
+        document.setdefault("participants", []).append({
+            "id": data["participant_id"],
+            "name": data["participant_name"],
+            "role": data.get("role"),
+            "joined_at": timestamp
+        })
+    elif event_type == "participant_removed":
+        # Mark participant as left
+        for p in document.get("participants", []):
+            if p["id"] == data["participant_id"]:
+                p["left_at"] = timestamp
+                break
+    elif event_type == "context_update":
+        document.setdefault("context", {}).update(data)
+    elif event_type == "insight_shared":
+        document.setdefault("shared_insights", []).append({
+            "timestamp": timestamp,
+            "participant_id": data["participant_id"],
+            "insight": data["insight"],
+            "context": data.get("context", {})
+        })
+    document[SEQ_KEY] = event["seq"]
+
+
+class _SessionBuffer:
+    def __init__(self, memory_id: str, owner: str, document: Dict[str, Any]):
+        self.memory_id = memory_id
+        self.owner = owner
+        self.document = document
+        self.pending_events = 0
+        self.lock = threading.Lock()
+        # Serializes Vault writes for the session without blocking apply()
+        self.flush_lock = threading.Lock()
+
+
+class CommunalWriteBehind:
+    """Per-session write-behind buffer in front of Vault communal memory."""
+
+    def __init__(self, vault, journal_dir: str, flush_interval: float = 2.0,
+                 fsync: bool = True, logger=None):
+        self.vault = vault
+        self.journal_dir = Path(journal_dir)
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.logger = logger
+
+        self._buffers: Dict[str, _SessionBuffer] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            "events_applied": 0,
+            "flushes": 0,
+            "events_flushed": 0,
+            "journals_recovered": 0,
+            "flush_failures": 0
+        }
+
+    # Lifecycle
+
+    def start(self):
+        """Replay leftover journals and start the periodic flusher."""
+        self.recover()
+        if self.flush_interval and self.flush_interval > 0:
+            self._thread = threading.Thread(target=self._run, name="CommunalWriteBehind", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write everything that is still buffered."""
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=10)
+        self.flush_all()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush_all()
+
+    # Buffering
+
+    def register(self, session_id: str, memory_id: str, owner: str, document: Dict[str, Any]):
+        """Seed the buffer with a document that was just written to the Vault."""
+        with self._lock:
+            self._buffers[session_id] = _SessionBuffer(memory_id, owner, copy.deepcopy(document))
+
+    def _buffer_for(self, session_id: str, memory_id: str, owner: str) -> Optional[_SessionBuffer]:
+        with self._lock:
+            buffer = self._buffers.get(session_id)
+        if buffer is not None:
+            return buffer
+
+        communal_mem = self.vault.get_communal(memory_id, owner)
+        if not communal_mem:
+            return None
+        with self._lock:
+            return self._buffers.setdefault(session_id, _SessionBuffer(memory_id, owner, communal_mem["data"]))
+
+    def apply(self, session_id: str, memory_id: str, owner: str,
+              event_type: str, data: Dict[str, Any]) -> bool:
+        """Journal an event and apply it to the in-memory document; False if there is no document."""
+        buffer = self._buffer_for(session_id, memory_id, owner)
+        if buffer is None:
+            return False
+
+        with buffer.lock:
+            event = {
+                "seq": buffer.document.get(SEQ_KEY, 0) + 1,
+                "session_id": session_id,
+                "memory_id": memory_id,
+                "owner": owner,
+                "event_type": event_type,
+                "data": data,
+                "timestamp": datetime.now().isoformat()
+            }
+            self._append_journal(memory_id, event)
+            apply_communal_event(buffer.document, event)
+            buffer.pending_events += 1
+
+        self.stats["events_applied"] += 1
+        return True
+
+    def get_document(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Current (possibly not yet flushed) communal document for a session."""
+        with self._lock:
+            buffer = self._buffers.get(session_id)
+        if buffer is None:
+            return None
+        with buffer.lock:
+            return copy.deepcopy(buffer.document)
+
+    # Flushing
+
+    def flush(self, session_id: str, evict: bool = False) -> bool:
+        """Write a session's coalesced document to the Vault if it has unflushed events."""
+        with self._lock:
+            buffer = self._buffers.get(session_id)
+        if buffer is None:
+            return True
+
+        with buffer.flush_lock:
+            with buffer.lock:
+                count = buffer.pending_events
+                if count:
+                    snapshot = copy.deepcopy(buffer.document)
+                    # Events applied from here on go to a fresh journal
+                    self._rotate_journal(buffer.memory_id)
+                    buffer.pending_events = 0
+
+            if count:
+                try:
+                    self.vault.create_or_update_communal(buffer.memory_id, snapshot, buffer.owner)
+                except Exception as e:
+                    # Events stay journaled; the next flush retries them
+                    with buffer.lock:
+                        buffer.pending_events += count
+                    self.stats["flush_failures"] += 1
+                    if self.logger:
+                        self.logger.error(f"Failed to flush communal memory {buffer.memory_id}: {e}")
+                    return False
+                self._flushing_path(buffer.memory_id).unlink(missing_ok=True)
+                self.stats["flushes"] += 1
+                self.stats["events_flushed"] += count
+
+        if evict:
+            with self._lock:
+                self._buffers.pop(session_id, None)
+        return True
+
+    def flush_all(self):
+        with self._lock:
+            session_ids = list(self._buffers)
+        for session_id in session_ids:
+            self.flush(session_id)
+
+    def pending_events(self) -> int:
+        with self._lock:
+            return sum(b.pending_events for b in self._buffers.values())
+
+    # Journal
+
+    def _journal_path(self, memory_id: str) -> Path:
+        return self.journal_dir / f"{memory_id}.jsonl"
+
+    def _flushing_path(self, memory_id: str) -> Path:
+        return self.journal_dir / f"{memory_id}.flushing"
+
+    def _rotate_journal(self, memory_id: str):
+        """Move the live journal aside while its events are written to the Vault."""
+        journal, flushing = self._journal_path(memory_id), self._flushing_path(memory_id)
+        if not journal.exists():
+            return
+        if flushing.exists():
+            # An earlier flush failed; keep its events alongside the new ones
+            with open(flushing, "ab") as f:
+                f.write(journal.read_bytes())
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            journal.unlink()
+        else:
+            os.replace(journal, flushing)
+
+    def _seal(self, event: Dict[str, Any]) -> str:
+        line = json.dumps(event, separators=(",", ":"))
+        encrypt = getattr(self.vault, "_encrypt", None)
+        if encrypt is None:
+            return line
+        return base64.b64encode(encrypt(line.encode("utf-8"))).decode("ascii")
+
+    def _unseal(self, line: str) -> Dict[str, Any]:
+        decrypt = getattr(self.vault, "_decrypt", None)
+        if decrypt is not None and not line.startswith("{"):
+            line = decrypt(base64.b64decode(line)).decode("utf-8")
+        return json.loads(line)
+
+    def _append_journal(self, memory_id: str, event: Dict[str, Any]):
+        with open(self._journal_path(memory_id), "a", encoding="utf-8") as f:
+            f.write(self._seal(event) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def _read_journal(self, path: Path) -> List[Dict[str, Any]]:
+        events = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(self._unseal(line.strip()))
+                except Exception:
+                    # Torn final line from a crash mid-append; that event was never applied
+                    break
+        return events
+
+    def recover(self) -> int:
+        """Replay journals left by a previous run into the Vault; returns events replayed."""
+        memory_ids = sorted({p.stem for p in self.journal_dir.glob("*.jsonl")} |
+                            {p.stem for p in self.journal_dir.glob("*.flushing")})
+        replayed = 0
+        for memory_id in memory_ids:
+            paths = [self._flushing_path(memory_id), self._journal_path(memory_id)]
+            events = []
+            for path in paths:
+                if path.exists():
+                    events.extend(self._read_journal(path))
+            events.sort(key=lambda e: e["seq"])
+
+            communal_mem = self.vault.get_communal(memory_id, events[0]["owner"]) if events else None
+            if events and not communal_mem and self.logger:
+                self.logger.warning(f"Discarding journal for missing communal memory {memory_id}")
+            if communal_mem:
+                document = communal_mem["data"]
+                applied_seq = document.get(SEQ_KEY, 0)
+                fresh = [e for e in events if e["seq"] > applied_seq]
+                for event in fresh:
+                    apply_communal_event(document, event)
+                if fresh:
+                    self.vault.create_or_update_communal(memory_id, document, events[0]["owner"])
+                replayed += len(fresh)
+                self.stats["journals_recovered"] += 1
+
+            for path in paths:
+                path.unlink(missing_ok=True)
+
+        if replayed and self.logger:
+            self.logger.info(f"Recovered {replayed} communal memory events from journal")
+        return replayed
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["sessions_buffered"] = len(self._buffers)
+        stats["pending_events"] = self.pending_events()
+        return stats
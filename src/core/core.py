@@ -25,6 +25,8 @@ import logging
 # Import Vault for communal memory mediation
 from vault.vault import Vault
 from vault.schema import CommunalMemory
+from core.communal_buffer import CommunalWriteBehind, apply_communal_event, SEQ_KEY
+from core.metrics_store import MetricsStore
 
 # Import error handling
 from core.error_handling import (
@@ -223,7 +225,11 @@ class Core:
         self.error_validator = CoreErrorValidator()
         
         # Initialize performance tracking
-        self.performance_metrics: List[PerformanceMetric] = []
+        # Fixed-capacity ring buffers per (session, metric type)
+        self.metrics_store = MetricsStore(
+            capacity_per_series=config.get('metrics_capacity_per_series', 4096),
+            max_series=config.get('metrics_max_series', 1024)
+        )
         self.session_performance: Dict[str, SessionPerformanceStats] = {}
         self.participant_performance: Dict[str, ParticipantPerformanceStats] = {}
         self.performance_enabled = config.get('performance_tracking', True)
@@ -232,6 +238,26 @@ class Core:
         # Performance timing tracking
         self.operation_timings: Dict[str, float] = {}
         
+        # Opt-in write-behind buffer for communal memory (journaled, flushed on a
+        # timer once start() is called). The journal sits next to the Vault file
+        # unless journal_dir is configured.
+        communal_config = config.get('communal_memory', {})
+        self.communal_buffer: Optional[CommunalWriteBehind] = None
+        if communal_config.get('write_behind', False):
+            journal_dir = communal_config.get('journal_dir')
+            if journal_dir is None and getattr(self.vault, 'storage_path', None) is not None:
+                journal_dir = Path(self.vault.storage_path).parent / 'communal_journal'
+            if journal_dir is None:
+                self.logger.warning("Communal write-behind disabled: no journal_dir and no Vault storage path")
+            else:
+                self.communal_buffer = CommunalWriteBehind(
+                    self.vault,
+                    journal_dir,
+                    flush_interval=communal_config.get('flush_interval_seconds', 2.0),
+                    fsync=communal_config.get('journal_fsync', True),
+                    logger=self.logger
+                )
+        
         # Setup error recovery strategies
         self._setup_error_recovery()
         
@@ -360,6 +386,8 @@ class Core:
                 "shared_insights": []
             }
             self.vault.create_or_update_communal(communal_memory_id, communal_data, user_id)
+            if self.communal_buffer:
+                self.communal_buffer.register(session_id, communal_memory_id, user_id, communal_data)
             
             # Create session
             session = Session(
@@ -873,41 +901,29 @@ class Core:
             if not session.communal_memory_id:
                 return
             
-            # Get current communal memory
-            communal_mem = self.vault.get_communal(session.communal_memory_id, session.created_by)
-            if not communal_mem:
-                return
-            
-            communal_data = communal_mem["data"]
-            
-            # Update based on event type
-            if event_type == "participant_added":
-                communal_data["participants"].append({
-                    "id": data["participant_id"],
-                    "name": data["participant_name"],
-                    "role": data.get("role"),
-                    "joined_at": datetime.now().isoformat()
-                })
-            elif event_type == "participant_removed":
-                # Mark participant as left
-                for p in communal_data["participants"]:
-                    if p["id"] == data["participant_id"]:
-                        p["left_at"] = datetime.now().isoformat()
-                        break
-            elif event_type == "context_update":
-                communal_data["context"].update(data)
-            elif event_type == "insight_shared":
-                communal_data["shared_insights"].append({
-                    "timestamp": datetime.now().isoformat(),
-                    "participant_id": data["participant_id"],
-                    "insight": data["insight"],
-                    "context": data.get("context", {})
+            if self.communal_buffer:
+                # Applied in memory and journaled; the Vault write happens on flush
+                if not self.communal_buffer.apply(session_id, session.communal_memory_id,
+                                                  session.created_by, event_type, data):
+                    return
+            else:
+                # Get current communal memory
+                communal_mem = self.vault.get_communal(session.communal_memory_id, session.created_by)
+                if not communal_mem:
+                    return
+                
+                communal_data = communal_mem["data"]
+                apply_communal_event(communal_data, {
+                    "seq": communal_data.get(SEQ_KEY, 0) + 1,
+                    "event_type": event_type,
+                    "data": data,
+                    "timestamp": datetime.now().isoformat()
                 })
-            
-            # Update communal memory
-            self.vault.create_or_update_communal(
-                session.communal_memory_id, communal_data, session.created_by
-            )
+                
+                # Update communal memory
+                self.vault.create_or_update_communal(
+                    session.communal_memory_id, communal_data, session.created_by
+                )
             
             # Record memory operation performance
             duration = time.time() - start_time
@@ -987,6 +1003,39 @@ class Core:
                      result="failure", error=e)
             raise CoreError(f"Failed to share insight: {e}")
 
+    def get_communal_memory(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get the session's communal memory, including updates not yet flushed to the Vault."""
+        if self.communal_buffer:
+            document = self.communal_buffer.get_document(session_id)
+            if document is not None:
+                return document
+        
+        session = self.sessions.get(session_id)
+        if not session or not session.communal_memory_id:
+            return None
+        communal_mem = self.vault.get_communal(session.communal_memory_id, session.created_by)
+        return communal_mem["data"] if communal_mem else None
+
+    def flush_communal_memory(self, session_id: Optional[str] = None, evict: bool = False) -> bool:
+        """Write buffered communal memory updates to the Vault (one session or all)."""
+        if not self.communal_buffer:
+            return True
+        if session_id is None:
+            self.communal_buffer.flush_all()
+            return True
+        return self.communal_buffer.flush(session_id, evict=evict)
+
+    def start(self):
+        """Start background work: replay communal journals and run the write-behind flusher."""
+        if self.communal_buffer:
+            self.communal_buffer.start()
+
+    def shutdown(self):
+        """Stop background work and flush buffered communal memory."""
+        if self.communal_buffer:
+            self.communal_buffer.stop()
+        self._log("core_shutdown", "system", None, "system", {})
+
     # Session State Management
     def get_session(self, session_id: str) -> Optional[Session]:
         """Get session by ID."""
@@ -1014,6 +1063,7 @@ class Core:
             
             session = self.sessions[session_id]
             session.status = SessionStatus.PAUSED
+            self.flush_communal_memory(session_id)
             
             self._log("pause_session", user_id, session_id, "session", {})
             return True
@@ -1058,6 +1108,8 @@ class Core:
             if session_id in self.turn_managers:
                 del self.turn_managers[session_id]
             
+            self.flush_communal_memory(session_id, evict=True)
+            
             self._log("end_session", user_id, session_id, "session", {})
             return True
             
@@ -1170,7 +1222,8 @@ class Core:
             
         try:
             metric_id = f"metric_{uuid.uuid4().hex[:8]}"
-            timestamp = datetime.now().isoformat()
+            now = time.time()
+            timestamp = datetime.fromtimestamp(now).isoformat()
             
             metric = PerformanceMetric(
                 metric_id=metric_id,
@@ -1184,7 +1237,13 @@ class Core:
                 tags=tags or []
             )
             
-            self.performance_metrics.append(metric)
+            self.metrics_store.append(session_id, metric_type.value, now, value, {
+                "metric_id": metric_id,
+                "participant_id": participant_id,
+                "unit": unit,
+                "context": metric.context,
+                "tags": metric.tags
+            })
             self._update_performance_stats(metric)
             
             self.logger.debug(f"Recorded performance metric: {metric_type.value} = {value} {unit}")
@@ -1412,22 +1471,27 @@ class Core:
             # Get recent metrics
             recent_metrics = [
                 {
-                    "type": m.metric_type.value,
-                    "value": m.value,
-                    "unit": m.unit,
-                    "timestamp": m.timestamp,
-                    "participant_id": m.participant_id
+                    "type": m["metric_type"],
+                    "value": m["value"],
+                    "unit": m["unit"],
+                    "timestamp": m["timestamp"],
+                    "participant_id": m["participant_id"]
                 }
-                for m in self.performance_metrics[-50:]  # Last 50 metrics
-                if m.session_id == session_id
+                for m in self.metrics_store.recent(session_id, 50)  # Last 50 metrics
             ]
             
+            aggregates = {
+                metric_type: self.metrics_store.aggregates(session_id, metric_type)
+                for metric_type in self.metrics_store.metric_types(session_id)
+            }
+            
             return {
                 "session_stats": asdict(stats),
                 "participant_stats": participant_summaries,
                 "recent_metrics": recent_metrics,
+                "metric_aggregates": aggregates,
                 "performance_enabled": self.performance_enabled,
-                "metrics_count": len([m for m in self.performance_metrics if m.session_id == session_id])
+                "metrics_count": self.metrics_store.count(session_id)
             }
             
         except Exception as e:
@@ -1440,12 +1504,12 @@ class Core:
         try:
             # Filter metrics by session if specified
             if session_id:
-                metrics = [m for m in self.performance_metrics if m.session_id == session_id]
+                metrics = list(self.metrics_store.iter_rows(session_id))
                 session_stats = {session_id: self.session_performance.get(session_id)}
                 participant_stats = {k: v for k, v in self.participant_performance.items() 
                                    if v.session_id == session_id}
             else:
-                metrics = self.performance_metrics
+                metrics = list(self.metrics_store.iter_rows())
                 session_stats = self.session_performance
                 participant_stats = self.participant_performance
             
@@ -1454,7 +1518,7 @@ class Core:
                 "metrics_count": len(metrics),
                 "sessions_count": len(session_stats),
                 "participants_count": len(participant_stats),
-                "metrics": [asdict(m) for m in metrics],
+                "metrics": metrics,
                 "session_stats": {k: asdict(v) for k, v in session_stats.items() if v},
                 "participant_stats": {k: asdict(v) for k, v in participant_stats.items()},
                 "format": format_type
@@ -1475,13 +1539,7 @@ class Core:
             
             cutoff_date = datetime.now().timestamp() - (self.metrics_retention_days * 24 * 3600)
             
-            initial_count = len(self.performance_metrics)
-            self.performance_metrics = [
-                m for m in self.performance_metrics 
-                if datetime.fromisoformat(m.timestamp).timestamp() > cutoff_date
-            ]
-            
-            cleaned_count = initial_count - len(self.performance_metrics)
+            cleaned_count = self.metrics_store.prune_before(cutoff_date)
             if cleaned_count > 0:
                 self.logger.info(f"Cleaned up {cleaned_count} old performance metrics")
                 
@@ -1495,24 +1553,17 @@ class Core:
         try:
             cutoff_time = datetime.now().timestamp() - (time_window_hours * 3600)
             
-            relevant_metrics = [
-                m for m in self.performance_metrics
-                if (m.session_id == session_id and 
-                    m.metric_type == metric_type and
-                    datetime.fromisoformat(m.timestamp).timestamp() > cutoff_time)
-            ]
-            
-            # Sort by timestamp
-            relevant_metrics.sort(key=lambda x: x.timestamp)
+            # Series are kept in time order, so this is a binary search
+            relevant_metrics = self.metrics_store.window(session_id, metric_type.value, since=cutoff_time)
             
             trends = []
             for metric in relevant_metrics:
                 trends.append({
-                    "timestamp": metric.timestamp,
-                    "value": metric.value,
-                    "unit": metric.unit,
-                    "participant_id": metric.participant_id,
-                    "context": metric.context
+                    "timestamp": metric["timestamp"],
+                    "value": metric["value"],
+                    "unit": metric["unit"],
+                    "participant_id": metric["participant_id"],
+                    "context": metric["context"]
                 })
             
             return trends
@@ -1521,6 +1572,20 @@ class Core:
             self.logger.error(f"Failed to get performance trends: {e}")
             return []
     
+    def get_metric_aggregates(self, session_id: str,
+                              metric_type: PerformanceMetricType,
+                              time_window_hours: Optional[int] = None) -> Dict[str, Any]:
+        """Get count/mean/min/max/p50/p95/p99 for a session's metric, optionally over a recent window."""
+        try:
+            since = None
+            if time_window_hours is not None:
+                since = datetime.now().timestamp() - (time_window_hours * 3600)
+            return self.metrics_store.aggregates(session_id, metric_type.value, since=since)
+            
+        except Exception as e:
+            self.logger.error(f"Failed to get metric aggregates: {e}")
+            return {}
+    
     # RAG/CAG Pipeline Implementation
     async def process_query_with_rag(self, session_id: str, query: str, 
                                    agent_id: str = None) -> Dict[str, Any]:
@@ -1613,7 +1678,7 @@ class Core:
                     })
             
             # Search through communal memory
-            communal_memory = self.communal_memory.get(session_id, {})
+            communal_memory = self.get_communal_memory(session_id) or {}
             for key, value in communal_memory.items():
                 if any(word in key.lower() for word in query_lower.split()):
                     context_chunks.append({
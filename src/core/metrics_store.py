@@ -0,0 +1,259 @@
+"""
+Columnar, fixed-capacity metrics store for Core performance tracking
+
+Each (session, metric type) pair gets a ring buffer of float64 timestamps and
+values in numpy arrays plus a parallel list of row metadata. Appends are
+O(1); once a series is full the oldest sample is overwritten, and the number
+of series is capped (least recently written series are dropped first), so
+memory stays bounded regardless of uptime.
+
+Timestamps within a series are kept non-decreasing, so time-window queries
+and retention pruning are binary searches over at most two contiguous
+slices of the ring. Count/mean/min/max and p50/p95/p99 over the buffered
+samples are computed once per change and cached until the next append.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple, Iterator, Set
+
+import numpy as np
+
+
+class MetricSeries:
+    """Ring buffer of (timestamp, value, metadata) samples, oldest first."""
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._values = np.zeros(capacity, dtype=np.float64)
+        self._meta: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._start = 0
+        self._size = 0
+        self._last_timestamp = -math.inf
+        self._aggregates: Optional[Dict[str, float]] = None
+
+        # Lifetime totals (not limited to the buffered window)
+        self.total_count = 0
+        self.total_sum = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, value: float, meta: Optional[Dict[str, Any]] = None):
+        # Clamp clock steps backwards so the series stays sorted
+        timestamp = max(timestamp, self._last_timestamp)
+        self._last_timestamp = timestamp
+
+        if self._size == self.capacity:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        else:
+            slot = (self._start + self._size) % self.capacity
+            self._size += 1
+
+        self._timestamps[slot] = timestamp
+        self._values[slot] = value
+        self._meta[slot] = meta
+        self.total_count += 1
+        self.total_sum += value
+        self._aggregates = None
+
+    def _segments(self) -> List[Tuple[int, int]]:
+        """Physical [lo, hi) slices holding the samples in chronological order."""
+        end = self._start + self._size
+        if end <= self.capacity:
+            return [(self._start, end)]
+        return [(self._start, self.capacity), (0, end - self.capacity)]
+
+    def _bound(self, timestamp: float, side: str) -> int:
+        """Logical index of the first sample at/after (left) or after (right) timestamp."""
+        offset = 0
+        for lo, hi in self._segments():
+            pos = int(np.searchsorted(self._timestamps[lo:hi], timestamp, side=side))
+            if pos < hi - lo:
+                return offset + pos
+            offset += hi - lo
+        return offset
+
+    def _physical(self, first: int, last: int) -> np.ndarray:
+        return (self._start + np.arange(first, last)) % self.capacity
+
+    def window(self, since: Optional[float] = None,
+               until: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, List[Optional[Dict[str, Any]]]]:
+        """Samples with since < timestamp <= until (either bound optional), oldest first."""
+        first = self._bound(since, "right") if since is not None else 0
+        last = self._bound(until, "right") if until is not None else self._size
+        idx = self._physical(first, max(first, last))
+        return self._timestamps[idx], self._values[idx], [self._meta[i] for i in idx]
+
+    def tail(self, limit: int) -> Tuple[np.ndarray, np.ndarray, List[Optional[Dict[str, Any]]]]:
+        idx = self._physical(max(0, self._size - limit), self._size)
+        return self._timestamps[idx], self._values[idx], [self._meta[i] for i in idx]
+
+    def prune_before(self, cutoff: float) -> int:
+        """Drop samples with timestamp <= cutoff; returns how many were removed."""
+        removed = self._bound(cutoff, "right")
+        for i in self._physical(0, removed):
+            self._meta[i] = None
+        self._start = (self._start + removed) % self.capacity
+        self._size -= removed
+        if removed:
+            self._aggregates = None
+        return removed
+
+    def aggregates(self, since: Optional[float] = None) -> Dict[str, float]:
+        """count/mean/min/max/p50/p95/p99 over buffered samples (optionally only after since)."""
+        if since is None and self._aggregates is not None:
+            return self._aggregates
+
+        _, values, _ = self.window(since=since)
+        if values.size:
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            result = {
+                "count": int(values.size),
+                "mean": float(values.mean()),
+                "min": float(values.min()),
+                "max": float(values.max()),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+            }
+        else:
+            result = {"count": 0, "mean": 0.0, "min": 0.0, "max": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+        result["lifetime_count"] = self.total_count
+        result["lifetime_mean"] = self.total_sum / self.total_count if self.total_count else 0.0
+
+        if since is None:
+            self._aggregates = result
+        return result
+
+
+class MetricsStore:
+    """Bounded collection of MetricSeries keyed by (session_id, metric type)."""
+
+    def __init__(self, capacity_per_series: int = 4096, max_series: int = 1024):
+        self.capacity_per_series = capacity_per_series
+        self.max_series = max_series
+        self._series: "OrderedDict[Tuple[str, str], MetricSeries]" = OrderedDict()
+        self._by_session: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        self.series_evicted = 0
+
+    def append(self, session_id: str, metric_type: str, timestamp: float, value: float,
+               meta: Optional[Dict[str, Any]] = None):
+        key = (session_id, metric_type)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = MetricSeries(self.capacity_per_series)
+                self._series[key] = series
+                self._by_session.setdefault(session_id, set()).add(metric_type)
+                while len(self._series) > self.max_series:
+                    self._drop(next(iter(self._series)))
+                    self.series_evicted += 1
+            else:
+                self._series.move_to_end(key)
+            series.append(timestamp, value, meta)
+
+    def _drop(self, key: Tuple[str, str]):
+        del self._series[key]
+        types = self._by_session.get(key[0])
+        if types is not None:
+            types.discard(key[1])
+            if not types:
+                del self._by_session[key[0]]
+
+    def series(self, session_id: str, metric_type: str) -> Optional[MetricSeries]:
+        with self._lock:
+            return self._series.get((session_id, metric_type))
+
+    def metric_types(self, session_id: str) -> List[str]:
+        with self._lock:
+            return sorted(self._by_session.get(session_id, ()))
+
+    def window(self, session_id: str, metric_type: str, since: Optional[float] = None,
+               until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Rows for one series in a time window, oldest first."""
+        with self._lock:
+            series = self._series.get((session_id, metric_type))
+            if series is None:
+                return []
+            timestamps, values, meta = series.window(since, until)
+            return self._rows(session_id, metric_type, timestamps, values, meta)
+
+    def recent(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent rows across all metric types of a session, oldest first."""
+        with self._lock:
+            rows = []
+            for metric_type in self._by_session.get(session_id, ()):
+                timestamps, values, meta = self._series[(session_id, metric_type)].tail(limit)
+                rows.extend(self._rows(session_id, metric_type, timestamps, values, meta))
+        rows.sort(key=lambda row: row["epoch"])
+        return rows[-limit:]
+
+    def aggregates(self, session_id: str, metric_type: str, since: Optional[float] = None) -> Dict[str, float]:
+        with self._lock:
+            series = self._series.get((session_id, metric_type))
+            if series is None:
+                return MetricSeries(1).aggregates()
+            return series.aggregates(since)
+
+    def count(self, session_id: Optional[str] = None) -> int:
+        with self._lock:
+            if session_id is None:
+                return sum(len(s) for s in self._series.values())
+            return sum(len(self._series[(session_id, t)]) for t in self._by_session.get(session_id, ()))
+
+    def sessions(self) -> List[str]:
+        with self._lock:
+            return list(self._by_session)
+
+    def iter_rows(self, session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """All buffered rows (for export), grouped by series."""
+        with self._lock:
+            keys = [k for k in self._series if session_id is None or k[0] == session_id]
+            snapshots = [(k, self._series[k].window()) for k in keys]
+        for (sid, metric_type), (timestamps, values, meta) in snapshots:
+            yield from self._rows(sid, metric_type, timestamps, values, meta)
+
+    def prune_before(self, cutoff: float) -> int:
+        """Drop every sample at or before cutoff; returns how many were removed."""
+        removed = 0
+        with self._lock:
+            for key in list(self._series):
+                series = self._series[key]
+                removed += series.prune_before(cutoff)
+                if not len(series):
+                    self._drop(key)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "series": len(self._series),
+                "samples": sum(len(s) for s in self._series.values()),
+                "capacity_per_series": self.capacity_per_series,
+                "max_series": self.max_series,
+                "series_evicted": self.series_evicted,
+                "array_bytes": len(self._series) * self.capacity_per_series * 16,
+            }
+
+    @staticmethod
+    def _rows(session_id: str, metric_type: str, timestamps: np.ndarray, values: np.ndarray,
+              meta: List[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        rows = []
+        for ts, value, extra in zip(timestamps.tolist(), values.tolist(), meta):
+            row = {
+                "session_id": session_id,
+                "metric_type": metric_type,
+                "timestamp": datetime.fromtimestamp(ts).isoformat(),
+                "epoch": ts,
+                "value": value,
+            }
+            if extra:
+                row.update(extra)
+            rows.append(row)
+        return rows
@@ -20,6 +20,7 @@ import logging
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from database.pgvector_client import PGVectorClient
+from utils.access_stats import default_access_stats, AccessRecord
 from embedding.semantic_embedding_service import SemanticMemoryManager
 
 logger = logging.getLogger(__name__)
@@ -118,7 +119,8 @@ class AldenMemoryManager:
         self, 
         database_url: str = None,
         embedding_service: SemanticMemoryManager = None,
-        logger: Optional[logging.Logger] = None
+        logger: Optional[logging.Logger] = None,
+        change_feed=None
     ):
         """
         Initialize Alden Memory Manager
@@ -127,6 +129,8 @@ class AldenMemoryManager:
             database_url: PostgreSQL connection URL
             embedding_service: Semantic embedding service
             logger: Optional logger instance
+            change_feed: Optional change feed (LocalChangeBus or PostgresChangeFeed)
+                that writes are published to
         """
         self.logger = logger or logging.getLogger(__name__)
         self.database_url = database_url or os.getenv(
@@ -136,8 +140,17 @@ class AldenMemoryManager:
         
         # Initialize components
         self.pgvector_client = PGVectorClient(self.database_url, logger)
+        self.pgvector_client.change_feed = change_feed
+        # A PostgresChangeFeed created before the manager shares this manager's pool
+        if change_feed is not None and getattr(change_feed, "pgvector_client", False) is None:
+            change_feed.pgvector_client = self.pgvector_client
+        self.change_feed = change_feed
         self.embedding_service = embedding_service
         
+        # Access counters are aggregated in memory and flushed in batches
+        self.access_stats = default_access_stats
+        self.access_stats_store = f"pgvector:{id(self)}:alden_memory"
+        
         # Cache for frequent operations
         self.tag_cache: Dict[str, MemoryTag] = {}
         self.session_cache: Dict[str, AldenSession] = {}
@@ -181,6 +194,13 @@ class AldenMemoryManager:
             # Load initial caches
             await self._load_tag_cache()
             
+            self.access_stats.register(self.access_stats_store, self._flush_memory_access_stats,
+                                       loop=asyncio.get_running_loop())
+            
+            # Start the change feed (opens the LISTEN connection for PostgresChangeFeed)
+            if self.change_feed:
+                await self.change_feed.start()
+            
             self.logger.info("Alden Memory Manager initialization completed successfully")
             return True
             
@@ -416,9 +436,9 @@ class AldenMemoryManager:
                 memory_id, session_id, user_id, agent_id, content, memory_type, 
                 memory_category, keywords, custom_tags, embedding, relevance_score,
                 importance_score, confidence_score, expires_at, metadata,
-                conversation_turn, context_window, parent_memory_id
+                conversation_turn, context_window, parent_memory_id, sync_status
             ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18
+                $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, 'pending'
             )
             RETURNING memory_id, session_id, user_id, agent_id, content, memory_type,
                       memory_category, keywords, custom_tags, relevance_score,
@@ -476,6 +496,8 @@ class AldenMemoryManager:
             
             self.stats["total_memories"] += 1
             
+            await self._publish_change(memory, "insert")
+            
             self.logger.info(f"Stored memory: {memory_id}", extra={
                 "session_id": session_id,
                 "memory_type": memory_type,
@@ -826,6 +848,121 @@ class AldenMemoryManager:
             self.logger.error(f"Failed to get session memories: {e}")
             raise
     
+    async def get_changed_memories(
+        self,
+        since: Optional[Tuple[str, str]] = None,
+        limit: int = 500,
+        memory_ids: Optional[List[str]] = None
+    ) -> List[AldenMemory]:
+        """
+        Get memories awaiting sync, in (updated_at, memory_id) order
+
+        Args:
+            since: Optional (updated_at, memory_id) watermark; only rows after it are returned
+            limit: Maximum results
+            memory_ids: Optional restriction to specific memories (e.g. from change events)
+
+        Returns:
+            List[AldenMemory]: Pending memories, oldest change first
+        """
+        try:
+            query = """
+            SELECT memory_id, session_id, user_id, agent_id, content, memory_type,
+                   memory_category, keywords, custom_tags, relevance_score,
+                   importance_score, confidence_score, created_at, updated_at,
+                   last_accessed, expires_at, access_count, retrieval_count,
+                   modification_count, metadata, parent_memory_id, related_memory_ids,
+                   conversation_turn, context_window, version, sync_status, last_sync_at
+            FROM semantic_memory.alden_memory
+            WHERE sync_status = 'pending'
+                  AND ($1::timestamptz IS NULL OR (updated_at, memory_id) > ($1, $2))
+                  AND ($4::varchar(64)[] IS NULL OR memory_id = ANY($4))
+            ORDER BY updated_at, memory_id
+            LIMIT $3;
+            """
+
+            since_at = datetime.fromisoformat(since[0]) if since else None
+            since_id = since[1] if since else ""
+
+            async with self.pgvector_client.pool.acquire() as conn:
+                rows = await conn.fetch(query, since_at, since_id, limit, memory_ids)
+
+            return [
+                AldenMemory(
+                    memory_id=row['memory_id'],
+                    session_id=row['session_id'],
+                    user_id=str(row['user_id']),
+                    agent_id=row['agent_id'],
+                    content=row['content'],
+                    memory_type=row['memory_type'],
+                    memory_category=row['memory_category'],
+                    keywords=row['keywords'] or [],
+                    custom_tags=row['custom_tags'] or [],
+                    embedding=None,
+                    relevance_score=row['relevance_score'],
+                    importance_score=row['importance_score'],
+                    confidence_score=row['confidence_score'],
+                    created_at=row['created_at'].isoformat(),
+                    updated_at=row['updated_at'].isoformat(),
+                    last_accessed=row['last_accessed'].isoformat(),
+                    expires_at=row['expires_at'].isoformat() if row['expires_at'] else None,
+                    access_count=row['access_count'],
+                    retrieval_count=row['retrieval_count'],
+                    modification_count=row['modification_count'],
+                    metadata=row['metadata'] or {},
+                    parent_memory_id=row['parent_memory_id'],
+                    related_memory_ids=row['related_memory_ids'] or [],
+                    conversation_turn=row['conversation_turn'],
+                    context_window=row['context_window'],
+                    version=row['version'],
+                    sync_status=row['sync_status'],
+                    last_sync_at=row['last_sync_at'].isoformat()
+                )
+                for row in rows
+            ]
+
+        except Exception as e:
+            self.logger.error(f"Failed to get changed memories: {e}")
+            raise
+
+    async def update_sync_statuses(self, updates: List[Tuple[str, str, str]]) -> int:
+        """
+        Write back sync statuses in a single statement
+
+        Args:
+            updates: (memory_id, sync_status, updated_at) tuples; updated_at is the
+                value that was read, so rows modified since then are left untouched
+                and picked up again by the next sync cycle
+
+        Returns:
+            int: Number of rows updated
+        """
+        if not updates:
+            return 0
+
+        try:
+            query = """
+            UPDATE semantic_memory.alden_memory AS m
+            SET sync_status = u.sync_status, last_sync_at = CURRENT_TIMESTAMP
+            FROM unnest($1::varchar(64)[], $2::varchar(16)[], $3::timestamptz[])
+                 AS u(memory_id, sync_status, updated_at)
+            WHERE m.memory_id = u.memory_id AND m.updated_at = u.updated_at;
+            """
+
+            memory_ids, statuses, read_at = zip(*updates)
+            async with self.pgvector_client.pool.acquire() as conn:
+                result = await conn.execute(
+                    query, list(memory_ids), list(statuses),
+                    [datetime.fromisoformat(ts) for ts in read_at]
+                )
+
+            # asyncpg returns the command tag, e.g. "UPDATE 42"
+            return int(result.split()[-1])
+
+        except Exception as e:
+            self.logger.error(f"Failed to update sync statuses: {e}")
+            raise
+
     async def cleanup_expired_memories(self) -> int:
         """
         Clean up expired working memories
@@ -974,6 +1111,19 @@ class AldenMemoryManager:
             self.logger.error(f"Failed to get memory statistics: {e}")
             return {"error": str(e), "timestamp": datetime.now().isoformat()}
     
+    async def _publish_change(self, memory: AldenMemory, operation: str):
+        """Publish a change event; a feed failure never fails the write itself"""
+        if self.change_feed is None:
+            return
+        try:
+            from database.memory_change_feed import MemoryChangeEvent
+            await self.change_feed.publish(MemoryChangeEvent(
+                table="alden_memory", record_id=memory.memory_id, operation=operation,
+                agent_id=memory.agent_id, user_id=memory.user_id, version=memory.version
+            ))
+        except Exception as e:
+            self.logger.warning(f"Failed to publish change for {memory.memory_id}: {e}")
+    
     async def _update_session_activity(self, session_id: str):
         """Update session activity timestamp"""
         try:
@@ -985,14 +1135,26 @@ class AldenMemoryManager:
             self.logger.warning(f"Failed to update session activity: {e}")
     
     async def _update_memory_access_stats(self, memory_ids: List[str]):
-        """Update memory access statistics"""
-        try:
-            query = "SELECT semantic_memory.update_alden_memory_access_stats($1);"
-            async with self.pgvector_client.pool.acquire() as conn:
-                await conn.execute(query, memory_ids)
-        
-        except Exception as e:
-            self.logger.warning(f"Failed to update memory access stats: {e}")
+        """Record memory reads; counters are written by the access-stats flush"""
+        self.access_stats.record(self.access_stats_store, memory_ids)
+    
+    async def _flush_memory_access_stats(self, records: List[AccessRecord]):
+        """Apply a batch of aggregated memory reads in one statement"""
+        query = """
+        UPDATE semantic_memory.alden_memory AS m SET
+            access_count = m.access_count + s.hits,
+            retrieval_count = m.retrieval_count + s.hits,
+            last_accessed = GREATEST(m.last_accessed, s.accessed_at)
+        FROM unnest($1::varchar[], $2::int[], $3::timestamptz[]) AS s(memory_id, hits, accessed_at)
+        WHERE m.memory_id = s.memory_id
+        """
+        async with self.pgvector_client.pool.acquire() as conn:
+            await conn.execute(
+                query,
+                [record.item_id for record in records],
+                [record.count for record in records],
+                [record.last_accessed for record in records]
+            )
     
     async def _extract_keywords(self, text: str) -> List[str]:
         """Simple keyword extraction"""
@@ -1150,6 +1312,13 @@ class AldenMemoryManager:
     async def cleanup(self):
         """Cleanup resources"""
         try:
+            if self.pgvector_client.pool:
+                await self.access_stats.flush_async(self.access_stats_store)
+            self.access_stats.unregister(self.access_stats_store, flush=False)
+            
+            if self.change_feed:
+                await self.change_feed.stop()
+            
             if self.pgvector_client:
                 await self.pgvector_client.cleanup()
             
@@ -1169,7 +1338,8 @@ class AldenMemoryManager:
 async def create_alden_memory_manager(
     database_url: str = None,
     embedding_service: SemanticMemoryManager = None,
-    logger: Optional[logging.Logger] = None
+    logger: Optional[logging.Logger] = None,
+    change_feed=None
 ) -> AldenMemoryManager:
     """
     Factory function to create and initialize Alden Memory Manager
@@ -1178,11 +1348,12 @@ async def create_alden_memory_manager(
         database_url: PostgreSQL connection URL
         embedding_service: Semantic embedding service
         logger: Optional logger instance
+        change_feed: Optional change feed that writes are published to
         
     Returns:
         AldenMemoryManager: Initialized memory manager
     """
-    manager = AldenMemoryManager(database_url, embedding_service, logger)
+    manager = AldenMemoryManager(database_url, embedding_service, logger, change_feed)
     
     success = await manager.initialize()
     if not success:
@@ -8,6 +8,7 @@ Phase 1 implementation focused on local-first functionality
 import sqlite3
 import json
 import os
+import sys
 import uuid
 import logging
 import threading
@@ -17,6 +18,12 @@ from pathlib import Path
 from contextlib import contextmanager
 from dataclasses import dataclass, asdict
 import hashlib
+import re
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.access_stats import default_access_stats, AccessRecord
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,11 +40,17 @@ class DatabaseConfig:
     enable_foreign_keys: bool = True
     auto_backup: bool = True
     backup_interval_hours: int = 24
+    fts_migration_chunk_size: int = 10000
+    search_importance_weight: float = 1.0
+    search_recency_weight: float = 0.5
+    search_recency_half_life_days: float = 30.0
 
 class DatabaseSchema:
     """Database schema definitions and migrations"""
     
-    CURRENT_VERSION = 1
+    CURRENT_VERSION = 2
+    
+    FTS_TABLE = "memory_slices_fts"
     
     @staticmethod
     def get_schema_version_1() -> List[str]:
@@ -155,6 +168,36 @@ class DatabaseSchema:
             # Insert schema version
             """INSERT OR REPLACE INTO schema_info (version, description) VALUES (1, 'Initial Phase 1 schema')"""
         ]
+    
+    @staticmethod
+    def get_schema_version_2() -> List[str]:
+        """Full-text index over memory_slices.content, kept in sync by triggers.
+        
+        The FTS table is external-content: it stores only the index and reads
+        content back from memory_slices by rowid. The update trigger fires on
+        content changes only, so access-count bumps never touch the index.
+        """
+        return [
+            """CREATE VIRTUAL TABLE IF NOT EXISTS memory_slices_fts USING fts5(
+                content,
+                content='memory_slices',
+                content_rowid='rowid',
+                tokenize='porter unicode61'
+            )""",
+            
+            """CREATE TRIGGER IF NOT EXISTS memory_slices_fts_insert AFTER INSERT ON memory_slices BEGIN
+                INSERT INTO memory_slices_fts(rowid, content) VALUES (new.rowid, new.content);
+            END""",
+            
+            """CREATE TRIGGER IF NOT EXISTS memory_slices_fts_delete AFTER DELETE ON memory_slices BEGIN
+                INSERT INTO memory_slices_fts(memory_slices_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+            END""",
+            
+            """CREATE TRIGGER IF NOT EXISTS memory_slices_fts_update AFTER UPDATE OF content ON memory_slices BEGIN
+                INSERT INTO memory_slices_fts(memory_slices_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+                INSERT INTO memory_slices_fts(rowid, content) VALUES (new.rowid, new.content);
+            END"""
+        ]
 
 class ConnectionPool:
     """Simple SQLite connection pool"""
@@ -217,6 +260,12 @@ class DatabaseManager:
             self.config.timeout
         )
         self.schema = DatabaseSchema()
+        self._fts_enabled: Optional[bool] = None
+        
+        # Access counters are bumped in batches off the search path
+        self.access_stats = default_access_stats
+        self.access_stats_store = f"sqlite:{Path(self.config.db_path).resolve()}:memory_slices"
+        self.access_stats.register(self.access_stats_store, self._flush_memory_access)
         
     def _setup_database(self):
         """Setup database and ensure directory exists"""
@@ -244,8 +293,105 @@ class DatabaseManager:
             
             conn.commit()
         
+        if self.get_schema_version() < 2:
+            self.migrate_to_fts()
+        
         logger.info("Database schema initialized successfully")
     
+    @staticmethod
+    def fts5_available() -> bool:
+        """Check whether the linked SQLite library was built with FTS5"""
+        try:
+            with sqlite3.connect(":memory:") as conn:
+                conn.execute("CREATE VIRTUAL TABLE fts5_probe USING fts5(content)")
+            return True
+        except sqlite3.OperationalError:
+            return False
+    
+    def migrate_to_fts(self, chunk_size: int = None):
+        """Build the memory full-text index for an existing database.
+        
+        Triggers are installed first so writes made during the backfill are
+        indexed by SQLite itself; the backfill then walks existing rows in
+        rowid order, committing every chunk so readers and writers are never
+        blocked for the whole table. An interrupted run is restarted from
+        scratch on the next call since schema version 2 is only recorded once
+        the backfill completes.
+        """
+        if not self.fts5_available():
+            logger.warning("SQLite FTS5 unavailable; memory search will use LIKE scans")
+            self._fts_enabled = False
+            return
+        
+        chunk_size = chunk_size or self.config.fts_migration_chunk_size
+        fts_table = self.schema.FTS_TABLE
+        
+        with self.pool.get_connection() as conn:
+            cursor = conn.cursor()
+            for statement in self.schema.get_schema_version_2():
+                cursor.execute(statement)
+            # Discard any partial index left by an interrupted migration
+            cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('delete-all')")
+            cursor.execute("SELECT COALESCE(MAX(rowid), 0) FROM memory_slices")
+            last_rowid = cursor.fetchone()[0]
+            conn.commit()
+            
+            # Rows above last_rowid were indexed by the insert trigger
+            indexed = 0
+            position = 0
+            while position < last_rowid:
+                cursor.execute("""
+                    SELECT MAX(rowid) FROM (
+                        SELECT rowid FROM memory_slices
+                        WHERE rowid > ? AND rowid <= ?
+                        ORDER BY rowid LIMIT ?
+                    )
+                """, (position, last_rowid, chunk_size))
+                chunk_end = cursor.fetchone()[0]
+                if chunk_end is None:
+                    break
+                
+                cursor.execute(f"""
+                    INSERT INTO {fts_table}(rowid, content)
+                    SELECT rowid, content FROM memory_slices
+                    WHERE rowid > ? AND rowid <= ?
+                """, (position, chunk_end))
+                indexed += cursor.rowcount
+                conn.commit()
+                position = chunk_end
+            
+            cursor.execute("""
+                INSERT OR REPLACE INTO schema_info (version, description)
+                VALUES (2, 'FTS5 index for memory_slices')
+            """)
+            conn.commit()
+        
+        self._fts_enabled = True
+        logger.info(f"Memory full-text index built ({indexed} existing memories)")
+    
+    def _has_fts(self, conn: sqlite3.Connection) -> bool:
+        """Whether the memory full-text index exists in this database"""
+        if self._fts_enabled is None:
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (self.schema.FTS_TABLE,)
+            ).fetchone()
+            self._fts_enabled = row is not None and self.get_schema_version() >= 2
+        return self._fts_enabled
+    
+    @staticmethod
+    def _build_fts_query(query: str) -> Optional[str]:
+        """Turn free text into an FTS5 MATCH expression.
+        
+        Every word is quoted so user input can never be parsed as FTS syntax;
+        words are ANDed together, mirroring the substring filter of the LIKE
+        path while letting the porter tokenizer match inflections.
+        """
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return None
+        return " ".join('"{}"'.format(term) for term in terms)
+    
     def get_schema_version(self) -> int:
         """Get current schema version"""
         try:
@@ -439,38 +585,27 @@ class DatabaseManager:
     
     def search_memories(self, agent_id: str, user_id: str, query: str = None,
                        slice_type: str = None, min_importance: float = 0.0,
-                       limit: int = 10, offset: int = 0) -> List[Dict]:
-        """Search for memories with various filters"""
+                       limit: int = 10, offset: int = 0,
+                       highlight: bool = False) -> List[Dict]:
+        """Search for memories with various filters
+        
+        Text queries go through the FTS5 index and are ranked by bm25 boosted
+        by importance and recency; each result carries its relevance 'score'
+        and, with highlight=True, a 'snippet' with matches wrapped in <mark>.
+        Without a query (or without FTS5) results are ordered by importance.
+        """
         with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            sql = """
-                SELECT id, content, slice_type, importance, confidence,
-                       tags, metadata, created_at, accessed_at, access_count
-                FROM memory_slices 
-                WHERE agent_id = ? AND user_id = ? AND importance >= ?
-            """
-            params = [agent_id, user_id, min_importance]
-            
-            if query:
-                sql += " AND content LIKE ?"
-                params.append(f"%{query}%")
-            
-            if slice_type:
-                sql += " AND slice_type = ?"
-                params.append(slice_type)
-            
-            sql += " ORDER BY importance DESC, created_at DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
-            
-            cursor.execute(sql, params)
-            
-            memories = []
-            for row in cursor.fetchall():
-                memory = dict(row)
-                memory['tags'] = json.loads(memory['tags'])
-                memory['metadata'] = json.loads(memory['metadata'])
-                memories.append(memory)
+            match_expression = self._build_fts_query(query) if query else None
+            if match_expression and self._has_fts(conn):
+                memories = self._search_memories_fts(
+                    conn, agent_id, user_id, match_expression, slice_type,
+                    min_importance, limit, offset, highlight
+                )
+            else:
+                memories = self._search_memories_like(
+                    conn, agent_id, user_id, query, slice_type,
+                    min_importance, limit, offset
+                )
         
         # Update access count for returned memories
         if memories:
@@ -479,17 +614,114 @@ class DatabaseManager:
         
         return memories
     
+    def _search_memories_fts(self, conn: sqlite3.Connection, agent_id: str, user_id: str,
+                             match_expression: str, slice_type: Optional[str],
+                             min_importance: float, limit: int, offset: int,
+                             highlight: bool) -> List[Dict]:
+        """Ranked full-text search through memory_slices_fts"""
+        cursor = conn.cursor()
+        
+        # bm25() is negative (lower is better), so multiplying by the boosts
+        # pushes important and recent memories further up the ascending order
+        snippet_column = ""
+        if highlight:
+            snippet_column = ", snippet(memory_slices_fts, 0, '<mark>', '</mark>', '…', 16) AS snippet"
+        
+        sql = f"""
+            SELECT m.id, m.content, m.slice_type, m.importance, m.confidence,
+                   m.tags, m.metadata, m.created_at, m.accessed_at, m.access_count,
+                   bm25(memory_slices_fts)
+                       * (1.0 + ? * m.importance)
+                       * (1.0 + ? / (1.0 + MAX(julianday('now') - julianday(m.created_at), 0) / ?))
+                       AS rank{snippet_column}
+            FROM memory_slices_fts
+            JOIN memory_slices m ON m.rowid = memory_slices_fts.rowid
+            WHERE memory_slices_fts MATCH ?
+              AND m.agent_id = ? AND m.user_id = ? AND m.importance >= ?
+        """
+        params = [
+            self.config.search_importance_weight,
+            self.config.search_recency_weight,
+            self.config.search_recency_half_life_days,
+            match_expression, agent_id, user_id, min_importance
+        ]
+        
+        if slice_type:
+            sql += " AND m.slice_type = ?"
+            params.append(slice_type)
+        
+        sql += " ORDER BY rank LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        
+        cursor.execute(sql, params)
+        
+        memories = []
+        for row in cursor.fetchall():
+            memory = dict(row)
+            memory['tags'] = json.loads(memory['tags'])
+            memory['metadata'] = json.loads(memory['metadata'])
+            memory['score'] = -memory.pop('rank')
+            memories.append(memory)
+        
+        return memories
+    
+    def _search_memories_like(self, conn: sqlite3.Connection, agent_id: str, user_id: str,
+                              query: Optional[str], slice_type: Optional[str],
+                              min_importance: float, limit: int, offset: int) -> List[Dict]:
+        """Filter-only search, and LIKE fallback when FTS5 is unavailable"""
+        cursor = conn.cursor()
+        
+        sql = """
+                SELECT id, content, slice_type, importance, confidence,
+                       tags, metadata, created_at, accessed_at, access_count
+            FROM memory_slices 
+            WHERE agent_id = ? AND user_id = ? AND importance >= ?
+        """
+        params = [agent_id, user_id, min_importance]
+        
+        if query:
+            sql += " AND content LIKE ?"
+            params.append(f"%{query}%")
+        
+        if slice_type:
+            sql += " AND slice_type = ?"
+            params.append(slice_type)
+        
+        sql += " ORDER BY importance DESC, created_at DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        
+        cursor.execute(sql, params)
+        
+        memories = []
+        for row in cursor.fetchall():
+            memory = dict(row)
+            memory['tags'] = json.loads(memory['tags'])
+            memory['metadata'] = json.loads(memory['metadata'])
+            memories.append(memory)
+        
+        return memories
+    
     def _update_memory_access(self, memory_ids: List[str]):
-        """Update memory access statistics"""
+        """Record memory reads; counters are written by the access-stats flush"""
+        self.access_stats.record(self.access_stats_store, memory_ids)
+    
+    def _flush_memory_access(self, records: List[AccessRecord]):
+        """Apply a batch of aggregated memory reads in one transaction"""
         with self.transaction() as conn:
-            cursor = conn.cursor()
-            placeholders = ','.join(['?'] * len(memory_ids))
-            cursor.execute(f"""
+            # Same UTC text format as CURRENT_TIMESTAMP so MAX() compares correctly
+            conn.executemany("""
                 UPDATE memory_slices SET 
-                    accessed_at = CURRENT_TIMESTAMP,
-                    access_count = access_count + 1
-                WHERE id IN ({placeholders})
-            """, memory_ids)
+                    accessed_at = MAX(COALESCE(accessed_at, ''), ?),
+                    access_count = access_count + ?
+                WHERE id = ?
+            """, [
+                (record.last_accessed.strftime('%Y-%m-%d %H:%M:%S'), record.count, record.item_id)
+                for record in records
+            ])
+    
+    def flush_access_stats(self) -> int:
+        """Write pending memory access counters now"""
+        return self.access_stats.flush(self.access_stats_store)
     
     def get_memory_stats(self, agent_id: str, user_id: str) -> Dict:
         """Get memory statistics for an agent"""
@@ -719,6 +951,12 @@ class DatabaseManager:
         logger.info("Running database VACUUM...")
         with self.pool.get_connection() as conn:
             conn.execute("VACUUM")
+            # VACUUM may renumber memory_slices rowids, which the
+            # external-content FTS index is keyed on
+            if self._has_fts(conn):
+                fts_table = self.schema.FTS_TABLE
+                conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+                conn.commit()
         logger.info("Database VACUUM completed")
     
     def backup_database(self, backup_name: str = None) -> str:
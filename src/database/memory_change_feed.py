@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Memory change feed - change-data-capture events for memory writers
+
+Writers (AldenMemoryManager, PGVectorClient) publish a small event after
+each successful write; consumers such as the Memory Sync Service subscribe
+with a bounded queue and are woken as soon as something changes instead of
+polling on a timer.
+
+Two interchangeable feeds are provided:
+    LocalChangeBus     - in-process fan-out, no external dependencies
+    PostgresChangeFeed - same interface over PostgreSQL LISTEN/NOTIFY, so
+                         writers in other processes are seen as well
+
+Queues never block writers. Events for the same record are coalesced, and
+when a subscriber's queue is full it is marked as overflowed; the consumer
+then falls back to a full scan, which is safe because the database rows
+(not the events) are the source of truth.
+"""
+
+import json
+import time
+import asyncio
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, Optional, List, Tuple, Callable, Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = "hearthlink_memory_changes"
+
+
+@dataclass
+class MemoryChangeEvent:
+    """A committed change to one memory record"""
+    table: str                      # alden_memory, memory_slices, reasoning_chains
+    record_id: str
+    operation: str                  # insert, upsert, update, delete
+    agent_id: Optional[str] = None
+    user_id: Optional[str] = None
+    version: Optional[int] = None
+    published_at: float = field(default_factory=time.time)
+
+
+class ChangeSubscription:
+    """Bounded, coalescing queue of change events for one consumer (thread-safe)"""
+
+    def __init__(self, max_events: int = 10000, on_event: Optional[Callable[[], None]] = None,
+                 tables: Optional[Iterable[str]] = None):
+        self.max_events = max_events
+        self.on_event = on_event
+        self.tables: Optional[Set[str]] = set(tables) if tables else None
+        self._events: "OrderedDict[Tuple[str, str], MemoryChangeEvent]" = OrderedDict()
+        self._overflowed = False
+        self._lock = threading.Lock()
+
+        self.received = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def offer(self, event: MemoryChangeEvent) -> bool:
+        """Enqueue an event; returns False if it was dropped because the queue is full"""
+        if self.tables is not None and event.table not in self.tables:
+            return True
+
+        key = (event.table, event.record_id)
+        with self._lock:
+            self.received += 1
+            accepted = True
+            previous = self._events.get(key)
+            if previous is not None:
+                # Keep the original publish time so lag covers the oldest unsynced change
+                event.published_at = min(event.published_at, previous.published_at)
+                self._events[key] = event
+                self.coalesced += 1
+            elif len(self._events) >= self.max_events:
+                self._overflowed = True
+                self.dropped += 1
+                accepted = False
+            else:
+                self._events[key] = event
+
+        if self.on_event is not None:
+            self.on_event()
+        return accepted
+
+    def drain(self) -> Tuple[List[MemoryChangeEvent], bool]:
+        """Take all queued events; the flag reports whether any were dropped since the last drain"""
+        with self._lock:
+            events = list(self._events.values())
+            overflowed = self._overflowed
+            self._events.clear()
+            self._overflowed = False
+        return events, overflowed
+
+    def mark_missed(self):
+        """Flag that events may have been lost so the consumer falls back to a full scan"""
+        with self._lock:
+            self._overflowed = True
+        if self.on_event is not None:
+            self.on_event()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._events),
+            "max_events": self.max_events,
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+        }
+
+
+class LocalChangeBus:
+    """In-process change feed"""
+
+    def __init__(self):
+        self._subscriptions: List[ChangeSubscription] = []
+        self._lock = threading.Lock()
+        self.published = 0
+
+    async def start(self):
+        return None
+
+    async def stop(self):
+        return None
+
+    def subscribe(self, max_events: int = 10000, on_event: Optional[Callable[[], None]] = None,
+                  tables: Optional[Iterable[str]] = None) -> ChangeSubscription:
+        subscription = ChangeSubscription(max_events, on_event, tables)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ChangeSubscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    async def publish(self, event: MemoryChangeEvent):
+        self.published += 1
+        self._deliver(event)
+
+    def _deliver(self, event: MemoryChangeEvent):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.offer(event)
+            except Exception as e:
+                logger.error(f"Change subscriber failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "feed": type(self).__name__,
+                "published": self.published,
+                "subscriptions": [s.stats() for s in self._subscriptions],
+            }
+
+
+class PostgresChangeFeed(LocalChangeBus):
+    """
+    Change feed over PostgreSQL LISTEN/NOTIFY
+
+    Local events are delivered immediately and also sent with pg_notify so
+    other processes see them; notifications from other processes arrive on
+    a dedicated listening connection and are fanned out to local subscribers.
+
+    The feed needs a PGVectorClient for its pool and connection string. It
+    may be created without one and passed to AldenMemoryManager, which then
+    binds it to the manager's own client.
+
+    If the listening connection drops, the feed reconnects with exponential
+    backoff and then marks every subscription as having missed events, since
+    notifications sent while disconnected are lost.
+    """
+
+    def __init__(self, pgvector_client=None, channel: str = DEFAULT_CHANNEL,
+                 logger: Optional[logging.Logger] = None,
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        super().__init__()
+        self.pgvector_client = pgvector_client
+        self.channel = channel
+        self.logger = logger or logging.getLogger(__name__)
+        self.origin = uuid.uuid4().hex
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._listen_conn = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.notify_failures = 0
+        self.reconnects = 0
+
+    async def start(self):
+        """Open the listening connection"""
+        if self.pgvector_client is None:
+            raise RuntimeError("PostgresChangeFeed is not bound to a PGVectorClient")
+        self._loop = asyncio.get_running_loop()
+        self._stopping = False
+        await self._connect()
+        self.logger.info(f"Listening for memory changes on channel {self.channel}")
+
+    async def _connect(self):
+        import asyncpg
+
+        conn = await asyncpg.connect(self.pgvector_client.connection_string)
+        await conn.add_listener(self.channel, self._on_notify)
+        conn.add_termination_listener(self._on_terminated)
+        self._listen_conn = conn
+
+    def _on_terminated(self, connection):
+        if self._stopping or connection is not self._listen_conn:
+            return
+        self._listen_conn = None
+        self.logger.warning("Change feed listening connection lost, reconnecting")
+        self._reconnect_task = self._loop.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = self.reconnect_delay
+        while not self._stopping:
+            try:
+                await self._connect()
+            except Exception as e:
+                self.logger.warning(f"Change feed reconnect failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            self.reconnects += 1
+            self.logger.info(f"Listening for memory changes on channel {self.channel} again")
+            # Notifications sent while disconnected were lost
+            with self._lock:
+                subscriptions = list(self._subscriptions)
+            for subscription in subscriptions:
+                subscription.mark_missed()
+            return
+
+    async def stop(self):
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._listen_conn is not None:
+            try:
+                await self._listen_conn.remove_listener(self.channel, self._on_notify)
+                await self._listen_conn.close()
+            finally:
+                self._listen_conn = None
+
+    async def publish(self, event: MemoryChangeEvent):
+        await super().publish(event)
+
+        pool = self.pgvector_client.pool if self.pgvector_client is not None else None
+        if pool is None:
+            return
+        payload = json.dumps({"origin": self.origin, "event": asdict(event)}, separators=(",", ":"))
+        try:
+            async with pool.acquire() as conn:
+                await conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        except Exception as e:
+            # Remote consumers fall back to their own scans; local delivery already happened
+            self.notify_failures += 1
+            self.logger.warning(f"Failed to send change notification: {e}")
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+            if message.get("origin") == self.origin:
+                return
+            self._deliver(MemoryChangeEvent(**message["event"]))
+        except Exception as e:
+            self.logger.warning(f"Ignoring malformed change notification: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            "channel": self.channel,
+            "listening": self._listen_conn is not None,
+            "reconnects": self.reconnects,
+            "notify_failures": self.notify_failures,
+        })
+        return stats
@@ -26,6 +26,8 @@ except ImportError as e:
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from utils.access_stats import default_access_stats, AccessRecord
+
 @dataclass
 class SemanticMemorySlice:
     """Enhanced memory slice with vector embedding support"""
@@ -78,6 +80,11 @@ class PGVectorClient:
         self.connection_string = connection_string or self._get_connection_string()
         self.logger = logger or logging.getLogger(__name__)
         self.pool: Optional[asyncpg.Pool] = None
+        # Optional change feed (see database.memory_change_feed); writers publish after commit
+        self.change_feed = None
+        # Retrieval counters are aggregated in memory and flushed in batches
+        self.access_stats = default_access_stats
+        self.access_stats_store = f"pgvector:{id(self)}:memory_slices"
         
     def _get_connection_string(self) -> str:
         """Build connection string from environment variables"""
@@ -130,6 +137,9 @@ class PGVectorClient:
                 if not table_exists:
                     raise Exception("memory_slices table not found in semantic_memory schema")
             
+            self.access_stats.register(self.access_stats_store, self._flush_retrieval_stats,
+                                       loop=asyncio.get_running_loop())
+            
             self.logger.info("Successfully connected to PGVector database")
             return True
             
@@ -140,10 +150,28 @@ class PGVectorClient:
     async def disconnect(self):
         """Close database connection pool"""
         if self.pool:
+            await self.access_stats.flush_async(self.access_stats_store)
+            self.access_stats.unregister(self.access_stats_store, flush=False)
             await self.pool.close()
             self.pool = None
             self.logger.info("Disconnected from PGVector database")
     
+    async def _flush_retrieval_stats(self, records: List[AccessRecord]):
+        """Apply a batch of aggregated retrievals in one statement"""
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                """
+                UPDATE memory_slices AS m SET
+                    retrieval_count = m.retrieval_count + s.hits,
+                    last_accessed = GREATEST(m.last_accessed, s.accessed_at)
+                FROM unnest($1::varchar[], $2::int[], $3::timestamptz[]) AS s(slice_id, hits, accessed_at)
+                WHERE m.slice_id = s.slice_id
+                """,
+                [record.item_id for record in records],
+                [record.count for record in records],
+                [record.last_accessed for record in records]
+            )
+    
     async def store_memory_slice(self, memory_slice: SemanticMemorySlice) -> bool:
         """
         Store a memory slice with vector embedding
@@ -189,12 +217,27 @@ class PGVectorClient:
                 )
             
             self.logger.info(f"Stored memory slice: {memory_slice.slice_id}")
+            await self._publish_change("memory_slices", memory_slice.slice_id, memory_slice.persona_id,
+                                       memory_slice.user_id)
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to store memory slice {memory_slice.slice_id}: {e}")
             return False
     
+    async def _publish_change(self, table: str, record_id: str, agent_id: str, user_id: str):
+        """Publish a change event; a feed failure never fails the write itself"""
+        if self.change_feed is None:
+            return
+        try:
+            from database.memory_change_feed import MemoryChangeEvent
+            await self.change_feed.publish(MemoryChangeEvent(
+                table=table, record_id=record_id, operation="upsert",
+                agent_id=agent_id, user_id=str(user_id)
+            ))
+        except Exception as e:
+            self.logger.warning(f"Failed to publish change for {record_id}: {e}")
+    
     async def semantic_search(
         self,
         query_embedding: List[float],
@@ -262,13 +305,9 @@ class PGVectorClient:
                     memories.append(memory)
                     similarity_scores.append(float(row['similarity_score']))
                 
-                # Update retrieval statistics
+                # Retrieval statistics are applied in batches off the search path
                 if memories:
-                    slice_ids = [m.slice_id for m in memories]
-                    await conn.execute(
-                        "SELECT update_retrieval_stats($1)",
-                        slice_ids
-                    )
+                    self.access_stats.record(self.access_stats_store, [m.slice_id for m in memories])
                 
                 query_time = int((datetime.now() - start_time).total_seconds() * 1000)
                 
@@ -372,13 +411,9 @@ class PGVectorClient:
                     memories.append(memory)
                     similarity_scores.append(float(row['combined_score']))
                 
-                # Update retrieval statistics
+                # Retrieval statistics are applied in batches off the search path
                 if memories:
-                    slice_ids = [m.slice_id for m in memories]
-                    await conn.execute(
-                        "SELECT update_retrieval_stats($1)",
-                        slice_ids
-                    )
+                    self.access_stats.record(self.access_stats_store, [m.slice_id for m in memories])
                 
                 query_time = int((datetime.now() - start_time).total_seconds() * 1000)
                 
@@ -446,6 +481,8 @@ class PGVectorClient:
                 )
             
             self.logger.info(f"Stored reasoning chain: {reasoning_chain.chain_id}")
+            await self._publish_change("reasoning_chains", reasoning_chain.chain_id, reasoning_chain.persona_id,
+                                       reasoning_chain.user_id)
             return True
             
         except Exception as e:
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Micro-batching front end for embedding model inference
+
+Concurrent generate_embedding calls are queued for a few milliseconds and
+encoded together in one model batch on a dedicated worker thread, so the
+event loop never blocks on the model and the model sees efficient batches.
+Requests are queued per event loop, so each batch's futures are resolved on
+the loop that created them.
+"""
+
+import asyncio
+import time
+import threading
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable, Sequence, Tuple
+
+import numpy as np
+
+
+class Histogram:
+    """Fixed-bucket histogram; each bucket counts observations <= its upper bound"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.total += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [f"<={b:g}" for b in self.bounds] + [f">{self.bounds[-1]:g}"]
+            return {
+                "buckets": dict(zip(labels, self.counts)),
+                "count": self.count,
+                "mean": self.total / self.count if self.count else 0.0,
+            }
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent encode requests into model batches"""
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        # One worker thread: the model is not assumed to be thread-safe
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-batcher")
+        self._pending: Dict[asyncio.AbstractEventLoop, List[Tuple[str, asyncio.Future, float]]] = {}
+        self._flush_handles: Dict[asyncio.AbstractEventLoop, asyncio.Handle] = {}
+        self._lock = threading.Lock()
+
+        self.batch_size_histogram = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.queue_wait_histogram = Histogram([0.5, 1, 2, 5, 10, 25, 50, 100, 250])
+        self.batches_run = 0
+
+    async def submit(self, text: str) -> np.ndarray:
+        """Queue one text and wait for its embedding"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            pending = self._pending.setdefault(loop, [])
+            pending.append((text, future, time.perf_counter()))
+            full = len(pending) >= self.max_batch_size
+            if not full and loop not in self._flush_handles:
+                self._flush_handles[loop] = loop.call_later(self.max_wait_ms / 1000.0, self._flush, loop)
+
+        if full:
+            self._flush(loop)
+        return await future
+
+    async def run(self, texts: List[str]) -> np.ndarray:
+        """Encode an explicit batch on the worker thread (bypasses the queue)"""
+        loop = asyncio.get_running_loop()
+        self.batch_size_histogram.observe(len(texts))
+        self.batches_run += 1
+        return await loop.run_in_executor(self.executor, self.encode_fn, texts)
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        """Start a batch from this loop's queue; runs on that loop"""
+        with self._lock:
+            handle = self._flush_handles.pop(loop, None)
+            if handle is not None:
+                handle.cancel()
+            pending = self._pending.pop(loop, [])
+            batch, rest = pending[:self.max_batch_size], pending[self.max_batch_size:]
+            if rest:
+                self._pending[loop] = rest
+                self._flush_handles[loop] = loop.call_soon(self._flush, loop)
+        if batch:
+            loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            self.queue_wait_histogram.observe((started - enqueued) * 1000)
+
+        # Identical texts in one window are encoded once
+        unique_texts = list(dict.fromkeys(text for text, _, _ in batch))
+        try:
+            vectors = await self.run(unique_texts)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(unique_texts, vectors))
+        for text, future, _ in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = sum(len(queue) for queue in self._pending.values())
+        return {
+            "batches_run": self.batches_run,
+            "pending": pending,
+            "batch_size_histogram": self.batch_size_histogram.snapshot(),
+            "queue_wait_ms_histogram": self.queue_wait_histogram.snapshot(),
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
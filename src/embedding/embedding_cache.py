@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Two-tier embedding cache for the Semantic Embedding Service
+
+Tier 1 is an in-memory LRU bounded by bytes (vectors are held as float32
+arrays, so the byte budget is exact rather than guessed from Python lists).
+Tier 2 is an on-disk store of fixed-width float32 rows read through a
+memory map and keyed by a hash of (model name, text), so embeddings survive
+restarts and are never served across models.
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: stores are only coordinated within a process
+    fcntl = None
+
+
+KEY_SIZE = 16
+_F32_LE = np.dtype("<f4")
+
+_shared_stores: Dict[Path, "DiskEmbeddingStore"] = {}
+_shared_stores_lock = threading.Lock()
+
+
+def content_key(model_name: str, text: str) -> bytes:
+    """Stable cache key for a text under a given model"""
+    return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).digest()[:KEY_SIZE]
+
+
+class LRUEmbeddingCache:
+    """In-memory LRU of float32 vectors bounded by entry count and total bytes"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._entries
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+            return vector
+
+    def put(self, key: bytes, vector: np.ndarray):
+        vector = np.ascontiguousarray(vector, dtype=np.float32)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = vector
+            self._bytes += vector.nbytes
+            while self._entries and (self._bytes > self.max_bytes or
+                                     (self.max_entries and len(self._entries) > self.max_entries)):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class DiskEmbeddingStore:
+    """
+    Append-only on-disk embedding store read through np.memmap.
+
+    Layout (one directory per model and dimension):
+        vectors.f32 - row i is the little-endian float32 embedding for key i
+        keys.bin    - KEY_SIZE-byte key i; written after its row, so a key on
+                      disk always refers to a complete vector
+        store.lock  - advisory lock file
+    When the store exceeds max_bytes the most recent half is kept.
+
+    A directory may be shared by several stores and processes. Writers hold
+    an exclusive lock on store.lock and take the row number from keys.bin
+    rather than from their own index, readers hold a shared lock, and every
+    hit is checked against the key stored at its row so a stale index is a
+    miss rather than another text's vector. Use shared() to get the single
+    store for a directory within a process.
+    """
+
+    def __init__(self, root: Path, model_name: str, dimension: int, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = self.directory_for(root, model_name, dimension)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dimension = dimension
+        self.row_bytes = dimension * _F32_LE.itemsize
+        self.max_bytes = max_bytes
+        self._vectors_path = self.directory / "vectors.f32"
+        self._keys_path = self.directory / "keys.bin"
+        self._lock_file = open(self.directory / "store.lock", "a+b")
+        self._lock = threading.Lock()
+        self._rows: Dict[bytes, int] = {}
+        self._indexed = 0
+        self._keys_ino: Optional[int] = None
+        self._map: Optional[np.memmap] = None
+        self._map_ino: Optional[int] = None
+        self._load()
+
+    @staticmethod
+    def directory_for(root: Path, model_name: str, dimension: int) -> Path:
+        model_tag = hashlib.sha256(model_name.encode("utf-8")).hexdigest()[:12]
+        return Path(root) / f"{model_tag}-{dimension}"
+
+    @classmethod
+    def shared(cls, root: Path, model_name: str, dimension: int,
+               max_bytes: int = 512 * 1024 * 1024) -> "DiskEmbeddingStore":
+        """The process-wide store for this model's directory, opened on first use"""
+        directory = cls.directory_for(root, model_name, dimension).resolve()
+        with _shared_stores_lock:
+            store = _shared_stores.get(directory)
+            if store is None:
+                store = cls(root, model_name, dimension, max_bytes=max_bytes)
+                _shared_stores[directory] = store
+            return store
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._rows
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _load(self):
+        with self._lock, self._file_lock(exclusive=True):
+            self._vectors_path.touch(exist_ok=True)
+            self._keys_path.touch(exist_ok=True)
+            complete_rows = self._vectors_path.stat().st_size // self.row_bytes
+            count = min(self._keys_path.stat().st_size // KEY_SIZE, complete_rows)
+            # Drop torn tails so the two files stay aligned
+            with open(self._keys_path, "r+b") as f:
+                f.truncate(count * KEY_SIZE)
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(count * self.row_bytes)
+            self._sync_index()
+
+    def _sync_index(self) -> int:
+        """
+        Index rows other writers appended since the last call and return the
+        number of rows on disk; rebuilds from scratch after a shrink or clear
+        elsewhere. Caller holds the file lock.
+        """
+        stat = self._keys_path.stat()
+        rows = stat.st_size // KEY_SIZE
+        if stat.st_ino != self._keys_ino or rows < self._indexed:
+            self._rows = {}
+            self._indexed = 0
+            self._keys_ino = stat.st_ino
+        if rows > self._indexed:
+            with open(self._keys_path, "rb") as f:
+                f.seek(self._indexed * KEY_SIZE)
+                keys = f.read((rows - self._indexed) * KEY_SIZE)
+            for i in range(len(keys) // KEY_SIZE):
+                self._rows.setdefault(keys[i * KEY_SIZE:(i + 1) * KEY_SIZE], self._indexed + i)
+            self._indexed = rows
+        return rows
+
+    def _key_at(self, row: int) -> bytes:
+        with open(self._keys_path, "rb") as f:
+            f.seek(row * KEY_SIZE)
+            return f.read(KEY_SIZE)
+
+    def _mapped(self, row: int) -> np.memmap:
+        stat = self._vectors_path.stat()
+        if self._map is None or row >= self._map.shape[0] or stat.st_ino != self._map_ino:
+            rows = stat.st_size // self.row_bytes
+            self._map = np.memmap(self._vectors_path, dtype=_F32_LE, mode="r", shape=(rows, self.dimension))
+            self._map_ino = stat.st_ino
+        return self._map
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        with self._lock, self._file_lock(exclusive=False):
+            row = self._rows.get(key)
+            if row is not None and self._key_at(row) != key:
+                # Rows were rewritten by another writer: rebuild the index
+                self._keys_ino = None
+                row = None
+            if row is None:
+                self._sync_index()
+                row = self._rows.get(key)
+                if row is None or self._key_at(row) != key:
+                    return None
+            return np.array(self._mapped(row)[row])
+
+    def put(self, key: bytes, vector: np.ndarray):
+        data = np.ascontiguousarray(vector, dtype=_F32_LE).reshape(-1)
+        if data.shape[0] != self.dimension:
+            return
+        with self._lock, self._file_lock(exclusive=True):
+            rows = self._sync_index()
+            if key in self._rows:
+                return
+            if (rows + 1) * self.row_bytes > self.max_bytes:
+                self._shrink()
+                rows = self._indexed
+            with open(self._vectors_path, "r+b") as f:
+                # Overwrite any torn row left by a writer that died before its key
+                f.truncate(rows * self.row_bytes)
+                f.seek(rows * self.row_bytes)
+                f.write(data.tobytes())
+            with open(self._keys_path, "ab") as f:
+                f.write(key)
+            self._rows[key] = rows
+            self._indexed = rows + 1
+
+    def _shrink(self):
+        """Keep the most recently written half of the rows."""
+        keep_from = self._indexed // 2
+        keys = self._keys_path.read_bytes()[keep_from * KEY_SIZE:self._indexed * KEY_SIZE]
+        vectors = np.fromfile(self._vectors_path, dtype=_F32_LE)[keep_from * self.dimension:
+                                                                 self._indexed * self.dimension]
+        self._map = None
+        tmp_vectors = self._vectors_path.with_suffix(".tmp")
+        vectors.tofile(tmp_vectors)
+        os.replace(tmp_vectors, self._vectors_path)
+        tmp_keys = self._keys_path.with_suffix(".tmp")
+        tmp_keys.write_bytes(keys)
+        os.replace(tmp_keys, self._keys_path)
+        self._keys_ino = None
+        self._indexed = 0
+        self._sync_index()
+
+    def clear(self):
+        with self._lock, self._file_lock(exclusive=True):
+            self._map = None
+            self._vectors_path.write_bytes(b"")
+            self._keys_path.write_bytes(b"")
+            self._sync_index()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._rows),
+            "size_bytes": len(self._rows) * self.row_bytes,
+            "max_bytes": self.max_bytes,
+            "path": str(self.directory),
+        }
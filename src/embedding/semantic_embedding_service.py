@@ -30,6 +30,8 @@ except ImportError as e:
 
 # Import our PGVector client
 from database.pgvector_client import PGVectorClient, SemanticMemorySlice
+from embedding.embedding_cache import LRUEmbeddingCache, DiskEmbeddingStore, content_key
+from embedding.embedding_batcher import EmbeddingBatcher
 
 @dataclass
 class EmbeddingResult:
@@ -49,7 +51,12 @@ class SemanticEmbeddingService:
         model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
         cache_size: int = 1000,
         device: str = None,
-        logger: logging.Logger = None
+        logger: logging.Logger = None,
+        cache_max_bytes: int = 64 * 1024 * 1024,
+        cache_dir: Optional[str] = "hearthlink_data/embedding_cache",
+        disk_cache_max_bytes: int = 512 * 1024 * 1024,
+        max_batch_size: int = 32,
+        max_batch_wait_ms: float = 5.0
     ):
         """
         Initialize embedding service
@@ -59,9 +66,16 @@ class SemanticEmbeddingService:
             cache_size: Number of embeddings to cache in memory
             device: Torch device ('cpu', 'cuda', 'auto')
             logger: Optional logger instance
+            cache_max_bytes: Byte budget of the in-memory LRU tier
+            cache_dir: Directory for the persistent on-disk tier (None disables it)
+            disk_cache_max_bytes: Byte budget of the on-disk tier
+            max_batch_size: Most concurrent requests encoded in one model batch
+            max_batch_wait_ms: How long a request waits for others to join its batch
         """
         self.model_name = model_name
         self.cache_size = cache_size
+        self.cache_dir = cache_dir
+        self.disk_cache_max_bytes = disk_cache_max_bytes
         self.logger = logger or logging.getLogger(__name__)
         
         # Set device
@@ -76,13 +90,19 @@ class SemanticEmbeddingService:
         self.model = None
         self.embedding_dimension = None
         
-        # Embedding cache
-        self.embedding_cache: Dict[str, EmbeddingResult] = {}
+        # Two-tier embedding cache: byte-bounded LRU in memory, memory-mapped on disk
+        self.embedding_cache = LRUEmbeddingCache(max_bytes=cache_max_bytes, max_entries=cache_size)
+        self.disk_cache: Optional[DiskEmbeddingStore] = None
+        
+        # Concurrent requests are coalesced into model batches on a worker thread
+        self.batcher = EmbeddingBatcher(self._encode, max_batch_size, max_batch_wait_ms)
         
         # Statistics
         self.stats = {
             "embeddings_generated": 0,
             "cache_hits": 0,
+            "memory_cache_hits": 0,
+            "disk_cache_hits": 0,
             "cache_misses": 0,
             "total_generation_time_ms": 0,
             "average_generation_time_ms": 0.0
@@ -103,6 +123,15 @@ class SemanticEmbeddingService:
                 f"Embedding dimension: {self.embedding_dimension}"
             )
             
+            if self.cache_dir:
+                try:
+                    self.disk_cache = DiskEmbeddingStore.shared(
+                        Path(self.cache_dir), self.model_name, self.embedding_dimension,
+                        max_bytes=self.disk_cache_max_bytes
+                    )
+                except Exception as e:
+                    self.logger.warning(f"Persistent embedding cache unavailable: {e}")
+            
             return True
             
         except Exception as e:
@@ -113,17 +142,42 @@ class SemanticEmbeddingService:
         """Generate hash for text caching"""
         return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
     
-    def _manage_cache(self):
-        """Remove old entries if cache is full"""
-        if len(self.embedding_cache) >= self.cache_size:
-            # Remove oldest 20% of entries
-            remove_count = max(1, self.cache_size // 5)
-            oldest_keys = list(self.embedding_cache.keys())[:remove_count]
-            
-            for key in oldest_keys:
-                del self.embedding_cache[key]
-                
-            self.logger.debug(f"Removed {remove_count} entries from embedding cache")
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run the model on a batch of texts (called on the batcher's worker thread)"""
+        return self.model.encode(texts, convert_to_numpy=True)
+    
+    def _get_cached(self, key: bytes) -> Optional[np.ndarray]:
+        """Look up an embedding in memory, then on disk (promoting disk hits)"""
+        vector = self.embedding_cache.get(key)
+        if vector is not None:
+            self.stats["memory_cache_hits"] += 1
+            return vector
+        if self.disk_cache is not None:
+            vector = self.disk_cache.get(key)
+            if vector is not None:
+                self.stats["disk_cache_hits"] += 1
+                self.embedding_cache.put(key, vector)
+                return vector
+        return None
+    
+    def _set_cached(self, key: bytes, vector: np.ndarray):
+        self.embedding_cache.put(key, vector)
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.put(key, vector)
+            except Exception as e:
+                self.logger.warning(f"Failed to persist embedding: {e}")
+    
+    def _make_result(self, text: str, vector: np.ndarray, generation_time_ms: int) -> EmbeddingResult:
+        embedding = np.asarray(vector, dtype=np.float32).tolist()
+        return EmbeddingResult(
+            text=text,
+            embedding=embedding,
+            model_name=self.model_name,
+            embedding_dimension=len(embedding),
+            generation_time_ms=generation_time_ms,
+            text_hash=self._get_text_hash(text)
+        )
     
     async def generate_embedding(self, text: str, use_cache: bool = True) -> EmbeddingResult:
         """
@@ -140,37 +194,24 @@ class SemanticEmbeddingService:
             if not self._load_model():
                 raise Exception("Failed to load embedding model")
         
-        text_hash = self._get_text_hash(text)
+        cache_key = content_key(self.model_name, text)
         
         # Check cache first
-        if use_cache and text_hash in self.embedding_cache:
-            self.stats["cache_hits"] += 1
-            return self.embedding_cache[text_hash]
+        if use_cache:
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return self._make_result(text, cached, 0)
         
         # Generate embedding
         start_time = time.time()
         
         try:
-            # Run model inference in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            embedding_array = await loop.run_in_executor(
-                None, 
-                lambda: self.model.encode([text], convert_to_numpy=True)
-            )
-            
-            # Extract embedding and convert to list
-            embedding = embedding_array[0].tolist()
+            # Queued with concurrent callers and encoded as one batch off the event loop
+            vector = await self.batcher.submit(text)
             generation_time = int((time.time() - start_time) * 1000)
             
-            # Create result
-            result = EmbeddingResult(
-                text=text,
-                embedding=embedding,
-                model_name=self.model_name,
-                embedding_dimension=len(embedding),
-                generation_time_ms=generation_time,
-                text_hash=text_hash
-            )
+            result = self._make_result(text, vector, generation_time)
             
             # Update statistics
             self.stats["embeddings_generated"] += 1
@@ -182,8 +223,7 @@ class SemanticEmbeddingService:
             
             # Cache result
             if use_cache:
-                self._manage_cache()
-                self.embedding_cache[text_hash] = result
+                self._set_cached(cache_key, vector)
             
             self.logger.debug(
                 f"Generated embedding for text ({len(text)} chars) in {generation_time}ms"
@@ -227,10 +267,10 @@ class SemanticEmbeddingService:
             
             # Check cache for each text
             for j, text in enumerate(batch_texts):
-                text_hash = self._get_text_hash(text)
+                cached = self._get_cached(content_key(self.model_name, text)) if use_cache else None
                 
-                if use_cache and text_hash in self.embedding_cache:
-                    cached_results[j] = self.embedding_cache[text_hash]
+                if cached is not None:
+                    cached_results[j] = self._make_result(text, cached, 0)
                     self.stats["cache_hits"] += 1
                 else:
                     texts_to_embed.append((j, text))
@@ -240,37 +280,22 @@ class SemanticEmbeddingService:
                 start_time = time.time()
                 
                 try:
-                    # Run batch inference
-                    loop = asyncio.get_event_loop()
+                    # Run batch inference on the model worker thread
                     text_list = [text for _, text in texts_to_embed]
-                    embeddings_array = await loop.run_in_executor(
-                        None,
-                        lambda: self.model.encode(text_list, convert_to_numpy=True)
-                    )
+                    embeddings_array = await self.batcher.run(text_list)
                     
                     generation_time = int((time.time() - start_time) * 1000)
                     avg_time_per_embedding = generation_time // len(texts_to_embed)
                     
                     # Process results
                     for k, (original_idx, text) in enumerate(texts_to_embed):
-                        embedding = embeddings_array[k].tolist()
-                        text_hash = self._get_text_hash(text)
-                        
-                        result = EmbeddingResult(
-                            text=text,
-                            embedding=embedding,
-                            model_name=self.model_name,
-                            embedding_dimension=len(embedding),
-                            generation_time_ms=avg_time_per_embedding,
-                            text_hash=text_hash
+                        cached_results[original_idx] = self._make_result(
+                            text, embeddings_array[k], avg_time_per_embedding
                         )
                         
-                        cached_results[original_idx] = result
-                        
                         # Cache result
                         if use_cache:
-                            self._manage_cache()
-                            self.embedding_cache[text_hash] = result
+                            self._set_cached(content_key(self.model_name, text), embeddings_array[k])
                     
                     # Update statistics
                     self.stats["embeddings_generated"] += len(texts_to_embed)
@@ -346,6 +371,7 @@ class SemanticEmbeddingService:
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get embedding service statistics"""
+        lookups = max(1, self.stats["cache_hits"] + self.stats["cache_misses"])
         return {
             **self.stats,
             "model_name": self.model_name,
@@ -353,16 +379,22 @@ class SemanticEmbeddingService:
             "device": self.device,
             "cache_size": len(self.embedding_cache),
             "cache_max_size": self.cache_size,
-            "cache_hit_rate": (
-                self.stats["cache_hits"] / 
-                max(1, self.stats["cache_hits"] + self.stats["cache_misses"])
-            ) * 100,
+            "cache_bytes": self.embedding_cache.size_bytes,
+            "cache_max_bytes": self.embedding_cache.max_bytes,
+            "cache_evictions": self.embedding_cache.evictions,
+            "cache_hit_rate": (self.stats["cache_hits"] / lookups) * 100,
+            "memory_cache_hit_rate": (self.stats["memory_cache_hits"] / lookups) * 100,
+            "disk_cache_hit_rate": (self.stats["disk_cache_hits"] / lookups) * 100,
+            "disk_cache": self.disk_cache.stats() if self.disk_cache else None,
+            "batching": self.batcher.get_statistics(),
             "model_loaded": self.model is not None
         }
     
-    def clear_cache(self):
-        """Clear embedding cache"""
+    def clear_cache(self, include_disk: bool = False):
+        """Clear the in-memory embedding cache (and the persistent tier if requested)"""
         self.embedding_cache.clear()
+        if include_disk and self.disk_cache is not None:
+            self.disk_cache.clear()
         self.logger.info("Embedding cache cleared")
 
 # Integration service that combines embedding generation with PGVector storage
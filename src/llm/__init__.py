@@ -15,19 +15,23 @@ from .local_llm_client import (
     LLMConfig,
     LLMRequest,
     LLMResponse,
+    LLMStreamChunk,
     LLMError,
     LLMConnectionError,
     LLMResponseError,
     create_llm_client
 )
+from .async_llm_client import AsyncLocalLLMClient
 
 __all__ = [
     'LocalLLMClient',
     'LLMConfig', 
     'LLMRequest',
     'LLMResponse',
+    'LLMStreamChunk',
     'LLMError',
     'LLMConnectionError',
     'LLMResponseError',
-    'create_llm_client'
+    'create_llm_client',
+    'AsyncLocalLLMClient'
 ] 
\ No newline at end of file
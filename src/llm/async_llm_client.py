@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Async Local LLM Client for Hearthlink
+
+asyncio-native counterpart of LocalLLMClient for callers running inside an
+event loop. Every client in a loop shares one keep-alive connection pool per
+endpoint. Generations are limited per model by a semaphore sized to what the
+engine serves in parallel (OLLAMA_NUM_PARALLEL for Ollama), so bursts queue
+in the client instead of piling up on the server. Failed attempts are
+retried with jittered exponential backoff without blocking the loop.
+
+Synchronous callers can use generate_blocking(), which runs the generation
+on a shared background loop and so shares the same pools and limits.
+
+Author: Hearthlink Development Team
+Version: 1.0.0
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import threading
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    aiohttp = None
+    AIOHTTP_AVAILABLE = False
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from main import HearthlinkLogger
+from .local_llm_client import (
+    CircuitBreaker,
+    LLMConfig,
+    LLMRequest,
+    LLMResponse,
+    LLMError,
+    LLMConnectionError,
+    LLMTimeoutError,
+    LLMAuthenticationError,
+    LLMRateLimitError,
+    build_generation_request,
+    parse_generation_response
+)
+
+# Parallel generations per model when neither the config nor the engine says otherwise
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Idle keep-alive connections are kept this long (seconds)
+KEEPALIVE_TIMEOUT = 60
+
+
+def default_concurrency(config: LLMConfig) -> int:
+    """Parallel generations per model: config, then OLLAMA_NUM_PARALLEL, then the default."""
+    if config.max_concurrency:
+        return config.max_concurrency
+    if config.engine == "ollama" and os.getenv("OLLAMA_NUM_PARALLEL"):
+        return max(1, int(os.environ["OLLAMA_NUM_PARALLEL"]))
+    return DEFAULT_MAX_CONCURRENCY
+
+
+class _LoopResources:
+    """Connection pools and concurrency limits owned by one event loop."""
+
+    def __init__(self):
+        self.sessions: Dict[str, "aiohttp.ClientSession"] = {}
+        self.semaphores: Dict[Tuple[str, str], asyncio.Semaphore] = {}
+
+
+# aiohttp sessions and asyncio semaphores are bound to the loop that created them
+_loop_resources: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopResources]" = weakref.WeakKeyDictionary()
+_loop_resources_lock = threading.Lock()
+
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_lock = threading.Lock()
+
+
+def _current_resources() -> _LoopResources:
+    loop = asyncio.get_running_loop()
+    with _loop_resources_lock:
+        resources = _loop_resources.get(loop)
+        if resources is None:
+            resources = _LoopResources()
+            _loop_resources[loop] = resources
+        return resources
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop thread that runs generate_blocking() calls."""
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-async-client", daemon=True).start()
+            _background_loop = loop
+        return _background_loop
+
+
+async def close_connection_pools() -> None:
+    """Close the connection pools owned by the running event loop."""
+    resources = _current_resources()
+    sessions = list(resources.sessions.values())
+    resources.sessions.clear()
+    for session in sessions:
+        await session.close()
+
+
+class AsyncLocalLLMClient:
+    """
+    asyncio-native client for local LLM engines.
+
+    Supports the same engines and request/response types as LocalLLMClient.
+    """
+
+    def __init__(self, config: LLMConfig, logger: Optional[HearthlinkLogger] = None):
+        """
+        Initialize async local LLM client.
+
+        Args:
+            config: LLM configuration
+            logger: Optional logger instance
+
+        Raises:
+            LLMError: If aiohttp is not installed
+        """
+        if not AIOHTTP_AVAILABLE:
+            raise LLMError("aiohttp is required for AsyncLocalLLMClient")
+
+        self.config = config
+        self.logger = logger or HearthlinkLogger()
+        self.max_concurrency = default_concurrency(config)
+        self.circuit_breaker = CircuitBreaker(
+            config.circuit_breaker_threshold,
+            config.circuit_breaker_timeout
+        ) if config.enable_circuit_breaker else None
+
+        self.headers: Dict[str, str] = {}
+        if config.api_key:
+            self.headers["Authorization"] = f"Bearer {config.api_key}"
+        if config.custom_headers:
+            self.headers.update(config.custom_headers)
+
+        # Requests currently holding a concurrency slot / waiting for one
+        self.in_flight = 0
+        self.waiting = 0
+
+    def _session(self) -> "aiohttp.ClientSession":
+        """Shared keep-alive session for this endpoint in the running loop."""
+        resources = _current_resources()
+        session = resources.sessions.get(self.config.base_url)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=max(self.max_concurrency * 2, 10),
+                                             keepalive_timeout=KEEPALIVE_TIMEOUT)
+            session = aiohttp.ClientSession(connector=connector)
+            resources.sessions[self.config.base_url] = session
+        return session
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Per-model concurrency limit in the running loop (sized by the first client)."""
+        resources = _current_resources()
+        key = (self.config.base_url, self.config.model)
+        semaphore = resources.semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            resources.semaphores[key] = semaphore
+        return semaphore
+
+    async def generate(self, request: LLMRequest) -> LLMResponse:
+        """
+        Generate response from local LLM.
+
+        Args:
+            request: LLM request with prompt and parameters
+
+        Returns:
+            LLMResponse: Generated response with metadata
+
+        Raises:
+            LLMError: If generation fails
+        """
+        start_time = time.time()
+
+        # Generate request ID if not provided
+        if not request.request_id:
+            request.request_id = f"req_{int(time.time() * 1000)}"
+
+        try:
+            if self.circuit_breaker:
+                response_data = await self.circuit_breaker.call_async(self._generate_with_retry, request)
+            else:
+                response_data = await self._generate_with_retry(request)
+        except Exception as e:
+            self._raise_llm_error(e, request)
+
+        response_time = time.time() - start_time
+        self.logger.logger.info("LLM async generation completed",
+                              extra={"extra_fields": {
+                                  "event_type": "llm_generation_success",
+                                  "request_id": request.request_id,
+                                  "response_length": len(response_data.get("content", "")),
+                                  "response_time": response_time,
+                                  "model": self.config.model
+                              }})
+
+        return LLMResponse(
+            content=response_data.get("content", ""),
+            model=self.config.model,
+            usage=response_data.get("usage"),
+            finish_reason=response_data.get("finish_reason"),
+            response_time=response_time,
+            timestamp=datetime.now().isoformat(),
+            context=request.context,
+            request_id=request.request_id
+        )
+
+    def generate_blocking(self, request: LLMRequest, timeout: Optional[float] = None) -> LLMResponse:
+        """
+        Synchronous facade over generate() for code outside an event loop.
+
+        Runs on a shared background loop, so blocking callers in different
+        threads share one connection pool and concurrency limit.
+        """
+        loop = _get_background_loop()
+        try:
+            if asyncio.get_running_loop() is loop:
+                raise LLMError("generate_blocking() cannot be called from the client's own event loop")
+        except RuntimeError:
+            pass
+        return asyncio.run_coroutine_threadsafe(self.generate(request), loop).result(timeout)
+
+    async def _generate_with_retry(self, request: LLMRequest) -> Dict[str, Any]:
+        """Generate response with jittered exponential backoff between attempts."""
+        last_exception = None
+
+        for retry_count in range(self.config.max_retries + 1):
+            try:
+                return await self._post(request)
+            except Exception as e:
+                last_exception = e
+
+                if retry_count < self.config.max_retries:
+                    self.logger.logger.warning("LLM request failed, retrying",
+                                             extra={"extra_fields": {
+                                                 "event_type": "llm_retry_attempt",
+                                                 "request_id": request.request_id,
+                                                 "retry_count": retry_count + 1,
+                                                 "max_retries": self.config.max_retries,
+                                                 "error": str(e)
+                                             }})
+                    await asyncio.sleep(self._backoff_delay(retry_count))
+                else:
+                    self.logger.logger.error("LLM request failed after all retries",
+                                           extra={"extra_fields": {
+                                               "event_type": "llm_final_failure",
+                                               "request_id": request.request_id,
+                                               "retry_count": retry_count,
+                                               "error": str(e)
+                                           }})
+
+        raise last_exception
+
+    def _backoff_delay(self, retry_count: int) -> float:
+        """Exponential backoff with jitter so failed requests don't retry in lockstep."""
+        delay = self.config.retry_delay * (2 ** retry_count)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _post(self, request: LLMRequest) -> Dict[str, Any]:
+        """Send one generation request, holding a concurrency slot only while it runs."""
+        url, payload = build_generation_request(self.config, request, stream=False)
+        session = self._session()
+
+        self.waiting += 1
+        async with self._semaphore():
+            self.waiting -= 1
+            self.in_flight += 1
+            try:
+                async with session.post(url, json=payload, headers=self.headers,
+                                        timeout=aiohttp.ClientTimeout(total=self.config.timeout)) as response:
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+            finally:
+                self.in_flight -= 1
+
+        return parse_generation_response(self.config.engine, data)
+
+    def _raise_llm_error(self, e: Exception, request: LLMRequest) -> None:
+        """Log a failed generation and re-raise it as the matching LLMError."""
+        self.logger.log_error(e, "llm_error", {
+            "error_type": type(e).__name__,
+            "engine": self.config.engine,
+            "model": self.config.model,
+            "base_url": self.config.base_url,
+            "request_id": request.request_id
+        })
+
+        if isinstance(e, LLMError):
+            raise e
+        if isinstance(e, asyncio.TimeoutError):
+            raise LLMTimeoutError(f"LLM request timed out after {self.config.timeout}s") from e
+        if isinstance(e, aiohttp.ClientResponseError):
+            if e.status == 401:
+                raise LLMAuthenticationError(f"LLM authentication failed: {str(e)}") from e
+            if e.status == 429:
+                raise LLMRateLimitError(f"LLM rate limit exceeded: {str(e)}") from e
+            raise LLMError(f"LLM request failed: {str(e)}") from e
+        if isinstance(e, aiohttp.ClientConnectionError):
+            raise LLMConnectionError(f"LLM connection failed: {str(e)}") from e
+        raise LLMError(f"LLM request failed: {str(e)}") from e
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get concurrency and circuit breaker status."""
+        return {
+            "engine": self.config.engine,
+            "model": self.config.model,
+            "base_url": self.config.base_url,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "circuit_breaker_state": self.circuit_breaker.state if self.circuit_breaker else "disabled",
+            "timestamp": datetime.now().isoformat()
+        }
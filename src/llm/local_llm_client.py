@@ -27,10 +27,12 @@ import logging
 import traceback
 import threading
 import queue
-from typing import Dict, Any, Optional, List, Union
+from collections import deque, OrderedDict
+from contextlib import closing
+from typing import Dict, Any, Optional, List, Union, Iterable, Iterator, Tuple
 from pathlib import Path
 from datetime import datetime
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from requests.exceptions import RequestException, Timeout, ConnectionError as RequestsConnectionError
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
@@ -39,6 +41,7 @@ from requests.adapters import HTTPAdapter
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from main import HearthlinkLogger, HearthlinkError
+from utils.single_flight import default_single_flight, request_key
 
 
 class LLMError(HearthlinkError):
@@ -88,6 +91,11 @@ class LLMConfig:
     enable_circuit_breaker: bool = True
     circuit_breaker_threshold: int = 5
     circuit_breaker_timeout: int = 60
+    max_concurrency: Optional[int] = None  # Parallel generations per model (async client)
+    coalesce_requests: bool = True  # Identical concurrent generations share one upstream call
+    keep_alive: Optional[str] = None  # Ollama: how long the model (and its KV cache) stays loaded, e.g. "30m"
+    session_context_tokens: int = 4096  # Ollama: restart a session's context continuation past this size
+    max_prompt_sessions: int = 256  # Ollama: sessions whose context tokens are kept
 
 
 @dataclass
@@ -100,6 +108,11 @@ class LLMRequest:
     stream: bool = False
     context: Optional[Dict[str, Any]] = None
     request_id: Optional[str] = None
+    session_id: Optional[str] = None  # Enables Ollama context continuation across turns
+    continuation_prompt: Optional[str] = None  # Sent instead of prompt when the session context is reused
+    volatile_context: Optional[str] = None  # Per-request details (time, etc.) appended after the prompt
+    keep_alive: Optional[str] = None
+    engine_context: Optional[List[int]] = None  # Set by the client when continuing a session
 
 
 @dataclass
@@ -113,6 +126,17 @@ class LLMResponse:
     finish_reason: Optional[str] = None
     context: Optional[Dict[str, Any]] = None
     request_id: Optional[str] = None
+    time_to_first_token: Optional[float] = None
+
+
+@dataclass
+class LLMStreamChunk:
+    """One piece of a streamed LLM response; the final chunk has done=True."""
+    content: str
+    done: bool = False
+    finish_reason: Optional[str] = None
+    usage: Optional[Dict[str, int]] = None
+    request_id: Optional[str] = None
 
 
 @dataclass
@@ -132,6 +156,214 @@ class LLMErrorContext:
     request_data: Optional[Dict[str, Any]] = None
 
 
+def iter_ndjson_stream(lines: Iterable[str], content_field: str = "response") -> Iterator[LLMStreamChunk]:
+    """
+    Parse a newline-delimited JSON token stream (Ollama /api/generate).
+    
+    Args:
+        lines: Decoded response lines
+        content_field: Field holding the token text in each object
+        
+    Yields:
+        LLMStreamChunk: One chunk per object; the last one has done=True
+    """
+    done = False
+    for line in lines:
+        if not line or not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise LLMResponseError(f"Invalid stream line: {line[:200]}") from e
+        
+        if data.get("error"):
+            raise LLMResponseError(f"LLM stream error: {data['error']}")
+        
+        done = bool(data.get("done", False))
+        chunk = LLMStreamChunk(content=data.get(content_field) or "", done=done)
+        if done:
+            chunk.finish_reason = data.get("done_reason") or data.get("finish_reason") or "stop"
+            if "eval_count" in data or "prompt_eval_count" in data:
+                chunk.usage = {
+                    "prompt_tokens": data.get("prompt_eval_count", 0),
+                    "completion_tokens": data.get("eval_count", 0),
+                    "total_tokens": data.get("prompt_eval_count", 0) + data.get("eval_count", 0)
+                }
+            else:
+                chunk.usage = data.get("usage")
+        yield chunk
+        if done:
+            return
+    
+    if not done:
+        raise LLMResponseError("LLM stream ended before completion")
+
+
+def iter_sse_stream(lines: Iterable[str]) -> Iterator[LLMStreamChunk]:
+    """
+    Parse an OpenAI-style server-sent event stream (LM Studio /v1/chat/completions).
+    
+    Args:
+        lines: Decoded response lines
+        
+    Yields:
+        LLMStreamChunk: One chunk per delta, then a final chunk with done=True
+    """
+    finish_reason = None
+    usage = None
+    data_lines: List[str] = []
+    
+    def parse_event(payload: str) -> Optional[LLMStreamChunk]:
+        nonlocal finish_reason, usage
+        try:
+            data = json.loads(payload)
+        except json.JSONDecodeError as e:
+            raise LLMResponseError(f"Invalid stream event: {payload[:200]}") from e
+        if data.get("error"):
+            raise LLMResponseError(f"LLM stream error: {data['error']}")
+        
+        usage = data.get("usage") or usage
+        choices = data.get("choices") or []
+        if not choices:
+            return None
+        choice = choices[0]
+        finish_reason = choice.get("finish_reason") or finish_reason
+        content = (choice.get("delta") or {}).get("content") or choice.get("text") or ""
+        return LLMStreamChunk(content=content) if content else None
+    
+    for line in lines:
+        if line is None:
+            continue
+        line = line.rstrip("\r")
+        if line:
+            if line.startswith("data:"):
+                data_lines.append(line[5:].lstrip(" "))
+            # Comments (":") and other fields carry no tokens
+            continue
+        
+        # A blank line ends the event
+        if not data_lines:
+            continue
+        payload, data_lines = "\n".join(data_lines), []
+        if payload == "[DONE]":
+            break
+        chunk = parse_event(payload)
+        if chunk:
+            yield chunk
+    else:
+        if data_lines and "\n".join(data_lines) != "[DONE]":
+            chunk = parse_event("\n".join(data_lines))
+            if chunk:
+                yield chunk
+    
+    yield LLMStreamChunk(content="", done=True, finish_reason=finish_reason or "stop", usage=usage)
+
+
+def assemble_prompt(request: LLMRequest) -> str:
+    """
+    Final prompt text: the stable part first, volatile details last.
+    
+    Keeping per-request details (current time, ids) at the tail means
+    consecutive prompts share the longest possible prefix, which local
+    engines reuse from their KV cache instead of re-evaluating.
+    """
+    if request.volatile_context:
+        return f"{request.prompt}\n\n{request.volatile_context}"
+    return request.prompt
+
+
+def build_generation_request(config: LLMConfig, request: LLMRequest,
+                             stream: bool) -> Tuple[str, Dict[str, Any]]:
+    """Build the engine-specific generation URL and JSON payload."""
+    prompt = assemble_prompt(request)
+    if config.engine == "ollama":
+        payload = {
+            "model": config.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "temperature": request.temperature or config.temperature,
+                "num_predict": request.max_tokens or config.max_tokens
+            }
+        }
+        if request.system_message:
+            payload["system"] = request.system_message
+        if request.keep_alive or config.keep_alive:
+            payload["keep_alive"] = request.keep_alive or config.keep_alive
+        if request.engine_context:
+            payload["context"] = request.engine_context
+        return f"{config.base_url}/api/generate", payload
+    
+    if config.engine == "lmstudio":
+        # OpenAI-compatible chat completions
+        messages = []
+        if request.system_message:
+            messages.append({"role": "system", "content": request.system_message})
+        messages.append({"role": "user", "content": prompt})
+        return f"{config.base_url}/v1/chat/completions", {
+            "model": config.model,
+            "messages": messages,
+            "temperature": request.temperature or config.temperature,
+            "max_tokens": request.max_tokens or config.max_tokens,
+            "stream": stream
+        }
+    
+    return f"{config.base_url}/generate", {
+        "prompt": prompt,
+        "system_message": request.system_message,
+        "temperature": request.temperature or config.temperature,
+        "max_tokens": request.max_tokens or config.max_tokens,
+        "stream": stream
+    }
+
+
+def parse_generation_response(engine: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a non-streaming generation reply and normalize it to content/usage/finish_reason."""
+    if engine == "ollama":
+        # Validate response structure
+        if "response" not in data:
+            raise LLMResponseError("Invalid Ollama response: missing 'response' field")
+        
+        # Ollama response format
+        return {
+            "content": data.get("response", ""),
+            "usage": {
+                "prompt_tokens": data.get("prompt_eval_count", 0),
+                "completion_tokens": data.get("eval_count", 0),
+                "total_tokens": data.get("prompt_eval_count", 0) + data.get("eval_count", 0)
+            },
+            "finish_reason": "stop" if data.get("done", False) else "length",
+            # Token state for continuing this conversation, and prompt processing time (ns)
+            "engine_context": data.get("context"),
+            "prompt_eval_duration": data.get("prompt_eval_duration")
+        }
+    
+    if engine == "lmstudio":
+        # Validate response structure
+        if "choices" not in data or not data["choices"]:
+            raise LLMResponseError("Invalid LM Studio response: missing or empty 'choices' field")
+        
+        choice = data["choices"][0]
+        if "message" not in choice or "content" not in choice["message"]:
+            raise LLMResponseError("Invalid LM Studio response: missing message content")
+        
+        return {
+            "content": choice["message"]["content"],
+            "usage": data.get("usage"),
+            "finish_reason": choice.get("finish_reason")
+        }
+    
+    # Validate response structure
+    if "content" not in data:
+        raise LLMResponseError("Invalid custom response: missing 'content' field")
+    
+    return {
+        "content": data.get("content", ""),
+        "usage": data.get("usage"),
+        "finish_reason": data.get("finish_reason", "stop")
+    }
+
+
 class CircuitBreaker:
     """Circuit breaker pattern for LLM requests."""
     
@@ -164,6 +396,29 @@ class CircuitBreaker:
                 self.state = "OPEN"
             
             raise e
+    
+    async def call_async(self, func, *args, **kwargs):
+        """Await coroutine function with circuit breaker protection."""
+        if self.state == "OPEN":
+            if time.time() - self.last_failure_time > self.timeout:
+                self.state = "HALF_OPEN"
+            else:
+                raise LLMConnectionError("Circuit breaker is OPEN - too many recent failures")
+        
+        try:
+            result = await func(*args, **kwargs)
+            if self.state == "HALF_OPEN":
+                self.state = "CLOSED"
+                self.failure_count = 0
+            return result
+        except Exception as e:
+            self.failure_count += 1
+            self.last_failure_time = time.time()
+            
+            if self.failure_count >= self.threshold:
+                self.state = "OPEN"
+            
+            raise e
 
 
 class LLMConnectionPool:
@@ -262,6 +517,103 @@ class LLMConnectionPool:
             }
 
 
+class PromptSessionCache:
+    """
+    Per-session prompt state for Ollama context continuation.
+    
+    Remembers the context tokens each session's last reply returned, so the
+    next turn can send only its new text, and tracks how often a turn
+    reused the previous prefix.
+    """
+    
+    def __init__(self, max_sessions: int = 256, max_context_tokens: int = 4096):
+        self.max_sessions = max_sessions
+        self.max_context_tokens = max_context_tokens
+        self.lock = threading.Lock()
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.stats = {"requests": 0, "prefix_hits": 0, "prefix_misses": 0}
+        self.miss_reasons: Dict[str, int] = {}
+        self.prefix_chars_reused = 0
+        self.prefix_chars_total = 0
+        self.prompt_eval_ms = {"hit": deque(maxlen=1000), "miss": deque(maxlen=1000)}
+    
+    def begin(self, session_id: str, system_message: Optional[str], full_prompt: str,
+              can_continue: bool) -> Optional[List[int]]:
+        """Context tokens to continue from, or None to send the full prompt."""
+        text = f"{system_message or ''}\n{full_prompt}"
+        with self.lock:
+            self.stats["requests"] += 1
+            entry = self.sessions.get(session_id)
+            
+            # How much of this prompt repeats the session's previous one
+            if entry is not None:
+                self.prefix_chars_reused += len(os.path.commonprefix([entry["text"], text]))
+                entry["text"] = text
+            self.prefix_chars_total += len(text)
+            
+            if entry is None:
+                reason = "new_session"
+            elif entry["system"] != system_message:
+                reason = "system_changed"
+            elif not can_continue:
+                reason = "no_continuation_prompt"
+            elif not entry["context"]:
+                reason = entry["reset_reason"]
+            else:
+                self.sessions.move_to_end(session_id)
+                self.stats["prefix_hits"] += 1
+                return entry["context"]
+            
+            if entry is None:
+                self.sessions[session_id] = {"system": system_message, "context": None,
+                                             "reset_reason": "new_session", "text": text}
+                while len(self.sessions) > self.max_sessions:
+                    self.sessions.popitem(last=False)
+            self.stats["prefix_misses"] += 1
+            self.miss_reasons[reason] = self.miss_reasons.get(reason, 0) + 1
+            return None
+    
+    def complete(self, session_id: str, system_message: Optional[str],
+                 engine_context: Optional[List[int]], continued: bool,
+                 prompt_eval_duration: Optional[int] = None):
+        """Store the context a reply returned for the session's next turn."""
+        with self.lock:
+            entry = self.sessions.get(session_id)
+            if entry is None:
+                return
+            entry["system"] = system_message
+            if engine_context and len(engine_context) > self.max_context_tokens:
+                # Start over from the caller's (bounded) full prompt
+                entry["context"], entry["reset_reason"] = None, "context_limit"
+            elif engine_context:
+                entry["context"] = engine_context
+            else:
+                entry["context"], entry["reset_reason"] = None, "no_context_returned"
+            if prompt_eval_duration:
+                self.prompt_eval_ms["hit" if continued else "miss"].append(prompt_eval_duration / 1e6)
+    
+    def reset(self, session_id: str, reason: str = "error"):
+        """Drop a session's context so its next turn sends the full prompt."""
+        with self.lock:
+            entry = self.sessions.get(session_id)
+            if entry is not None:
+                entry["context"], entry["reset_reason"] = None, reason
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Prefix hit/miss counts and prompt evaluation time for each."""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["sessions"] = len(self.sessions)
+            stats["miss_reasons"] = dict(self.miss_reasons)
+            stats["hit_rate"] = stats["prefix_hits"] / stats["requests"] if stats["requests"] else 0.0
+            stats["prefix_reuse"] = (self.prefix_chars_reused / self.prefix_chars_total
+                                     if self.prefix_chars_total else 0.0)
+            for kind, samples in self.prompt_eval_ms.items():
+                if samples:
+                    stats[f"avg_prompt_eval_ms_{kind}"] = sum(samples) / len(samples)
+            return stats
+
+
 class LocalLLMClient:
     """
     Unified client for local LLM engines.
@@ -297,6 +649,20 @@ class LocalLLMClient:
                 config.circuit_breaker_timeout
             ) if config.enable_circuit_breaker else None
             
+            # Streaming metrics (time to first token, seconds)
+            self.streams_completed = 0
+            self.ttft_samples = deque(maxlen=1000)
+            
+            # Created on first agenerate() call
+            self._async_client = None
+            
+            # Process-wide, so duplicates from other clients coalesce too
+            self.single_flight = default_single_flight
+            
+            # Context continuation and prefix statistics per session
+            self.prompt_sessions = PromptSessionCache(config.max_prompt_sessions,
+                                                      config.session_context_tokens)
+            
             # Configure session
             self.session.timeout = config.timeout
             if config.api_key:
@@ -486,6 +852,11 @@ class LocalLLMClient:
         if not request.request_id:
             request.request_id = f"req_{int(time.time() * 1000)}"
         
+        if request.stream:
+            return self._collect_stream(request)
+        
+        request = self._assemble_request(request)
+        
         try:
             # Log request
             self.logger.logger.info("LLM generation request", 
@@ -498,13 +869,24 @@ class LocalLLMClient:
                                       "temperature": request.temperature or self.config.temperature
                                   }})
             
-            # Use circuit breaker if enabled
-            if self.circuit_breaker:
-                response_data = self.circuit_breaker.call(
-                    self._generate_with_retry, request
-                )
+            def send():
+                # Use circuit breaker if enabled
+                if self.circuit_breaker:
+                    return self.circuit_breaker.call(
+                        self._generate_with_retry, request
+                    )
+                return self._generate_with_retry(request)
+            
+            if self.config.coalesce_requests:
+                response_data = self.single_flight.do(self._flight_key(request, stream=False), send)
             else:
-                response_data = self._generate_with_retry(request)
+                response_data = send()
+            
+            if request.session_id:
+                self.prompt_sessions.complete(request.session_id, request.system_message,
+                                              response_data.get("engine_context"),
+                                              continued=request.engine_context is not None,
+                                              prompt_eval_duration=response_data.get("prompt_eval_duration"))
             
             # Calculate response time
             response_time = time.time() - start_time
@@ -535,14 +917,60 @@ class LocalLLMClient:
             
         except Exception as e:
             response_time = time.time() - start_time
+            if request.session_id:
+                self.prompt_sessions.reset(request.session_id)
             self._handle_request_exception(e, request)
     
-    def _generate_with_retry(self, request: LLMRequest) -> Dict[str, Any]:
-        """Generate response with retry logic."""
+    def _assemble_request(self, request: LLMRequest) -> LLMRequest:
+        """
+        Pick the prompt to send for a session turn.
+        
+        With Ollama, a turn whose session has context tokens from its previous
+        reply sends only continuation_prompt along with those tokens, so the
+        history is not re-tokenized and its KV cache entries are reused.
+        Otherwise the full prompt is sent and the reply's context is kept for
+        the next turn.
+        """
+        if not request.session_id or request.engine_context:
+            return request
+        
+        can_continue = self.config.engine == "ollama" and request.continuation_prompt is not None
+        engine_context = self.prompt_sessions.begin(request.session_id, request.system_message,
+                                                    assemble_prompt(request), can_continue)
+        if engine_context:
+            return replace(request, prompt=request.continuation_prompt, engine_context=engine_context)
+        return request
+    
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        """
+        Generate response from local LLM without blocking the event loop.
+        
+        Delegates to AsyncLocalLLMClient, so async callers share its
+        per-endpoint connection pool and per-model concurrency limit.
+        
+        Args:
+            request: LLM request with prompt and parameters
+            
+        Returns:
+            LLMResponse: Generated response with metadata
+            
+        Raises:
+            LLMError: If generation fails
+        """
+        if self._async_client is None:
+            from .async_llm_client import AsyncLocalLLMClient
+            self._async_client = AsyncLocalLLMClient(self.config, self.logger)
+        return await self._async_client.generate(request)
+    
+    def _generate_with_retry(self, request: LLMRequest, open_stream: bool = False):
+        """Generate response (or open a response stream) with retry logic."""
         last_exception = None
         
         for retry_count in range(self.config.max_retries + 1):
             try:
+                if open_stream:
+                    return self._open_stream(request)
+                
                 # Generate response based on engine
                 if self.config.engine == "ollama":
                     return self._generate_ollama(request)
@@ -582,102 +1010,183 @@ class LocalLLMClient:
     
     def _generate_ollama(self, request: LLMRequest) -> Dict[str, Any]:
         """Generate response using Ollama API."""
-        url = f"{self.config.base_url}/api/generate"
-        
-        payload = {
-            "model": self.config.model,
-            "prompt": request.prompt,
-            "stream": request.stream,
-            "options": {
-                "temperature": request.temperature or self.config.temperature,
-                "num_predict": request.max_tokens or self.config.max_tokens
-            }
-        }
-        
-        if request.system_message:
-            payload["system"] = request.system_message
+        url, payload = build_generation_request(self.config, request, stream=False)
         
         response = self.session.post(url, json=payload)
         response.raise_for_status()
         
-        data = response.json()
-        
-        # Validate response structure
-        if "response" not in data:
-            raise LLMResponseError("Invalid Ollama response: missing 'response' field")
-        
-        # Ollama response format
-        return {
-            "content": data.get("response", ""),
-            "usage": {
-                "prompt_tokens": data.get("prompt_eval_count", 0),
-                "completion_tokens": data.get("eval_count", 0),
-                "total_tokens": data.get("prompt_eval_count", 0) + data.get("eval_count", 0)
-            },
-            "finish_reason": "stop" if data.get("done", False) else "length"
-        }
+        return parse_generation_response("ollama", response.json())
     
     def _generate_lmstudio(self, request: LLMRequest) -> Dict[str, Any]:
         """Generate response using LM Studio API (OpenAI-compatible)."""
-        url = f"{self.config.base_url}/v1/chat/completions"
+        url, payload = build_generation_request(self.config, request, stream=False)
         
-        messages = []
-        if request.system_message:
-            messages.append({"role": "system", "content": request.system_message})
-        messages.append({"role": "user", "content": request.prompt})
+        response = self.session.post(url, json=payload)
+        response.raise_for_status()
         
-        payload = {
-            "model": self.config.model,
-            "messages": messages,
-            "temperature": request.temperature or self.config.temperature,
-            "max_tokens": request.max_tokens or self.config.max_tokens,
-            "stream": request.stream
-        }
+        return parse_generation_response("lmstudio", response.json())
+    
+    def _generate_custom(self, request: LLMRequest) -> Dict[str, Any]:
+        """Generate response using custom endpoint."""
+        url, payload = build_generation_request(self.config, request, stream=False)
         
         response = self.session.post(url, json=payload)
         response.raise_for_status()
         
-        data = response.json()
+        return parse_generation_response("custom", response.json())
+    
+    def generate_stream(self, request: LLMRequest) -> Iterator[LLMStreamChunk]:
+        """
+        Stream a response from local LLM as tokens are generated.
         
-        # Validate response structure
-        if "choices" not in data or not data["choices"]:
-            raise LLMResponseError("Invalid LM Studio response: missing or empty 'choices' field")
+        Retries and the circuit breaker only cover opening the stream; once
+        tokens have been yielded a failure is raised to the caller.
         
-        choice = data["choices"][0]
-        if "message" not in choice or "content" not in choice["message"]:
-            raise LLMResponseError("Invalid LM Studio response: missing message content")
+        Args:
+            request: LLM request with prompt and parameters
+            
+        Yields:
+            LLMStreamChunk: Token chunks; the last one has done=True
+            
+        Raises:
+            LLMError: If the stream cannot be opened or breaks off
+        """
+        start_time = time.time()
         
-        return {
-            "content": choice["message"]["content"],
-            "usage": data.get("usage"),
-            "finish_reason": choice.get("finish_reason")
-        }
+        # Generate request ID if not provided
+        if not request.request_id:
+            request.request_id = f"req_{int(time.time() * 1000)}"
+        
+        self.logger.logger.info("LLM stream request", 
+                              extra={"extra_fields": {
+                                  "event_type": "llm_stream_request",
+                                  "request_id": request.request_id,
+                                  "engine": self.config.engine,
+                                  "model": self.config.model,
+                                  "prompt_length": len(request.prompt)
+                              }})
+        
+        def open_stream():
+            if self.circuit_breaker:
+                response = self.circuit_breaker.call(
+                    self._generate_with_retry, request, True
+                )
+            else:
+                response = self._generate_with_retry(request, True)
+            return self._iter_response(response)
+        
+        try:
+            # Concurrent identical streams are fanned out from one upstream stream
+            if self.config.coalesce_requests:
+                chunks = self.single_flight.stream(self._flight_key(request, stream=True), open_stream)
+            else:
+                chunks = open_stream()
+        except Exception as e:
+            self._handle_request_exception(e, request)
+        
+        time_to_first_token = None
+        response_length = 0
+        try:
+            with closing(chunks):
+                for chunk in chunks:
+                    if chunk.content and time_to_first_token is None:
+                        time_to_first_token = time.time() - start_time
+                        self.ttft_samples.append(time_to_first_token)
+                    response_length += len(chunk.content)
+                    # Chunks may be shared with other subscribers
+                    yield replace(chunk, request_id=request.request_id)
+        except LLMError:
+            raise
+        except Exception as e:
+            self._handle_request_exception(e, request)
+        
+        self.streams_completed += 1
+        self.logger.logger.info("LLM stream completed", 
+                              extra={"extra_fields": {
+                                  "event_type": "llm_stream_success",
+                                  "request_id": request.request_id,
+                                  "response_length": response_length,
+                                  "response_time": time.time() - start_time,
+                                  "time_to_first_token": time_to_first_token,
+                                  "model": self.config.model
+                              }})
     
-    def _generate_custom(self, request: LLMRequest) -> Dict[str, Any]:
-        """Generate response using custom endpoint."""
-        url = f"{self.config.base_url}/generate"
+    def _open_stream(self, request: LLMRequest) -> requests.Response:
+        """Send a streaming generation request and return the open response."""
+        url, payload = build_generation_request(self.config, request, stream=True)
         
-        payload = {
-            "prompt": request.prompt,
-            "system_message": request.system_message,
-            "temperature": request.temperature or self.config.temperature,
-            "max_tokens": request.max_tokens or self.config.max_tokens,
-            "stream": request.stream
-        }
+        # With stream=True the timeout bounds the wait for each chunk, not the whole reply
+        response = self.session.post(url, json=payload, stream=True, timeout=self.config.timeout)
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+        return response
+    
+    def _iter_response(self, response: requests.Response) -> Iterator[LLMStreamChunk]:
+        """Parse an open streaming response, closing it when done or abandoned."""
+        with response:
+            yield from self._parse_stream(response)
+    
+    def _flight_key(self, request: LLMRequest, stream: bool) -> str:
+        """Coalescing key: endpoint, model, prompt, system message and sampling params."""
+        url, payload = build_generation_request(self.config, request, stream)
+        return request_key(url, payload)
+    
+    def _parse_stream(self, response: requests.Response) -> Iterator[LLMStreamChunk]:
+        """Parse an open streaming response with the engine's wire format."""
+        # text/event-stream without a charset would otherwise decode as ISO-8859-1
+        response.encoding = "utf-8"
+        lines = response.iter_lines(decode_unicode=True)
         
-        response = self.session.post(url, json=payload)
-        response.raise_for_status()
+        if self.config.engine == "ollama":
+            return iter_ndjson_stream(lines, "response")
+        elif self.config.engine == "lmstudio":
+            return iter_sse_stream(lines)
+        else:
+            return iter_ndjson_stream(lines, "content")
+    
+    def _collect_stream(self, request: LLMRequest) -> LLMResponse:
+        """Consume generate_stream() into a single LLMResponse."""
+        start_time = time.time()
+        parts = []
+        final_chunk = None
+        time_to_first_token = None
         
-        data = response.json()
+        for chunk in self.generate_stream(request):
+            if chunk.content:
+                if time_to_first_token is None:
+                    time_to_first_token = time.time() - start_time
+                parts.append(chunk.content)
+            if chunk.done:
+                final_chunk = chunk
         
-        # Validate response structure
-        if "content" not in data:
-            raise LLMResponseError("Invalid custom response: missing 'content' field")
+        return LLMResponse(
+            content="".join(parts),
+            model=self.config.model,
+            usage=final_chunk.usage if final_chunk else None,
+            finish_reason=final_chunk.finish_reason if final_chunk else None,
+            response_time=time.time() - start_time,
+            timestamp=datetime.now().isoformat(),
+            context=request.context,
+            request_id=request.request_id,
+            time_to_first_token=time_to_first_token
+        )
+    
+    def get_stream_metrics(self) -> Dict[str, Any]:
+        """Get time-to-first-token statistics for streamed generations."""
+        samples = sorted(self.ttft_samples)
+        if not samples:
+            return {"streams_completed": self.streams_completed, "samples": 0}
         
         return {
-            "content": data.get("content", ""),
-            "usage": data.get("usage"),
-            "finish_reason": data.get("finish_reason", "stop")
+            "streams_completed": self.streams_completed,
+            "samples": len(samples),
+            "last_time_to_first_token": self.ttft_samples[-1],
+            "avg_time_to_first_token": sum(samples) / len(samples),
+            "p50_time_to_first_token": samples[len(samples) // 2],
+            "p95_time_to_first_token": samples[min(len(samples) - 1, int(len(samples) * 0.95))]
         }
     
     def list_models(self) -> List[Dict[str, Any]]:
@@ -733,7 +1242,10 @@ class LocalLLMClient:
                     "max_connections": pool_stats["max_connections"],
                     "health_status": health_status
                 },
-                "endpoint_health": health_status.get(self.config.base_url, False)
+                "endpoint_health": health_status.get(self.config.base_url, False),
+                "streaming": self.get_stream_metrics(),
+                "deduplication": self.single_flight.get_stats(),
+                "prompt_cache": self.prompt_sessions.get_stats()
             }
         except Exception as e:
             error_context = LLMErrorContext(
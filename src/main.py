@@ -676,9 +676,11 @@ class IPCHandler:
             # Initialize Core with Vault
             core_config = {
                 "turn_timeout": 300,
-                "auto_advance": True
+                "auto_advance": True,
+                "communal_memory": {"write_behind": True}
             }
             self.core = Core(core_config, self.vault, self.logger.logger)
+            self.core.start()
             
             # Initialize Synapse
             from synapse.synapse import SynapseConfig
@@ -756,6 +758,9 @@ class IPCHandler:
             self.logger.log_error(e, "ipc_main_loop")
         finally:
             self.running = False
+            if self.core:
+                # Write buffered communal memory back to the Vault
+                self.core.shutdown()
     
     def _process_command(self, command):
         """Process a command from Electron and return response."""
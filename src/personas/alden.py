@@ -37,6 +37,7 @@ from vault.lightweight_rag_cag_vault import LightweightRAGCAGVault
 from vault.schema import PersonaMemory as VaultPersonaMemory
 from utils.performance_optimizer import performance_optimizer
 from utils.memory_optimizer import MemoryOptimizer
+from personas.conversation_window import ConversationWindowRegistry
 
 
 class PersonaError(HearthlinkError):
@@ -178,6 +179,9 @@ class AldenPersona:
     and adaptive growth capabilities.
     """
     
+    # Recent turns per "user_id:session_id", shared by all instances
+    _conversation_windows = ConversationWindowRegistry(max_sessions=256, max_turns=20, max_tokens=1024)
+    
     def __init__(self, llm_client: LocalLLMClient, logger: Optional[HearthlinkLogger] = None):
         """
         Initialize Alden persona.
@@ -570,11 +574,10 @@ class AldenPersona:
 
 CRITICAL: Keep ALL responses to 1-2 sentences maximum. Be direct and helpful.
 
-Current Date/Time: {current_datetime}
 Traits: Openness {openness}, Conscientiousness {conscientiousness}, Extraversion {extraversion}, Agreeableness {agreeableness}, Emotional Stability {emotional_stability}
 Style: {motivation_style} | Trust: {trust_level}
 
-Rules: Maximum 1-2 sentences. Use {user_name} or "friend". Be warm but brief. You are fully time-aware and can reference current time, date, day of week, etc. in responses."""
+Rules: Maximum 1-2 sentences. Use {user_name} or "friend". Be warm but brief. You are fully time-aware: the current date/time is given at the end of each message and you can reference time, date, day of week, etc. in responses."""
 
             self.baseline_user_prompt_template = """{user_name}: {user_message}
 
@@ -583,6 +586,28 @@ Reply in 1-2 sentences max."""
         except Exception as e:
             raise PersonaError(f"Failed to load baseline prompts: {str(e)}") from e
     
+    def _get_system_prompt(self, user_name: str) -> str:
+        """Format the system prompt, reusing the last one while its inputs are unchanged."""
+        values = dict(
+            openness=self.memory.traits["openness"],
+            conscientiousness=self.memory.traits["conscientiousness"],
+            extraversion=self.memory.traits["extraversion"],
+            agreeableness=self.memory.traits["agreeableness"],
+            emotional_stability=self.memory.traits["emotional_stability"],
+            motivation_style=self.memory.motivation_style,
+            trust_level=self.memory.trust_level,
+            learning_agility=self.memory.learning_agility,
+            reflective_capacity=self.memory.reflective_capacity,
+            user_name=user_name
+        )
+        key = tuple(sorted(values.items()))
+        cached = getattr(self, '_system_prompt_cache', None)
+        if cached and cached[0] == key:
+            return cached[1]
+        prompt = self.baseline_system_prompt.format(**values)
+        self._system_prompt_cache = (key, prompt)
+        return prompt
+    
     def _detect_user_name_introduction(self, message: str) -> Optional[str]:
         """Detect if user is introducing themselves and extract their name."""
         import re
@@ -633,6 +658,8 @@ Reply in 1-2 sentences max."""
             if not user_message or not user_message.strip():
                 raise PersonaValidationError("User message cannot be empty")
             
+            # A generated id only labels this one turn; there is no conversation to continue
+            has_session = bool(session_id)
             session_id = session_id or str(uuid.uuid4())
             timestamp = datetime.now().isoformat()
             
@@ -679,73 +706,32 @@ Reply in 1-2 sentences max."""
                                   }})
             
             # Prepare system prompt with current memory state and time awareness
-            current_time = datetime.now()
-            system_prompt = self.baseline_system_prompt.format(
-                current_datetime=current_time.strftime("%A, %B %d, %Y at %I:%M %p"),
-                openness=self.memory.traits["openness"],
-                conscientiousness=self.memory.traits["conscientiousness"],
-                extraversion=self.memory.traits["extraversion"],
-                agreeableness=self.memory.traits["agreeableness"],
-                emotional_stability=self.memory.traits["emotional_stability"],
-                motivation_style=self.memory.motivation_style,
-                trust_level=self.memory.trust_level,
-                learning_agility=self.memory.learning_agility,
-                reflective_capacity=self.memory.reflective_capacity,
-                user_name=user_name or "friend"
-            )
+            system_prompt = self._get_system_prompt(user_name or "friend")
             
-            # Simple in-memory conversation history (fallback when database fails)
-            if not hasattr(self.__class__, '_conversation_memory'):
-                self.__class__._conversation_memory = {}
+            # Recent turns come from the in-memory window; older ones are summarized
+            window = self._conversation_windows.get(f"{effective_user_id}:{session_id}") if has_session else None
+            conversation_history = window.render() if window is not None else ""
+            if not conversation_history:
+                conversation_history = "[This is the start of a new conversation session.]\n"
             
-            conversation_history = ""
-            try:
-                # Try database first, fallback to memory
-                history = None
-                if hasattr(self, 'db_manager') and self.db_manager and session_id:
-                    try:
-                        history = self.db_manager.get_conversation_history(session_id, limit=10)
-                    except Exception:
-                        history = None
-                
-                # Fallback to in-memory storage
-                if not history and session_id:
-                    memory_key = f"{effective_user_id}:{session_id}"
-                    history = self.__class__._conversation_memory.get(memory_key, [])
-                
-                if history:
-                    conversation_history = "\n\nPrevious conversation in this session:\n"
-                    for conv in history:
-                        role = conv.get('role', 'unknown')
-                        content = conv.get('content', '')
-                        if role == 'user':
-                            conversation_history += f"Human: {content}\n"
-                        elif role == 'assistant':
-                            conversation_history += f"Alden: {content}\n\n"
-                else:
-                    conversation_history = "\n\n[This is the start of a new conversation session.]\n"
-                    
-            except Exception as e:
-                self.logger.logger.warning(f"Failed to retrieve conversation history: {e}")
-                conversation_history = "\n\n[Conversation history unavailable.]\n"
-            
-            # Prepare user prompt
+            # Prepare user prompt; history first so earlier turns stay a stable prefix
             recent_mood = "neutral"
             if self.memory.session_mood:
                 recent_mood = self.memory.session_mood[-1].mood
             
-            user_prompt = self.baseline_user_prompt_template.format(
+            turn_prompt = self.baseline_user_prompt_template.format(
                 user_message=user_message,
                 user_name=user_name,
                 session_id=session_id,
                 timestamp=timestamp,
                 user_tags=", ".join(self.memory.user_tags) if self.memory.user_tags else "none",
                 recent_mood=recent_mood
-            ) + conversation_history
+            )
             
-            # Generate LLM response
+            # Generate LLM response; the time goes last so the prompt prefix stays stable,
+            # and follow-up turns can continue from the engine's session context
             llm_request = LLMRequest(
-                prompt=user_prompt,
+                prompt=conversation_history + "\n" + turn_prompt,
                 system_message=system_prompt,
                 temperature=0.5,  # Lower for more focused responses
                 max_tokens=64,    # Very small for 1-2 sentence responses only
@@ -754,7 +740,10 @@ Reply in 1-2 sentences max."""
                     "user_id": self.memory.user_id,
                     "persona_id": "alden"
                 },
-                request_id=request_id
+                request_id=request_id,
+                session_id=f"alden:{effective_user_id}:{session_id}" if has_session else None,
+                continuation_prompt=turn_prompt if has_session else None,
+                volatile_context=f"Current Date/Time: {datetime.now().strftime('%A, %B %d, %Y at %I:%M %p')}"
             )
             
             llm_response = self.llm_client.generate(llm_request)
@@ -836,29 +825,10 @@ Reply in 1-2 sentences max."""
                     except Exception:
                         stored_in_db = False
                 
-                # Always store in memory as backup/fallback
-                if session_id:
-                    memory_key = f"{effective_user_id}:{session_id}"
-                    if memory_key not in self.__class__._conversation_memory:
-                        self.__class__._conversation_memory[memory_key] = []
-                    
-                    # Add user message
-                    self.__class__._conversation_memory[memory_key].append({
-                        'role': 'user',
-                        'content': user_message,
-                        'timestamp': timestamp
-                    })
-                    
-                    # Add assistant response
-                    self.__class__._conversation_memory[memory_key].append({
-                        'role': 'assistant',
-                        'content': llm_response.content,
-                        'timestamp': timestamp
-                    })
-                    
-                    # Keep only last 20 messages per session
-                    if len(self.__class__._conversation_memory[memory_key]) > 20:
-                        self.__class__._conversation_memory[memory_key] = self.__class__._conversation_memory[memory_key][-20:]
+                # The window is what the next turn's prompt is built from
+                if window is not None:
+                    window.append('user', user_message, timestamp)
+                    window.append('assistant', llm_response.content, timestamp)
                 
             except Exception as db_error:
                 self.logger.logger.warning(f"Failed to store conversation in database: {db_error}")
@@ -1381,16 +1351,8 @@ Reply in 1-2 sentences max."""
     
     def _cleanup_conversation_memory(self):
         """Clean up old conversation memory to free resources."""
-        if hasattr(self.__class__, '_conversation_memory'):
-            # Keep only last 50 conversations across all sessions
-            for session_key in list(self.__class__._conversation_memory.keys()):
-                if len(self.__class__._conversation_memory[session_key]) > 50:
-                    self.__class__._conversation_memory[session_key] = self.__class__._conversation_memory[session_key][-50:]
-            
-            # Remove empty sessions
-            empty_sessions = [k for k, v in self.__class__._conversation_memory.items() if not v]
-            for session in empty_sessions:
-                del self.__class__._conversation_memory[session]
+        # Drop windows for sessions idle over an hour
+        self._conversation_windows.prune(idle_seconds=3600)
     
     def _perform_self_assessment(self) -> Dict[str, Any]:
         """
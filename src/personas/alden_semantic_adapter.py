@@ -9,6 +9,7 @@ import sys
 import json
 import uuid
 import asyncio
+import functools
 import aiohttp
 from datetime import datetime
 from pathlib import Path
@@ -20,6 +21,7 @@ import logging
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from personas.alden import AldenPersona, PersonaError
+from personas.memory_write_queue import MemoryWriteQueue
 from embedding.semantic_embedding_service import SemanticMemoryManager
 from database.pgvector_client import PGVectorClient
 from llm.local_llm_client import LocalLLMClient, LLMRequest, LLMResponse
@@ -57,7 +59,7 @@ class AldenSemanticAdapter:
     
     Provides:
     - Real-time semantic memory retrieval during conversations
-    - Automatic memory storage with embeddings
+    - Automatic memory storage with embeddings, off the response path
     - Reasoning chain generation for complex queries
     - Performance monitoring and optimization
     """
@@ -67,7 +69,8 @@ class AldenSemanticAdapter:
         llm_client: LocalLLMClient,
         semantic_vault_url: str = "http://localhost:8082",
         vault_auth_token: str = None,
-        logger: Optional[logging.Logger] = None
+        logger: Optional[logging.Logger] = None,
+        spool_path: Optional[str] = None
     ):
         """
         Initialize enhanced Alden adapter
@@ -77,6 +80,8 @@ class AldenSemanticAdapter:
             semantic_vault_url: Base URL for semantic vault API
             vault_auth_token: Authorization token for vault API
             logger: Optional logger instance
+            spool_path: Spool file for conversation memories not yet stored; defaults to
+                memory_spool/alden_semantic.jsonl in the data directory next to Alden's Vault
         """
         self.logger = logger or logging.getLogger(__name__)
         self.semantic_vault_url = semantic_vault_url.rstrip('/')
@@ -103,6 +108,15 @@ class AldenSemanticAdapter:
         self.response_cache: Dict[str, Dict[str, Any]] = {}
         self.cache_max_size = 100
         
+        # Keyword extraction, embedding and storage run in the background
+        if spool_path is None:
+            if self.alden.vault is not None:
+                data_dir = Path(self.alden.vault.storage_path).parent
+            else:
+                data_dir = Path(__file__).parent.parent.parent / "hearthlink_data"
+            spool_path = str(data_dir / "memory_spool" / "alden_semantic.jsonl")
+        self.memory_queue = MemoryWriteQueue(self._persist_memory_batch, spool_path, logger=self.logger)
+        
         self.logger.info("Alden Semantic Adapter initialized", extra={
             "semantic_vault_url": self.semantic_vault_url,
             "direct_mode": self.direct_mode,
@@ -236,9 +250,10 @@ class AldenSemanticAdapter:
         memory_type: str = "episodic",
         keywords: List[str] = None,
         relevance_score: float = 0.8,
-        metadata: Dict[str, Any] = None
+        metadata: Dict[str, Any] = None,
+        session: Optional[aiohttp.ClientSession] = None
     ) -> bool:
-        """Store memory using semantic vault API"""
+        """Store memory using semantic vault API (on a shared session if given)"""
         try:
             headers = {
                 "Authorization": f"Bearer {self.vault_auth_token}",
@@ -257,24 +272,29 @@ class AldenSemanticAdapter:
                 "metadata": metadata
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.semantic_vault_url}/api/semantic/store",
-                    headers=headers,
-                    json=request_data,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    if response.status == 200:
-                        return True
-                    else:
-                        error_text = await response.text()
-                        self.logger.error(f"Memory store API error {response.status}: {error_text}")
-                        return False
+            if session is None:
+                async with aiohttp.ClientSession() as session:
+                    return await self._post_memory(session, headers, request_data)
+            return await self._post_memory(session, headers, request_data)
                         
         except Exception as e:
             self.logger.error(f"Failed to store memory via API: {e}")
             return False
     
+    async def _post_memory(self, session: aiohttp.ClientSession, headers: Dict[str, str],
+                           request_data: Dict[str, Any]) -> bool:
+        async with session.post(
+            f"{self.semantic_vault_url}/api/semantic/store",
+            headers=headers,
+            json=request_data,
+            timeout=aiohttp.ClientTimeout(total=30)
+        ) as response:
+            if response.status == 200:
+                return True
+            error_text = await response.text()
+            self.logger.error(f"Memory store API error {response.status}: {error_text}")
+            return False
+    
     async def _store_memory_direct(
         self,
         slice_id: str,
@@ -334,6 +354,38 @@ class AldenSemanticAdapter:
         word_counts = Counter(keywords)
         return [word for word, count in word_counts.most_common(10)]
     
+    async def _persist_memory(self, job: Dict[str, Any],
+                              session: Optional[aiohttp.ClientSession] = None) -> bool:
+        """Extract keywords for one conversation turn and store it with its embedding"""
+        keywords = await self._extract_keywords(f"{job['user_message']} {job['response']}")
+        store_args = dict(
+            slice_id=job["slice_id"],
+            content=f"User: {job['user_message']}\nAlden: {job['response']}",
+            user_id=job["user_id"],
+            persona_id="alden",
+            memory_type="episodic",
+            keywords=keywords,
+            relevance_score=0.8,
+            metadata=job["metadata"]
+        )
+        if self.direct_mode and self.semantic_manager:
+            return await self._store_memory_direct(**store_args)
+        return await self._store_memory_api(session=session, **store_args)
+    
+    async def _persist_memory_batch(self, jobs: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Store a batch of queued conversation turns concurrently; the embedding
+        service encodes concurrent requests together, and API mode shares
+        one HTTP session per batch.
+        """
+        if self.direct_mode and self.semantic_manager:
+            results = await asyncio.gather(*(self._persist_memory(job) for job in jobs))
+        else:
+            async with aiohttp.ClientSession() as session:
+                results = await asyncio.gather(*(self._persist_memory(job, session) for job in jobs))
+        self.stats["memory_stores"] += sum(1 for ok in results if ok)
+        return list(results)
+    
     async def generate_enhanced_response(
         self,
         user_message: str,
@@ -439,14 +491,17 @@ class AldenSemanticAdapter:
                 enhanced_context["semantic_memories"] = memory_context
                 enhanced_context["memory_count"] = len(semantic_context.retrieved_memories)
             
-            # Step 3: Generate Alden's response using enhanced context
+            # Step 3: Generate Alden's response using enhanced context; the blocking
+            # LLM call runs in an executor so other sessions keep being served
             enhanced_context["user_id"] = effective_user_id
-            response_metadata = self.alden.generate_response(
+            loop = asyncio.get_running_loop()
+            response_metadata = await loop.run_in_executor(None, functools.partial(
+                self.alden.generate_response,
                 user_message=user_message,
                 session_id=session_id,
                 context=enhanced_context,
                 return_metadata=True
-            )
+            ))
             
             if not isinstance(response_metadata, dict):
                 # Fallback if metadata format unexpected
@@ -458,47 +513,28 @@ class AldenSemanticAdapter:
                     "timestamp": datetime.now().isoformat()
                 }
             
-            # Step 4: Store conversation in semantic memory (if enabled)
+            # Step 4: Queue the conversation for semantic memory (if enabled); keywords,
+            # embedding and storage happen in the background and survive a crash via the spool
             memory_stored = False
             if store_conversation:
-                slice_id = f"slice_{session_id}_{int(datetime.now().timestamp())}"
-                conversation_content = f"User: {user_message}\nAlden: {response_metadata['content']}"
-                keywords = await self._extract_keywords(f"{user_message} {response_metadata['content']}")
-                
-                metadata = {
-                    "session_id": session_id,
-                    "user_id": effective_user_id,
-                    "response_time_ms": int((response_metadata.get("response_time", 0)) * 1000),
-                    "model_used": response_metadata.get("model", "unknown"),
-                    "semantic_context_used": semantic_context is not None,
-                    "memories_retrieved": len(semantic_context.retrieved_memories) if semantic_context else 0
-                }
-                
-                if self.direct_mode and self.semantic_manager:
-                    memory_stored = await self._store_memory_direct(
-                        slice_id=slice_id,
-                        content=conversation_content,
-                        user_id=effective_user_id,
-                        persona_id="alden",
-                        memory_type="episodic",
-                        keywords=keywords,
-                        relevance_score=0.8,
-                        metadata=metadata
-                    )
-                else:
-                    memory_stored = await self._store_memory_api(
-                        slice_id=slice_id,
-                        content=conversation_content,
-                        user_id=effective_user_id,
-                        persona_id="alden",
-                        memory_type="episodic",
-                        keywords=keywords,
-                        relevance_score=0.8,
-                        metadata=metadata
-                    )
-                
-                if memory_stored:
-                    self.stats["memory_stores"] += 1
+                try:
+                    await self.memory_queue.enqueue({
+                        "slice_id": f"slice_{session_id}_{int(datetime.now().timestamp())}",
+                        "user_message": user_message,
+                        "response": response_metadata["content"],
+                        "user_id": effective_user_id,
+                        "metadata": {
+                            "session_id": session_id,
+                            "user_id": effective_user_id,
+                            "response_time_ms": int((response_metadata.get("response_time", 0)) * 1000),
+                            "model_used": response_metadata.get("model", "unknown"),
+                            "semantic_context_used": semantic_context is not None,
+                            "memories_retrieved": len(semantic_context.retrieved_memories) if semantic_context else 0
+                        }
+                    })
+                    memory_stored = True
+                except Exception as queue_error:
+                    self.logger.error(f"Failed to queue conversation memory: {queue_error}")
             
             # Step 5: Calculate metrics and create response
             total_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
@@ -565,11 +601,12 @@ class AldenSemanticAdapter:
             
             # Fallback to basic Alden response
             try:
-                basic_response = self.alden.generate_response(
+                basic_response = await asyncio.get_running_loop().run_in_executor(None, functools.partial(
+                    self.alden.generate_response,
                     user_message=user_message,
                     session_id=session_id,
                     context={"user_id": effective_user_id}
-                )
+                ))
                 
                 return AldenResponse(
                     content=str(basic_response),
@@ -617,6 +654,7 @@ class AldenSemanticAdapter:
                 "adapter_stats": self.stats,
                 "alden_persona_stats": alden_stats,
                 "semantic_memory_stats": semantic_stats,
+                "persistence_stats": self.memory_queue.get_stats(),
                 "cache_stats": {
                     "cache_size": len(self.response_cache),
                     "cache_max_size": self.cache_max_size,
@@ -716,6 +754,9 @@ class AldenSemanticAdapter:
     
     async def cleanup(self):
         """Cleanup resources"""
+        # Let queued memories reach storage; whatever doesn't stays spooled
+        await self.memory_queue.close()
+        
         if self.semantic_manager:
             await self.semantic_manager.cleanup()
         
@@ -760,6 +801,9 @@ async def create_alden_semantic_adapter(
         if enable_direct_mode:
             await adapter.initialize_semantic_manager()
         
+        # Resume storing memories spooled by a previous run
+        await adapter.memory_queue.start()
+        
         return adapter
         
     except Exception as e:
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Conversation Window Cache
+Keeps the recent turns of each persona session in memory so prompts are
+assembled from a bounded window without a database round-trip. Turns that
+fall out of the window (by count or estimated tokens) are folded into a
+rolling summary on a background worker, so long sessions stay within the
+model's context budget while earlier topics are not lost entirely.
+"""
+
+import re
+import time
+import threading
+import logging
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class ConversationTurn:
+    """A single message in a session"""
+    role: str
+    content: str
+    timestamp: str = ""
+    tokens: int = field(default=0)
+
+    def __post_init__(self):
+        if not self.tokens:
+            self.tokens = estimate_tokens(self.content)
+
+
+# Folds evicted turns into the previous summary and returns the new summary
+Summarizer = Callable[[str, List[ConversationTurn]], str]
+
+
+def extractive_summary(previous: str, turns: List[ConversationTurn], max_chars: int = 600) -> str:
+    """
+    Default summarizer: keep the first sentence of each evicted turn, oldest
+    dropped first once the summary exceeds max_chars. Cheap enough to run on
+    every eviction without an extra LLM call.
+    """
+    notes = [previous] if previous else []
+    for turn in turns:
+        sentence = re.split(r"(?<=[.!?])\s", turn.content.strip(), maxsplit=1)[0]
+        if len(sentence) > 120:
+            sentence = sentence[:117].rstrip() + "..."
+        speaker = "User" if turn.role == "user" else "Alden"
+        notes.append(f"{speaker}: {sentence}")
+    summary = " | ".join(notes)
+    if len(summary) > max_chars:
+        summary = "..." + summary[-(max_chars - 3):]
+    return summary
+
+
+# One background worker is plenty: summaries are small and order matters per window
+_summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conversation-summary")
+
+
+class ConversationWindow:
+    """
+    Bounded window of recent turns plus a rolling summary of older ones
+    """
+
+    def __init__(self, session_key: str, max_turns: int = 20, max_tokens: int = 1024,
+                 summarizer: Optional[Summarizer] = None):
+        self.session_key = session_key
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer or extractive_summary
+        # Share of the token budget reserved for the rolling summary
+        self.summary_budget = max_tokens // 4
+        self.lock = threading.Lock()
+        self.turns: Deque[ConversationTurn] = deque()
+        self.turn_tokens = 0
+        self.summary = ""
+        self.summary_tokens = 0
+        self.evicted: List[ConversationTurn] = []
+        self.summarizing = False
+        self.last_active = time.time()
+        self.stats = {"turns": 0, "evicted": 0, "summaries": 0}
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    @property
+    def token_count(self) -> int:
+        """Estimated tokens the rendered history will occupy"""
+        return self.turn_tokens + self.summary_tokens
+
+    def append(self, role: str, content: str, timestamp: str = ""):
+        """Add a turn, evicting the oldest ones that no longer fit"""
+        turn = ConversationTurn(role=role, content=content, timestamp=timestamp)
+        with self.lock:
+            self.turns.append(turn)
+            self.turn_tokens += turn.tokens
+            self.stats["turns"] += 1
+            self.last_active = time.time()
+
+            # Always keep the newest turn, even if it alone exceeds the budget
+            while len(self.turns) > 1 and (len(self.turns) > self.max_turns
+                                           or self.turn_tokens > self.max_tokens - self.summary_budget):
+                old = self.turns.popleft()
+                self.turn_tokens -= old.tokens
+                self.evicted.append(old)
+                self.stats["evicted"] += 1
+
+            schedule = bool(self.evicted) and not self.summarizing
+            if schedule:
+                self.summarizing = True
+        if schedule:
+            _summary_executor.submit(self._summarize)
+
+    def _summarize(self):
+        """Fold evicted turns into the summary (runs on the summary worker)"""
+        while True:
+            with self.lock:
+                batch, self.evicted = self.evicted, []
+                previous = self.summary
+                if not batch:
+                    self.summarizing = False
+                    return
+            try:
+                summary = self.summarizer(previous, batch)
+            except Exception as e:
+                logger.warning(f"Conversation summary failed for {self.session_key}: {e}")
+                summary = extractive_summary(previous, batch)
+            limit = max(self.summary_budget - 1, 1) * 4
+            if len(summary) > limit:
+                summary = "..." + summary[-(limit - 3):]
+            with self.lock:
+                self.summary = summary
+                self.summary_tokens = estimate_tokens(summary) if summary else 0
+                self.stats["summaries"] += 1
+
+    def render(self, user_label: str = "Human", assistant_label: str = "Alden") -> str:
+        """History block for the prompt, oldest first; O(window)"""
+        with self.lock:
+            summary = self.summary
+            turns = list(self.turns)
+        if not summary and not turns:
+            return ""
+
+        lines = ["Previous conversation in this session:"]
+        if summary:
+            lines.append(f"(Earlier: {summary})")
+        for turn in turns:
+            if turn.role == "user":
+                lines.append(f"{user_label}: {turn.content}")
+            elif turn.role == "assistant":
+                lines.append(f"{assistant_label}: {turn.content}\n")
+        return "\n".join(lines) + "\n"
+
+    def get_turns(self) -> List[Dict[str, str]]:
+        """Turns in the window as plain dicts"""
+        with self.lock:
+            return [{"role": t.role, "content": t.content, "timestamp": t.timestamp} for t in self.turns]
+
+
+class ConversationWindowRegistry:
+    """
+    Per-session windows with LRU eviction of idle sessions
+    """
+
+    def __init__(self, max_sessions: int = 256, max_turns: int = 20, max_tokens: int = 1024,
+                 summarizer: Optional[Summarizer] = None):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.lock = threading.Lock()
+        self.windows: "OrderedDict[str, ConversationWindow]" = OrderedDict()
+
+    def get(self, session_key: str) -> ConversationWindow:
+        """Window for a session, created on first use"""
+        with self.lock:
+            window = self.windows.get(session_key)
+            if window is None:
+                window = ConversationWindow(session_key, self.max_turns, self.max_tokens, self.summarizer)
+                self.windows[session_key] = window
+                while len(self.windows) > self.max_sessions:
+                    self.windows.popitem(last=False)
+            else:
+                self.windows.move_to_end(session_key)
+            return window
+
+    def peek(self, session_key: str) -> Optional[ConversationWindow]:
+        """Window for a session without creating or touching it"""
+        with self.lock:
+            return self.windows.get(session_key)
+
+    def prune(self, idle_seconds: float = 3600.0) -> int:
+        """Drop windows idle longer than idle_seconds; returns how many"""
+        cutoff = time.time() - idle_seconds
+        with self.lock:
+            stale = [key for key, window in self.windows.items() if window.last_active < cutoff]
+            for key in stale:
+                del self.windows[key]
+        return len(stale)
+
+    def __len__(self) -> int:
+        return len(self.windows)
@@ -0,0 +1,298 @@
+"""
+Background persistence queue for persona conversation memories
+
+Storing a conversation turn in semantic memory means keyword extraction, an
+embedding and a database or API write. The queue takes that work off the
+response path: a turn is appended to a spool file and put on a bounded
+asyncio queue, and a worker task hands batches of turns to the store
+callback, retrying failures with exponential backoff.
+
+Crash safety: a job is spooled (flushed and optionally fsynced) before it is
+queued, and a "done" record is appended once it is stored or given up on.
+Spool and dead-letter file I/O runs on a dedicated thread, in submission
+order, so the event loop never waits on a write or fsync.
+On start-up a torn final record is cut off and every spooled job without a
+done record is queued again; unreadable lines are skipped. When
+the queue is full a job stays in the spool only and is picked up again once
+the queue drains. The spool is compacted when it holds only finished jobs.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Set, Callable, Awaitable
+
+# Stores a batch of jobs; returns one success flag per job
+BatchProcessor = Callable[[List[Dict[str, Any]]], Awaitable[List[bool]]]
+
+
+class MemoryWriteQueue:
+    """Spool-backed, bounded async work queue with batching and retries."""
+
+    def __init__(self, process_batch: BatchProcessor, spool_path: str,
+                 max_queue: int = 1000, batch_size: int = 16, batch_wait: float = 0.05,
+                 max_attempts: int = 5, retry_delay: float = 1.0, fsync: bool = True,
+                 logger=None):
+        self.process_batch = process_batch
+        self.spool_path = Path(spool_path)
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        self.dead_letter_path = self.spool_path.with_suffix(".dead.jsonl")
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.fsync = fsync
+        self.logger = logger
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Jobs queued, in a batch or waiting to retry, so a spool reload skips them
+        self._active: Dict[str, Dict[str, Any]] = {}
+        # Jobs whose put record is still being written, so a spool reload skips them
+        self._spooling: Set[str] = set()
+        self._overflowed = False
+        # One thread keeps spool writes, reads and compaction in submission order;
+        # _live_records is only touched there
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-spool")
+        self._live_records = 0
+
+        self.stats = {
+            "enqueued": 0,
+            "stored": 0,
+            "batches": 0,
+            "retries": 0,
+            "dead_lettered": 0,
+            "recovered": 0,
+            "overflowed": 0
+        }
+
+    # Lifecycle
+
+    async def start(self) -> int:
+        """Start the worker on the running loop and queue unfinished spooled jobs."""
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._loop is loop:
+            return 0
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._active.clear()
+        # Submitted before anything else can append, so the repair lands first
+        repaired = self._spool_io(self._repair_spool_tail)
+        self._worker = loop.create_task(self._run())
+        await repaired
+        recovered = await self._reload_spool()
+        self.stats["recovered"] += recovered
+        if recovered and self.logger:
+            self.logger.info(f"Recovered {recovered} unsaved memories from {self.spool_path}")
+        return recovered
+
+    async def close(self, timeout: float = 10.0):
+        """Wait up to timeout for queued jobs, then stop; the rest stay spooled."""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            if self.logger:
+                self.logger.warning(f"{self._queue.qsize()} memories left in spool at shutdown")
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        # Spool writes already handed to the spool thread finish before close returns
+        await self._spool_io(lambda: None)
+
+    # Producer side
+
+    async def enqueue(self, payload: Dict[str, Any]) -> str:
+        """Spool a job and queue it; never waits for the store. Returns the job id."""
+        await self.start()
+        job = {"id": uuid.uuid4().hex, "payload": payload, "attempts": 0, "enqueued_at": time.time()}
+        self._spooling.add(job["id"])
+        try:
+            await self._spool_io(self._append_many, [{"op": "put", "job": job}])
+        finally:
+            self._spooling.discard(job["id"])
+        self.stats["enqueued"] += 1
+        self._offer(job)
+        return job["id"]
+
+    def _offer(self, job: Dict[str, Any]):
+        """Queue a spooled job, or leave it in the spool if the queue is full."""
+        try:
+            self._queue.put_nowait(job)
+            self._active[job["id"]] = job
+        except asyncio.QueueFull:
+            self._overflowed = True
+            self.stats["overflowed"] += 1
+
+    # Worker
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                try:
+                    results = await self.process_batch([job["payload"] for job in batch])
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"Memory batch failed: {e}")
+                    results = [False] * len(batch)
+                self.stats["batches"] += 1
+
+                finished = []
+                for job, ok in zip(batch, results):
+                    if ok:
+                        self.stats["stored"] += 1
+                        finished.append(job["id"])
+                    elif job["attempts"] + 1 >= self.max_attempts:
+                        await self._dead_letter(job)
+                        finished.append(job["id"])
+                    else:
+                        self._schedule_retry(job)
+                if finished:
+                    await self._spool_io(self._append_many, [{"op": "done", "id": job_id} for job_id in finished])
+                    for job_id in finished:
+                        self._active.pop(job_id, None)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if self._queue.empty() and not self._pending_retries():
+                if self._overflowed:
+                    self._overflowed = False
+                    await self._reload_spool()
+                elif not self._active:
+                    await self._spool_io(self._compact)
+
+    def _pending_retries(self) -> bool:
+        return any(job.get("retrying") for job in self._active.values())
+
+    def _schedule_retry(self, job: Dict[str, Any]):
+        job["attempts"] += 1
+        job["retrying"] = True
+        self.stats["retries"] += 1
+        delay = self.retry_delay * (2 ** (job["attempts"] - 1))
+
+        def requeue():
+            job.pop("retrying", None)
+            self._active.pop(job["id"], None)
+            self._offer(job)
+
+        self._loop.call_later(delay, requeue)
+
+    async def _dead_letter(self, job: Dict[str, Any]):
+        self.stats["dead_lettered"] += 1
+        await self._spool_io(self._write_dead_letter, job)
+        if self.logger:
+            self.logger.error(f"Giving up on memory job {job['id']} after {job['attempts'] + 1} attempts")
+
+    def _write_dead_letter(self, job: Dict[str, Any]):
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(job, separators=(",", ":"), default=str) + "\n")
+
+    # Spool (the methods below run on the spool thread unless noted)
+
+    def _spool_io(self, fn: Callable[..., Any], *args) -> "asyncio.Future":
+        """
+        Run a spool operation on the spool thread; call from the loop. The
+        operation still runs if the awaiting task is cancelled (e.g. by close).
+        """
+        return asyncio.shield(self._loop.run_in_executor(self._io, fn, *args))
+
+    def _append_many(self, records: List[Dict[str, Any]]):
+        lines = "".join(json.dumps(r, separators=(",", ":"), default=str) + "\n" for r in records)
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._live_records += lines.count("\n")
+
+    def _read_spool(self) -> List[Dict[str, Any]]:
+        """Spooled jobs without a done record, in spool order."""
+        if not self.spool_path.exists():
+            return []
+        jobs: Dict[str, Dict[str, Any]] = {}
+        with open(self.spool_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn record from a crash mid-append; that job was never acknowledged
+                    continue
+                if record.get("op") == "put":
+                    jobs[record["job"]["id"]] = record["job"]
+                elif record.get("op") == "done":
+                    jobs.pop(record["id"], None)
+        return list(jobs.values())
+
+    def _repair_spool_tail(self):
+        """Cut a torn final record so later appends start on a fresh line."""
+        if not self.spool_path.exists():
+            return
+        with open(self.spool_path, "r+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            while end > 0:
+                start = max(0, end - 4096)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    f.truncate(start + newline + 1)
+                    break
+                end = start
+            else:
+                f.truncate(0)
+        if self.logger:
+            self.logger.warning(f"Dropped a torn record at the end of {self.spool_path}")
+
+    async def _reload_spool(self) -> int:
+        """Queue spooled jobs that are not already active; returns how many (runs on the loop)."""
+        queued = 0
+        for job in await self._spool_io(self._read_spool):
+            if job["id"] in self._active or job["id"] in self._spooling:
+                continue
+            self._offer(job)
+            if job["id"] not in self._active:
+                break
+            queued += 1
+        return queued
+
+    def _compact(self):
+        """Drop the spool once every job in it is finished."""
+        if self._live_records and self.spool_path.exists() and not self._read_spool():
+            self.spool_path.unlink()
+            self._live_records = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["queue_depth"] = self._queue.qsize() if self._queue else 0
+        stats["active_jobs"] = len(self._active)
+        stats["spool_path"] = str(self.spool_path)
+        return stats
@@ -8,9 +8,12 @@ import os
 import sys
 import json
 import uuid
+import time
+import hashlib
 import asyncio
 import threading
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Union, Tuple, Set
 from dataclasses import dataclass, asdict
@@ -111,6 +114,11 @@ class MemorySyncService:
         sync_interval_seconds: int = 30,
         conflict_resolution_strategy: ConflictResolution = ConflictResolution.LATEST_WINS,
         agent_priorities: Dict[str, AgentPriority] = None,
+        sync_batch_size: int = 500,
+        max_tracked_versions: int = 100000,
+        change_feed=None,
+        change_queue_size: int = 10000,
+        fallback_sweep_seconds: Optional[float] = None,
         logger: Optional[logging.Logger] = None
     ):
         """
@@ -121,11 +129,25 @@ class MemorySyncService:
             sync_interval_seconds: Automatic sync interval
             conflict_resolution_strategy: Default conflict resolution
             agent_priorities: Agent priority configuration
+            sync_batch_size: Maximum memories read and written back per sync cycle
+            max_tracked_versions: Number of acknowledged memory versions kept for conflict checks
+            change_feed: Optional change feed to consume instead of polling; defaults to the
+                memory manager's feed
+            change_queue_size: Bound on queued change events before falling back to a full scan
+            fallback_sweep_seconds: With a change feed, interval for a safety scan that catches
+                changes the feed missed; defaults to sync_interval_seconds
             logger: Optional logger instance
         """
         self.logger = logger or logging.getLogger(__name__)
         self.memory_manager = memory_manager
         self.sync_interval = sync_interval_seconds
+        self.sync_batch_size = sync_batch_size
+        self.max_tracked_versions = max_tracked_versions
+        self.change_feed = change_feed if change_feed is not None else getattr(memory_manager, "change_feed", None)
+        self.change_queue_size = change_queue_size
+        self.fallback_sweep_seconds = (fallback_sweep_seconds if fallback_sweep_seconds is not None
+                                       else sync_interval_seconds)
+        self._change_subscription = None
         self.default_resolution = conflict_resolution_strategy
         
         # Agent configuration
@@ -142,8 +164,15 @@ class MemorySyncService:
         self.pending_conflicts: Dict[str, SyncConflict] = {}  # conflict_id -> conflict
         self.sync_operations: List[SyncOperation] = []
         
-        # Background sync management
-        self._sync_thread: Optional[threading.Thread] = None
+        # Sync engine state
+        self._watermark: Optional[Tuple[str, str]] = None  # (updated_at, memory_id) of last row read
+        self._acked_versions: "OrderedDict[str, int]" = OrderedDict()  # memory_id -> last synced version
+        
+        # Background sync management: a task on the loop that owns the memory manager's
+        # connection pool (asyncpg pools cannot be used from another event loop)
+        self._sync_task: Optional[asyncio.Task] = None
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake_event: Optional[asyncio.Event] = None
         self._shutdown_event = threading.Event()
         self._sync_enabled = True
         
@@ -155,7 +184,15 @@ class MemorySyncService:
             "conflicts_resolved": 0,
             "locks_acquired": 0,
             "locks_released": 0,
-            "avg_sync_time_ms": 0.0
+            "avg_sync_time_ms": 0.0,
+            "memories_synced": 0,
+            "writeback_skipped": 0,
+            "last_cycle_memories": 0,
+            "last_cycle_throughput_per_sec": 0.0,
+            "last_cycle_lag_ms": 0.0,
+            "max_lag_ms": 0.0,
+            "change_events_consumed": 0,
+            "last_event_lag_ms": 0.0
         }
         
         self.logger.info("Memory Sync Service initialized", extra={
@@ -171,8 +208,16 @@ class MemorySyncService:
             if not self.memory_manager:
                 raise ValueError("Memory manager not provided")
             
-            # Start background sync thread
-            self._start_sync_thread()
+            # Consume change events instead of polling when a feed is available
+            if self.change_feed is not None:
+                self._change_subscription = self.change_feed.subscribe(
+                    max_events=self.change_queue_size,
+                    on_event=self.request_sync,
+                    tables=["alden_memory"]
+                )
+            
+            # Start background sync task
+            self._start_sync_task()
             
             # Clean up any stale locks from previous sessions
             await self._cleanup_stale_locks()
@@ -187,32 +232,54 @@ class MemorySyncService:
             self.logger.error(f"Failed to initialize Memory Sync Service: {e}")
             return False
     
-    def _start_sync_thread(self):
-        """Start background synchronization thread"""
-        def sync_worker():
-            while not self._shutdown_event.is_set():
-                try:
-                    if self._sync_enabled:
-                        # Run sync in async context
-                        asyncio.run(self._background_sync_cycle())
-                    
-                    # Wait for next sync or shutdown
-                    self._shutdown_event.wait(timeout=self.sync_interval)
-                    
-                except Exception as e:
-                    self.logger.error(f"Background sync error: {e}")
-                    # Wait before retrying
-                    self._shutdown_event.wait(timeout=min(60, self.sync_interval * 2))
+    def _start_sync_task(self):
+        """Start background synchronization on the running event loop"""
+        self._sync_loop = asyncio.get_running_loop()
+        self._wake_event = asyncio.Event()
+        self._sync_task = self._sync_loop.create_task(self._run_sync_loop(), name="MemorySync")
+        self.logger.info(f"Background sync task started (interval: {self.sync_interval}s)")
+    
+    async def _run_sync_loop(self):
+        """Run sync cycles until shutdown"""
         
-        self._sync_thread = threading.Thread(
-            target=sync_worker,
-            name="MemorySync",
-            daemon=True
-        )
-        self._sync_thread.start()
-        self.logger.info(f"Background sync thread started (interval: {self.sync_interval}s)")
+        while not self._shutdown_event.is_set():
+            # Cleared before the cycle so events arriving during it trigger another one
+            self._wake_event.clear()
+            delay = self.sync_interval if self._change_subscription is None else self._idle_timeout()
+            try:
+                if self._sync_enabled:
+                    cycle = await self._background_sync_cycle()
+                    # A full batch means there is a backlog: go again without waiting
+                    if cycle.get("memories", 0) >= self.sync_batch_size:
+                        delay = 0
+            except Exception as e:
+                self.logger.error(f"Background sync error: {e}")
+                # Wait before retrying
+                delay = min(60, self.sync_interval * 2)
+            
+            if self._shutdown_event.is_set():
+                break
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+    
+    def _idle_timeout(self) -> float:
+        """With a change feed, sleep until the next lock expiry or safety sweep"""
+        deadlines = [self.fallback_sweep_seconds]
+        if self.active_locks:
+            now = datetime.now()
+            earliest = min(datetime.fromisoformat(info["expires_at"]) for info in list(self.active_locks.values()))
+            deadlines.append(max(0.0, (earliest - now).total_seconds()))
+        return min(deadlines)
+    
+    def request_sync(self):
+        """Wake the background sync loop so it runs a cycle now (thread-safe)"""
+        loop, wake_event = self._sync_loop, self._wake_event
+        if loop is not None and wake_event is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake_event.set)
     
-    async def _background_sync_cycle(self):
+    async def _background_sync_cycle(self) -> Dict[str, Any]:
         """Perform one background synchronization cycle"""
         try:
             start_time = datetime.now()
@@ -220,13 +287,16 @@ class MemorySyncService:
             # 1. Clean up expired locks
             await self._cleanup_expired_locks()
             
-            # 2. Detect and resolve conflicts
-            conflicts_detected = await self._detect_conflicts()
-            if conflicts_detected > 0:
-                await self._resolve_pending_conflicts()
+            # 2. Sync pending memories (conflicts are detected per batch)
+            memory_ids, oldest_event = self._drain_change_events()
+            cycle = await self._sync_pending_memories(memory_ids)
+            if oldest_event is not None:
+                self.stats["last_event_lag_ms"] = (time.time() - oldest_event) * 1000
+                cycle["event_lag_ms"] = self.stats["last_event_lag_ms"]
             
-            # 3. Sync pending memories
-            await self._sync_pending_memories()
+            # 3. Retry conflicts left unresolved by earlier cycles
+            if self.pending_conflicts and self.default_resolution != ConflictResolution.MANUAL_REVIEW:
+                await self._resolve_pending_conflicts()
             
             # 4. Update statistics
             sync_time_ms = (datetime.now() - start_time).total_seconds() * 1000
@@ -236,10 +306,12 @@ class MemorySyncService:
                 self.stats["total_syncs"]
             )
             
-            self.logger.debug(f"Background sync cycle completed in {sync_time_ms:.1f}ms")
+            self.logger.debug(f"Background sync cycle completed in {sync_time_ms:.1f}ms", extra=cycle)
+            return cycle
             
         except Exception as e:
             self.logger.error(f"Background sync cycle failed: {e}")
+            return {}
     
     async def acquire_memory_lock(
         self,
@@ -420,32 +492,12 @@ class MemorySyncService:
                 "errors": []
             }
             
-            # Process each memory
-            for memory in pending_memories:
-                try:
-                    # Check for conflicts
-                    conflict = await self._detect_memory_conflict(memory)
-                    if conflict:
-                        sync_results["conflicts_detected"] += 1
-                        self.pending_conflicts[conflict.conflict_id] = conflict
-                        self.stats["conflicts_detected"] += 1
-                        
-                        # Attempt automatic resolution
-                        if await self._resolve_conflict(conflict):
-                            sync_results["conflicts_resolved"] += 1
-                            self.stats["conflicts_resolved"] += 1
-                    
-                    # Update sync status
-                    await self._update_memory_sync_status(
-                        memory.memory_id, SyncStatus.SYNCED
-                    )
-                    
-                    sync_results["successful_syncs"] += 1
-                    
-                except Exception as mem_error:
-                    error_msg = f"Failed to sync {memory.memory_id}: {mem_error}"
-                    sync_results["errors"].append(error_msg)
-                    self.logger.error(error_msg)
+            # Detect conflicts and write back statuses for the whole set at once
+            batch_results = await self._sync_batch(pending_memories)
+            sync_results["successful_syncs"] = batch_results["synced"]
+            sync_results["conflicts_detected"] = batch_results["conflicts_detected"]
+            sync_results["conflicts_resolved"] = batch_results["conflicts_resolved"]
+            sync_results["errors"].extend(batch_results["errors"])
             
             # Complete sync operation
             sync_op.completed_at = datetime.now().isoformat()
@@ -454,9 +506,6 @@ class MemorySyncService:
             if sync_results["errors"]:
                 sync_op.error_message = "; ".join(sync_results["errors"][:3])
             
-            # Update statistics
-            self.stats["successful_syncs"] += sync_results["successful_syncs"]
-            
             sync_time_ms = (datetime.now() - start_time).total_seconds() * 1000
             sync_results["sync_time_ms"] = sync_time_ms
             
@@ -700,6 +749,7 @@ class MemorySyncService:
                     agent: priority.value 
                     for agent, priority in self.agent_priorities.items()
                 },
+                "change_feed": self.change_feed.stats() if self.change_feed is not None else None,
                 "configuration": {
                     "sync_interval_seconds": self.sync_interval,
                     "default_resolution": self.default_resolution.value,
@@ -798,29 +848,121 @@ class MemorySyncService:
             self.logger.error(f"Failed to get pending sync memories: {e}")
             return []
     
-    async def _detect_conflicts(self) -> int:
-        """Detect memory conflicts across agents"""
-        try:
-            conflicts_found = 0
-            # This would implement conflict detection logic
-            # For now, return 0 as a placeholder
-            return conflicts_found
-        except Exception as e:
-            self.logger.error(f"Failed to detect conflicts: {e}")
-            return 0
+    def _detect_batch_conflicts(self, memories: List[AldenMemory]) -> List[SyncConflict]:
+        """
+        Detect conflicts across a batch of changed memories by version comparison
+        
+        A memory conflicts when its version is not newer than the last version
+        this service acknowledged (the writer started from a stale base), or
+        when memories derived from the same parent were changed by more than
+        one agent in the same batch.
+        """
+        conflicts = []
+        
+        for memory in memories:
+            acked = self._acked_versions.get(memory.memory_id)
+            if acked is not None and memory.version <= acked:
+                conflicts.append(self._make_conflict(memory.memory_id, "version", [memory]))
+        
+        by_parent: Dict[str, List[AldenMemory]] = {}
+        for memory in memories:
+            if memory.parent_memory_id:
+                by_parent.setdefault(memory.parent_memory_id, []).append(memory)
+        for parent_id, siblings in by_parent.items():
+            if len({m.agent_id for m in siblings}) > 1:
+                conflicts.append(self._make_conflict(parent_id, "content", siblings))
+        
+        return conflicts
     
-    async def _detect_memory_conflict(self, memory: AldenMemory) -> Optional[SyncConflict]:
-        """Detect conflict for a specific memory"""
+    def _make_conflict(self, memory_id: str, conflict_type: str, memories: List[AldenMemory]) -> SyncConflict:
+        """Build a conflict record holding the latest version each agent wrote"""
+        versions: Dict[str, MemorySlice] = {}
+        for memory in sorted(memories, key=lambda m: (m.version, m.updated_at)):
+            versions[memory.agent_id] = self._to_memory_slice(memory)
+        
+        return SyncConflict(
+            conflict_id=str(uuid.uuid4()),
+            memory_id=memory_id,
+            conflicting_agents=list(versions),
+            conflict_type=conflict_type,
+            created_at=datetime.now().isoformat(),
+            resolution_strategy=self.default_resolution,
+            resolved=False,
+            memory_versions=versions
+        )
+    
+    def _to_memory_slice(self, memory: AldenMemory) -> MemorySlice:
+        return MemorySlice(
+            memory_id=memory.memory_id,
+            agent_id=memory.agent_id,
+            user_id=memory.user_id,
+            session_id=memory.session_id,
+            content=memory.content,
+            memory_type=memory.memory_type,
+            sync_status=SyncStatus.CONFLICT,
+            version=memory.version,
+            last_modified=memory.updated_at,
+            last_sync=memory.last_sync_at,
+            checksum=hashlib.sha256(memory.content.encode("utf-8")).hexdigest()[:16]
+        )
+    
+    async def _sync_batch(self, memories: List[AldenMemory]) -> Dict[str, Any]:
+        """Detect conflicts for a batch, resolve what can be resolved, and write statuses back once"""
+        results = {
+            "synced": 0,
+            "conflicts_detected": 0,
+            "conflicts_resolved": 0,
+            "skipped": 0,
+            "errors": []
+        }
+        if not memories:
+            return results
+        
+        # memory_id of every row involved in an unresolved conflict
+        unresolved: Set[str] = set()
+        for conflict in self._detect_batch_conflicts(memories):
+            results["conflicts_detected"] += 1
+            self.stats["conflicts_detected"] += 1
+            self.pending_conflicts[conflict.conflict_id] = conflict
+            
+            involved = {m.memory_id for m in conflict.memory_versions.values()} | {conflict.memory_id}
+            if self.default_resolution != ConflictResolution.MANUAL_REVIEW and \
+                    await self._resolve_conflict(conflict):
+                results["conflicts_resolved"] += 1
+            else:
+                unresolved |= involved
+        
+        updates = [
+            (
+                memory.memory_id,
+                (SyncStatus.CONFLICT if memory.memory_id in unresolved else SyncStatus.SYNCED).value,
+                memory.updated_at
+            )
+            for memory in memories
+        ]
+        
         try:
-            # Placeholder conflict detection logic
-            # In real implementation, this would check for:
-            # - Concurrent modifications
-            # - Version conflicts
-            # - Content divergence
-            return None
+            applied = await self.memory_manager.update_sync_statuses(updates)
         except Exception as e:
-            self.logger.error(f"Failed to detect conflict for {memory.memory_id}: {e}")
-            return None
+            results["errors"].append(f"Status write-back failed for {len(updates)} memories: {e}")
+            return results
+        
+        # Rows changed after they were read were not updated; they stay pending
+        results["skipped"] = len(updates) - applied
+        results["synced"] = sum(1 for _, status, _ in updates if status == SyncStatus.SYNCED.value)
+        results["synced"] = max(0, results["synced"] - results["skipped"])
+        
+        for memory in memories:
+            if memory.memory_id not in unresolved:
+                self._acked_versions[memory.memory_id] = memory.version
+                self._acked_versions.move_to_end(memory.memory_id)
+        while len(self._acked_versions) > self.max_tracked_versions:
+            self._acked_versions.popitem(last=False)
+        
+        self.stats["successful_syncs"] += results["synced"]
+        self.stats["memories_synced"] += results["synced"]
+        self.stats["writeback_skipped"] += results["skipped"]
+        return results
     
     async def _resolve_pending_conflicts(self):
         """Resolve all pending conflicts"""
@@ -831,14 +973,84 @@ class MemorySyncService:
         except Exception as e:
             self.logger.error(f"Failed to resolve pending conflicts: {e}")
     
-    async def _sync_pending_memories(self):
-        """Sync all pending memories"""
+    def _drain_change_events(self) -> Tuple[Optional[List[str]], Optional[float]]:
+        """
+        Take queued change events
+        
+        Returns the memory ids to sync (None means scan past the watermark:
+        no feed, a timer wake-up, an overflowed queue or more changes than fit
+        in one batch) and the publish time of the oldest event.
+        """
+        if self._change_subscription is None:
+            return None, None
+        
+        events, overflowed = self._change_subscription.drain()
+        self.stats["change_events_consumed"] += len(events)
+        oldest = min((e.published_at for e in events), default=None)
+        
+        memory_ids = list(dict.fromkeys(e.record_id for e in events))
+        if overflowed or not memory_ids or len(memory_ids) > self.sync_batch_size:
+            return None, oldest
+        return memory_ids, oldest
+    
+    async def _sync_pending_memories(self, memory_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Sync one batch of pending memories past the watermark, or just the given memories
+        
+        One read and one status write-back per cycle. When a cycle comes back
+        short the watermark resets, so the next pass starts from the oldest
+        pending change again and also picks up rows committed late with an
+        earlier updated_at.
+        """
+        started = time.perf_counter()
         try:
-            # This would implement the actual memory synchronization logic
-            # For now, just log that sync was attempted
-            self.logger.debug("Pending memories sync completed")
+            if memory_ids is not None:
+                memories = await self.memory_manager.get_changed_memories(
+                    limit=len(memory_ids), memory_ids=memory_ids
+                )
+            else:
+                memories = await self.memory_manager.get_changed_memories(
+                    since=self._watermark, limit=self.sync_batch_size
+                )
+                
+                if len(memories) < self.sync_batch_size:
+                    self._watermark = None
+                else:
+                    self._watermark = (memories[-1].updated_at, memories[-1].memory_id)
+            
+            batch_results = await self._sync_batch(memories)
+            
+            elapsed = time.perf_counter() - started
+            lag_ms = max((self._change_age_ms(m.updated_at) for m in memories), default=0.0)
+            cycle = {
+                "memories": len(memories),
+                "synced": batch_results["synced"],
+                "conflicts": batch_results["conflicts_detected"],
+                "skipped": batch_results["skipped"],
+                "duration_ms": elapsed * 1000,
+                "throughput_per_sec": len(memories) / elapsed if memories and elapsed > 0 else 0.0,
+                "lag_ms": lag_ms
+            }
+            
+            self.stats["last_cycle_memories"] = cycle["memories"]
+            self.stats["last_cycle_throughput_per_sec"] = cycle["throughput_per_sec"]
+            self.stats["last_cycle_lag_ms"] = lag_ms
+            self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], lag_ms)
+            
+            for error in batch_results["errors"]:
+                self.logger.error(error)
+            return cycle
+            
         except Exception as e:
             self.logger.error(f"Failed to sync pending memories: {e}")
+            return {}
+    
+    @staticmethod
+    def _change_age_ms(updated_at: str) -> float:
+        """Milliseconds between a change and now (lag of the sync pipeline for that row)"""
+        changed = datetime.fromisoformat(updated_at)
+        now = datetime.now(timezone.utc) if changed.tzinfo else datetime.now()
+        return max(0.0, (now - changed).total_seconds() * 1000)
     
     async def _update_memory_lock_status(
         self, 
@@ -857,14 +1069,6 @@ class MemorySyncService:
         except Exception as e:
             self.logger.error(f"Failed to update lock status for {memory_id}: {e}")
     
-    async def _update_memory_sync_status(self, memory_id: str, status: SyncStatus):
-        """Update memory sync status in database"""
-        try:
-            # This would update the database with sync status
-            self.logger.debug(f"Sync status for {memory_id} set to {status.value}")
-        except Exception as e:
-            self.logger.error(f"Failed to update sync status for {memory_id}: {e}")
-    
     # Conflict resolution strategies
     
     async def _resolve_latest_wins(self, conflict: SyncConflict) -> bool:
@@ -977,14 +1181,14 @@ class MemorySyncService:
                 "components": {}
             }
             
-            # Check background sync thread
-            if self._sync_thread and self._sync_thread.is_alive():
-                health_status["components"]["sync_thread"] = {
+            # Check background sync task
+            if self._sync_task and not self._sync_task.done():
+                health_status["components"]["sync_task"] = {
                     "status": "healthy",
                     "enabled": self._sync_enabled
                 }
             else:
-                health_status["components"]["sync_thread"] = {
+                health_status["components"]["sync_task"] = {
                     "status": "unhealthy",
                     "enabled": self._sync_enabled
                 }
@@ -1043,9 +1247,19 @@ class MemorySyncService:
             # Stop background sync
             self._sync_enabled = False
             self._shutdown_event.set()
+            self.request_sync()
             
-            if self._sync_thread and self._sync_thread.is_alive():
-                self._sync_thread.join(timeout=10)
+            if self._change_subscription is not None:
+                self.change_feed.unsubscribe(self._change_subscription)
+                self._change_subscription = None
+            
+            if self._sync_task and not self._sync_task.done():
+                try:
+                    await asyncio.wait_for(self._sync_task, timeout=10)
+                except asyncio.TimeoutError:
+                    self.logger.warning("Background sync did not stop in time; cancelled")
+            self._sync_task = None
+            self._sync_loop = None
             
             # Release all active locks
             for memory_id in list(self.active_locks.keys()):
@@ -1062,6 +1276,7 @@ async def create_memory_sync_service(
     sync_interval_seconds: int = 30,
     conflict_resolution_strategy: ConflictResolution = ConflictResolution.LATEST_WINS,
     agent_priorities: Dict[str, AgentPriority] = None,
+    change_feed=None,
     logger: Optional[logging.Logger] = None
 ) -> MemorySyncService:
     """
@@ -1072,6 +1287,7 @@ async def create_memory_sync_service(
         sync_interval_seconds: Automatic sync interval
         conflict_resolution_strategy: Default conflict resolution
         agent_priorities: Agent priority configuration
+        change_feed: Optional change feed to consume instead of polling
         logger: Optional logger instance
         
     Returns:
@@ -1082,6 +1298,7 @@ async def create_memory_sync_service(
         sync_interval_seconds=sync_interval_seconds,
         conflict_resolution_strategy=conflict_resolution_strategy,
         agent_priorities=agent_priorities,
+        change_feed=change_feed,
         logger=logger
     )
     
@@ -1112,6 +1329,12 @@ async def test_memory_sync_service():
             async def get_session_memories(self, **kwargs):
                 return self.memories[:5]  # Return first 5 memories
             
+            async def get_changed_memories(self, since=None, limit=500, memory_ids=None):
+                return [m for m in self.memories if m.sync_status == "pending"][:limit]
+            
+            async def update_sync_statuses(self, updates):
+                return len(updates)
+            
             async def semantic_search(self, **kwargs):
                 # Return mock search results
                 from database.alden_memory_manager import SearchResult, AldenMemory
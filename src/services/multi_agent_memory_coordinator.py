@@ -20,6 +20,7 @@ import logging
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from database.alden_memory_manager import AldenMemoryManager, create_alden_memory_manager
+from database.memory_change_feed import PostgresChangeFeed
 from services.memory_sync_service import MemorySyncService, create_memory_sync_service, ConflictResolution, AgentPriority
 from embedding.semantic_embedding_service import SemanticMemoryManager
 from personas.alden import AldenPersona
@@ -99,6 +100,7 @@ class MultiAgentMemoryCoordinator:
         # Core services
         self.memory_manager: Optional[AldenMemoryManager] = None
         self.sync_service: Optional[MemorySyncService] = None
+        self.change_feed: Optional[PostgresChangeFeed] = None
         
         # Agent configurations
         self.agent_configs = self._create_default_agent_configs()
@@ -201,11 +203,16 @@ class MultiAgentMemoryCoordinator:
         try:
             self.logger.info("Initializing Multi-Agent Memory Coordinator...")
             
+            # One change feed shared by the memory manager (publisher) and sync service
+            # (consumer), so sync is driven by LISTEN/NOTIFY instead of polling
+            self.change_feed = PostgresChangeFeed(logger=self.logger)
+            
             # Initialize memory manager
             self.memory_manager = await create_alden_memory_manager(
                 database_url=self.database_url,
                 embedding_service=self.embedding_service,
-                logger=self.logger
+                logger=self.logger,
+                change_feed=self.change_feed
             )
             
             # Initialize sync service
@@ -219,6 +226,7 @@ class MultiAgentMemoryCoordinator:
                 sync_interval_seconds=self.sync_interval,
                 conflict_resolution_strategy=ConflictResolution.LATEST_WINS,
                 agent_priorities=agent_priorities,
+                change_feed=self.change_feed,
                 logger=self.logger
             )
             
@@ -795,6 +803,9 @@ class MultiAgentMemoryCoordinator:
             if self.memory_manager:
                 await self.memory_manager.cleanup()
             
+            if self.change_feed:
+                await self.change_feed.stop()
+            
             self.logger.info("Multi-Agent Memory Coordinator cleanup completed")
             
         except Exception as e:
@@ -6,22 +6,48 @@ Comprehensive audit logging for all external interactions:
 - Permission checks and security events
 - Rate limiting and access control
 - All logged to /logs/synapse-actions.json
+
+Events are written by a group-commit writer: log_event signs nothing and
+touches no files on the caller's thread, it only enqueues the event. A
+dedicated writer thread drains the queue in batches, signs each event with
+an HMAC that also covers the previous event's signature (so dropped,
+reordered or spliced lines break the chain), appends the whole batch with
+one write and fsyncs according to the configured policy.
+
+The log is split into segments: the active file is sealed (renamed with a
+timestamp suffix) when it outgrows max_file_size or its time bucket
+(segment_seconds) ends, and each sealed segment gets a signed sidecar index
+with its aggregates and HMAC (see audit_segments).
 """
 
 import json
 import logging
 import os
+import queue
+import threading
+import time
+import atexit
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, asdict
 from enum import Enum
-import hashlib
-import hmac
 import secrets
 
+from .audit_segments import (
+    sign_payload, new_segment_mac, event_time, new_aggregate, add_event, merge_aggregate,
+    scan_segment, verify_event_lines, verify_segment, segment_chain_breaks,
+    index_path, sign_index, index_is_valid, write_index, load_index, build_index
+)
+
 logger = logging.getLogger(__name__)
 
+# Queue marker that tells the writer thread to exit
+_STOP = object()
+
+FSYNC_POLICIES = ("batch", "interval", "never")
+
 
 class AuditEventType(Enum):
     """Types of audit events."""
@@ -69,18 +95,24 @@ class AuditLogger:
     """Comprehensive audit logger for Synapse."""
     
     def __init__(self, log_file: str = "logs/synapse-actions.json", 
-                 max_file_size_mb: int = 100, backup_count: int = 5):
+                 max_file_size_mb: int = 100, backup_count: int = 5,
+                 group_commit: bool = True, queue_size: int = 10000,
+                 batch_size: int = 512, fsync_policy: str = "batch",
+                 fsync_interval: float = 1.0, segment_seconds: Optional[int] = 3600):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy must be one of {FSYNC_POLICIES}")
+        
         self.log_file = Path(log_file)
         self.max_file_size = max_file_size_mb * 1024 * 1024  # Convert to bytes
         self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.segment_seconds = segment_seconds
         
         # Ensure log directory exists
         self.log_file.parent.mkdir(parents=True, exist_ok=True)
         
-        # Initialize log file if it doesn't exist
-        if not self.log_file.exists():
-            self._initialize_log_file()
-        
         # Audit secret for signing events
         self.audit_secret = self._get_or_create_audit_secret()
         
@@ -89,22 +121,102 @@ class AuditLogger:
             event_type: 0 for event_type in AuditEventType
         }
         
+        # Writer state (only touched by whoever holds _write_lock)
+        self._write_lock = threading.Lock()
+        self._log_handle = None
+        self._last_fsync = time.monotonic()
+        
+        # Sealed segment indexes (oldest first), then the active segment
+        self._segment_indexes: List[Dict[str, Any]] = self._load_segment_indexes()
+        if self.log_file.exists():
+            self._load_active_segment()
+        else:
+            self._initialize_log_file()
+        
+        # Group-commit queue and writer thread
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._writer: Optional[threading.Thread] = None
+        self.writer_stats = {
+            "events_committed": 0,
+            "batches_committed": 0,
+            "write_errors": 0,
+            "fsyncs": 0,
+            "queue_full_waits": 0,
+            "max_batch_size": 0,
+            "last_commit_latency_ms": 0.0,
+            "max_commit_latency_ms": 0.0,
+            "total_commit_latency_ms": 0.0
+        }
+        if group_commit:
+            self._writer = threading.Thread(target=self._writer_loop, name="AuditLogWriter", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+        
         logger.info(f"Audit logger initialized: {self.log_file}")
     
     def _initialize_log_file(self):
-        """Initialize the audit log file with header."""
+        """Initialize the audit log file with header and start a new active segment."""
+        prev_segment_hmac = self._segment_indexes[-1]["segment_hmac"] if self._segment_indexes else None
         header = {
             "audit_log_header": {
                 "created_at": datetime.now(timezone.utc).isoformat(),
                 "version": "1.0",
                 "description": "Synapse external interactions audit log",
                 "format": "jsonl",
-                "signature_algorithm": "hmac-sha256"
+                "signature_algorithm": "hmac-sha256",
+                "prev_segment_hmac": prev_segment_hmac
             }
         }
+        data = (json.dumps(header) + '\n').encode('utf-8')
+        
+        with open(self.log_file, 'wb') as f:
+            f.write(data)
         
-        with open(self.log_file, 'w', encoding='utf-8') as f:
-            f.write(json.dumps(header) + '\n')
+        # Fresh signature chain, segment HMAC and aggregate for the new segment
+        self._prev_signature = None
+        self._prev_segment_hmac = prev_segment_hmac
+        self._segment_mac = new_segment_mac(self.audit_secret)
+        self._segment_mac.update(data)
+        self._segment_size = len(data)
+        self._active_aggregate = new_aggregate()
+    
+    def _load_active_segment(self):
+        """Rebuild active segment state from an existing log file (chain head, HMAC, aggregate)."""
+        data = self.log_file.read_bytes()
+        self._prev_signature = None
+        self._prev_segment_hmac = None
+        self._segment_mac = new_segment_mac(self.audit_secret)
+        self._segment_mac.update(data)
+        self._segment_size = len(data)
+        self._active_aggregate = new_aggregate()
+        
+        for line in data.decode('utf-8', errors='replace').splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "audit_log_header" in record:
+                self._prev_segment_hmac = record["audit_log_header"].get("prev_segment_hmac")
+                continue
+            self._prev_signature = record.get('signature')
+            try:
+                add_event(self._active_aggregate, record, event_time(record))
+            except (KeyError, ValueError):
+                continue
+    
+    def _load_segment_indexes(self) -> List[Dict[str, Any]]:
+        """Load sidecar indexes of sealed segments, indexing any sealed before indexes existed."""
+        indexes = []
+        for segment_file in sorted(self.log_file.parent.glob(f"{self.log_file.stem}.*.json")):
+            sidecar = index_path(segment_file)
+            index = load_index(sidecar)
+            if index is None:
+                index = build_index(self.audit_secret, segment_file)
+                write_index(sidecar, index)
+                logger.info(f"Indexed audit segment: {segment_file}")
+            indexes.append(index)
+        return indexes
     
     def _get_or_create_audit_secret(self) -> str:
         """Get or create audit secret for signing events."""
@@ -127,54 +239,64 @@ class AuditLogger:
     
     def _sign_event(self, event_data: Dict[str, Any]) -> str:
         """Sign audit event data."""
-        # Create canonical representation
-        canonical_data = json.dumps(event_data, sort_keys=True, separators=(',', ':'))
-        
-        # Create HMAC signature
-        signature = hmac.new(
-            self.audit_secret.encode('utf-8'),
-            canonical_data.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        
-        return signature
+        return sign_payload(self.audit_secret, event_data)
     
     def _rotate_log_file(self):
-        """Rotate log file if it exceeds size limit."""
+        """Seal the active segment if it exceeds the size limit or its time bucket has ended."""
         if not self.log_file.exists():
             return
         
-        if self.log_file.stat().st_size > self.max_file_size:
-            # Create backup
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = self.log_file.with_suffix(f".{timestamp}.json")
-            
-            # Move current file to backup
-            self.log_file.rename(backup_file)
-            
-            # Reinitialize log file
-            self._initialize_log_file()
-            
-            # Clean up old backups
-            self._cleanup_old_backups()
-            
-            logger.info(f"Rotated audit log: {backup_file}")
+        bucket_ended = (
+            self.segment_seconds and self._active_aggregate["event_count"] and
+            int(self._active_aggregate["start_ts"] // self.segment_seconds) != int(time.time() // self.segment_seconds)
+        )
+        if self._segment_size > self.max_file_size or bucket_ended:
+            self._seal_active_segment()
+    
+    def _seal_active_segment(self):
+        """Move the active file aside as a sealed segment and write its signed index."""
+        self._close_log_handle()
+        
+        # Move current file to a timestamped segment
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        segment_file = self.log_file.with_suffix(f".{timestamp}.json")
+        self.log_file.rename(segment_file)
+        
+        index = dict(self._active_aggregate)
+        index.update({
+            "segment": segment_file.name,
+            "size": self._segment_size,
+            "segment_hmac": self._segment_mac.hexdigest(),
+            "prev_segment_hmac": self._prev_segment_hmac
+        })
+        write_index(index_path(segment_file), sign_index(self.audit_secret, index))
+        self._segment_indexes.append(index)
+        
+        # Reinitialize log file; the signature chain restarts with it
+        self._initialize_log_file()
+        
+        # Clean up old segments
+        self._cleanup_old_backups()
+        
+        logger.info(f"Sealed audit segment: {segment_file}")
     
     def _cleanup_old_backups(self):
-        """Clean up old backup files."""
-        log_dir = self.log_file.parent
-        pattern = f"{self.log_file.stem}.*.json"
-        
-        backup_files = sorted(
-            log_dir.glob(pattern),
-            key=lambda x: x.stat().st_mtime,
-            reverse=True
-        )
+        """Drop the oldest sealed segments beyond backup_count * max_file_size bytes."""
+        budget = self.backup_count * self.max_file_size
+        used = 0
+        keep_from = 0
+        for position in range(len(self._segment_indexes) - 1, -1, -1):
+            used += self._segment_indexes[position].get("size", 0)
+            if used > budget:
+                keep_from = position + 1
+                break
         
-        # Keep only the most recent backup_count files
-        for backup_file in backup_files[self.backup_count:]:
-            backup_file.unlink()
-            logger.info(f"Removed old backup: {backup_file}")
+        for index in self._segment_indexes[:keep_from]:
+            segment_file = self.log_file.parent / index["segment"]
+            segment_file.unlink(missing_ok=True)
+            index_path(segment_file).unlink(missing_ok=True)
+            logger.info(f"Removed old backup: {segment_file}")
+        del self._segment_indexes[:keep_from]
     
     def log_event(self, event_type: AuditEventType, level: AuditLevel, 
                  agent_id: str, agent_type: str, action: str, target: str,
@@ -206,27 +328,18 @@ class AuditLogger:
                 risk_score=risk_score
             )
             
-            # Convert to dict and sign
+            # Convert to dict; signing happens in commit order on the writer
             event_dict = asdict(event)
             event_dict['event_type'] = event_type.value
             event_dict['level'] = level.value
-            
-            # Remove signature field for signing
             event_dict.pop('signature', None)
             
-            # Sign the event
-            signature = self._sign_event(event_dict)
-            event_dict['signature'] = signature
-            
-            # Write to log file
+            # Hand off to the group-commit writer (or write inline without one)
             self._write_event_to_log(event_dict)
             
             # Update counters
             self.event_counters[event_type] += 1
             
-            # Rotate if needed
-            self._rotate_log_file()
-            
             logger.debug(f"Audit event logged: {event_id} - {action}")
             return event_id
             
@@ -235,12 +348,134 @@ class AuditLogger:
             return ""
     
     def _write_event_to_log(self, event_dict: Dict[str, Any]):
-        """Write event to log file."""
-        try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(event_dict) + '\n')
-        except Exception as e:
-            logger.error(f"Failed to write audit event to log: {e}")
+        """Queue event for the writer thread, or commit it directly when there is none."""
+        item = (event_dict, time.perf_counter())
+        if self._writer is not None and not self._closed:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                # Backpressure rather than dropping audit events
+                self.writer_stats["queue_full_waits"] += 1
+                self._queue.put(item)
+        else:
+            self._commit_batch([item])
+    
+    def _writer_loop(self):
+        """Drain the queue in batches until the stop marker is seen."""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            events = [item for item in batch if item is not _STOP]
+            if events:
+                self._commit_batch(events)
+            for _ in batch:
+                self._queue.task_done()
+            if len(events) < len(batch):
+                return
+    
+    def _commit_batch(self, items: List[tuple]):
+        """Chain-sign a batch of events and append it with a single write."""
+        with self._write_lock:
+            try:
+                # A new time bucket starts a new segment
+                self._rotate_log_file()
+            except Exception as e:
+                logger.error(f"Failed to seal audit segment: {e}")
+            
+            lines = []
+            for event_dict, _ in items:
+                event_dict['prev_signature'] = self._prev_signature
+                event_dict['signature'] = self._sign_event(event_dict)
+                self._prev_signature = event_dict['signature']
+                lines.append(json.dumps(event_dict))
+            data = ('\n'.join(lines) + '\n').encode('utf-8')
+            
+            try:
+                if self._log_handle is None:
+                    self._log_handle = open(self.log_file, 'ab')
+                self._log_handle.write(data)
+                self._log_handle.flush()
+                self._segment_mac.update(data)
+                self._segment_size += len(data)
+                for event_dict, _ in items:
+                    add_event(self._active_aggregate, event_dict, event_time(event_dict))
+                
+                now = time.monotonic()
+                if self.fsync_policy == "batch" or (
+                        self.fsync_policy == "interval" and now - self._last_fsync >= self.fsync_interval):
+                    os.fsync(self._log_handle.fileno())
+                    self._last_fsync = now
+                    self.writer_stats["fsyncs"] += 1
+                
+                self._rotate_log_file()
+            except Exception as e:
+                self.writer_stats["write_errors"] += len(items)
+                self._close_log_handle()
+                logger.error(f"Failed to write audit event to log: {e}")
+                return
+            
+            # Commit latency: from enqueue of the oldest event to durable write
+            latency_ms = (time.perf_counter() - items[0][1]) * 1000
+            stats = self.writer_stats
+            stats["events_committed"] += len(items)
+            stats["batches_committed"] += 1
+            stats["max_batch_size"] = max(stats["max_batch_size"], len(items))
+            stats["last_commit_latency_ms"] = latency_ms
+            stats["max_commit_latency_ms"] = max(stats["max_commit_latency_ms"], latency_ms)
+            stats["total_commit_latency_ms"] += latency_ms
+    
+    def _close_log_handle(self):
+        if self._log_handle is not None:
+            try:
+                self._log_handle.close()
+            finally:
+                self._log_handle = None
+    
+    def flush(self):
+        """Block until every event logged so far has been written."""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+    
+    def close(self):
+        """Flush queued events, stop the writer thread and close the log file."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        
+        # Anything queued after the stop marker is written inline
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftovers.append(item)
+        if leftovers:
+            self._commit_batch(leftovers)
+        
+        with self._write_lock:
+            self._close_log_handle()
+    
+    def get_writer_stats(self) -> Dict[str, Any]:
+        """Queue depth and group-commit metrics."""
+        stats = dict(self.writer_stats)
+        batches = stats["batches_committed"]
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._queue.maxsize
+        stats["avg_batch_size"] = stats["events_committed"] / batches if batches else 0.0
+        stats["avg_commit_latency_ms"] = stats.pop("total_commit_latency_ms") / batches if batches else 0.0
+        stats["fsync_policy"] = self.fsync_policy
+        stats["group_commit"] = self._writer is not None and not self._closed
+        return stats
     
     def log_outbound_request(self, agent_id: str, agent_type: str, url: str, 
                            method: str, success: bool, response_status: Optional[int] = None,
@@ -424,41 +659,32 @@ class AuditLogger:
         """Get audit summary for specified time period."""
         try:
             cutoff_time = datetime.now(timezone.utc).timestamp() - (hours * 3600)
+            self.flush()
+            
+            with self._write_lock:
+                segments = [(self.log_file.parent / index["segment"], index) for index in self._segment_indexes]
+                active = new_aggregate()
+                merge_aggregate(active, self._active_aggregate)
+                segments.append((self.log_file, active))
             
-            events = []
-            with open(self.log_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip() and not line.startswith('{"audit_log_header"'):
-                        try:
-                            event = json.loads(line)
-                            event_time = datetime.fromisoformat(event['timestamp'].replace('Z', '+00:00')).timestamp()
-                            if event_time >= cutoff_time:
-                                events.append(event)
-                        except (json.JSONDecodeError, KeyError):
-                            continue
+            # Segments wholly inside the window contribute their precomputed
+            # aggregates; only a segment straddling the cutoff is parsed
+            totals = new_aggregate()
+            for segment_file, index in segments:
+                if not index["event_count"] or index["end_ts"] < cutoff_time:
+                    continue
+                if index["start_ts"] >= cutoff_time:
+                    merge_aggregate(totals, index)
+                else:
+                    merge_aggregate(totals, scan_segment(segment_file, since=cutoff_time))
             
             # Calculate statistics
-            total_events = len(events)
-            successful_events = len([e for e in events if e.get('success', False)])
+            total_events = totals["event_count"]
+            successful_events = totals["successful"]
             failed_events = total_events - successful_events
-            
-            # Event type breakdown
-            event_types = {}
-            for event in events:
-                event_type = event.get('event_type', 'unknown')
-                event_types[event_type] = event_types.get(event_type, 0) + 1
-            
-            # Level breakdown
-            levels = {}
-            for event in events:
-                level = event.get('level', 'unknown')
-                levels[level] = levels.get(level, 0) + 1
-            
-            # Agent activity
-            agent_activity = {}
-            for event in events:
-                agent = event.get('agent_id', 'unknown')
-                agent_activity[agent] = agent_activity.get(agent, 0) + 1
+            event_types = totals["event_types"]
+            levels = totals["levels"]
+            agent_activity = totals["agents"]
             
             return {
                 "summary": {
@@ -478,46 +704,67 @@ class AuditLogger:
             logger.error(f"Failed to get audit summary: {e}")
             return {"error": str(e)}
     
-    def verify_log_integrity(self) -> Dict[str, Any]:
-        """Verify log file integrity by checking signatures."""
+    def verify_log_integrity(self, deep: bool = False, workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Verify log integrity across all retained segments.
+        
+        Sealed segments whose HMAC matches their signed index are trusted as a
+        whole unless deep is set; any other sealed segment is re-verified event
+        by event. Segments are checked in a process pool (workers=1 disables it).
+        The active segment is always verified event by event.
+        """
         try:
-            total_events = 0
-            valid_signatures = 0
-            invalid_signatures = 0
+            self.flush()
+            with self._write_lock:
+                indexes = list(self._segment_indexes)
+                active_hmac = self._segment_mac.copy().hexdigest()
+                active_size = self._segment_size
+                active_prev = self._prev_segment_hmac
             
-            with open(self.log_file, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    if line.strip() and not line.startswith('{"audit_log_header"'):
-                        try:
-                            event = json.loads(line)
-                            total_events += 1
-                            
-                            # Get signature
-                            signature = event.pop('signature', None)
-                            if not signature:
-                                invalid_signatures += 1
-                                continue
-                            
-                            # Verify signature
-                            expected_signature = self._sign_event(event)
-                            if signature == expected_signature:
-                                valid_signatures += 1
-                            else:
-                                invalid_signatures += 1
-                                
-                        except (json.JSONDecodeError, KeyError):
-                            invalid_signatures += 1
+            jobs = []
+            invalid_indexes = 0
+            for index in indexes:
+                trusted = index_is_valid(self.audit_secret, index)
+                invalid_indexes += 0 if trusted else 1
+                jobs.append((str(self.log_file.parent / index["segment"]), self.audit_secret,
+                             index if trusted else None, deep))
+            results = self._verify_segments(jobs, workers)
+            
+            # Active segment: compare the bytes written so far against the running HMAC
+            data = self.log_file.read_bytes()[:active_size]
+            active_mac = new_segment_mac(self.audit_secret)
+            active_mac.update(data)
+            active = verify_event_lines(data.decode('utf-8', errors='replace').splitlines(), self.audit_secret)
+            active["segment_intact"] = active_mac.hexdigest() == active_hmac
+            results.append(active)
+            
+            chain = indexes + [{"prev_segment_hmac": active_prev}]
+            totals = {key: sum(r[key] for r in results)
+                      for key in ("total_events", "valid_signatures", "invalid_signatures", "chain_breaks")}
+            total_events = totals["total_events"]
             
             return {
-                "total_events": total_events,
-                "valid_signatures": valid_signatures,
-                "invalid_signatures": invalid_signatures,
-                "integrity_percentage": (valid_signatures / total_events * 100) if total_events > 0 else 0
+                **totals,
+                "segments_verified": len(results),
+                "segments_tampered": sum(1 for r in results if not r["segment_intact"]),
+                "invalid_indexes": invalid_indexes,
+                "segment_chain_breaks": segment_chain_breaks(chain),
+                "integrity_percentage": (totals["valid_signatures"] / total_events * 100) if total_events > 0 else 0
             }
             
         except Exception as e:
             logger.error(f"Failed to verify log integrity: {e}")
             return {"error": str(e)}
+    
+    def _verify_segments(self, jobs: List[tuple], workers: Optional[int]) -> List[Dict[str, Any]]:
+        """Run verify_segment over sealed segments, in parallel when there is more than one."""
+        if len(jobs) > 1 and (workers is None or workers > 1):
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    return list(pool.map(verify_segment, *zip(*jobs)))
+            except Exception as e:
+                logger.warning(f"Parallel segment verification unavailable, verifying serially: {e}")
+        return [verify_segment(*job) for job in jobs]
 
 
 # Global audit logger instance
@@ -0,0 +1,201 @@
+"""
+Synapse Audit Log Segments
+
+Helpers for the sealed, time-bucketed segments of the audit log. Each sealed
+segment file gets a sidecar index with its time range, event counts per
+type/level/agent, an HMAC over the segment bytes and the HMAC of the segment
+before it. Summaries merge these precomputed aggregates instead of parsing
+every event, and integrity checks can verify segments independently.
+
+Everything here is free of module-level state so segment verification can
+run in worker processes.
+"""
+
+import json
+import hmac
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Iterable
+
+HEADER_PREFIX = '{"audit_log_header"'
+INDEX_SUFFIX = ".index"
+
+
+def sign_payload(secret: str, data: Dict[str, Any]) -> str:
+    """HMAC-SHA256 over the canonical JSON form of data."""
+    canonical_data = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hmac.new(secret.encode('utf-8'), canonical_data.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def new_segment_mac(secret: str):
+    return hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+
+
+def event_time(event: Dict[str, Any]) -> float:
+    return datetime.fromisoformat(event['timestamp'].replace('Z', '+00:00')).timestamp()
+
+
+def new_aggregate() -> Dict[str, Any]:
+    return {
+        "start_ts": None,
+        "end_ts": None,
+        "event_count": 0,
+        "successful": 0,
+        "event_types": {},
+        "levels": {},
+        "agents": {}
+    }
+
+
+def add_event(aggregate: Dict[str, Any], event: Dict[str, Any], ts: float):
+    """Fold one event into an aggregate."""
+    if aggregate["start_ts"] is None or ts < aggregate["start_ts"]:
+        aggregate["start_ts"] = ts
+    if aggregate["end_ts"] is None or ts > aggregate["end_ts"]:
+        aggregate["end_ts"] = ts
+    aggregate["event_count"] += 1
+    if event.get('success', False):
+        aggregate["successful"] += 1
+    for key, field in (("event_types", 'event_type'), ("levels", 'level'), ("agents", 'agent_id')):
+        value = event.get(field, 'unknown')
+        aggregate[key][value] = aggregate[key].get(value, 0) + 1
+
+
+def merge_aggregate(target: Dict[str, Any], source: Dict[str, Any]):
+    """Add source's counts into target."""
+    if not source["event_count"]:
+        return
+    for bound, pick in (("start_ts", min), ("end_ts", max)):
+        target[bound] = source[bound] if target[bound] is None else pick(target[bound], source[bound])
+    target["event_count"] += source["event_count"]
+    target["successful"] += source["successful"]
+    for key in ("event_types", "levels", "agents"):
+        for value, count in source[key].items():
+            target[key][value] = target[key].get(value, 0) + count
+
+
+def iter_events(lines: Iterable[str]) -> Iterable[Dict[str, Any]]:
+    for line in lines:
+        if line.strip() and not line.startswith(HEADER_PREFIX):
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def scan_segment(path: Path, since: Optional[float] = None) -> Dict[str, Any]:
+    """Aggregate a segment file by parsing it, optionally only events at/after since."""
+    aggregate = new_aggregate()
+    with open(path, 'r', encoding='utf-8') as f:
+        for event in iter_events(f):
+            try:
+                ts = event_time(event)
+            except (KeyError, ValueError):
+                continue
+            if since is None or ts >= since:
+                add_event(aggregate, event, ts)
+    return aggregate
+
+
+def verify_event_lines(lines: Iterable[str], secret: str) -> Dict[str, int]:
+    """Check every event signature and the prev_signature chain."""
+    counts = {"total_events": 0, "valid_signatures": 0, "invalid_signatures": 0, "chain_breaks": 0}
+    prev_signature = None
+    for line in lines:
+        if not line.strip() or line.startswith(HEADER_PREFIX):
+            continue
+        counts["total_events"] += 1
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            counts["invalid_signatures"] += 1
+            continue
+
+        signature = event.pop('signature', None)
+        if not signature:
+            counts["invalid_signatures"] += 1
+            prev_signature = None
+            continue
+
+        # Chained events must follow the event they were signed after
+        if 'prev_signature' in event and prev_signature is not None \
+                and event['prev_signature'] != prev_signature:
+            counts["chain_breaks"] += 1
+        prev_signature = signature
+
+        if signature == sign_payload(secret, event):
+            counts["valid_signatures"] += 1
+        else:
+            counts["invalid_signatures"] += 1
+    return counts
+
+
+def index_path(segment_path: Path) -> Path:
+    return segment_path.with_suffix(INDEX_SUFFIX)
+
+
+def sign_index(secret: str, index: Dict[str, Any]) -> Dict[str, Any]:
+    index.pop("index_signature", None)
+    index["index_signature"] = sign_payload(secret, index)
+    return index
+
+
+def index_is_valid(secret: str, index: Dict[str, Any]) -> bool:
+    unsigned = dict(index)
+    signature = unsigned.pop("index_signature", None)
+    return signature is not None and hmac.compare_digest(signature, sign_payload(secret, unsigned))
+
+
+def write_index(path: Path, index: Dict[str, Any]):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(index), encoding='utf-8')
+    tmp.replace(path)
+
+
+def load_index(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def build_index(secret: str, segment_path: Path, prev_segment_hmac: Optional[str] = None) -> Dict[str, Any]:
+    """Index an existing segment file from scratch (segments sealed before indexing existed)."""
+    data = segment_path.read_bytes()
+    mac = new_segment_mac(secret)
+    mac.update(data)
+    index = scan_segment(segment_path)
+    index.update({
+        "segment": segment_path.name,
+        "size": len(data),
+        "segment_hmac": mac.hexdigest(),
+        "prev_segment_hmac": prev_segment_hmac
+    })
+    return sign_index(secret, index)
+
+
+def verify_segment(path: str, secret: str, index: Optional[Dict[str, Any]], deep: bool = False) -> Dict[str, Any]:
+    """Verify one sealed segment; events are only re-checked if deep or the segment HMAC fails."""
+    data = Path(path).read_bytes()
+    mac = new_segment_mac(secret)
+    mac.update(data)
+    intact = index is not None and hmac.compare_digest(mac.hexdigest(), index.get("segment_hmac", ""))
+
+    if intact and not deep:
+        counts = {"total_events": index["event_count"], "valid_signatures": index["event_count"],
+                  "invalid_signatures": 0, "chain_breaks": 0}
+    else:
+        counts = verify_event_lines(data.decode('utf-8', errors='replace').splitlines(), secret)
+    counts["segment"] = Path(path).name
+    counts["segment_intact"] = intact
+    return counts
+
+
+def segment_chain_breaks(indexes: List[Dict[str, Any]]) -> int:
+    """Count sealed segments whose recorded predecessor is not the segment before them."""
+    breaks = 0
+    for previous, current in zip(indexes, indexes[1:]):
+        if current.get("prev_segment_hmac") is not None and current["prev_segment_hmac"] != previous["segment_hmac"]:
+            breaks += 1
+    return breaks
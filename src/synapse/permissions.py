@@ -6,8 +6,9 @@ All plugin permissions must be explicitly approved by the user.
 """
 
 import json
+import time
 import uuid
-from typing import Dict, Any, List, Optional, Set
+from typing import Dict, Any, List, Optional, Set, Tuple
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from enum import Enum
@@ -15,6 +16,9 @@ import logging
 
 from .manifest import PermissionType
 
+# Expiry recorded in the grant index for grants that never expire
+NEVER_EXPIRES = float("inf")
+
 class PermissionStatus(Enum):
     """Permission approval status."""
     PENDING = "pending"
@@ -60,6 +64,17 @@ class PermissionManager:
         # Permission requests
         self.requests: Dict[str, PermissionRequest] = {}
         
+        # Grant index: plugin_id -> permission -> latest expiry (epoch seconds).
+        # Rebuilt lazily whenever _version moves past _indexed_version.
+        self._version = 0
+        self._indexed_version = -1
+        self._grant_index: Dict[str, Dict[str, float]] = {}
+        self._plugin_grant_ids: Dict[str, List[str]] = {}
+        
+        # Decision cache: (plugin_id, permission) -> (allowed, valid_until, version)
+        self._decisions: Dict[Tuple[str, str], Tuple[bool, float, int]] = {}
+        self.cache_stats = {"hits": 0, "misses": 0, "index_rebuilds": 0}
+        
         # Risk thresholds for automatic approval
         self.risk_thresholds = {
             PermissionType.READ_VAULT.value: 10,
@@ -159,6 +174,7 @@ class PermissionManager:
         )
         
         self.grants[grant_id] = grant
+        self.invalidate_cache()
         
         self.logger.info(f"Permissions approved: {request_id} -> {grant_id}")
         
@@ -186,6 +202,7 @@ class PermissionManager:
         request.reviewed_at = datetime.now().isoformat()
         request.reviewed_by = user_id
         request.reason = reason
+        self.invalidate_cache()
         
         self.logger.info(f"Permissions denied: {request_id}")
         
@@ -207,14 +224,13 @@ class PermissionManager:
         revoked_count = 0
         
         # Find and remove grants for this plugin
-        grants_to_remove = []
-        for grant_id, grant in self.grants.items():
-            if grant.plugin_id == plugin_id:
-                grants_to_remove.append(grant_id)
+        self._ensure_index()
+        grants_to_remove = list(self._plugin_grant_ids.get(plugin_id, []))
         
         for grant_id in grants_to_remove:
-            del self.grants[grant_id]
-            revoked_count += 1
+            if self.grants.pop(grant_id, None) is not None:
+                revoked_count += 1
+        self.invalidate_cache()
         
         # Update any pending requests
         for request in self.requests.values():
@@ -239,15 +255,24 @@ class PermissionManager:
         Returns:
             True if permission is granted
         """
-        for grant in self.grants.values():
-            if grant.plugin_id == plugin_id and permission in grant.permissions:
-                # Check if grant has expired
-                if grant.expires_at:
-                    if datetime.fromisoformat(grant.expires_at) < datetime.now():
-                        continue
-                return True
-        
-        return False
+        now = time.time()
+        key = (plugin_id, permission)
+        cached = self._decisions.get(key)
+        if cached is not None and cached[2] == self._version and now <= cached[1]:
+            self.cache_stats["hits"] += 1
+            return cached[0]
+        
+        self.cache_stats["misses"] += 1
+        self._ensure_index()
+        expiry = self._grant_index.get(plugin_id, {}).get(permission)
+        if expiry is not None and expiry >= now:
+            # Granted until the latest grant carrying this permission expires
+            decision = (True, expiry, self._version)
+        else:
+            # Denials only change when grants do, which bumps the version
+            decision = (False, NEVER_EXPIRES, self._version)
+        self._decisions[key] = decision
+        return decision[0]
     
     def get_plugin_permissions(self, plugin_id: str) -> List[str]:
         """
@@ -259,17 +284,11 @@ class PermissionManager:
         Returns:
             List of granted permissions
         """
-        permissions = set()
+        self._ensure_index()
+        now = time.time()
         
-        for grant in self.grants.values():
-            if grant.plugin_id == plugin_id:
-                # Check if grant has expired
-                if grant.expires_at:
-                    if datetime.fromisoformat(grant.expires_at) < datetime.now():
-                        continue
-                permissions.update(grant.permissions)
-        
-        return list(permissions)
+        return [permission for permission, expiry in self._grant_index.get(plugin_id, {}).items()
+                if expiry >= now]
     
     def get_pending_requests(self) -> List[PermissionRequest]:
         """Get all pending permission requests."""
@@ -278,8 +297,48 @@ class PermissionManager:
     
     def get_plugin_grants(self, plugin_id: str) -> List[PermissionGrant]:
         """Get all active grants for a plugin."""
-        return [grant for grant in self.grants.values() 
-                if grant.plugin_id == plugin_id]
+        self._ensure_index()
+        return [self.grants[grant_id] for grant_id in self._plugin_grant_ids.get(plugin_id, [])]
+    
+    def invalidate_cache(self):
+        """
+        Invalidate the grant index and cached decisions.
+        
+        Called on approve/deny/revoke/import; code that edits self.grants or a
+        grant's expiry directly must call it too.
+        """
+        self._version += 1
+        self._decisions.clear()
+    
+    def _ensure_index(self):
+        """Rebuild the per-plugin grant index if grants changed since it was built."""
+        if self._indexed_version == self._version:
+            return
+        
+        grant_index: Dict[str, Dict[str, float]] = {}
+        plugin_grant_ids: Dict[str, List[str]] = {}
+        for grant_id, grant in self.grants.items():
+            plugin_grant_ids.setdefault(grant.plugin_id, []).append(grant_id)
+            expiry = self._parse_expiry(grant)
+            permissions = grant_index.setdefault(grant.plugin_id, {})
+            for permission in grant.permissions:
+                if expiry > permissions.get(permission, -NEVER_EXPIRES):
+                    permissions[permission] = expiry
+        
+        self._grant_index = grant_index
+        self._plugin_grant_ids = plugin_grant_ids
+        self._indexed_version = self._version
+        self.cache_stats["index_rebuilds"] += 1
+    
+    def _parse_expiry(self, grant: PermissionGrant) -> float:
+        """Grant expiry as epoch seconds; unparseable expiries count as already expired."""
+        if not grant.expires_at:
+            return NEVER_EXPIRES
+        try:
+            return datetime.fromisoformat(grant.expires_at).timestamp()
+        except ValueError:
+            self.logger.warning(f"Invalid expiry on grant {grant.grant_id}: {grant.expires_at}")
+            return -NEVER_EXPIRES
     
     def _validate_permissions(self, permissions: List[str]) -> List[str]:
         """Validate permission types."""
@@ -330,6 +389,7 @@ class PermissionManager:
             # Clear existing data
             self.grants.clear()
             self.requests.clear()
+            self.invalidate_cache()
             
             # Import grants
             for grant_data in data.get("grants", []):
@@ -341,6 +401,7 @@ class PermissionManager:
                 request = PermissionRequest(**request_data)
                 self.requests[request.request_id] = request
             
+            self.invalidate_cache()
             self.logger.info("Permissions imported successfully")
             return True
             
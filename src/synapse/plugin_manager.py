@@ -89,7 +89,8 @@ class PluginManager:
         self.traffic_logger = TrafficLogger(
             max_entries=config.get("traffic", {}).get("max_entries", 10000),
             retention_days=config.get("traffic", {}).get("retention_days", 30),
-            logger=self.logger
+            logger=self.logger,
+            spill_dir=config.get("traffic", {}).get("spill_dir")
         )
         
         # Initialize MCP executor
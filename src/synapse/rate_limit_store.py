@@ -0,0 +1,218 @@
+"""
+Rate Limit Counter Stores
+
+Sliding-window request counters for the Synapse RateLimiter. Each window is
+a ring of fixed-width buckets: 1-second buckets cover the burst and minute
+windows, 1-minute buckets cover the hour window. A check reads and bumps a
+handful of counters no matter how many requests were made in the last hour.
+
+LocalRateLimitStore keeps the counters in process memory. SQLiteRateLimitStore
+keeps the same buckets in a SQLite database shared by several API worker
+processes, so they enforce a single global limit.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+BURST_SECONDS = 10
+SECOND_BUCKETS = 60   # 1-second buckets: minute window
+MINUTE_BUCKETS = 60   # 1-minute buckets: hour window
+
+
+class RateCounts(NamedTuple):
+    """Requests recorded in the burst, minute and hour windows."""
+    burst: int
+    minute: int
+    hour: int
+
+
+class SlidingWindowCounter:
+    """Request counts over a sliding window held as a ring of fixed-width buckets."""
+
+    __slots__ = ("bucket_seconds", "counts", "total", "head")
+
+    def __init__(self, buckets: int, bucket_seconds: int):
+        self.bucket_seconds = bucket_seconds
+        self.counts: List[int] = [0] * buckets
+        self.total = 0
+        self.head: Optional[int] = None  # Absolute index of the newest bucket
+
+    def _advance(self, now: float) -> int:
+        """Expire buckets that fell out of the window; returns the current bucket index."""
+        current = int(now // self.bucket_seconds)
+        if self.head is None or current - self.head >= len(self.counts):
+            self.counts = [0] * len(self.counts)
+            self.total = 0
+        elif current > self.head:
+            for bucket in range(self.head + 1, current + 1):
+                slot = bucket % len(self.counts)
+                self.total -= self.counts[slot]
+                self.counts[slot] = 0
+        if self.head is None or current > self.head:
+            self.head = current
+        return self.head
+
+    def add(self, now: float, amount: int = 1):
+        current = self._advance(now)
+        self.counts[current % len(self.counts)] += amount
+        self.total += amount
+
+    def count(self, now: float) -> int:
+        self._advance(now)
+        return self.total
+
+    def recent(self, now: float, buckets: int) -> int:
+        """Count over only the newest `buckets` buckets."""
+        current = self._advance(now)
+        return sum(self.counts[(current - i) % len(self.counts)] for i in range(buckets))
+
+
+class LocalRateLimitStore:
+    """In-process counters; transaction() serializes check-and-record across threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Tuple[SlidingWindowCounter, SlidingWindowCounter]] = {}
+        self._blocked: Dict[str, float] = {}
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield self
+
+    def _counters_for(self, key: str) -> Tuple[SlidingWindowCounter, SlidingWindowCounter]:
+        counters = self._counters.get(key)
+        if counters is None:
+            counters = (SlidingWindowCounter(SECOND_BUCKETS, 1), SlidingWindowCounter(MINUTE_BUCKETS, 60))
+            self._counters[key] = counters
+        return counters
+
+    def counts(self, key: str, now: float) -> RateCounts:
+        seconds, minutes = self._counters_for(key)
+        return RateCounts(seconds.recent(now, BURST_SECONDS), seconds.count(now), minutes.count(now))
+
+    def record(self, key: str, now: float):
+        seconds, minutes = self._counters_for(key)
+        seconds.add(now)
+        minutes.add(now)
+
+    def blocked_at(self, agent_id: str) -> Optional[float]:
+        return self._blocked.get(agent_id)
+
+    def block(self, agent_id: str, now: float):
+        self._blocked[agent_id] = now
+
+    def unblock(self, agent_id: str):
+        self._blocked.pop(agent_id, None)
+
+    def blocked_agents(self) -> Dict[str, float]:
+        return dict(self._blocked)
+
+
+class SQLiteRateLimitStore:
+    """Counters in a SQLite database shared between processes (one connection per thread)."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rate_buckets (
+            key TEXT NOT NULL,
+            width INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (key, width, bucket)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS rate_blocks (
+            agent_id TEXT PRIMARY KEY,
+            blocked_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: str, prune_every: int = 1000, busy_timeout_ms: int = 5000):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.prune_every = prune_every
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._records_since_prune = 0
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transaction() issues BEGIN IMMEDIATE itself
+            conn = sqlite3.connect(str(self.db_path), isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Counters are advisory state, not worth an fsync per request
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Hold the database write lock so check-and-record is atomic across processes."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def counts(self, key: str, now: float) -> RateCounts:
+        second, minute = int(now), int(now // 60)
+        row = self._conn().execute(
+            """
+            SELECT COALESCE(SUM(CASE WHEN width = 1 AND bucket > ? THEN count END), 0),
+                   COALESCE(SUM(CASE WHEN width = 1 THEN count END), 0),
+                   COALESCE(SUM(CASE WHEN width = 60 THEN count END), 0)
+            FROM rate_buckets
+            WHERE key = ? AND ((width = 1 AND bucket > ?) OR (width = 60 AND bucket > ?))
+            """,
+            (second - BURST_SECONDS, key, second - SECOND_BUCKETS, minute - MINUTE_BUCKETS)
+        ).fetchone()
+        return RateCounts(*row)
+
+    def record(self, key: str, now: float):
+        second, minute = int(now), int(now // 60)
+        conn = self._conn()
+        conn.execute(
+            """
+            INSERT INTO rate_buckets (key, width, bucket, count) VALUES (?, 1, ?, 1), (?, 60, ?, 1)
+            ON CONFLICT (key, width, bucket) DO UPDATE SET count = count + 1
+            """,
+            (key, second, key, minute)
+        )
+        self._records_since_prune += 1
+        if self._records_since_prune >= self.prune_every:
+            self._records_since_prune = 0
+            conn.execute(
+                "DELETE FROM rate_buckets WHERE (width = 1 AND bucket <= ?) OR (width = 60 AND bucket <= ?)",
+                (second - SECOND_BUCKETS, minute - MINUTE_BUCKETS)
+            )
+
+    def blocked_at(self, agent_id: str) -> Optional[float]:
+        row = self._conn().execute("SELECT blocked_at FROM rate_blocks WHERE agent_id = ?", (agent_id,)).fetchone()
+        return row[0] if row else None
+
+    def block(self, agent_id: str, now: float):
+        self._conn().execute(
+            "INSERT INTO rate_blocks (agent_id, blocked_at) VALUES (?, ?) "
+            "ON CONFLICT (agent_id) DO UPDATE SET blocked_at = excluded.blocked_at",
+            (agent_id, now)
+        )
+
+    def unblock(self, agent_id: str):
+        self._conn().execute("DELETE FROM rate_blocks WHERE agent_id = ?", (agent_id,))
+
+    def blocked_agents(self) -> Dict[str, float]:
+        return dict(self._conn().execute("SELECT agent_id, blocked_at FROM rate_blocks").fetchall())
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
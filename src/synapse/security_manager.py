@@ -11,17 +11,21 @@ Comprehensive security management for all Synapse modules including:
 import asyncio
 import json
 import logging
+import os
+import random
 import time
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Any
-from collections import defaultdict
+from typing import Dict, Optional, Set, Any, Deque, Tuple
+from collections import defaultdict, deque
 import hashlib
 import hmac
 import secrets
 
+from .rate_limit_store import LocalRateLimitStore, SQLiteRateLimitStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -165,77 +169,75 @@ class SentryHook:
 
 
 class RateLimiter:
-    """Rate limiting for external actions."""
+    """Rate limiting for external actions (bucketed sliding windows, O(1) per check)."""
+    
+    def __init__(self, store=None):
+        # LocalRateLimitStore per process, or SQLiteRateLimitStore for a limit shared across processes
+        self.store = store or LocalRateLimitStore()
     
-    def __init__(self):
-        self.request_counts: Dict[str, List[float]] = defaultdict(list)
-        self.blocked_agents: Dict[str, float] = {}
+    @property
+    def blocked_agents(self) -> Dict[str, float]:
+        return self.store.blocked_agents()
     
     def check_rate_limit(self, agent_id: str, permission_type: PermissionType, 
                         config: RateLimitConfig) -> bool:
         """Check if request is within rate limits."""
         current_time = time.time()
-        
-        # Check if agent is blocked
-        if agent_id in self.blocked_agents:
-            if current_time - self.blocked_agents[agent_id] < config.cooldown_seconds:
-                return False
-            else:
-                del self.blocked_agents[agent_id]
-        
-        # Get request history for this agent/permission combination
         key = f"{agent_id}_{permission_type.value}"
-        requests = self.request_counts[key]
-        
-        # Remove old requests (older than 1 hour)
-        requests = [req_time for req_time in requests if current_time - req_time < 3600]
-        self.request_counts[key] = requests
-        
-        # Check minute limit
-        minute_requests = [req_time for req_time in requests if current_time - req_time < 60]
-        if len(minute_requests) >= config.requests_per_minute:
-            self.blocked_agents[agent_id] = current_time
-            return False
-        
-        # Check hour limit
-        if len(requests) >= config.requests_per_hour:
-            self.blocked_agents[agent_id] = current_time
-            return False
-        
-        # Check burst limit
-        recent_requests = [req_time for req_time in requests if current_time - req_time < 10]
-        if len(recent_requests) >= config.burst_limit:
-            return False
         
-        # Add current request
-        requests.append(current_time)
-        return True
+        with self.store.transaction():
+            # Check if agent is blocked
+            blocked_at = self.store.blocked_at(agent_id)
+            if blocked_at is not None:
+                if current_time - blocked_at < config.cooldown_seconds:
+                    return False
+                self.store.unblock(agent_id)
+            
+            counts = self.store.counts(key, current_time)
+            
+            # Check minute and hour limits
+            if counts.minute >= config.requests_per_minute or counts.hour >= config.requests_per_hour:
+                self.store.block(agent_id, current_time)
+                return False
+            
+            # Check burst limit
+            if counts.burst >= config.burst_limit:
+                return False
+            
+            # Add current request
+            self.store.record(key, current_time)
+            return True
     
     def get_rate_limit_status(self, agent_id: str, permission_type: PermissionType) -> Dict[str, Any]:
         """Get current rate limit status for agent."""
         key = f"{agent_id}_{permission_type.value}"
-        requests = self.request_counts[key]
-        current_time = time.time()
         
-        minute_requests = [req_time for req_time in requests if current_time - req_time < 60]
-        hour_requests = [req_time for req_time in requests if current_time - req_time < 3600]
+        with self.store.transaction():
+            counts = self.store.counts(key, time.time())
+            blocked_at = self.store.blocked_at(agent_id)
         
         return {
             "agent_id": agent_id,
             "permission_type": permission_type.value,
-            "requests_last_minute": len(minute_requests),
-            "requests_last_hour": len(hour_requests),
-            "is_blocked": agent_id in self.blocked_agents,
-            "blocked_until": self.blocked_agents.get(agent_id, None)
+            "requests_last_minute": counts.minute,
+            "requests_last_hour": counts.hour,
+            "is_blocked": blocked_at is not None,
+            "blocked_until": blocked_at
         }
 
 
 class SecurityManager:
     """Main security manager for Synapse modules."""
     
-    def __init__(self, sentry_instance=None, log_file: str = "logs/synapse-actions.json"):
+    def __init__(self, sentry_instance=None, log_file: str = "logs/synapse-actions.json",
+                 rate_limit_db: Optional[str] = None,
+                 success_log_interval: Optional[float] = None,
+                 success_log_sample_rate: Optional[float] = None):
         self.sentry_hook = SentryHook(sentry_instance)
-        self.rate_limiter = RateLimiter()
+        
+        # A shared database makes every API worker process enforce the same limits
+        rate_limit_db = rate_limit_db or os.getenv("SYNAPSE_RATE_LIMIT_DB")
+        self.rate_limiter = RateLimiter(SQLiteRateLimitStore(rate_limit_db) if rate_limit_db else None)
         self.log_file = Path(log_file)
         self.log_file.parent.mkdir(exist_ok=True)
         
@@ -243,8 +245,20 @@ class SecurityManager:
         self.permission_configs = self._initialize_permission_configs()
         
         # Security event history
-        self.security_events: List[SecurityEvent] = []
         self.max_events = 10000  # Keep last 10k events in memory
+        self.security_events: Deque[SecurityEvent] = deque(maxlen=self.max_events)
+        
+        # Successful checks are logged for the first check of each agent/permission
+        # pair per interval plus a random sample of the rest; denials are always
+        # logged. An interval of 0 logs every successful check.
+        if success_log_interval is None:
+            success_log_interval = float(os.getenv("SYNAPSE_SUCCESS_LOG_INTERVAL", "60"))
+        if success_log_sample_rate is None:
+            success_log_sample_rate = float(os.getenv("SYNAPSE_SUCCESS_LOG_SAMPLE_RATE", "0"))
+        self.success_log_interval = success_log_interval
+        self.success_log_sample_rate = success_log_sample_rate
+        self._last_success_logged: Dict[Tuple[str, PermissionType], float] = {}
+        self.decision_counts = {"allowed": 0, "denied": 0, "successes_logged": 0, "successes_sampled_out": 0}
         
         # Risk scoring weights
         self.risk_weights = {
@@ -311,6 +325,7 @@ class SecurityManager:
         
         # Check if permission is allowed
         if permission_type not in config.allowed_permissions:
+            self.decision_counts["denied"] += 1
             self._log_security_event(agent_id, agent_type, action, target, 
                                    permission_type, config.security_level, False, details)
             return False
@@ -321,16 +336,32 @@ class SecurityManager:
             rate_limit_details = {"reason": "rate_limit_exceeded"}
             if details:
                 rate_limit_details.update(details)
+            self.decision_counts["denied"] += 1
             self._log_security_event(agent_id, agent_type, action, target, 
                                    permission_type, config.security_level, False, 
                                    rate_limit_details)
             return False
         
-        # Log successful permission check
-        self._log_security_event(agent_id, agent_type, action, target, 
-                               permission_type, config.security_level, True, details)
+        # Log successful permission check (sampled)
+        self.decision_counts["allowed"] += 1
+        if self._should_log_success(agent_id, permission_type):
+            self.decision_counts["successes_logged"] += 1
+            self._log_security_event(agent_id, agent_type, action, target, 
+                                   permission_type, config.security_level, True, details)
+        else:
+            self.decision_counts["successes_sampled_out"] += 1
         return True
     
+    def _should_log_success(self, agent_id: str, permission_type: PermissionType) -> bool:
+        """Apply the success logging policy to one successful check."""
+        now = time.time()
+        key = (agent_id, permission_type)
+        last_logged = self._last_success_logged.get(key)
+        if last_logged is None or now - last_logged >= self.success_log_interval:
+            self._last_success_logged[key] = now
+            return True
+        return self.success_log_sample_rate > 0 and random.random() < self.success_log_sample_rate
+    
     def _log_security_event(self, agent_id: str, agent_type: AgentType, action: str, 
                            target: str, permission_type: PermissionType, 
                            security_level: SecurityLevel, success: bool, 
@@ -358,8 +389,6 @@ class SecurityManager:
         
         # Add to memory
         self.security_events.append(event)
-        if len(self.security_events) > self.max_events:
-            self.security_events.pop(0)
         
         # Log to file
         self._write_event_to_log(event)
@@ -471,6 +500,7 @@ class SecurityManager:
             },
             "agent_activity": dict(agent_activity),
             "permission_usage": dict(permission_usage),
+            "decisions": dict(self.decision_counts),
             "rate_limit_status": self._get_rate_limit_status(),
             "last_updated": current_time.isoformat()
         }
@@ -508,6 +538,7 @@ class SecurityManager:
     def clear_security_events(self):
         """Clear security events (for testing/debugging)."""
         self.security_events.clear()
+        self._last_success_logged.clear()
         logger.info("Security events cleared")
 
 
@@ -7,6 +7,7 @@ Provides the unified interface for plugin registration, execution, and monitorin
 
 import json
 import uuid
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from typing import Dict, Any, List, Optional, Union
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
@@ -36,7 +37,8 @@ class SynapseConfig:
     })
     traffic: Dict[str, Any] = field(default_factory=lambda: {
         "max_entries": 10000,
-        "retention_days": 30
+        "retention_days": 30,
+        "spill_dir": None
     })
     security: Dict[str, Any] = field(default_factory=lambda: {
         "require_manifest_signature": True,
@@ -101,6 +103,7 @@ class Synapse:
             config=self.config.traffic_manager,
             logger=self.logger
         )
+        self.traffic_manager.register_executor("plugin", self._execute_queued_plugin)
         self.security_orchestrator = SentrySecurityOrchestrator(
             config=self.config.security,
             logger=self.logger
@@ -218,13 +221,20 @@ class Synapse:
                 loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
             
-            # Submit request for rate limiting
+            # Submit request for rate limiting and pooled execution
             traffic_result = loop.run_until_complete(
                 self.traffic_manager.submit_request(
                     request_id=request_id,
                     agent_type=agent_type,
                     payload=payload,
-                    user_id=user_id
+                    user_id=user_id,
+                    metadata={
+                        "executor": "plugin",
+                        "plugin_id": plugin_id,
+                        "user_id": user_id,
+                        "session_id": session_id,
+                        "timeout": timeout
+                    }
                 )
             )
             
@@ -239,8 +249,14 @@ class Synapse:
                     response_data={"retry_after": traffic_result.get("retry_after")}
                 )
             
-            # Execute the plugin
-            execution_result = self.plugin_manager.execute_plugin(plugin_id, user_id, payload, session_id, timeout)
+            # Wait for a traffic worker to execute the plugin
+            wait_timeout = (timeout or self.config.sandbox.get("max_execution_time", 300)) + \
+                traffic_result.get("estimated_wait_time", 0)
+            try:
+                execution_result = traffic_result["future"].result(timeout=wait_timeout)
+            except FutureTimeoutError:
+                traffic_result["future"].cancel()
+                raise TimeoutError(f"Plugin execution timed out after {wait_timeout:.1f}s")
             
             # Log successful execution
             self.logger.info(f"Plugin executed successfully: {plugin_id} by {user_id}")
@@ -573,9 +589,21 @@ class Synapse:
         # Shutdown enhanced components
         self.traffic_manager.shutdown()
         self.security_orchestrator.shutdown()
+        self.traffic_logger.flush()
         
         self.logger.info("System cleanup completed")
     
+    def _execute_queued_plugin(self, request) -> PluginExecutionResult:
+        """Traffic manager executor for plugin requests."""
+        metadata = request.metadata
+        return self.plugin_manager.execute_plugin(
+            metadata["plugin_id"],
+            metadata["user_id"],
+            request.payload,
+            metadata.get("session_id"),
+            metadata.get("timeout")
+        )
+    
     # Enhanced API methods for traffic management and security
     
     def get_traffic_metrics(self) -> Dict[str, Any]:
@@ -3,17 +3,27 @@ Traffic Logging System
 
 Logs all plugin, API, and browser extension events for audit and monitoring.
 Provides traffic summaries and detailed logs for compliance review.
+
+Entries live in a fixed-size ring buffer addressed by a monotonically
+increasing sequence number (slot = seq % max_entries). Plugin, user and
+session indexes hold ascending sequence numbers, so evicting the oldest
+entry is a popleft on each index it appears in, and time-range queries are
+a binary search over the buffered timestamps. Evicted entries can optionally
+be spilled to JSON-lines segment files for history beyond memory.
 """
 
 import json
+import time
 import uuid
 import statistics
-from typing import Dict, Any, List, Optional, Union
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Union, Deque, Iterable
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timedelta
 from enum import Enum
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
 
 class TrafficType(Enum):
     """Traffic event types."""
@@ -90,21 +100,37 @@ class ConnectionLog:
 class TrafficLogger:
     """Logs and manages traffic events for plugins and APIs."""
     
-    def __init__(self, max_entries: int = 10000, retention_days: int = 30, logger=None):
+    def __init__(self, max_entries: int = 10000, retention_days: int = 30, logger=None,
+                 spill_dir: Optional[str] = None, spill_batch_size: int = 256,
+                 spill_segment_bytes: int = 64 * 1024 * 1024):
         self.max_entries = max_entries
         self.retention_days = retention_days
         self.logger = logger or logging.getLogger(__name__)
         
-        # Traffic log storage
-        self.traffic_logs: List[TrafficLogEntry] = []
+        # Ring buffer: the entry with sequence number seq lives in slot seq % max_entries
+        self._ring: List[Optional[TrafficLogEntry]] = [None] * max_entries
+        self._ring_times: List[float] = [0.0] * max_entries
+        self._first_seq = 0
+        self._next_seq = 0
+        self._last_time = 0.0
+        self._lock = threading.RLock()
         
         # Connection logs
         self.connection_logs: Dict[str, ConnectionLog] = {}
         
-        # Indexes for quick lookups
-        self.plugin_index: Dict[str, List[str]] = defaultdict(list)
-        self.user_index: Dict[str, List[str]] = defaultdict(list)
-        self.session_index: Dict[str, List[str]] = defaultdict(list)
+        # Indexes for quick lookups: key -> ascending sequence numbers of buffered entries
+        self.plugin_index: Dict[str, Deque[int]] = defaultdict(deque)
+        self.user_index: Dict[str, Deque[int]] = defaultdict(deque)
+        self.session_index: Dict[str, Deque[int]] = defaultdict(deque)
+        
+        # Optional on-disk segments for entries evicted from memory
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_batch_size = spill_batch_size
+        self.spill_segment_bytes = spill_segment_bytes
+        self._spill_buffer: List[str] = []
+        self._segment_path: Optional[Path] = None
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
         
         # Traffic counters
         self.traffic_counters = {
@@ -113,9 +139,20 @@ class TrafficLogger:
             "events_by_source": defaultdict(int),
             "events_by_plugin": defaultdict(int),
             "errors": 0,
-            "warnings": 0
+            "warnings": 0,
+            "evicted": 0,
+            "spilled": 0
         }
     
+    @property
+    def traffic_logs(self) -> List[TrafficLogEntry]:
+        """Buffered entries, oldest first."""
+        with self._lock:
+            return [self._ring[seq % self.max_entries] for seq in range(self._first_seq, self._next_seq)]
+    
+    def __len__(self) -> int:
+        return self._next_seq - self._first_seq
+    
     def log_traffic(self, traffic_type: TrafficType, source: str, 
                    target: Optional[str] = None, user_id: Optional[str] = None,
                    plugin_id: Optional[str] = None, session_id: Optional[str] = None,
@@ -147,48 +184,59 @@ class TrafficLogger:
             Entry ID
         """
         entry_id = f"traffic-{uuid.uuid4().hex[:8]}"
-        timestamp = datetime.now().isoformat()
-        
-        # Create log entry
-        entry = TrafficLogEntry(
-            entry_id=entry_id,
-            timestamp=timestamp,
-            traffic_type=traffic_type,
-            source=source,
-            target=target,
-            user_id=user_id,
-            plugin_id=plugin_id,
-            session_id=session_id,
-            request_id=request_id,
-            payload=payload,
-            response=response,
-            duration=duration,
-            status=status,
-            error_message=error_message,
-            severity=severity,
-            metadata=metadata or {}
-        )
         
-        # Add to log
-        self.traffic_logs.append(entry)
-        
-        # Update indexes
-        if plugin_id:
-            self.plugin_index[plugin_id].append(entry_id)
-        if user_id:
-            self.user_index[user_id].append(entry_id)
-        if session_id:
-            self.session_index[session_id].append(entry_id)
-        
-        # Update counters
-        self._update_counters(entry)
-        
-        # Update connection log if applicable
-        if traffic_type in [TrafficType.CONNECTION_ESTABLISH, TrafficType.CONNECTION_CLOSE]:
-            self._update_connection_log(entry)
-        
-        # Cleanup old entries if needed
-        self._cleanup_old_entries()
+        with self._lock:
+            # Clamp clock steps backwards so the buffer stays sorted by time
+            stamp = datetime.fromtimestamp(max(time.time(), self._last_time))
+            # Index the microsecond-precision time the ISO timestamp round-trips to
+            now = self._last_time = stamp.timestamp()
+            
+            # Create log entry
+            entry = TrafficLogEntry(
+                entry_id=entry_id,
+                timestamp=stamp.isoformat(),
+                traffic_type=traffic_type,
+                source=source,
+                target=target,
+                user_id=user_id,
+                plugin_id=plugin_id,
+                session_id=session_id,
+                request_id=request_id,
+                payload=payload,
+                response=response,
+                duration=duration,
+                status=status,
+                error_message=error_message,
+                severity=severity,
+                metadata=metadata or {}
+            )
+            
+            # Drop expired entries, then make room if the buffer is full
+            self._cleanup_old_entries(now)
+            if len(self) >= self.max_entries:
+                self._evict_oldest()
+            
+            # Add to log
+            seq = self._next_seq
+            slot = seq % self.max_entries
+            self._ring[slot] = entry
+            self._ring_times[slot] = now
+            self._next_seq += 1
+            
+            # Update indexes
+            if plugin_id:
+                self.plugin_index[plugin_id].append(seq)
+            if user_id:
+                self.user_index[user_id].append(seq)
+            if session_id:
+                self.session_index[session_id].append(seq)
+            
+            # Update counters
+            self._update_counters(entry)
+            
+            # Update connection log if applicable
+            if traffic_type in [TrafficType.CONNECTION_ESTABLISH, TrafficType.CONNECTION_CLOSE]:
+                self._update_connection_log(entry)
         
         self.logger.debug(f"Traffic logged: {entry_id} - {traffic_type.value}")
         return entry_id
@@ -197,7 +245,8 @@ class TrafficLogger:
                         user_id: Optional[str] = None, session_id: Optional[str] = None,
                         traffic_type: Optional[TrafficType] = None,
                         start_time: Optional[str] = None, end_time: Optional[str] = None,
-                        limit: Optional[int] = None) -> List[TrafficLogEntry]:
+                        limit: Optional[int] = None,
+                        include_spilled: bool = False) -> List[TrafficLogEntry]:
         """
         Get traffic logs with optional filtering.
         
@@ -209,43 +258,53 @@ class TrafficLogger:
             start_time: Filter by start time
             end_time: Filter by end time
             limit: Limit number of results
+            include_spilled: Also search entries spilled to disk segments
             
         Returns:
-            List of traffic log entries
+            List of traffic log entries (newest first)
         """
-        # Start with all logs
-        logs = self.traffic_logs.copy()
-        
-        # Apply filters
-        if plugin_id:
-            entry_ids = set(self.plugin_index.get(plugin_id, []))
-            logs = [log for log in logs if log.entry_id in entry_ids]
-        
-        if user_id:
-            entry_ids = set(self.user_index.get(user_id, []))
-            logs = [log for log in logs if log.entry_id in entry_ids]
-        
-        if session_id:
-            entry_ids = set(self.session_index.get(session_id, []))
-            logs = [log for log in logs if log.entry_id in entry_ids]
-        
-        if traffic_type:
-            logs = [log for log in logs if log.traffic_type == traffic_type]
-        
-        if start_time:
-            start_dt = datetime.fromisoformat(start_time)
-            logs = [log for log in logs if datetime.fromisoformat(log.timestamp) >= start_dt]
-        
-        if end_time:
-            end_dt = datetime.fromisoformat(end_time)
-            logs = [log for log in logs if datetime.fromisoformat(log.timestamp) <= end_dt]
-        
-        # Sort by timestamp (newest first)
-        logs.sort(key=lambda x: x.timestamp, reverse=True)
-        
-        # Apply limit
-        if limit:
-            logs = logs[:limit]
+        start_ts = datetime.fromisoformat(start_time).timestamp() if start_time else None
+        end_ts = datetime.fromisoformat(end_time).timestamp() if end_time else None
+        
+        def matches(entry: TrafficLogEntry) -> bool:
+            return ((not plugin_id or entry.plugin_id == plugin_id) and
+                    (not user_id or entry.user_id == user_id) and
+                    (not session_id or entry.session_id == session_id) and
+                    (not traffic_type or entry.traffic_type == traffic_type))
+        
+        logs = []
+        with self._lock:
+            # Narrow to the sequence range covering the time window
+            lo, hi = self._first_seq, self._next_seq
+            if start_ts is not None:
+                lo = self._bisect_time(start_ts, lo, hi, right=False)
+            if end_ts is not None:
+                hi = self._bisect_time(end_ts, lo, hi, right=True)
+            
+            # Walk the most selective index, or the whole range, newest first
+            indexes = [index.get(key, ()) for index, key in ((self.plugin_index, plugin_id),
+                                                              (self.user_index, user_id),
+                                                              (self.session_index, session_id)) if key]
+            seqs: Iterable[int] = reversed(min(indexes, key=len)) if indexes else range(hi - 1, lo - 1, -1)
+            
+            for seq in seqs:
+                if seq >= hi:
+                    continue
+                if seq < lo:
+                    break
+                entry = self._ring[seq % self.max_entries]
+                if matches(entry):
+                    logs.append(entry)
+                    if limit and len(logs) >= limit:
+                        return logs
+            
+            if include_spilled and self.spill_dir:
+                self._flush_spill()
+                for entry in self._read_spilled(start_ts, end_ts):
+                    if matches(entry):
+                        logs.append(entry)
+                        if limit and len(logs) >= limit:
+                            break
         
         return logs
     
@@ -390,6 +449,9 @@ class TrafficLogger:
             "events_by_plugin": dict(self.traffic_counters["events_by_plugin"]),
             "error_count": self.traffic_counters["errors"],
             "warning_count": self.traffic_counters["warnings"],
+            "buffered_entries": len(self),
+            "evicted_entries": self.traffic_counters["evicted"],
+            "spilled_entries": self.traffic_counters["spilled"],
             "active_connections": len([log for log in self.connection_logs.values() 
                                      if not log.closed_at]),
             "last_updated": datetime.now().isoformat()
@@ -436,42 +498,104 @@ class TrafficLogger:
                 if entry.duration:
                     conn_log.total_duration += entry.duration
     
-    def _cleanup_old_entries(self):
-        """Clean up old log entries."""
-        if len(self.traffic_logs) <= self.max_entries:
+    def _cleanup_old_entries(self, now: Optional[float] = None) -> int:
+        """Evict entries older than the retention period; returns how many were removed."""
+        cutoff = (now or time.time()) - self.retention_days * 24 * 3600
+        removed = 0
+        with self._lock:
+            while self._first_seq < self._next_seq and self._ring_times[self._first_seq % self.max_entries] < cutoff:
+                self._evict_oldest()
+                removed += 1
+        if removed:
+            self.logger.info(f"Cleaned up {removed} old traffic log entries")
+        return removed
+    
+    def _evict_oldest(self):
+        """Remove the oldest buffered entry from the ring and indexes (spilling it if enabled)."""
+        seq = self._first_seq
+        slot = seq % self.max_entries
+        entry = self._ring[slot]
+        self._ring[slot] = None
+        self._first_seq += 1
+        
+        # The evicted entry is always the head of every index it appears in
+        for index, key in ((self.plugin_index, entry.plugin_id),
+                           (self.user_index, entry.user_id),
+                           (self.session_index, entry.session_id)):
+            if key:
+                seqs = index.get(key)
+                if seqs and seqs[0] == seq:
+                    seqs.popleft()
+                    if not seqs:
+                        del index[key]
+        
+        self.traffic_counters["evicted"] += 1
+        if self.spill_dir:
+            self._spill(seq, entry)
+    
+    def _bisect_time(self, ts: float, lo: int, hi: int, right: bool) -> int:
+        """First sequence in [lo, hi) whose timestamp is >= ts (or > ts when right)."""
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_ts = self._ring_times[mid % self.max_entries]
+            if mid_ts < ts or (right and mid_ts == ts):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    # Disk spill
+    
+    def _spill(self, seq: int, entry: TrafficLogEntry):
+        record = asdict(entry)
+        record["seq"] = seq
+        record["traffic_type"] = entry.traffic_type.value
+        record["severity"] = entry.severity.value
+        self._spill_buffer.append(json.dumps(record, default=str))
+        if len(self._spill_buffer) >= self.spill_batch_size:
+            self._flush_spill()
+    
+    def _flush_spill(self):
+        """Append buffered evicted entries to the current segment, rolling it when full."""
+        if not self._spill_buffer:
             return
-        
-        # Remove entries older than retention period
-        cutoff_time = datetime.now() - timedelta(days=self.retention_days)
-        old_entries = []
-        
-        for entry in self.traffic_logs:
-            if datetime.fromisoformat(entry.timestamp) < cutoff_time:
-                old_entries.append(entry)
-        
-        # Remove old entries
-        for entry in old_entries:
-            self.traffic_logs.remove(entry)
-            
-            # Remove from indexes
-            if entry.plugin_id and entry.entry_id in self.plugin_index[entry.plugin_id]:
-                self.plugin_index[entry.plugin_id].remove(entry.entry_id)
-            if entry.user_id and entry.entry_id in self.user_index[entry.user_id]:
-                self.user_index[entry.user_id].remove(entry.entry_id)
-            if entry.session_id and entry.entry_id in self.session_index[entry.session_id]:
-                self.session_index[entry.session_id].remove(entry.entry_id)
-        
-        # If still over limit, remove oldest entries
-        while len(self.traffic_logs) > self.max_entries:
-            oldest_entry = min(self.traffic_logs, key=lambda x: x.timestamp)
-            self.traffic_logs.remove(oldest_entry)
-            
-            # Remove from indexes
-            if oldest_entry.plugin_id and oldest_entry.entry_id in self.plugin_index[oldest_entry.plugin_id]:
-                self.plugin_index[oldest_entry.plugin_id].remove(oldest_entry.entry_id)
-            if oldest_entry.user_id and oldest_entry.entry_id in self.user_index[oldest_entry.user_id]:
-                self.user_index[oldest_entry.user_id].remove(oldest_entry.entry_id)
-            if oldest_entry.session_id and oldest_entry.entry_id in self.session_index[oldest_entry.session_id]:
-                self.session_index[oldest_entry.session_id].remove(oldest_entry.entry_id)
-        
-        self.logger.info(f"Cleaned up {len(old_entries)} old traffic log entries") 
\ No newline at end of file
+        with self._lock:
+            lines, self._spill_buffer = self._spill_buffer, []
+            if self._segment_path is None or self._segment_path.stat().st_size >= self.spill_segment_bytes:
+                first_seq = json.loads(lines[0])["seq"]
+                self._segment_path = self.spill_dir / f"traffic_{first_seq:012d}.jsonl"
+                self._prune_spill_segments()
+            with open(self._segment_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            self.traffic_counters["spilled"] += len(lines)
+    
+    def _prune_spill_segments(self):
+        """Delete segments whose newest entry is past the retention period."""
+        cutoff = time.time() - self.retention_days * 24 * 3600
+        for path in self.spill_dir.glob("traffic_*.jsonl"):
+            if path != self._segment_path and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+    
+    def _read_spilled(self, start_ts: Optional[float] = None,
+                      end_ts: Optional[float] = None) -> List[TrafficLogEntry]:
+        """Entries from disk segments within the time window, newest first."""
+        entries = []
+        for path in sorted(self.spill_dir.glob("traffic_*.jsonl"), reverse=True):
+            if start_ts is not None and path.stat().st_mtime < start_ts:
+                break
+            with open(path, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            for record in reversed(records):
+                ts = datetime.fromisoformat(record["timestamp"]).timestamp()
+                if (start_ts is not None and ts < start_ts) or (end_ts is not None and ts > end_ts):
+                    continue
+                record.pop("seq", None)
+                record["traffic_type"] = TrafficType(record["traffic_type"])
+                record["severity"] = TrafficSeverity(record["severity"])
+                entries.append(TrafficLogEntry(**record))
+        return entries
+    
+    def flush(self):
+        """Write any evicted entries still buffered for the spill segments."""
+        if self.spill_dir:
+            self._flush_spill()
@@ -7,7 +7,9 @@ as recommended in ClaudeDesktopInsights.md architectural analysis.
 
 import time
 import asyncio
-from typing import Dict, Any, Optional, List
+import inspect
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, List, Callable
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
@@ -70,6 +72,13 @@ class QueuedRequest:
     status: RequestStatus = RequestStatus.PENDING
     retry_count: int = 0
     max_retries: int = 3
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    future: Future = field(default_factory=Future, repr=False)
+
+
+# Executors receive the dequeued request and return the agent/plugin result.
+# Coroutine functions are supported and run to completion on the worker thread.
+RequestExecutor = Callable[[QueuedRequest], Any]
 
 
 @dataclass
@@ -202,9 +211,32 @@ class SynapseTrafficManager:
     
     Implements the architecture recommended in ClaudeDesktopInsights.md for
     handling multi-agent traffic with security and performance considerations.
+    
+    Requests are dispatched to a pool of ``max_workers`` threads that block on
+    a condition variable while the queues are empty. SYSTEM traffic always
+    preempts; the remaining priorities share the pool by smooth weighted
+    round-robin so EXTERNAL traffic keeps making progress under load. Each
+    request carries a ``Future`` that resolves with its executor's result.
     """
     
-    def __init__(self, config: Dict[str, Any], logger: Optional[logging.Logger] = None):
+    # Share of dispatch slots per priority when several queues are backlogged
+    DEFAULT_PRIORITY_WEIGHTS = {
+        AgentPriority.ALDEN: 8,
+        AgentPriority.INTERNAL: 4,
+        AgentPriority.EXTERNAL: 1
+    }
+    
+    TOKEN_AGENT_TYPES = {
+        'alden': AgentType.ALDEN,
+        'mimic': AgentType.MIMIC,
+        'alice': AgentType.ALICE,
+        'gemini': AgentType.GEMINI,
+        'claude': AgentType.CLAUDE,
+        'system': AgentType.SYSTEM
+    }
+    
+    def __init__(self, config: Dict[str, Any], logger: Optional[logging.Logger] = None,
+                 executor: Optional[RequestExecutor] = None):
         self.config = config
         self.logger = logger or logging.getLogger(__name__)
         
@@ -219,29 +251,55 @@ class SynapseTrafficManager:
             AgentPriority.INTERNAL: deque(),
             AgentPriority.EXTERNAL: deque()
         }
+        self.queue_condition = threading.Condition()
+        
+        # Weighted fair scheduling state for the non-system priorities
+        configured_weights = config.get('priority_weights', {})
+        self.priority_weights: Dict[AgentPriority, int] = {
+            priority: max(1, int(configured_weights.get(priority.name.lower(), weight)))
+            for priority, weight in self.DEFAULT_PRIORITY_WEIGHTS.items()
+        }
+        self.scheduler_credit: Dict[AgentPriority, int] = {
+            priority: 0 for priority in self.priority_weights
+        }
         
-        # Global rate limiters
+        # Global rate limiters (start full, like per-user budgets)
         self.global_rate_limiters: Dict[str, TokenBucket] = {
-            'alden': TokenBucket(rate=100, burst=200),
-            'internal_agents': TokenBucket(rate=50, burst=100),
-            'external_agents': TokenBucket(rate=20, burst=40),
-            'system': TokenBucket(rate=1000, burst=1000)
+            'alden': TokenBucket(rate=100, burst=200, tokens=200),
+            'internal_agents': TokenBucket(rate=50, burst=100, tokens=100),
+            'external_agents': TokenBucket(rate=20, burst=40, tokens=40),
+            'system': TokenBucket(rate=1000, burst=1000, tokens=1000)
         }
         
+        # Executors that actually run queued work, keyed by name or agent type
+        self.executors: Dict[str, RequestExecutor] = {}
+        self.default_executor = executor
+        
         # Processing state
         self.processing_requests: Dict[str, QueuedRequest] = {}
         self.active_workers = 0
-        self.max_workers = config.get('max_workers', 10)
+        self.max_workers = max(1, int(config.get('max_workers', 10)))
+        
+        # Measured service times (EWMA, seconds) used for wait estimates
+        self.default_service_time = config.get('initial_service_time', 0.5)
+        self.service_time_alpha = config.get('service_time_alpha', 0.2)
+        self.service_times: Dict[AgentPriority, float] = {}
         
         # Metrics
         self.start_time = datetime.now()
         self.processed_requests = 0
         
-        # Start background processing
+        # Start worker pool
         self.running = True
-        self.processing_thread = threading.Thread(target=self._process_queue_worker)
-        self.processing_thread.daemon = True
-        self.processing_thread.start()
+        self.workers: List[threading.Thread] = []
+        for index in range(self.max_workers):
+            worker = threading.Thread(
+                target=self._process_queue_worker,
+                name=f"synapse-traffic-{index}"
+            )
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
     
     def get_agent_priority(self, agent_type: str) -> AgentPriority:
         """Determine priority for agent type."""
@@ -249,16 +307,35 @@ class SynapseTrafficManager:
         
         if agent_type_lower == 'alden':
             return AgentPriority.ALDEN
-        elif agent_type_lower in ['alice', 'mimic', 'sentry']:
+        elif agent_type_lower in ['alice', 'mimic', 'sentry', 'internal_agents']:
             return AgentPriority.INTERNAL
         elif agent_type_lower == 'system':
             return AgentPriority.SYSTEM
         else:
             return AgentPriority.EXTERNAL
     
+    def register_executor(self, name: str, executor: RequestExecutor):
+        """
+        Register an executor for requests routed to ``name``.
+        
+        A request is routed by ``metadata['executor']`` first, then by its
+        agent type, and finally to the default executor.
+        """
+        self.executors[name.lower()] = executor
+    
+    def unregister_executor(self, name: str):
+        """Remove a previously registered executor."""
+        self.executors.pop(name.lower(), None)
+    
     async def submit_request(self, request_id: str, agent_type: str, payload: Dict[str, Any], 
-                           user_id: str = "default") -> Dict[str, Any]:
-        """Submit request for processing with rate limiting and priority queuing."""
+                           user_id: str = "default",
+                           metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Submit request for processing with rate limiting and priority queuing.
+        
+        On success the returned dict carries a ``future`` that resolves with
+        the executor's result (await it with ``asyncio.wrap_future``).
+        """
         try:
             # Get user's rate limit budget
             user_bucket = self.bandwidth_manager.get_user_budget(user_id, agent_type)
@@ -274,15 +351,19 @@ class SynapseTrafficManager:
                 }
             
             # Check global rate limit
-            if not self.global_rate_limiters[agent_type].consume(1):
+            global_bucket = self.global_rate_limiters.get(agent_type, self.global_rate_limiters['external_agents'])
+            if not global_bucket.consume(1):
                 self.traffic_analytics.metrics.setdefault(agent_type, TrafficMetrics()).rate_limit_hits += 1
                 return {
                     'success': False,
                     'error': 'Global rate limit exceeded',
                     'status': RequestStatus.RATE_LIMITED.value,
-                    'retry_after': 1.0 / self.global_rate_limiters[agent_type].rate
+                    'retry_after': 1.0 / global_bucket.rate
                 }
             
+            if not self.running:
+                raise RuntimeError("Traffic manager is shut down")
+            
             # Create queued request
             priority = self.get_agent_priority(agent_type)
             queued_request = QueuedRequest(
@@ -290,14 +371,19 @@ class SynapseTrafficManager:
                 agent_type=agent_type,
                 priority=priority,
                 payload=payload,
-                submitted_at=datetime.now()
+                submitted_at=datetime.now(),
+                metadata=dict(metadata or {})
             )
             
-            # Add to appropriate priority queue
-            self.priority_queues[priority].append(queued_request)
+            # Add to appropriate priority queue and wake one worker
+            with self.queue_condition:
+                self.priority_queues[priority].append(queued_request)
+                queue_position = len(self.priority_queues[priority])
+                total_queue_depth = sum(len(q) for q in self.priority_queues.values())
+                estimated_wait_time = self._estimate_wait_time(priority)
+                self.queue_condition.notify()
             
             # Update queue depth metric
-            total_queue_depth = sum(len(q) for q in self.priority_queues.values())
             self.traffic_analytics.metrics.setdefault(agent_type, TrafficMetrics()).queue_depth = total_queue_depth
             
             self.logger.info(f"Request {request_id} queued for {agent_type} with priority {priority.name}")
@@ -306,8 +392,9 @@ class SynapseTrafficManager:
                 'success': True,
                 'request_id': request_id,
                 'status': RequestStatus.PENDING.value,
-                'queue_position': len(self.priority_queues[priority]),
-                'estimated_wait_time': self._estimate_wait_time(priority)
+                'queue_position': queue_position,
+                'estimated_wait_time': estimated_wait_time,
+                'future': queued_request.future
             }
             
         except Exception as e:
@@ -318,44 +405,131 @@ class SynapseTrafficManager:
                 'status': RequestStatus.REJECTED.value
             }
     
+    async def execute_request(self, request_id: str, agent_type: str, payload: Dict[str, Any],
+                              user_id: str = "default",
+                              metadata: Optional[Dict[str, Any]] = None,
+                              timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Submit a request and wait for its executor to finish."""
+        submission = await self.submit_request(request_id, agent_type, payload, user_id, metadata)
+        if not submission['success']:
+            return submission
+        
+        future = submission['future']
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            return {
+                'success': False,
+                'request_id': request_id,
+                'error': f'Request timed out after {timeout}s',
+                'status': RequestStatus.REJECTED.value
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'request_id': request_id,
+                'error': str(e),
+                'status': RequestStatus.REJECTED.value
+            }
+        
+        return {
+            'success': True,
+            'request_id': request_id,
+            'status': RequestStatus.COMPLETED.value,
+            'result': result
+        }
+    
+    def _service_time(self, priority: AgentPriority) -> float:
+        """Measured average service time for a priority, or the configured default."""
+        return self.service_times.get(priority, self.default_service_time)
+    
+    def _record_service_time(self, priority: AgentPriority, elapsed: float):
+        """Fold a measured service time into the per-priority EWMA."""
+        with self.queue_condition:
+            previous = self.service_times.get(priority)
+            if previous is None:
+                self.service_times[priority] = elapsed
+            else:
+                alpha = self.service_time_alpha
+                self.service_times[priority] = alpha * elapsed + (1 - alpha) * previous
+    
     def _estimate_wait_time(self, priority: AgentPriority) -> float:
-        """Estimate wait time based on queue depth and processing rate."""
-        # Count requests ahead in queue
-        ahead_count = 0
+        """Estimate wait time based on queue depth and measured service times."""
+        # Work queued at the same or higher priority, spread across the pool
+        pending_work = 0.0
         for p in AgentPriority:
             if p.value <= priority.value:
-                ahead_count += len(self.priority_queues[p])
+                pending_work += len(self.priority_queues[p]) * self._service_time(p)
         
-        # Estimate based on average processing time
-        avg_processing_time = 0.5  # 500ms average
-        return ahead_count * avg_processing_time
+        return pending_work / self.max_workers
     
     def _process_queue_worker(self):
-        """Background worker to process queued requests."""
-        while self.running:
-            try:
-                # Get next request from highest priority queue
+        """Pool worker: block until work is queued, then execute it."""
+        while True:
+            with self.queue_condition:
                 request = self._get_next_request()
+                while request is None and self.running:
+                    self.queue_condition.wait()
+                    request = self._get_next_request()
                 
-                if request:
-                    self._process_request(request)
-                else:
-                    # No requests available, sleep briefly
-                    time.sleep(0.1)
-                    
+                if request is None:
+                    return
+                self.active_workers += 1
+            
+            try:
+                self._process_request(request)
             except Exception as e:
                 self.logger.error(f"Error in queue worker: {e}")
-                time.sleep(1)
+            finally:
+                with self.queue_condition:
+                    self.active_workers -= 1
     
     def _get_next_request(self) -> Optional[QueuedRequest]:
-        """Get next request from priority queues."""
-        for priority in AgentPriority:
-            if self.priority_queues[priority]:
-                return self.priority_queues[priority].popleft()
-        return None
+        """
+        Get next request from priority queues. Caller must hold queue_condition.
+        
+        SYSTEM requests always go first. Otherwise every backlogged priority
+        earns credit equal to its weight, the one with the most credit is
+        served and pays back the round's total weight.
+        """
+        if self.priority_queues[AgentPriority.SYSTEM]:
+            return self.priority_queues[AgentPriority.SYSTEM].popleft()
+        
+        ready = [p for p in self.priority_weights if self.priority_queues[p]]
+        if not ready:
+            return None
+        
+        total_weight = 0
+        for priority in ready:
+            self.scheduler_credit[priority] += self.priority_weights[priority]
+            total_weight += self.priority_weights[priority]
+        
+        # Ties go to the higher priority (lower enum value)
+        chosen = max(ready, key=lambda p: (self.scheduler_credit[p], -p.value))
+        self.scheduler_credit[chosen] -= total_weight
+        
+        queue = self.priority_queues[chosen]
+        request = queue.popleft()
+        if not queue:
+            # Idle queues must not bank credit for a later burst
+            self.scheduler_credit[chosen] = 0
+        return request
+    
+    def _resolve_executor(self, request: QueuedRequest) -> Optional[RequestExecutor]:
+        """Find the executor for a request."""
+        for key in (request.metadata.get('executor'), request.agent_type):
+            if key and key.lower() in self.executors:
+                return self.executors[key.lower()]
+        return self.default_executor
     
     def _process_request(self, request: QueuedRequest):
         """Process individual request."""
+        if not request.future.set_running_or_notify_cancel():
+            # Caller cancelled (e.g. timed out) while the request was queued
+            request.status = RequestStatus.REJECTED
+            return
+        
         start_time = time.time()
         
         try:
@@ -363,42 +537,19 @@ class SynapseTrafficManager:
             request.status = RequestStatus.PROCESSING
             self.processing_requests[request.request_id] = request
             
-            # Simulate processing (in real implementation, this would call the actual agent)
-            # This is where the actual plugin execution would happen
-            time.sleep(0.1)  # Simulate processing time
+            executor = self._resolve_executor(request)
+            if executor is None:
+                raise RuntimeError(f"No executor registered for agent type '{request.agent_type}'")
+            
+            result = executor(request)
+            if inspect.iscoroutine(result):
+                result = asyncio.run(result)
             
             # Mark as completed
             request.status = RequestStatus.COMPLETED
             processing_time = time.time() - start_time
             
-            # Log token usage (estimate based on request payload size)
-            try:
-                estimated_tokens = len(str(request.payload)) // 4  # Rough estimate
-                if estimated_tokens > 0:
-                    # Map agent types to AgentType enum
-                    agent_type_mapping = {
-                        'alden': AgentType.ALDEN,
-                        'mimic': AgentType.MIMIC,
-                        'alice': AgentType.ALICE,
-                        'gemini': AgentType.GEMINI,
-                        'claude': AgentType.CLAUDE,
-                        'system': AgentType.SYSTEM
-                    }
-                    
-                    agent_type_enum = agent_type_mapping.get(request.agent_type.lower(), AgentType.EXTERNAL_GPT)
-                    
-                    log_agent_token_usage(
-                        agent_name=request.agent_type,
-                        agent_type=agent_type_enum,
-                        tokens_used=estimated_tokens,
-                        task_description=f"Traffic managed request: {request.request_id}",
-                        module="traffic_manager",
-                        request_id=request.request_id,
-                        response_time_ms=int(processing_time * 1000),
-                        success=True
-                    )
-            except Exception as token_error:
-                self.logger.warning(f"Failed to log token usage for request {request.request_id}: {token_error}")
+            self._log_token_usage(request, processing_time, True)
             
             # Record analytics
             self.traffic_analytics.record_request(
@@ -407,43 +558,18 @@ class SynapseTrafficManager:
                 True,
                 processing_time
             )
+            self._record_service_time(request.priority, processing_time)
             
             self.processed_requests += 1
             self.logger.info(f"Request {request.request_id} completed in {processing_time:.3f}s")
+            request.future.set_result(result)
             
         except Exception as e:
             # Handle processing error
             request.status = RequestStatus.REJECTED
             processing_time = time.time() - start_time
             
-            # Log failed token usage attempt
-            try:
-                estimated_tokens = len(str(request.payload)) // 4
-                if estimated_tokens > 0:
-                    agent_type_mapping = {
-                        'alden': AgentType.ALDEN,
-                        'mimic': AgentType.MIMIC,
-                        'alice': AgentType.ALICE,
-                        'gemini': AgentType.GEMINI,
-                        'claude': AgentType.CLAUDE,
-                        'system': AgentType.SYSTEM
-                    }
-                    
-                    agent_type_enum = agent_type_mapping.get(request.agent_type.lower(), AgentType.EXTERNAL_GPT)
-                    
-                    log_agent_token_usage(
-                        agent_name=request.agent_type,
-                        agent_type=agent_type_enum,
-                        tokens_used=estimated_tokens,
-                        task_description=f"Failed traffic managed request: {request.request_id}",
-                        module="traffic_manager",
-                        request_id=request.request_id,
-                        response_time_ms=int(processing_time * 1000),
-                        success=False,
-                        error_message=str(e)
-                    )
-            except Exception as token_error:
-                self.logger.warning(f"Failed to log token usage for failed request {request.request_id}: {token_error}")
+            self._log_token_usage(request, processing_time, False, str(e))
             
             self.traffic_analytics.record_request(
                 request.agent_type,
@@ -451,26 +577,64 @@ class SynapseTrafficManager:
                 False,
                 processing_time
             )
+            self._record_service_time(request.priority, processing_time)
             
             self.logger.error(f"Request {request.request_id} failed: {e}")
+            request.future.set_exception(e)
             
         finally:
             # Remove from processing
             self.processing_requests.pop(request.request_id, None)
     
+    def _log_token_usage(self, request: QueuedRequest, processing_time: float, success: bool,
+                         error_message: Optional[str] = None):
+        """Log token usage for a request (estimate based on request payload size)."""
+        try:
+            estimated_tokens = len(str(request.payload)) // 4  # Rough estimate
+            if estimated_tokens <= 0:
+                return
+            
+            agent_type_enum = self.TOKEN_AGENT_TYPES.get(request.agent_type.lower(), AgentType.EXTERNAL_GPT)
+            prefix = "Traffic managed request" if success else "Failed traffic managed request"
+            
+            kwargs = {}
+            if error_message is not None:
+                kwargs['error_message'] = error_message
+            
+            log_agent_token_usage(
+                agent_name=request.agent_type,
+                agent_type=agent_type_enum,
+                tokens_used=estimated_tokens,
+                task_description=f"{prefix}: {request.request_id}",
+                module="traffic_manager",
+                request_id=request.request_id,
+                response_time_ms=int(processing_time * 1000),
+                success=success,
+                **kwargs
+            )
+        except Exception as token_error:
+            self.logger.warning(f"Failed to log token usage for request {request.request_id}: {token_error}")
+    
     def get_system_metrics(self) -> Dict[str, Any]:
         """Get comprehensive system metrics."""
         uptime = (datetime.now() - self.start_time).total_seconds()
         
+        with self.queue_condition:
+            queue_depths = {
+                priority.name: len(queue) for priority, queue in self.priority_queues.items()
+            }
+            service_times = {
+                priority.name: self._service_time(priority) for priority in AgentPriority
+            }
+        
         return {
             'uptime_seconds': uptime,
             'processed_requests': self.processed_requests,
             'requests_per_second': self.processed_requests / uptime if uptime > 0 else 0,
             'active_workers': self.active_workers,
             'max_workers': self.max_workers,
-            'queue_depths': {
-                priority.name: len(queue) for priority, queue in self.priority_queues.items()
-            },
+            'queue_depths': queue_depths,
+            'avg_service_times': service_times,
             'processing_requests': len(self.processing_requests),
             'agent_metrics': {
                 agent_type: {
@@ -494,7 +658,17 @@ class SynapseTrafficManager:
     
     def shutdown(self):
         """Gracefully shutdown the traffic manager."""
-        self.running = False
-        if self.processing_thread.is_alive():
-            self.processing_thread.join(timeout=5)
-        self.logger.info("Traffic manager shutdown complete")
\ No newline at end of file
+        with self.queue_condition:
+            self.running = False
+            # Requests still queued will never run; release their waiters
+            for queue in self.priority_queues.values():
+                while queue:
+                    request = queue.popleft()
+                    request.status = RequestStatus.REJECTED
+                    request.future.cancel()
+            self.queue_condition.notify_all()
+        
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.join(timeout=5)
+        self.logger.info("Traffic manager shutdown complete")
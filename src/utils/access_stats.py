@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Deferred Access Statistics
+Memory stores record reads here instead of bumping access counters inside
+the read path. Hits are aggregated in memory per store and item (count and
+latest access time) and a background thread hands each store one batch per
+flush interval, so searches stay read-only and never take the write lock.
+"""
+
+import asyncio
+import atexit
+import inspect
+import threading
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AccessRecord(NamedTuple):
+    """Aggregated reads of one item since the last flush"""
+    item_id: str
+    count: int
+    last_accessed: datetime
+
+
+# Applies a batch to the store; may be a coroutine function bound to a loop
+FlushFunction = Callable[[List[AccessRecord]], Any]
+
+
+class _Store:
+    """A registered store and its pending hits"""
+
+    def __init__(self, flush: FlushFunction, loop: Optional[asyncio.AbstractEventLoop]):
+        self.flush = flush
+        self.loop = loop
+        self.pending: Dict[str, List[Any]] = {}
+
+
+class AccessStatsAccumulator:
+    """
+    Aggregates access counts per store and flushes them in batches
+    """
+
+    def __init__(self, flush_interval: float = 5.0, max_pending: int = 5000,
+                 flush_timeout: float = 30.0):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.flush_timeout = flush_timeout
+        self.lock = threading.Lock()
+        self.stores: Dict[str, _Store] = {}
+        self.wake = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.stats = {
+            "recorded": 0,
+            "flushes": 0,
+            "flushed_items": 0,
+            "failed_flushes": 0
+        }
+
+    def register(self, store: str, flush: FlushFunction,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Register the function that applies a batch to a store.
+
+        Coroutine flush functions must pass the loop that owns their
+        connections; batches are then submitted to that loop. Re-registering
+        a store replaces its flush function and keeps its pending hits.
+        """
+        with self.lock:
+            existing = self.stores.get(store)
+            entry = _Store(flush, loop)
+            if existing:
+                entry.pending = existing.pending
+            self.stores[store] = entry
+            if self.thread is None:
+                self.running = True
+                self.thread = threading.Thread(target=self._flush_loop, name="access-stats-flush")
+                self.thread.daemon = True
+                self.thread.start()
+
+    def unregister(self, store: str, flush: bool = True):
+        """Stop tracking a store, applying its pending hits first by default"""
+        if flush:
+            self.flush(store)
+        with self.lock:
+            self.stores.pop(store, None)
+
+    def record(self, store: str, item_ids: Iterable[str], at: Optional[datetime] = None):
+        """Count one read of each item; never touches the store itself"""
+        at = at or datetime.now(timezone.utc)
+        with self.lock:
+            entry = self.stores.get(store)
+            if entry is None:
+                return
+            for item_id in item_ids:
+                hit = entry.pending.get(item_id)
+                if hit is None:
+                    entry.pending[item_id] = [1, at]
+                else:
+                    hit[0] += 1
+                    if at > hit[1]:
+                        hit[1] = at
+                self.stats["recorded"] += 1
+            backlog = len(entry.pending)
+        if backlog >= self.max_pending:
+            self.wake.set()
+
+    def pending_count(self, store: str, item_id: str) -> int:
+        """Reads of an item not yet applied to its store"""
+        with self.lock:
+            entry = self.stores.get(store)
+            hit = entry.pending.get(item_id) if entry else None
+            return hit[0] if hit else 0
+
+    def _take(self, store: str) -> List[AccessRecord]:
+        with self.lock:
+            entry = self.stores.get(store)
+            if entry is None or not entry.pending:
+                return []
+            pending, entry.pending = entry.pending, {}
+        return [AccessRecord(item_id, hit[0], hit[1]) for item_id, hit in pending.items()]
+
+    def _restore(self, store: str, records: List[AccessRecord]):
+        """Merge a failed batch back so its hits are retried next flush"""
+        with self.lock:
+            entry = self.stores.get(store)
+            if entry is None:
+                return
+            for record in records:
+                hit = entry.pending.get(record.item_id)
+                if hit is None:
+                    entry.pending[record.item_id] = [record.count, record.last_accessed]
+                else:
+                    hit[0] += record.count
+                    hit[1] = max(hit[1], record.last_accessed)
+
+    def _finish(self, store: str, records: List[AccessRecord], error: Optional[BaseException]) -> int:
+        with self.lock:
+            if error is None:
+                self.stats["flushes"] += 1
+                self.stats["flushed_items"] += len(records)
+            else:
+                self.stats["failed_flushes"] += 1
+        if error is None:
+            return len(records)
+        logger.warning(f"Failed to flush access stats for {store}: {error}")
+        self._restore(store, records)
+        return 0
+
+    def flush(self, store: Optional[str] = None) -> int:
+        """Apply pending hits now (one store or all); returns items written"""
+        with self.lock:
+            names = [store] if store else list(self.stores)
+        written = 0
+        for name in names:
+            with self.lock:
+                entry = self.stores.get(name)
+            if entry is None:
+                continue
+            records = self._take(name)
+            if not records:
+                continue
+            try:
+                result = entry.flush(records)
+                if inspect.iscoroutine(result):
+                    # Blocking on the store's own loop from inside it would deadlock;
+                    # those callers use flush_async
+                    if entry.loop is None or not entry.loop.is_running() or _running_loop() is entry.loop:
+                        result.close()
+                        raise RuntimeError("store loop is not available")
+                    asyncio.run_coroutine_threadsafe(result, entry.loop).result(self.flush_timeout)
+                written += self._finish(name, records, None)
+            except Exception as e:
+                self._finish(name, records, e)
+        return written
+
+    async def flush_async(self, store: str) -> int:
+        """Apply a store's pending hits from inside its own event loop"""
+        with self.lock:
+            entry = self.stores.get(store)
+        if entry is None:
+            return 0
+        records = self._take(store)
+        if not records:
+            return 0
+        try:
+            result = entry.flush(records)
+            if inspect.isawaitable(result):
+                await result
+            return self._finish(store, records, None)
+        except Exception as e:
+            return self._finish(store, records, e)
+
+    def _flush_loop(self):
+        while self.running:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            if not self.running:
+                break
+            self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Flush counters and current backlog per store"""
+        with self.lock:
+            return {
+                **self.stats,
+                "pending": {name: len(entry.pending) for name, entry in self.stores.items()}
+            }
+
+    def close(self):
+        """Stop the flush thread and apply what synchronous stores still hold"""
+        self.running = False
+        self.wake.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=self.flush_timeout)
+        with self.lock:
+            names = [name for name, entry in self.stores.items() if entry.loop is None]
+        for name in names:
+            self.flush(name)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+# Shared by every memory store in the process
+default_access_stats = AccessStatsAccumulator()
+atexit.register(default_access_stats.close)
@@ -5,11 +5,15 @@ Handles LLM response caching, prompt optimization, and system performance tuning
 """
 
 import asyncio
+import os
+import re
+import sys
 import json
 import hashlib
 import logging
+import threading
 import time
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 import sqlite3
@@ -18,17 +22,64 @@ import urllib.parse
 import urllib.error
 import concurrent.futures
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Database used when no path is given (HEARTHLINK_RESPONSE_CACHE_DB overrides it)
+DEFAULT_CACHE_DB = os.getenv("HEARTHLINK_RESPONSE_CACHE_DB",
+                             "/mnt/g/mythologiq/hearthlink/hearthlink_data/response_cache.db")
+
+# The clock headers Hearthlink itself adds to prompts: Alden's "Current Date/Time"
+# line and the "Current time: ..." prefix from PromptOptimizer. Only these exact
+# formats are stripped; dates and times typed by the user are part of the question.
+_CLOCK_VALUE = r"[A-Z][a-z]+day, [A-Z][a-z]+ \d{2}, \d{4} at \d{2}:\d{2} [AP]M"
+VOLATILE_PATTERNS = [
+    (re.compile(rf"^(Current Date/Time): {_CLOCK_VALUE}[ \t]*$", re.MULTILINE), r"\1:"),
+    (re.compile(rf"\A(Current time): {_CLOCK_VALUE}(?=\. )"), r"\1:"),
+]
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Strip Hearthlink's clock headers and collapse whitespace so equivalent prompts share a cache entry"""
+    for pattern, replacement in VOLATILE_PATTERNS:
+        prompt = pattern.sub(replacement, prompt)
+    return " ".join(prompt.split())
+
+
 class ResponseCache:
     """Intelligent caching system for LLM responses"""
     
-    def __init__(self, cache_db_path: str = "/mnt/g/mythologiq/hearthlink/hearthlink_data/response_cache.db"):
+    def __init__(self, cache_db_path: str = DEFAULT_CACHE_DB, max_entries: int = 1000):
         self.cache_db_path = cache_db_path
-        self.setup_cache_db()
+        self.max_entries = max_entries
         self.logger = logging.getLogger("response_cache")
+        
+        # One connection for the cache's lifetime, shared by all callers
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(cache_db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.setup_cache_db()
+        self.entry_count = self.conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        
+        self.stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "latency_saved": 0.0,
+            "lookup_time": 0.0
+        }
     
     def setup_cache_db(self):
         """Create cache database with optimized schema"""
-        conn = sqlite3.connect(self.cache_db_path)
+        conn = self.conn
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
         conn.execute("""
             CREATE TABLE IF NOT EXISTS response_cache (
                 hash_key TEXT PRIMARY KEY,
@@ -41,10 +92,18 @@ class ResponseCache:
                 last_used INTEGER NOT NULL,
                 use_count INTEGER DEFAULT 1,
                 expires_at INTEGER,
+                namespace TEXT,
+                embedding BLOB,
                 UNIQUE(hash_key)
             )
         """)
         
+        # Databases created before namespaces and embeddings were stored
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(response_cache)")}
+        for column, column_type in (("namespace", "TEXT"), ("embedding", "BLOB")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE response_cache ADD COLUMN {column} {column_type}")
+        
         conn.execute("""
             CREATE INDEX IF NOT EXISTS idx_cache_expires ON response_cache(expires_at);
         """)
@@ -53,114 +112,295 @@ class ResponseCache:
             CREATE INDEX IF NOT EXISTS idx_cache_last_used ON response_cache(last_used DESC);
         """)
         
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_cache_namespace ON response_cache(namespace);
+        """)
+        
         conn.commit()
-        conn.close()
+    
+    def get_namespace(self, model: str, context: Dict[str, Any] = None) -> str:
+        """Entries only ever match requests for the same model and context"""
+        context_str = json.dumps(context or {}, sort_keys=True)
+        return f"{model}#{hashlib.sha256(context_str.encode()).hexdigest()[:16]}"
     
     def generate_cache_key(self, prompt: str, model: str, context: Dict[str, Any] = None) -> str:
         """Generate a cache key for the given prompt and context"""
         context_str = json.dumps(context or {}, sort_keys=True)
-        cache_input = f"{prompt}|{model}|{context_str}"
+        cache_input = f"{normalize_prompt(prompt)}|{model}|{context_str}"
         return hashlib.sha256(cache_input.encode()).hexdigest()
     
-    def get_cached_response(self, prompt: str, model: str, context: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
-        """Retrieve cached response if available and valid"""
-        cache_key = self.generate_cache_key(prompt, model, context)
-        
-        try:
-            conn = sqlite3.connect(self.cache_db_path)
-            conn.row_factory = sqlite3.Row
-            
-            cursor = conn.execute("""
+    def _fetch_entry(self, cache_key: str) -> Optional[sqlite3.Row]:
+        """Return a live entry and mark it as recently used"""
+        now = int(time.time())
+        with self.lock:
+            row = self.conn.execute("""
                 SELECT * FROM response_cache 
                 WHERE hash_key = ? AND (expires_at IS NULL OR expires_at > ?)
-            """, (cache_key, int(time.time())))
-            
-            row = cursor.fetchone()
+            """, (cache_key, now)).fetchone()
             
             if row:
                 # Update usage statistics
-                conn.execute("""
+                self.conn.execute("""
                     UPDATE response_cache 
                     SET last_used = ?, use_count = use_count + 1 
                     WHERE hash_key = ?
-                """, (int(time.time()), cache_key))
-                conn.commit()
-                
-                result = {
-                    "response": row["response_text"],
-                    "confidence": row["confidence"],
-                    "model": row["model_used"],
-                    "response_time": row["response_time"],
-                    "cached": True,
-                    "cache_hit": True,
-                    "use_count": row["use_count"] + 1
-                }
-                
+                """, (now, cache_key))
+                self.conn.commit()
+        return row
+    
+    def _record_hit(self, row: sqlite3.Row, match: str, started: float) -> Dict[str, Any]:
+        lookup_time = time.perf_counter() - started
+        latency_saved = max(row["response_time"] - lookup_time, 0.0)
+        self.stats[f"{match}_hits"] += 1
+        self.stats["latency_saved"] += latency_saved
+        self.stats["lookup_time"] += lookup_time
+        return {
+            "response": row["response_text"],
+            "confidence": row["confidence"],
+            "model": row["model_used"],
+            "response_time": row["response_time"],
+            "cached": True,
+            "cache_hit": True,
+            "cache_match": match,
+            "latency_saved": latency_saved,
+            "use_count": row["use_count"] + 1
+        }
+    
+    def _record_miss(self, started: float):
+        self.stats["misses"] += 1
+        self.stats["lookup_time"] += time.perf_counter() - started
+    
+    def get_cached_response(self, prompt: str, model: str, context: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """Retrieve cached response if available and valid"""
+        started = time.perf_counter()
+        
+        try:
+            row = self._fetch_entry(self.generate_cache_key(prompt, model, context))
+            if row:
                 self.logger.info(f"Cache HIT for prompt: {prompt[:50]}...")
-                return result
-            
-            conn.close()
-            
+                return self._record_hit(row, "exact", started)
         except Exception as e:
             self.logger.error(f"Cache retrieval error: {e}")
         
+        self._record_miss(started)
         return None
     
+    async def aget_cached_response(self, prompt: str, model: str, context: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """Async form of get_cached_response"""
+        return self.get_cached_response(prompt, model, context)
+    
     def cache_response(self, prompt: str, response: str, model: str, response_time: float, 
-                      confidence: float = 1.0, context: Dict[str, Any] = None, ttl_hours: int = 24):
+                      confidence: float = 1.0, context: Dict[str, Any] = None, ttl_hours: int = 24,
+                      embedding: Optional[bytes] = None):
         """Cache a response for future use"""
         cache_key = self.generate_cache_key(prompt, model, context)
         
         try:
-            conn = sqlite3.connect(self.cache_db_path)
-            
-            expires_at = int(time.time()) + (ttl_hours * 3600) if ttl_hours > 0 else None
-            
-            conn.execute("""
-                INSERT OR REPLACE INTO response_cache 
-                (hash_key, prompt_text, response_text, confidence, model_used, response_time, 
-                 created_at, last_used, expires_at) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                cache_key, prompt, response, confidence, model, response_time,
-                int(time.time()), int(time.time()), expires_at
-            ))
-            
-            conn.commit()
-            conn.close()
+            now = int(time.time())
+            expires_at = now + (ttl_hours * 3600) if ttl_hours > 0 else None
+            
+            with self.lock:
+                exists = self.conn.execute("SELECT 1 FROM response_cache WHERE hash_key = ?",
+                                           (cache_key,)).fetchone()
+                self.conn.execute("""
+                    INSERT OR REPLACE INTO response_cache 
+                    (hash_key, prompt_text, response_text, confidence, model_used, response_time, 
+                     created_at, last_used, expires_at, namespace, embedding) 
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    cache_key, prompt, response, confidence, model, response_time,
+                    now, now, expires_at, self.get_namespace(model, context), embedding
+                ))
+                self.conn.commit()
+                if not exists:
+                    self.entry_count += 1
+                if self.entry_count > self.max_entries:
+                    self._evict_lru()
             
             self.logger.info(f"Cached response for prompt: {prompt[:50]}...")
             
         except Exception as e:
             self.logger.error(f"Cache storage error: {e}")
     
+    async def acache_response(self, prompt: str, response: str, model: str, response_time: float,
+                              confidence: float = 1.0, context: Dict[str, Any] = None, ttl_hours: int = 24):
+        """Async form of cache_response"""
+        self.cache_response(prompt, response, model, response_time, confidence, context, ttl_hours)
+    
+    def _evict_lru(self):
+        """Drop least recently used entries down to 90% of max_entries, so eviction runs once per batch of inserts"""
+        with self.lock:
+            excess = self.entry_count - int(self.max_entries * 0.9)
+            if excess <= 0:
+                return
+            cursor = self.conn.execute("""
+                DELETE FROM response_cache WHERE hash_key IN (
+                    SELECT hash_key FROM response_cache 
+                    ORDER BY last_used ASC LIMIT ?
+                )
+            """, (excess,))
+            self.conn.commit()
+            self.entry_count -= cursor.rowcount
+            self.stats["evictions"] += cursor.rowcount
+        self._on_entries_removed()
+    
+    def _on_entries_removed(self):
+        """Hook for subclasses holding derived state about stored entries"""
+        pass
+    
     def cleanup_expired(self):
         """Remove expired cache entries"""
         try:
-            conn = sqlite3.connect(self.cache_db_path)
-            
-            # Remove expired entries
-            cursor = conn.execute("DELETE FROM response_cache WHERE expires_at IS NOT NULL AND expires_at < ?", 
-                                (int(time.time()),))
-            
-            expired_count = cursor.rowcount
-            
-            # Remove old entries if cache is too large (keep only 1000 most recent)
-            conn.execute("""
-                DELETE FROM response_cache WHERE hash_key NOT IN (
-                    SELECT hash_key FROM response_cache 
-                    ORDER BY last_used DESC LIMIT 1000
-                )
-            """)
-            
-            conn.commit()
-            conn.close()
+            with self.lock:
+                # Remove expired entries
+                cursor = self.conn.execute("DELETE FROM response_cache WHERE expires_at IS NOT NULL AND expires_at < ?", 
+                                           (int(time.time()),))
+                self.conn.commit()
+                
+                expired_count = cursor.rowcount
+                self.entry_count -= expired_count
+                
+                # Remove least recently used entries if cache is too large
+                if self.entry_count > self.max_entries:
+                    self._evict_lru()
             
             if expired_count > 0:
+                self._on_entries_removed()
                 self.logger.info(f"Cleaned up {expired_count} expired cache entries")
             
         except Exception as e:
             self.logger.error(f"Cache cleanup error: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate and latency accounting"""
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": self.entry_count,
+            "max_entries": self.max_entries,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "average_lookup_time": self.stats["lookup_time"] / lookups if lookups else 0.0
+        }
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class SemanticResponseCache(ResponseCache):
+    """
+    Response cache that also answers prompts phrased differently from a cached one.
+    
+    Normalized prompts are embedded with SemanticEmbeddingService; a lookup that
+    misses the exact key returns the most similar cached prompt in the same
+    model/context namespace if its cosine similarity reaches the threshold.
+    """
+    
+    def __init__(self, cache_db_path: str = DEFAULT_CACHE_DB, max_entries: int = 1000,
+                 similarity_threshold: float = 0.92, embedding_service=None):
+        super().__init__(cache_db_path, max_entries)
+        self.similarity_threshold = similarity_threshold
+        self.embedding_service = embedding_service
+        self._embedding_unavailable = False
+        
+        # namespace -> (cache keys, unit-length embedding matrix), loaded on first use
+        self._vectors: Dict[str, Tuple[List[str], "np.ndarray"]] = {}
+    
+    def _get_embedding_service(self):
+        if self.embedding_service is None and not self._embedding_unavailable:
+            try:
+                from embedding.semantic_embedding_service import SemanticEmbeddingService
+                self.embedding_service = SemanticEmbeddingService(logger=self.logger)
+            except (ImportError, SystemExit) as e:
+                # The embedding service exits when its model dependencies are missing
+                self.logger.warning(f"Semantic cache falling back to exact matching: {e}")
+                self._embedding_unavailable = True
+        return self.embedding_service
+    
+    async def _embed(self, prompt: str) -> Optional["np.ndarray"]:
+        service = self._get_embedding_service()
+        if service is None or np is None:
+            return None
+        try:
+            result = await service.generate_embedding(normalize_prompt(prompt))
+        except Exception as e:
+            self.logger.error(f"Prompt embedding error: {e}")
+            return None
+        vector = np.asarray(result.embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+    
+    def _namespace_vectors(self, namespace: str) -> Tuple[List[str], "np.ndarray"]:
+        with self.lock:
+            if namespace not in self._vectors:
+                rows = self.conn.execute("""
+                    SELECT hash_key, embedding FROM response_cache 
+                    WHERE namespace = ? AND embedding IS NOT NULL
+                """, (namespace,)).fetchall()
+                keys = [row["hash_key"] for row in rows]
+                matrix = (np.vstack([np.frombuffer(row["embedding"], dtype=np.float32) for row in rows])
+                          if rows else np.empty((0, 0), dtype=np.float32))
+                self._vectors[namespace] = (keys, matrix)
+            return self._vectors[namespace]
+    
+    def _on_entries_removed(self):
+        with self.lock:
+            self._vectors.clear()
+    
+    async def aget_cached_response(self, prompt: str, model: str, context: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """Exact lookup first, then the nearest cached prompt above the similarity threshold"""
+        started = time.perf_counter()
+        
+        try:
+            row = self._fetch_entry(self.generate_cache_key(prompt, model, context))
+            if row:
+                return self._record_hit(row, "exact", started)
+            
+            vector = await self._embed(prompt)
+            if vector is not None:
+                keys, matrix = self._namespace_vectors(self.get_namespace(model, context))
+                if keys and matrix.shape[1] == vector.shape[0]:
+                    similarities = matrix @ vector
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.similarity_threshold:
+                        row = self._fetch_entry(keys[best])
+                        if row:
+                            self.logger.info(f"Semantic cache HIT ({similarities[best]:.3f}) for prompt: {prompt[:50]}...")
+                            result = self._record_hit(row, "semantic", started)
+                            result["similarity"] = float(similarities[best])
+                            return result
+        except Exception as e:
+            self.logger.error(f"Cache retrieval error: {e}")
+        
+        self._record_miss(started)
+        return None
+    
+    async def acache_response(self, prompt: str, response: str, model: str, response_time: float,
+                              confidence: float = 1.0, context: Dict[str, Any] = None, ttl_hours: int = 24):
+        """Cache a response together with its prompt embedding"""
+        vector = await self._embed(prompt)
+        self.cache_response(prompt, response, model, response_time, confidence, context, ttl_hours,
+                            embedding=vector.tobytes() if vector is not None else None)
+        if vector is None:
+            return
+        
+        cache_key = self.generate_cache_key(prompt, model, context)
+        namespace = self.get_namespace(model, context)
+        with self.lock:
+            if namespace not in self._vectors:
+                return
+            keys, matrix = self._vectors[namespace]
+            if cache_key in keys:
+                return
+            matrix = np.vstack([matrix, vector]) if keys else vector.reshape(1, -1)
+            self._vectors[namespace] = (keys + [cache_key], matrix)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats["similarity_threshold"] = self.similarity_threshold
+        stats["semantic_enabled"] = not self._embedding_unavailable
+        return stats
 
 
 class PromptOptimizer:
@@ -233,8 +473,16 @@ class PromptOptimizer:
 class PerformanceOptimizer:
     """Main performance optimization coordinator"""
     
-    def __init__(self):
-        self.cache = ResponseCache()
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        # HEARTHLINK_SEMANTIC_CACHE=1 also serves cached responses to reworded prompts
+        if cache is None:
+            if os.getenv("HEARTHLINK_SEMANTIC_CACHE", "").lower() in ("1", "true", "yes"):
+                cache = SemanticResponseCache(
+                    similarity_threshold=float(os.getenv("HEARTHLINK_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+                )
+            else:
+                cache = ResponseCache()
+        self.cache = cache
         self.prompt_optimizer = PromptOptimizer()
         self.logger = logging.getLogger("performance_optimizer")
         self.setup_logging()
@@ -263,7 +511,7 @@ class PerformanceOptimizer:
         
         try:
             # Step 1: Check cache first
-            cached_response = self.cache.get_cached_response(prompt, model, context)
+            cached_response = await self.cache.aget_cached_response(prompt, model, context)
             if cached_response:
                 self.metrics["cache_hits"] += 1
                 elapsed_time = time.time() - start_time
@@ -287,7 +535,7 @@ class PerformanceOptimizer:
             # Step 5: Cache the response if it's good
             if response_data.get("status") == "success":
                 confidence = optimization_score * 0.9  # Slightly reduce confidence for cached responses
-                self.cache.cache_response(
+                await self.cache.acache_response(
                     prompt=prompt,
                     response=response_data.get("response", ""),
                     model=model,
@@ -371,7 +619,8 @@ class PerformanceOptimizer:
             "cache_hit_rate": (self.metrics["cache_hits"] / total_requests) if total_requests > 0 else 0,
             "average_response_time": (self.metrics["total_response_time"] / total_requests) if total_requests > 0 else 0,
             "optimizations_applied": self.metrics["optimizations_applied"],
-            "optimization_rate": (self.metrics["optimizations_applied"] / total_requests) if total_requests > 0 else 0
+            "optimization_rate": (self.metrics["optimizations_applied"] / total_requests) if total_requests > 0 else 0,
+            "response_cache": self.cache.get_stats()
         }
         
         return metrics
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Single-flight Request Coalescing
+Concurrent identical LLM generations share one upstream call. Callers that
+arrive while a generation is in flight wait for its result instead of
+sending their own; streamed generations are fanned out chunk by chunk to
+every subscriber, and the upstream stream is closed once all of them leave.
+"""
+
+import json
+import hashlib
+import threading
+import logging
+from typing import Dict, Any, Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def request_key(*parts: Any) -> str:
+    """Stable key for a request (URL, payload, ...); dict key order does not matter"""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class _Call:
+    """An in-flight blocking generation"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class _Stream:
+    """An in-flight streamed generation and the chunks produced so far"""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.upstream: Optional[Iterator[Any]] = None
+        self.chunks = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.pulling = False
+        self.subscribers = 0
+        self.opened = threading.Event()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: Dict[str, _Call] = {}
+        self.streams: Dict[str, _Stream] = {}
+        self.stats = {
+            "generations": 0,
+            "streams": 0,
+            "deduplicated": 0,
+            "cancelled": 0
+        }
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn() unless an identical call is already in flight, in which case
+        wait for and share its result (or exception)
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = _Call()
+                leader = True
+                self.stats["generations"] += 1
+            else:
+                call.waiters += 1
+                leader = False
+                self.stats["deduplicated"] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+
+    def stream(self, key: str, open_fn: Callable[[], Iterator[Any]]) -> Iterator[Any]:
+        """
+        Subscribe to the stream for key, opening it with open_fn() if none is
+        in flight. Errors opening the stream are raised here for the caller
+        that opened it and from iteration for everyone else. Late subscribers
+        first replay the chunks already produced.
+        """
+        with self.lock:
+            flight = self.streams.get(key)
+            if flight is None:
+                flight = self.streams[key] = _Stream()
+                leader = True
+                self.stats["streams"] += 1
+            else:
+                leader = False
+                self.stats["deduplicated"] += 1
+            flight.subscribers += 1
+
+        if leader:
+            try:
+                flight.upstream = iter(open_fn())
+            except BaseException as e:
+                with flight.cond:
+                    flight.error = e
+                    flight.done = True
+                    flight.subscribers -= 1
+                self._forget_stream(key, flight)
+                flight.opened.set()
+                raise
+            flight.opened.set()
+
+        return self._subscribe(key, flight)
+
+    def _forget_stream(self, key: str, flight: _Stream):
+        with self.lock:
+            if self.streams.get(key) is flight:
+                del self.streams[key]
+
+    def _subscribe(self, key: str, flight: _Stream) -> Iterator[Any]:
+        flight.opened.wait()
+        position = 0
+        finished = False
+        try:
+            while True:
+                with flight.cond:
+                    while position >= len(flight.chunks) and not flight.done and flight.pulling:
+                        flight.cond.wait()
+                    if position < len(flight.chunks):
+                        chunk = flight.chunks[position]
+                        position += 1
+                    elif flight.done:
+                        finished = True
+                        if flight.error is not None:
+                            raise flight.error
+                        return
+                    else:
+                        # Nobody is reading upstream: this subscriber fetches the next chunk
+                        flight.pulling = True
+                        chunk = None
+
+                if chunk is None:
+                    self._pull(key, flight)
+                    continue
+                yield chunk
+        finally:
+            if not finished:
+                self._unsubscribe(key, flight)
+
+    def _pull(self, key: str, flight: _Stream):
+        try:
+            chunk = next(flight.upstream)
+        except StopIteration:
+            with flight.cond:
+                flight.done = True
+        except BaseException as e:
+            with flight.cond:
+                flight.error = e
+                flight.done = True
+        else:
+            with flight.cond:
+                flight.chunks.append(chunk)
+        finally:
+            with flight.cond:
+                flight.pulling = False
+                flight.cond.notify_all()
+        if flight.done:
+            self._forget_stream(key, flight)
+
+    def _unsubscribe(self, key: str, flight: _Stream):
+        """A subscriber left early; close the upstream if it was the last one"""
+        with flight.cond:
+            flight.subscribers -= 1
+            cancel = flight.subscribers == 0 and not flight.done
+            if cancel:
+                flight.done = True
+        if not cancel:
+            return
+
+        self._forget_stream(key, flight)
+        with self.lock:
+            self.stats["cancelled"] += 1
+        close = getattr(flight.upstream, "close", None)
+        if close:
+            try:
+                close()
+            except Exception as e:
+                logger.warning(f"Error closing cancelled stream: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Coalescing counters and current in-flight work"""
+        with self.lock:
+            return {
+                **self.stats,
+                "in_flight_generations": len(self.calls),
+                "in_flight_streams": len(self.streams)
+            }
+
+
+# Shared by every client in the process so duplicates from different callers coalesce
+default_single_flight = SingleFlight()
@@ -0,0 +1,52 @@
+"""
+Binary embedding codec for the SQLite vector tables
+
+Embeddings are stored as BLOBs instead of JSON text:
+    float32 - little-endian float32 values, 4 bytes per dimension
+    int8    - little-endian float32 scale followed by one int8 per dimension
+              (symmetric per-vector quantization, value = int8 * scale)
+
+Rows written before the binary format carry a JSON string and a NULL
+format column; ``decode_embedding`` still reads them so migration can run
+online while readers continue to work.
+"""
+
+import json
+import struct
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+
+FLOAT32 = "float32"
+INT8 = "int8"
+JSON = "json"
+ENCODINGS = (FLOAT32, INT8)
+
+_F32_LE = np.dtype("<f4")
+_SCALE = struct.Struct("<f")
+
+
+def encode_embedding(vector, encoding: str = FLOAT32) -> Tuple[bytes, str]:
+    """Encode a vector into (blob, format) for storage."""
+    vec = np.asarray(vector, dtype=_F32_LE).reshape(-1)
+    if encoding == FLOAT32:
+        return vec.tobytes(), FLOAT32
+    if encoding == INT8:
+        peak = float(np.max(np.abs(vec))) if vec.size else 0.0
+        scale = peak / 127.0 if peak > 0 else 1.0
+        quantized = np.clip(np.rint(vec / scale), -127, 127).astype(np.int8)
+        return _SCALE.pack(scale) + quantized.tobytes(), INT8
+    raise ValueError(f"Unsupported embedding encoding: {encoding}")
+
+
+def decode_embedding(value: Any, encoding: Optional[str] = None) -> Optional[np.ndarray]:
+    """Decode a stored embedding. float32 blobs are returned as read-only zero-copy views."""
+    if value is None:
+        return None
+    if isinstance(value, str) or encoding == JSON:
+        return np.asarray(json.loads(value), dtype=np.float32)
+    if encoding == INT8:
+        (scale,) = _SCALE.unpack_from(value)
+        return np.frombuffer(value, dtype=np.int8, offset=_SCALE.size).astype(np.float32) * scale
+    return np.frombuffer(value, dtype=_F32_LE)
@@ -15,6 +15,7 @@ from dataclasses import dataclass, asdict
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from .segmented_store import segment_directory_for, rekey_segment_directory
 import base64
 import logging
 from prometheus_client import Counter, Gauge, Histogram
@@ -356,33 +357,41 @@ class VaultKeyRotationManager:
             raise KeyRotationError(f"Key rotation failed: {e}")
 
     async def _re_encrypt_vault_data(self, new_key: KeyVersion):
-        """Re-encrypt all vault data with the new key"""
+        """Re-encrypt all vault data (monolithic file and segments) with the new key"""
         if not self._current_key:
             return
             
         storage_path = Path(self.config['storage']['file_path'])
-        if not storage_path.exists():
-            return
-            
-        # Read data with old key
-        with open(storage_path, 'rb') as f:
-            encrypted_data = f.read()
-            
-        # Decrypt with old key
-        old_aesgcm = AESGCM(self._current_key.key_data)
-        nonce = encrypted_data[:12]
-        ciphertext = encrypted_data[12:]
-        plaintext = old_aesgcm.decrypt(nonce, ciphertext, None)
-        
-        # Encrypt with new key
-        new_aesgcm = AESGCM(new_key.key_data)
-        new_nonce = secrets.token_bytes(12)
-        new_ciphertext = new_aesgcm.encrypt(new_nonce, plaintext, None)
-        new_encrypted_data = new_nonce + new_ciphertext
-        
-        # Write back with new encryption
-        with open(storage_path, 'wb') as f:
-            f.write(new_encrypted_data)
+        if storage_path.exists():
+            # Read data with old key
+            with open(storage_path, 'rb') as f:
+                encrypted_data = f.read()
+                
+            # Decrypt with old key
+            old_aesgcm = AESGCM(self._current_key.key_data)
+            nonce = encrypted_data[:12]
+            ciphertext = encrypted_data[12:]
+            plaintext = old_aesgcm.decrypt(nonce, ciphertext, None)
+            
+            # Encrypt with new key
+            new_aesgcm = AESGCM(new_key.key_data)
+            new_nonce = secrets.token_bytes(12)
+            new_ciphertext = new_aesgcm.encrypt(new_nonce, plaintext, None)
+            new_encrypted_data = new_nonce + new_ciphertext
+            
+            # Write to a temp file and swap so a crash never leaves a half-written vault
+            tmp_path = storage_path.with_name(storage_path.name + '.rotate.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(new_encrypted_data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, storage_path)
+            
+        # Segmented engine: every live frame is resealed into a new log generation
+        segment_dir = segment_directory_for(storage_path)
+        if segment_dir.is_dir():
+            counts = rekey_segment_directory(segment_dir, self._current_key.key_data, new_key.key_data)
+            self.logger.info(f"Re-encrypted vault segments with new key: {counts}")
             
         self.logger.info("Successfully re-encrypted vault data with new key")
 
@@ -0,0 +1,150 @@
+"""
+In-process BM25 inverted index for the lightweight (model-free) RAG vault
+
+Stored content is tokenized exactly once, when it is indexed. Queries only
+walk the posting lists of their own terms, so cost tracks the number of
+matching slices rather than the total number of memories.
+"""
+
+import heapq
+import math
+import threading
+from collections import Counter
+from typing import Dict, Any, Optional, List, Tuple, Iterable, Callable
+
+
+class BM25Index:
+    """Okapi BM25 over one (persona, user) scope."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_length: Dict[str, int] = {}
+        self._doc_type: Dict[str, str] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_length)
+
+    def __contains__(self, slice_id: str) -> bool:
+        return slice_id in self._doc_length
+
+    def add(self, slice_id: str, terms: List[str], memory_type: str = "episodic"):
+        """Index a slice from its pre-tokenized terms (replaces any previous entry)."""
+        with self._lock:
+            self.remove(slice_id)
+            counts = dict(Counter(terms))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[slice_id] = tf
+            self._doc_terms[slice_id] = counts
+            self._doc_length[slice_id] = len(terms)
+            self._doc_type[slice_id] = memory_type
+            self._total_length += len(terms)
+
+    def add_many(self, entries: Iterable[Tuple[str, List[str], str]]):
+        for slice_id, terms, memory_type in entries:
+            self.add(slice_id, terms, memory_type)
+
+    def remove(self, slice_id: str) -> bool:
+        with self._lock:
+            counts = self._doc_terms.pop(slice_id, None)
+            if counts is None:
+                return False
+            for term in counts:
+                posting = self._postings[term]
+                del posting[slice_id]
+                if not posting:
+                    del self._postings[term]
+            self._total_length -= self._doc_length.pop(slice_id)
+            del self._doc_type[slice_id]
+            return True
+
+    def _idf(self, doc_freq: int) -> float:
+        # Lucene-style idf: always positive, even for terms in most documents
+        n = len(self._doc_length)
+        return math.log(1 + (n - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def search(self, query_terms: List[str], k: int,
+               memory_types: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Return up to k (slice_id, similarity) pairs, best first.
+
+        Similarity is the BM25 score divided by the score of an average-length
+        slice containing each query term once, capped at 1.0.
+        """
+        with self._lock:
+            n = len(self._doc_length)
+            terms = [t for t in dict.fromkeys(query_terms) if t in self._postings]
+            if n == 0 or not terms or k <= 0:
+                return []
+
+            avg_length = self._total_length / n or 1.0
+            allowed = set(memory_types) if memory_types else None
+            scores: Dict[str, float] = {}
+            ideal = 0.0
+            for term in terms:
+                posting = self._postings[term]
+                idf = self._idf(len(posting))
+                ideal += idf
+                for slice_id, tf in posting.items():
+                    if allowed is not None and self._doc_type[slice_id] not in allowed:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_length[slice_id] / avg_length)
+                    scores[slice_id] = scores.get(slice_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(slice_id, min(1.0, score / ideal)) for slice_id, score in top]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"documents": len(self._doc_length), "terms": len(self._postings),
+                    "avg_length": self._total_length / len(self._doc_length) if self._doc_length else 0.0}
+
+
+class LexicalIndexRegistry:
+    """Lazily built per-(persona, user) BM25Index instances."""
+
+    def __init__(self, loader: Callable[[str, str], Iterable[Tuple[str, List[str], str]]],
+                 k1: float = 1.2, b: float = 0.75):
+        self._loader = loader
+        self._k1 = k1
+        self._b = b
+        self._indexes: Dict[Tuple[str, str], BM25Index] = {}
+        self._lock = threading.RLock()
+
+    def get(self, persona_id: str, user_id: str) -> BM25Index:
+        key = (persona_id, user_id)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = BM25Index(self._k1, self._b)
+                index.add_many(self._loader(persona_id, user_id))
+                self._indexes[key] = index
+            return index
+
+    def add(self, persona_id: str, user_id: str, slice_id: str, terms: List[str], memory_type: str):
+        """Apply an insert to an already-loaded index; unloaded scopes pick it up on first use."""
+        with self._lock:
+            index = self._indexes.get((persona_id, user_id))
+        if index is not None:
+            index.add(slice_id, terms, memory_type)
+
+    def remove(self, persona_id: str, user_id: str, slice_id: str):
+        with self._lock:
+            index = self._indexes.get((persona_id, user_id))
+        if index is not None:
+            index.remove(slice_id)
+
+    def invalidate(self, persona_id: Optional[str] = None, user_id: Optional[str] = None):
+        with self._lock:
+            if persona_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop((persona_id, user_id), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {f"{p}:{u}": index.stats() for (p, u), index in self._indexes.items()}
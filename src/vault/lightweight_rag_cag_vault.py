@@ -5,6 +5,7 @@ Without heavy ML dependencies - uses text similarity instead of embeddings
 """
 
 import os
+import sys
 import json
 import hashlib
 import re
@@ -17,7 +18,12 @@ import threading
 from collections import Counter
 import math
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.access_stats import default_access_stats, AccessRecord
 from .vault_enhanced import VaultEnhanced, VaultError
+from .lexical_index import LexicalIndexRegistry
 
 @dataclass
 class MemorySlice:
@@ -71,6 +77,11 @@ class LightweightRAGCAGVault(VaultEnhanced):
         # Initialize vector database (SQLite with text operations)
         self._init_vector_db()
         
+        # Retrieval counters are bumped in batches off the search path
+        self.access_stats = default_access_stats
+        self.access_stats_store = f"sqlite:{self.vector_db_path.resolve()}:memory_slices"
+        self.access_stats.register(self.access_stats_store, self._flush_retrieval_counts)
+        
         # Reasoning chain cache
         self.reasoning_chains: Dict[str, ReasoningChain] = {}
         self.chain_lock = threading.RLock()
@@ -83,6 +94,13 @@ class LightweightRAGCAGVault(VaultEnhanced):
             'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them',
             'my', 'your', 'his', 'her', 'its', 'our', 'their', 'this', 'that', 'these', 'those'
         ])
+        
+        # BM25 inverted index per (persona, user), loaded lazily from the database
+        self.lexical_index = LexicalIndexRegistry(
+            self._load_index_entries,
+            k1=config.get("rag_config", {}).get("bm25_k1", 1.2),
+            b=config.get("rag_config", {}).get("bm25_b", 0.75)
+        )
 
     def _log_message(self, level: str, message: str):
         """Helper method to handle logger compatibility"""
@@ -152,12 +170,8 @@ class LightweightRAGCAGVault(VaultEnhanced):
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_slices_score ON memory_slices(relevance_score)")
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_chains_persona ON reasoning_chains(persona_id)")
                 
-                # Full-text search for content
-                conn.execute("""
-                    CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5(
-                        slice_id, content, keywords
-                    )
-                """)
+                # Retrieval uses the in-memory BM25 index; drop the FTS copy older versions kept
+                conn.execute("DROP TABLE IF EXISTS memory_fts")
                 
                 conn.commit()
                 
@@ -188,6 +202,19 @@ class LightweightRAGCAGVault(VaultEnhanced):
             self._log_message('warning', f"Keyword extraction failed: {e}")
             return []
 
+    def _tokenize(self, text: str) -> List[str]:
+        """Split text into index terms (same word rule as keyword extraction)"""
+        return [w for w in re.findall(r'\b[a-zA-Z]{3,}\b', text.lower()) if w not in self.stopwords]
+
+    def _load_index_entries(self, persona_id: str, user_id: str) -> List[Tuple[str, List[str], str]]:
+        """Tokenize every stored slice for a persona/user once to seed its BM25 index"""
+        with sqlite3.connect(str(self.vector_db_path)) as conn:
+            rows = conn.execute("""
+                SELECT slice_id, content, memory_type FROM memory_slices
+                WHERE persona_id = ? AND user_id = ?
+            """, (persona_id, user_id)).fetchall()
+        return [(slice_id, self._tokenize(content or ""), memory_type) for slice_id, content, memory_type in rows]
+
     def _calculate_text_similarity(self, text1: str, text2: str, keywords1: List[str], keywords2: List[str]) -> float:
         """Calculate similarity between two texts using TF-IDF-like approach"""
         try:
@@ -251,14 +278,10 @@ class LightweightRAGCAGVault(VaultEnhanced):
                     json.dumps(memory_slice.metadata)
                 ))
                 
-                # Store in FTS table for full-text search
-                conn.execute("""
-                    INSERT OR REPLACE INTO memory_fts (slice_id, content, keywords)
-                    VALUES (?, ?, ?)
-                """, (slice_id, content, ' '.join(keywords)))
-                
                 conn.commit()
             
+            self.lexical_index.add(persona_id, user_id, slice_id, self._tokenize(content), memory_type)
+            
             self._log("store_memory_slice", user_id, persona_id, "memory_slice", slice_id, 
                      {"content_length": len(content), "memory_type": memory_type, "keywords_count": len(keywords)})
             
@@ -285,75 +308,53 @@ class LightweightRAGCAGVault(VaultEnhanced):
             max_results = max_results or self.max_retrieval_results
             min_similarity = min_similarity or self.similarity_threshold
             
-            # Build base query
-            query_sql = """
-                SELECT slice_id, persona_id, user_id, content, memory_type,
-                       keywords, relevance_score, created_at, last_accessed,
-                       retrieval_count, metadata
-                FROM memory_slices 
-                WHERE persona_id = ? AND user_id = ?
-            """
-            query_params = [persona_id, user_id]
-            
-            if memory_types:
-                placeholders = ','.join(['?' for _ in memory_types])
-                query_sql += f" AND memory_type IN ({placeholders})"
-                query_params.extend(memory_types)
-            
-            # First, try FTS search for exact matches
-            fts_results = set()
-            if query_keywords:
-                fts_query = ' OR '.join(query_keywords)
-                with sqlite3.connect(str(self.vector_db_path)) as conn:
-                    cursor = conn.execute("""
-                        SELECT slice_id FROM memory_fts 
-                        WHERE memory_fts MATCH ?
-                        LIMIT ?
-                    """, (fts_query, max_results * 2))
-                    fts_results = set(row[0] for row in cursor.fetchall())
-            
-            # Get all candidate memories
-            with sqlite3.connect(str(self.vector_db_path)) as conn:
-                cursor = conn.execute(query_sql, query_params)
-                rows = cursor.fetchall()
+            # BM25 over the inverted index; over-fetch so the relevance boost can re-rank
+            ranked = self.lexical_index.get(persona_id, user_id).search(
+                self._tokenize(query), max_results * 2, memory_types
+            )
             
-            # Calculate similarities and rank
             similar_memories = []
             similarity_scores = []
             
-            for row in rows:
-                try:
-                    stored_keywords = json.loads(row[5]) if row[5] else []
-                    
-                    # Calculate text similarity
-                    similarity = self._calculate_text_similarity(query, row[3], query_keywords, stored_keywords)
-                    
-                    # Boost similarity if found in FTS search
-                    if row[0] in fts_results:
-                        similarity = min(1.0, similarity * 1.2)
-                    
-                    # Boost based on relevance score
-                    boosted_similarity = similarity * (0.5 + row[6] * 0.5)
-                    
-                    if boosted_similarity >= min_similarity:
-                        memory_slice = MemorySlice(
-                            slice_id=row[0],
-                            content=row[3],
-                            memory_type=row[4],
-                            created_at=row[7],
-                            last_accessed=row[8],
-                            keywords=stored_keywords,
-                            relevance_score=row[6],
-                            metadata=json.loads(row[10]) if row[10] else {},
-                            retrieval_count=row[9]
-                        )
-                        
-                        similar_memories.append(memory_slice)
-                        similarity_scores.append(boosted_similarity)
+            if ranked:
+                slice_ids = [slice_id for slice_id, _ in ranked]
+                placeholders = ','.join(['?' for _ in slice_ids])
+                with sqlite3.connect(str(self.vector_db_path)) as conn:
+                    cursor = conn.execute(f"""
+                        SELECT slice_id, content, memory_type, keywords, relevance_score,
+                               created_at, last_accessed, retrieval_count, metadata
+                        FROM memory_slices 
+                        WHERE slice_id IN ({placeholders})
+                    """, slice_ids)
+                    rows = {row[0]: row for row in cursor.fetchall()}
+                
+                for slice_id, similarity in ranked:
+                    row = rows.get(slice_id)
+                    if row is None:
+                        continue
+                    try:
+                        # Boost based on relevance score
+                        boosted_similarity = similarity * (0.5 + row[4] * 0.5)
                         
-                except Exception as e:
-                    self._log_message('warning', f"Error processing memory slice {row[0]}: {e}")
-                    continue
+                        if boosted_similarity >= min_similarity:
+                            memory_slice = MemorySlice(
+                                slice_id=row[0],
+                                content=row[1],
+                                memory_type=row[2],
+                                created_at=row[5],
+                                last_accessed=row[6],
+                                keywords=json.loads(row[3]) if row[3] else [],
+                                relevance_score=row[4],
+                                metadata=json.loads(row[8]) if row[8] else {},
+                                retrieval_count=row[7]
+                            )
+                            
+                            similar_memories.append(memory_slice)
+                            similarity_scores.append(boosted_similarity)
+                            
+                    except Exception as e:
+                        self._log_message('warning', f"Error processing memory slice {slice_id}: {e}")
+                        continue
             
             # Sort by similarity score
             if similar_memories:
@@ -389,19 +390,23 @@ class LightweightRAGCAGVault(VaultEnhanced):
             raise VaultError(f"Memory retrieval failed: {e}")
 
     def _update_retrieval_counts(self, slice_ids: List[str]):
-        """Update retrieval counts for accessed memories"""
-        try:
-            with sqlite3.connect(str(self.vector_db_path)) as conn:
-                for slice_id in slice_ids:
-                    conn.execute("""
-                        UPDATE memory_slices 
-                        SET retrieval_count = retrieval_count + 1,
-                            last_accessed = ?
-                        WHERE slice_id = ?
-                    """, (datetime.now().isoformat(), slice_id))
-                conn.commit()
-        except Exception as e:
-            self._log_message('warning', f"Failed to update retrieval counts: {e}")
+        """Record retrievals; counters are written by the access-stats flush"""
+        self.access_stats.record(self.access_stats_store, slice_ids)
+
+    def _flush_retrieval_counts(self, records: List[AccessRecord]):
+        """Apply a batch of aggregated retrievals in one transaction"""
+        with sqlite3.connect(str(self.vector_db_path)) as conn:
+            # last_accessed holds naive local ISO timestamps
+            conn.executemany("""
+                UPDATE memory_slices 
+                SET retrieval_count = retrieval_count + ?,
+                    last_accessed = MAX(COALESCE(last_accessed, ''), ?)
+                WHERE slice_id = ?
+            """, [
+                (record.count, record.last_accessed.astimezone().replace(tzinfo=None).isoformat(), record.item_id)
+                for record in records
+            ])
+            conn.commit()
 
     def generate_reasoning_chain(self, query: str, persona_id: str, user_id: str,
                                context_memories: List[MemorySlice] = None) -> ReasoningChain:
@@ -758,13 +763,17 @@ class LightweightRAGCAGVault(VaultEnhanced):
                 
                 # Clean up memory slices with very low relevance scores (< 0.2) and no recent access
                 old_cutoff = datetime.now() - timedelta(days=7)
-                cursor = conn.execute("""
-                    DELETE FROM memory_slices 
+                stale_slices = conn.execute("""
+                    SELECT slice_id, persona_id, user_id FROM memory_slices 
                     WHERE relevance_score < 0.2 
                     AND last_accessed < ? 
                     AND retrieval_count = 0
-                """, (old_cutoff.isoformat(),))
-                deleted_memories = cursor.rowcount
+                """, (old_cutoff.isoformat(),)).fetchall()
+                conn.executemany("DELETE FROM memory_slices WHERE slice_id = ?",
+                                 [(row[0],) for row in stale_slices])
+                deleted_memories = len(stale_slices)
+                for slice_id, slice_persona, slice_user in stale_slices:
+                    self.lexical_index.remove(slice_persona, slice_user, slice_id)
                 
                 # Update relevance scores based on retrieval patterns
                 cursor = conn.execute("""
@@ -778,12 +787,6 @@ class LightweightRAGCAGVault(VaultEnhanced):
                 """, (old_cutoff.isoformat(),))
                 updated_scores = cursor.rowcount
                 
-                # Clean up FTS table to match memory_slices
-                conn.execute("""
-                    DELETE FROM memory_fts 
-                    WHERE slice_id NOT IN (SELECT slice_id FROM memory_slices)
-                """)
-                
                 conn.commit()
             
             # Clear in-memory caches
@@ -4,6 +4,7 @@ Implements Retrieval-Augmented Generation and Chain-of-Thought Augmentation
 """
 
 import os
+import sys
 import json
 import numpy as np
 import hashlib
@@ -13,10 +14,17 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 import sqlite3
 import threading
+import time
 from sentence_transformers import SentenceTransformer
 import logging
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.access_stats import default_access_stats, AccessRecord
 from .vault_enhanced import VaultEnhanced, VaultError
+from .vector_index import VectorIndexRegistry
+from .embedding_codec import encode_embedding, decode_embedding, ENCODINGS
 
 @dataclass
 class MemorySlice:
@@ -67,6 +75,9 @@ class RAGCAGVault(VaultEnhanced):
         self.max_retrieval_results = config.get("rag_config", {}).get("max_results", 10)
         self.similarity_threshold = config.get("rag_config", {}).get("similarity_threshold", 0.7)
         self.vector_dimension = config.get("rag_config", {}).get("vector_dimension", 384)
+        self.embedding_encoding = config.get("rag_config", {}).get("embedding_encoding", "float32")
+        if self.embedding_encoding not in ENCODINGS:
+            raise VaultError(f"Unsupported embedding encoding: {self.embedding_encoding}")
         
         # Initialize embedding model
         try:
@@ -81,6 +92,27 @@ class RAGCAGVault(VaultEnhanced):
         # Initialize vector database (SQLite with vector operations)
         self._init_vector_db()
         
+        # Retrieval counters are bumped in batches off the search path
+        self.access_stats = default_access_stats
+        self.access_stats_store = f"sqlite:{self.vector_db_path.resolve()}:memory_vectors"
+        self.access_stats.register(self.access_stats_store, self._flush_retrieval_counts)
+        
+        # In-memory ANN index per (persona, user), loaded lazily from the vector DB
+        rag_config = config.get("rag_config", {})
+        self.vector_index = VectorIndexRegistry(
+            self._load_index_entries,
+            ivf_min_size=rag_config.get("ivf_min_size", 50000),
+            ivf_probe=rag_config.get("ivf_probe", 8)
+        )
+        
+        # Convert legacy JSON embeddings to BLOBs without blocking readers
+        self._migration_thread = None
+        if rag_config.get("migrate_embeddings", True) and self._count_legacy_embeddings() > 0:
+            self._migration_thread = threading.Thread(
+                target=self.migrate_embeddings_to_blob, name="embedding-blob-migration", daemon=True
+            )
+            self._migration_thread.start()
+        
         # Reasoning chain cache
         self.reasoning_chains: Dict[str, ReasoningChain] = {}
         self.chain_lock = threading.RLock()
@@ -95,6 +127,8 @@ class RAGCAGVault(VaultEnhanced):
             
             # Create vector database schema
             with sqlite3.connect(str(self.vector_db_path)) as conn:
+                # WAL lets readers proceed while the embedding migration writes
+                conn.execute("PRAGMA journal_mode=WAL")
                 conn.execute("""
                     CREATE TABLE IF NOT EXISTS memory_vectors (
                         slice_id TEXT PRIMARY KEY,
@@ -102,15 +136,20 @@ class RAGCAGVault(VaultEnhanced):
                         user_id TEXT,
                         content TEXT,
                         memory_type TEXT,
-                        embedding_vector TEXT,  -- JSON string of vector
+                        embedding_vector BLOB,  -- see embedding_codec; JSON text in legacy rows
                         relevance_score REAL,
                         created_at TEXT,
                         last_accessed TEXT,
                         retrieval_count INTEGER DEFAULT 0,
-                        metadata TEXT  -- JSON string
+                        metadata TEXT,  -- JSON string
+                        embedding_format TEXT  -- 'float32' | 'int8', NULL for legacy JSON
                     )
                 """)
                 
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(memory_vectors)")}
+                if "embedding_format" not in columns:
+                    conn.execute("ALTER TABLE memory_vectors ADD COLUMN embedding_format TEXT")
+                
                 conn.execute("""
                     CREATE TABLE IF NOT EXISTS reasoning_chains (
                         chain_id TEXT PRIMARY KEY,
@@ -154,6 +193,73 @@ class RAGCAGVault(VaultEnhanced):
                 self.logger.warning(f"Failed to generate embedding: {e}")
             return None
 
+    def _load_index_entries(self, persona_id: str, user_id: str) -> List[Tuple[str, np.ndarray, str]]:
+        """Read every stored embedding for a persona/user to seed its vector index"""
+        with sqlite3.connect(str(self.vector_db_path)) as conn:
+            rows = conn.execute("""
+                SELECT slice_id, embedding_vector, embedding_format, memory_type
+                FROM memory_vectors
+                WHERE persona_id = ? AND user_id = ? AND embedding_vector IS NOT NULL
+            """, (persona_id, user_id)).fetchall()
+        
+        entries = []
+        for slice_id, embedding, embedding_format, memory_type in rows:
+            try:
+                entries.append((slice_id, decode_embedding(embedding, embedding_format), memory_type))
+            except Exception as e:
+                if self.logger:
+                    self.logger.warning(f"Skipping unreadable embedding for slice {slice_id}: {e}")
+        return entries
+
+    def _count_legacy_embeddings(self) -> int:
+        with sqlite3.connect(str(self.vector_db_path)) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM memory_vectors WHERE typeof(embedding_vector) = 'text'"
+            ).fetchone()[0]
+
+    def migrate_embeddings_to_blob(self, batch_size: int = 500, pause_seconds: float = 0.01) -> int:
+        """
+        Convert JSON-text embeddings to binary BLOBs in small batches.
+        
+        Each batch is its own short transaction, so readers (WAL mode) are never
+        locked out and writers only wait for one batch. Safe to rerun.
+        """
+        converted = 0
+        try:
+            while True:
+                with sqlite3.connect(str(self.vector_db_path), timeout=30) as conn:
+                    rows = conn.execute("""
+                        SELECT slice_id, embedding_vector FROM memory_vectors
+                        WHERE typeof(embedding_vector) = 'text'
+                        LIMIT ?
+                    """, (batch_size,)).fetchall()
+                    if not rows:
+                        break
+                    
+                    updates = []
+                    for slice_id, embedding in rows:
+                        try:
+                            blob, embedding_format = encode_embedding(json.loads(embedding), self.embedding_encoding)
+                        except (ValueError, TypeError):
+                            blob, embedding_format = None, None  # unreadable legacy row
+                        updates.append((blob, embedding_format, slice_id))
+                    # Guard on the type so a concurrent store_memory_slice is never overwritten
+                    conn.executemany("""
+                        UPDATE memory_vectors SET embedding_vector = ?, embedding_format = ?
+                        WHERE slice_id = ? AND typeof(embedding_vector) = 'text'
+                    """, updates)
+                    conn.commit()
+                    converted += len(updates)
+                time.sleep(pause_seconds)
+            
+            self._log("migrate_embeddings_to_blob", "system", None, "optimization", None,
+                     {"converted": converted, "encoding": self.embedding_encoding})
+            return converted
+        except Exception as e:
+            self._log("migrate_embeddings_to_blob", "system", None, "optimization", None,
+                     {"converted": converted}, result="failure", error=e)
+            raise VaultError(f"Embedding migration failed: {e}")
+
     def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors"""
         try:
@@ -186,17 +292,24 @@ class RAGCAGVault(VaultEnhanced):
                 retrieval_count=0
             )
             
+            # Refuse a mismatched embedding before anything is written
+            index_dimension = self.vector_index.loaded_dimension(persona_id, user_id)
+            if embedding and index_dimension is not None and len(embedding) != index_dimension:
+                raise ValueError(f"Embedding dimension {len(embedding)} does not match index dimension {index_dimension}")
+            
+            blob, embedding_format = encode_embedding(embedding, self.embedding_encoding) if embedding else (None, None)
+            
             # Store in vector database
             with sqlite3.connect(str(self.vector_db_path)) as conn:
                 conn.execute("""
                     INSERT OR REPLACE INTO memory_vectors 
                     (slice_id, persona_id, user_id, content, memory_type, 
-                     embedding_vector, relevance_score, created_at, last_accessed, 
+                     embedding_vector, embedding_format, relevance_score, created_at, last_accessed, 
                      retrieval_count, metadata)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     slice_id, persona_id, user_id, content, memory_type,
-                    json.dumps(embedding) if embedding else None,
+                    blob, embedding_format,
                     memory_slice.relevance_score,
                     memory_slice.created_at,
                     memory_slice.last_accessed,
@@ -205,6 +318,15 @@ class RAGCAGVault(VaultEnhanced):
                 ))
                 conn.commit()
             
+            if embedding:
+                try:
+                    self.vector_index.add(persona_id, user_id, slice_id, embedding, memory_type)
+                except Exception as e:
+                    # The slice is committed; rebuild the scope's index from the DB on next search
+                    self.vector_index.invalidate(persona_id, user_id)
+                    if self.logger:
+                        self.logger.warning(f"Vector index update failed for slice {slice_id}: {e}")
+            
             self._log("store_memory_slice", user_id, persona_id, "memory_slice", slice_id, 
                      {"content_length": len(content), "memory_type": memory_type})
             
@@ -239,66 +361,53 @@ class RAGCAGVault(VaultEnhanced):
             max_results = max_results or self.max_retrieval_results
             min_similarity = min_similarity or self.similarity_threshold
             
-            # Build query
-            query_sql = """
-                SELECT slice_id, persona_id, user_id, content, memory_type,
-                       embedding_vector, relevance_score, created_at, last_accessed,
-                       retrieval_count, metadata
-                FROM memory_vectors 
-                WHERE persona_id = ? AND user_id = ? AND embedding_vector IS NOT NULL
-            """
-            query_params = [persona_id, user_id]
-            
-            if memory_types:
-                placeholders = ','.join(['?' for _ in memory_types])
-                query_sql += f" AND memory_type IN ({placeholders})"
-                query_params.extend(memory_types)
+            # Rank every candidate in one matrix-vector product
+            index = self.vector_index.get(persona_id, user_id)
+            ranked = index.search(query_embedding, max_results, min_similarity, memory_types or None)
             
-            # Retrieve candidate memories
-            with sqlite3.connect(str(self.vector_db_path)) as conn:
-                cursor = conn.execute(query_sql, query_params)
-                rows = cursor.fetchall()
-            
-            # Calculate similarities and rank
             similar_memories = []
             similarity_scores = []
             
-            for row in rows:
-                try:
-                    stored_embedding = json.loads(row[5]) if row[5] else None
-                    if stored_embedding:
-                        similarity = self._cosine_similarity(query_embedding, stored_embedding)
-                        
-                        if similarity >= min_similarity:
-                            memory_slice = MemorySlice(
-                                slice_id=row[0],
-                                content=row[3],
-                                memory_type=row[4],
-                                created_at=row[7],
-                                last_accessed=row[8],
-                                embedding_vector=stored_embedding,
-                                relevance_score=row[6],
-                                metadata=json.loads(row[10]) if row[10] else {},
-                                retrieval_count=row[9]
-                            )
-                            
-                            similar_memories.append(memory_slice)
-                            similarity_scores.append(similarity)
-                except Exception as e:
-                    if self.logger:
-                        self.logger.warning(f"Error processing memory slice {row[0]}: {e}")
-                    continue
-            
-            # Sort by similarity score
-            if similar_memories:
-                sorted_pairs = sorted(zip(similar_memories, similarity_scores), 
-                                    key=lambda x: x[1], reverse=True)
-                similar_memories, similarity_scores = zip(*sorted_pairs)
-                similar_memories = list(similar_memories[:max_results])
-                similarity_scores = list(similarity_scores[:max_results])
+            if ranked:
+                slice_ids = [slice_id for slice_id, _ in ranked]
+                placeholders = ','.join(['?' for _ in slice_ids])
+                with sqlite3.connect(str(self.vector_db_path)) as conn:
+                    cursor = conn.execute(f"""
+                        SELECT slice_id, content, memory_type, relevance_score,
+                               created_at, last_accessed, retrieval_count, metadata
+                        FROM memory_vectors 
+                        WHERE slice_id IN ({placeholders})
+                    """, slice_ids)
+                    rows = {row[0]: row for row in cursor.fetchall()}
+                
+                for slice_id, similarity in ranked:
+                    row = rows.get(slice_id)
+                    if row is None:
+                        # Row removed outside this process; drop it from the index
+                        index.remove(slice_id)
+                        continue
+                    try:
+                        memory_slice = MemorySlice(
+                            slice_id=row[0],
+                            content=row[1],
+                            memory_type=row[2],
+                            created_at=row[4],
+                            last_accessed=row[5],
+                            embedding_vector=index.vector(slice_id).tolist(),
+                            relevance_score=row[3],
+                            metadata=json.loads(row[7]) if row[7] else {},
+                            retrieval_count=row[6]
+                        )
+                        similar_memories.append(memory_slice)
+                        similarity_scores.append(similarity)
+                    except Exception as e:
+                        if self.logger:
+                            self.logger.warning(f"Error processing memory slice {slice_id}: {e}")
+                        continue
                 
                 # Update retrieval counts
-                self._update_retrieval_counts([m.slice_id for m in similar_memories])
+                if similar_memories:
+                    self._update_retrieval_counts([m.slice_id for m in similar_memories])
             
             # Calculate retrieval time
             retrieval_time = int((datetime.now() - start_time).total_seconds() * 1000)
@@ -323,20 +432,23 @@ class RAGCAGVault(VaultEnhanced):
             raise VaultError(f"Memory retrieval failed: {e}")
 
     def _update_retrieval_counts(self, slice_ids: List[str]):
-        """Update retrieval counts for accessed memories"""
-        try:
-            with sqlite3.connect(str(self.vector_db_path)) as conn:
-                for slice_id in slice_ids:
-                    conn.execute("""
-                        UPDATE memory_vectors 
-                        SET retrieval_count = retrieval_count + 1,
-                            last_accessed = ?
-                        WHERE slice_id = ?
-                    """, (datetime.now().isoformat(), slice_id))
-                conn.commit()
-        except Exception as e:
-            if self.logger:
-                self.logger.warning(f"Failed to update retrieval counts: {e}")
+        """Record retrievals; counters are written by the access-stats flush"""
+        self.access_stats.record(self.access_stats_store, slice_ids)
+
+    def _flush_retrieval_counts(self, records: List[AccessRecord]):
+        """Apply a batch of aggregated retrievals in one transaction"""
+        with sqlite3.connect(str(self.vector_db_path)) as conn:
+            # last_accessed holds naive local ISO timestamps
+            conn.executemany("""
+                UPDATE memory_vectors 
+                SET retrieval_count = retrieval_count + ?,
+                    last_accessed = MAX(COALESCE(last_accessed, ''), ?)
+                WHERE slice_id = ?
+            """, [
+                (record.count, record.last_accessed.astimezone().replace(tzinfo=None).isoformat(), record.item_id)
+                for record in records
+            ])
+            conn.commit()
 
     def generate_reasoning_chain(self, query: str, persona_id: str, user_id: str,
                                context_memories: List[MemorySlice] = None) -> ReasoningChain:
@@ -625,13 +737,17 @@ class RAGCAGVault(VaultEnhanced):
                 
                 # Clean up memory slices with very low relevance scores (< 0.1) and no recent access
                 old_cutoff = datetime.now() - timedelta(days=7)
-                cursor = conn.execute("""
-                    DELETE FROM memory_vectors 
+                stale_slices = conn.execute("""
+                    SELECT slice_id, persona_id, user_id FROM memory_vectors 
                     WHERE relevance_score < 0.1 
                     AND last_accessed < ? 
                     AND retrieval_count = 0
-                """, (old_cutoff.isoformat(),))
-                deleted_memories = cursor.rowcount
+                """, (old_cutoff.isoformat(),)).fetchall()
+                conn.executemany("DELETE FROM memory_vectors WHERE slice_id = ?",
+                                 [(row[0],) for row in stale_slices])
+                deleted_memories = len(stale_slices)
+                for slice_id, slice_persona, slice_user in stale_slices:
+                    self.vector_index.remove(slice_persona, slice_user, slice_id)
                 
                 # Update relevance scores based on retrieval patterns
                 conn.execute("""
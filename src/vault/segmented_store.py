@@ -0,0 +1,389 @@
+"""
+Segmented Vault Store
+
+Append-only, per-record encrypted storage engine for the Vault. Each persona
+or communal record is sealed in its own AES-GCM frame and appended to a log
+file, so a single-record update costs O(record) instead of re-encrypting the
+whole vault. Reads decrypt only the frame they touch. Superseded frames are
+reclaimed by periodic compaction, which copies live frames verbatim (no
+re-encryption) into a fresh log generation.
+
+Frame layout on disk:
+    [4-byte big-endian length][12-byte nonce][ciphertext + GCM tag]
+
+Plaintext of each frame is a JSON document:
+    {"op": "put" | "del", "kind": "persona" | "communal", "id": str, "record": {...}}
+"""
+
+import os
+import json
+import struct
+import secrets
+import threading
+import weakref
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple, Iterator
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+
+FRAME_HEADER = struct.Struct(">I")
+NONCE_SIZE = 12
+SEGMENT_AAD = b"hearthlink-vault-segment-v1"
+RECORD_KINDS = ("persona", "communal")
+
+# Stores open in this process, by resolved directory, so key rotation can
+# reseal through them instead of leaving them on the old key and generation
+_open_stores: Dict[Path, "weakref.WeakSet[SegmentedVaultStore]"] = {}
+_open_stores_lock = threading.Lock()
+
+
+class SegmentedStoreError(Exception):
+    pass
+
+
+class SegmentedVaultStore:
+    """Append-only encrypted record store with in-memory offset index."""
+
+    def __init__(self, directory: Path, key: bytes, fsync: bool = True,
+                 compaction_ratio: float = 0.5, compaction_min_bytes: int = 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._aesgcm = AESGCM(key)
+        self.fsync = fsync
+        self.compaction_ratio = compaction_ratio
+        self.compaction_min_bytes = compaction_min_bytes
+
+        self._lock = threading.RLock()
+        self._index: Dict[str, Dict[str, Tuple[int, int]]] = {kind: {} for kind in RECORD_KINDS}
+        self._live_bytes = 0
+        self._total_bytes = 0
+        self._generation = 0
+        self._fh = None
+        self._open_log()
+        with _open_stores_lock:
+            _open_stores.setdefault(self.directory.resolve(), weakref.WeakSet()).add(self)
+
+    # Log file management
+    def _log_path(self, generation: int) -> Path:
+        return self.directory / f"vault-{generation:06d}.log"
+
+    def _existing_generations(self) -> List[int]:
+        generations = []
+        for path in self.directory.glob("vault-*.log"):
+            try:
+                generations.append(int(path.stem.split("-", 1)[1]))
+            except ValueError:
+                continue
+        return sorted(generations)
+
+    def _open_log(self):
+        generations = self._existing_generations()
+        self._generation = generations[-1] if generations else 1
+        # Older generations are leftovers from an interrupted compaction
+        for stale in generations[:-1]:
+            self._log_path(stale).unlink(missing_ok=True)
+        self.directory.joinpath("compact.tmp").unlink(missing_ok=True)
+
+        path = self._log_path(self._generation)
+        path.touch(exist_ok=True)
+        valid_end = self._rebuild_index(path)
+        self._fh = open(path, "r+b")
+        if valid_end < path.stat().st_size:
+            # Drop a torn trailing frame left by a crash mid-append
+            self._fh.truncate(valid_end)
+        self._fh.seek(0, os.SEEK_END)
+        self._total_bytes = valid_end
+
+    def _rebuild_index(self, path: Path) -> int:
+        offset = 0
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    break
+                (length,) = FRAME_HEADER.unpack(header)
+                body = f.read(length)
+                if len(body) < length:
+                    break
+                try:
+                    entry = json.loads(self._open_frame(body))
+                except Exception as e:
+                    # A complete frame that fails authentication means a wrong
+                    # key or tampering, never a torn write: refuse to truncate.
+                    raise SegmentedStoreError(f"Segment frame at offset {offset} failed authentication: {e}")
+                frame_size = FRAME_HEADER.size + length
+                self._apply(entry["op"], entry["kind"], entry["id"], (offset, frame_size))
+                offset += frame_size
+        return offset
+
+    def _apply(self, op: str, kind: str, record_id: str, location: Tuple[int, int]):
+        bucket = self._index[kind]
+        previous = bucket.pop(record_id, None)
+        if previous:
+            self._live_bytes -= previous[1]
+        if op == "put":
+            bucket[record_id] = location
+            self._live_bytes += location[1]
+
+    # Frame encryption
+    def _seal_frame(self, payload: bytes) -> bytes:
+        nonce = secrets.token_bytes(NONCE_SIZE)
+        body = nonce + self._aesgcm.encrypt(nonce, payload, SEGMENT_AAD)
+        return FRAME_HEADER.pack(len(body)) + body
+
+    def _open_frame(self, body: bytes) -> bytes:
+        return self._aesgcm.decrypt(body[:NONCE_SIZE], body[NONCE_SIZE:], SEGMENT_AAD)
+
+    def _append(self, entry: Dict[str, Any]) -> Tuple[int, int]:
+        frame = self._seal_frame(json.dumps(entry).encode())
+        offset = self._total_bytes
+        self._fh.write(frame)
+        self._fh.flush()
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+        self._total_bytes += len(frame)
+        return offset, len(frame)
+
+    def _read_entry(self, location: Tuple[int, int]) -> Dict[str, Any]:
+        offset, size = location
+        with open(self._log_path(self._generation), "rb") as f:
+            f.seek(offset + FRAME_HEADER.size)
+            body = f.read(size - FRAME_HEADER.size)
+        return json.loads(self._open_frame(body))
+
+    # Record API
+    def _check_kind(self, kind: str):
+        if kind not in self._index:
+            raise SegmentedStoreError(f"Unknown record kind: {kind}")
+
+    def get(self, kind: str, record_id: str) -> Optional[Dict[str, Any]]:
+        self._check_kind(kind)
+        with self._lock:
+            location = self._index[kind].get(record_id)
+            if location is None:
+                return None
+            try:
+                return self._read_entry(location)["record"]
+            except Exception as e:
+                raise SegmentedStoreError(f"Failed to read {kind} record {record_id}: {e}")
+
+    def put(self, kind: str, record_id: str, record: Dict[str, Any]):
+        self._check_kind(kind)
+        with self._lock:
+            location = self._append({"op": "put", "kind": kind, "id": record_id, "record": record})
+            self._apply("put", kind, record_id, location)
+            self._maybe_compact()
+
+    def put_many(self, kind: str, records: Dict[str, Dict[str, Any]]):
+        """Append several records with a single flush/fsync."""
+        self._check_kind(kind)
+        with self._lock:
+            fsync, self.fsync = self.fsync, False
+            try:
+                for record_id, record in records.items():
+                    location = self._append({"op": "put", "kind": kind, "id": record_id, "record": record})
+                    self._apply("put", kind, record_id, location)
+            finally:
+                self.fsync = fsync
+            if self.fsync:
+                os.fsync(self._fh.fileno())
+            self._maybe_compact()
+
+    def delete(self, kind: str, record_id: str) -> bool:
+        self._check_kind(kind)
+        with self._lock:
+            if record_id not in self._index[kind]:
+                return False
+            tombstone = self._append({"op": "del", "kind": kind, "id": record_id})
+            self._apply("del", kind, record_id, tombstone)
+            self._maybe_compact()
+            return True
+
+    def contains(self, kind: str, record_id: str) -> bool:
+        self._check_kind(kind)
+        return record_id in self._index[kind]
+
+    def list_ids(self, kind: str) -> List[str]:
+        self._check_kind(kind)
+        with self._lock:
+            return list(self._index[kind].keys())
+
+    def iter_records(self, kind: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for record_id in self.list_ids(kind):
+            record = self.get(kind, record_id)
+            if record is not None:
+                yield record_id, record
+
+    def export_all(self) -> Dict[str, Dict[str, Any]]:
+        """Materialize every live record in the monolithic {kind: {id: record}} shape."""
+        return {kind: dict(self.iter_records(kind)) for kind in RECORD_KINDS}
+
+    def replace_all(self, data: Dict[str, Dict[str, Any]]):
+        """Replace the store contents with the given {kind: {id: record}} mapping."""
+        with self._lock:
+            for kind in RECORD_KINDS:
+                for record_id in self.list_ids(kind):
+                    if record_id not in data.get(kind, {}):
+                        self.delete(kind, record_id)
+                self.put_many(kind, data.get(kind, {}))
+            self.compact()
+
+    # Compaction
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "generation": self._generation,
+                "records": {kind: len(bucket) for kind, bucket in self._index.items()},
+                "live_bytes": self._live_bytes,
+                "total_bytes": self._total_bytes,
+            }
+
+    def _maybe_compact(self):
+        dead_bytes = self._total_bytes - self._live_bytes
+        if self._total_bytes >= self.compaction_min_bytes and dead_bytes > self._total_bytes * self.compaction_ratio:
+            self.compact()
+
+    def compact(self, new_key: Optional[bytes] = None):
+        """
+        Rewrite live frames into a new log generation and drop the old one.
+
+        With new_key, every live frame is decrypted and resealed under that
+        key (key rotation) instead of being copied verbatim. The new
+        generation only replaces the old one once it is fully written and
+        fsynced, so a crash leaves either the old or the new log intact.
+        """
+        with self._lock:
+            old_path = self._log_path(self._generation)
+            tmp_path = self.directory / "compact.tmp"
+            new_aesgcm = AESGCM(new_key) if new_key is not None else None
+            new_index: Dict[str, Dict[str, Tuple[int, int]]] = {kind: {} for kind in RECORD_KINDS}
+            offset = 0
+            with open(old_path, "rb") as src, open(tmp_path, "wb") as dst:
+                for kind, bucket in self._index.items():
+                    # Copy frames in file order so compaction reads sequentially
+                    for record_id, (frame_offset, size) in sorted(bucket.items(), key=lambda item: item[1][0]):
+                        src.seek(frame_offset)
+                        frame = src.read(size)
+                        if new_aesgcm is not None:
+                            payload = self._open_frame(frame[FRAME_HEADER.size:])
+                            nonce = secrets.token_bytes(NONCE_SIZE)
+                            body = nonce + new_aesgcm.encrypt(nonce, payload, SEGMENT_AAD)
+                            frame = FRAME_HEADER.pack(len(body)) + body
+                        dst.write(frame)
+                        new_index[kind][record_id] = (offset, len(frame))
+                        offset += len(frame)
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            new_generation = self._generation + 1
+            new_path = self._log_path(new_generation)
+            os.replace(tmp_path, new_path)
+            self._fh.close()
+            old_path.unlink(missing_ok=True)
+
+            self._generation = new_generation
+            if new_aesgcm is not None:
+                self._aesgcm = new_aesgcm
+            self._index = new_index
+            self._live_bytes = offset
+            self._total_bytes = offset
+            self._fh = open(new_path, "r+b")
+            self._fh.seek(0, os.SEEK_END)
+
+    def reopen(self, key: Optional[bytes] = None):
+        """Drop the in-memory index and replay the newest log generation, optionally under a new key."""
+        with self._lock:
+            if self._fh:
+                self._fh.close()
+                self._fh = None
+            if key is not None:
+                self._aesgcm = AESGCM(key)
+            self._index = {kind: {} for kind in RECORD_KINDS}
+            self._live_bytes = 0
+            self._total_bytes = 0
+            self._open_log()
+
+    def close(self):
+        with self._lock:
+            if self._fh:
+                self._fh.close()
+                self._fh = None
+        with _open_stores_lock:
+            stores = _open_stores.get(self.directory.resolve())
+            if stores is not None:
+                stores.discard(self)
+
+
+def segment_directory_for(storage_path: Path) -> Path:
+    """Return the segment directory that sits alongside a monolithic vault file."""
+    storage_path = Path(storage_path)
+    return storage_path.with_name(storage_path.name + ".segments")
+
+
+def rekey_segment_directory(directory: Path, old_key: bytes, new_key: bytes) -> Dict[str, int]:
+    """
+    Re-encrypt a segment directory under a new key; returns live record counts.
+
+    Used by key rotation. Stores already open on the directory in this
+    process are rotated in place: the first one reseals the log and the rest
+    replay the new generation under new_key. Otherwise a temporary store is
+    opened, which fails without touching the log if any frame does not
+    authenticate under old_key.
+    """
+    with _open_stores_lock:
+        live = list(_open_stores.get(Path(directory).resolve(), ()))
+    if not live:
+        store = SegmentedVaultStore(directory, old_key)
+        try:
+            store.compact(new_key=new_key)
+            return store.stats()["records"]
+        finally:
+            store.close()
+
+    primary = live[0]
+    primary.compact(new_key=new_key)
+    for store in live[1:]:
+        store.reopen(new_key)
+    return primary.stats()["records"]
+
+
+def migrate_monolithic_vault(storage_path: Path, key: bytes, store: Optional[SegmentedVaultStore] = None,
+                             keep_original: bool = True) -> Dict[str, int]:
+    """
+    One-shot migration from the monolithic encrypted vault file into segments.
+
+    The original file is renamed to ``<name>.migrated`` (or removed when
+    ``keep_original`` is False) once every record has been written, so
+    running the migrator twice is a no-op.
+    """
+    storage_path = Path(storage_path)
+    if not storage_path.exists():
+        return {kind: 0 for kind in RECORD_KINDS}
+
+    with open(storage_path, "rb") as f:
+        enc = f.read()
+    aesgcm = AESGCM(key)
+    try:
+        data = json.loads(aesgcm.decrypt(enc[:NONCE_SIZE], enc[NONCE_SIZE:], None).decode())
+    except Exception as e:
+        raise SegmentedStoreError(f"Failed to decrypt monolithic vault {storage_path}: {e}")
+
+    owns_store = store is None
+    if owns_store:
+        store = SegmentedVaultStore(segment_directory_for(storage_path), key)
+    try:
+        counts = {}
+        for kind in RECORD_KINDS:
+            records = data.get(kind, {})
+            store.put_many(kind, records)
+            counts[kind] = len(records)
+    finally:
+        if owns_store:
+            store.close()
+
+    if keep_original:
+        os.replace(storage_path, storage_path.with_name(storage_path.name + ".migrated"))
+    else:
+        storage_path.unlink()
+    return counts
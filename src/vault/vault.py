@@ -12,6 +12,7 @@ import base64
 import secrets
 
 from .schema import PersonaMemory, CommunalMemory, AuditLogEntry
+from .segmented_store import SegmentedVaultStore, segment_directory_for, migrate_monolithic_vault
 
 class VaultError(Exception):
     pass
@@ -33,7 +34,8 @@ class VaultManager:
                 "key_file": "hearthlink_data/vault_key.key"
             },
             "storage": {
-                "file_path": "hearthlink_data/vault_storage"
+                "file_path": "hearthlink_data/vault_storage",
+                "engine": "monolithic"
             },
             "schema_version": "1.0.0",
             "backup_enabled": True,
@@ -90,7 +92,7 @@ class VaultManager:
         return {
             "initialized": self._is_initialized,
             "healthy": self._is_healthy,
-            "storage_exists": self.vault and Path(self.config["storage"]["file_path"]).exists(),
+            "storage_exists": bool(self.vault) and (self.vault.storage_path.exists() or self.vault.segments is not None),
             "key_available": self.vault and hasattr(self.vault, 'key') and self.vault.key is not None,
             "last_check": datetime.now().isoformat()
         }
@@ -187,13 +189,12 @@ class VaultManager:
             return []
             
         try:
-            all_data = self.vault._load_all()
-            communal_memories = all_data.get("communal", {})
+            memory_ids = self.vault.list_record_ids("communal")
             
             if prefix:
-                return [path for path in communal_memories.keys() if path.startswith(prefix)]
+                return [path for path in memory_ids if path.startswith(prefix)]
             else:
-                return list(communal_memories.keys())
+                return memory_ids
                 
         except Exception as e:
             self.logger.error(f"VaultManager list_memories failed: {e}")
@@ -216,6 +217,7 @@ class Vault:
     def __init__(self, config: Dict[str, Any], logger=None):
         self.config = config
         self.logger = logger
+        self.segments: Optional[SegmentedVaultStore] = None
         self._load_key()
         self._init_storage()
         self.audit_log: List[AuditLogEntry] = []
@@ -269,6 +271,10 @@ class Vault:
         # Ensure parent directory exists
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
         
+        if self.config["storage"].get("engine", "monolithic") == "segmented":
+            self._init_segmented_storage()
+            return
+        
         # Initialize storage file if it doesn't exist
         if not self.storage_path.exists():
             try:
@@ -303,6 +309,24 @@ class Vault:
                 with open(self.storage_path, "wb") as f:
                     f.write(encrypted_data)
 
+    def _init_segmented_storage(self):
+        """Open the append-only segment store, migrating a monolithic file on first use."""
+        storage_cfg = self.config["storage"]
+        try:
+            self.segments = SegmentedVaultStore(
+                segment_directory_for(self.storage_path),
+                self.key,
+                fsync=storage_cfg.get("fsync", True),
+                compaction_ratio=storage_cfg.get("compaction_ratio", 0.5),
+                compaction_min_bytes=storage_cfg.get("compaction_min_bytes", 1024 * 1024)
+            )
+            if self.storage_path.exists():
+                counts = migrate_monolithic_vault(self.storage_path, self.key, store=self.segments)
+                if self.logger:
+                    self.logger.info(f"Migrated monolithic vault {self.storage_path} to segments: {counts}")
+        except Exception as e:
+            raise VaultError(f"Failed to initialize segmented storage: {e}")
+
     def _encrypt(self, data: bytes) -> bytes:
         aesgcm = AESGCM(self.key)
         nonce = secrets.token_bytes(12)
@@ -334,13 +358,39 @@ class Vault:
             self._log("save_all", "system", None, "system", None, {}, result="failure", error=e)
             raise VaultError(f"Failed to save Vault storage: {e}")
 
+    # Record-level access shared by both storage engines
+    def _get_record(self, kind: str, record_id: str) -> Optional[Dict[str, Any]]:
+        if self.segments is not None:
+            return self.segments.get(kind, record_id)
+        return self._load_all()[kind].get(record_id)
+
+    def _put_record(self, kind: str, record_id: str, record: Dict[str, Any]):
+        if self.segments is not None:
+            self.segments.put(kind, record_id, record)
+            return
+        all_data = self._load_all()
+        all_data[kind][record_id] = record
+        self._save_all(all_data)
+
+    def _delete_record(self, kind: str, record_id: str):
+        if self.segments is not None:
+            self.segments.delete(kind, record_id)
+            return
+        all_data = self._load_all()
+        all_data[kind].pop(record_id, None)
+        self._save_all(all_data)
+
+    def list_record_ids(self, kind: str) -> List[str]:
+        if self.segments is not None:
+            return self.segments.list_ids(kind)
+        return list(self._load_all()[kind].keys())
+
     # Persona memory CRUD
     def create_or_update_persona(self, persona_id: str, user_id: str, memory_data: Dict[str, Any]):
         try:
-            all_data = self._load_all()
-            persona_memories = all_data["persona"]
-            if persona_id not in persona_memories:
-                persona_memories[persona_id] = PersonaMemory(
+            mem = self._get_record("persona", persona_id)
+            if mem is None:
+                mem = PersonaMemory(
                     persona_id=persona_id,
                     user_id=user_id,
                     data=memory_data,
@@ -350,9 +400,9 @@ class Vault:
                     audit_log=[]
                 ).__dict__
             else:
-                persona_memories[persona_id]["data"] = memory_data
-                persona_memories[persona_id]["updated_at"] = datetime.now().isoformat()
-            self._save_all(all_data)
+                mem["data"] = memory_data
+                mem["updated_at"] = datetime.now().isoformat()
+            self._put_record("persona", persona_id, mem)
             self._log("create_or_update_persona", user_id, persona_id, "persona", None, {"memory_data": memory_data})
         except Exception as e:
             self._log("create_or_update_persona", user_id, persona_id, "persona", None, {"memory_data": memory_data}, result="failure", error=e)
@@ -360,9 +410,7 @@ class Vault:
 
     def get_persona(self, persona_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         try:
-            all_data = self._load_all()
-            persona_memories = all_data["persona"]
-            mem = persona_memories.get(persona_id)
+            mem = self._get_record("persona", persona_id)
             if mem and mem["user_id"] == user_id:
                 self._log("get_persona", user_id, persona_id, "persona", None, {})
                 return mem
@@ -374,12 +422,9 @@ class Vault:
 
     def delete_persona(self, persona_id: str, user_id: str):
         try:
-            all_data = self._load_all()
-            persona_memories = all_data["persona"]
-            mem = persona_memories.get(persona_id)
+            mem = self._get_record("persona", persona_id)
             if mem and mem["user_id"] == user_id:
-                del persona_memories[persona_id]
-                self._save_all(all_data)
+                self._delete_record("persona", persona_id)
                 self._log("delete_persona", user_id, persona_id, "persona", None, {})
             else:
                 self._log("delete_persona_denied", user_id, persona_id, "persona", None, {}, result="denied")
@@ -390,17 +435,14 @@ class Vault:
     # Communal memory CRUD
     def create_or_update_communal(self, memory_id: str, memory_data: Dict[str, Any], user_id: str):
         try:
-            all_data = self._load_all()
-            communal_memories = all_data["communal"]
-            communal_memories[memory_id] = CommunalMemory(
+            self._put_record("communal", memory_id, CommunalMemory(
                 memory_id=memory_id,
                 data=memory_data,
                 created_at=datetime.now().isoformat(),
                 updated_at=datetime.now().isoformat(),
                 schema_version=self.config["schema_version"],
                 audit_log=[]
-            ).__dict__
-            self._save_all(all_data)
+            ).__dict__)
             self._log("create_or_update_communal", user_id, None, "communal", memory_id, {"memory_data": memory_data})
         except Exception as e:
             self._log("create_or_update_communal", user_id, None, "communal", memory_id, {"memory_data": memory_data}, result="failure", error=e)
@@ -408,9 +450,7 @@ class Vault:
 
     def get_communal(self, memory_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         try:
-            all_data = self._load_all()
-            communal_memories = all_data["communal"]
-            mem = communal_memories.get(memory_id)
+            mem = self._get_record("communal", memory_id)
             self._log("get_communal", user_id, None, "communal", memory_id, {})
             return mem
         except Exception as e:
@@ -419,11 +459,8 @@ class Vault:
 
     def delete_communal(self, memory_id: str, user_id: str):
         try:
-            all_data = self._load_all()
-            communal_memories = all_data["communal"]
-            if memory_id in communal_memories:
-                del communal_memories[memory_id]
-                self._save_all(all_data)
+            if self._get_record("communal", memory_id) is not None:
+                self._delete_record("communal", memory_id)
                 self._log("delete_communal", user_id, None, "communal", memory_id, {})
             else:
                 self._log("delete_communal_denied", user_id, None, "communal", memory_id, {}, result="denied")
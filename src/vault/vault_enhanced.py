@@ -13,6 +13,7 @@ import threading
 from dataclasses import asdict
 
 from .schema import PersonaMemory, CommunalMemory, AuditLogEntry
+from .segmented_store import SegmentedVaultStore, segment_directory_for, migrate_monolithic_vault
 
 class VaultError(Exception):
     pass
@@ -27,12 +28,13 @@ class VaultEnhanced:
     def __init__(self, config: Dict[str, Any], logger=None):
         self.config = config
         self.logger = logger
-        self._load_key()
-        self._init_storage()
+        self.segments: Optional[SegmentedVaultStore] = None
         self.audit_log: List[AuditLogEntry] = []
         self._lock = threading.RLock()
         self._cache = {}
         self._cache_ttl = 300  # 5 minutes
+        self._load_key()
+        self._init_storage()
 
     def _log(self, action: str, user_id: str, persona_id: Optional[str], memory_type: str, key: Optional[str], details: Dict[str, Any], result: str = "success", error: Optional[Exception] = None):
         entry = AuditLogEntry(
@@ -76,9 +78,29 @@ class VaultEnhanced:
         storage_path = self.config["storage"]["file_path"]
         self.storage_path = Path(storage_path)
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
-        if not self.storage_path.exists():
+        if self.config["storage"].get("engine", "monolithic") == "segmented":
+            self._init_segmented_storage()
+        elif not self.storage_path.exists():
             self._create_initial_storage()
 
+    def _init_segmented_storage(self):
+        """Open the append-only segment store, migrating a monolithic file on first use."""
+        storage_cfg = self.config["storage"]
+        try:
+            self.segments = SegmentedVaultStore(
+                segment_directory_for(self.storage_path),
+                self.key,
+                fsync=storage_cfg.get("fsync", True),
+                compaction_ratio=storage_cfg.get("compaction_ratio", 0.5),
+                compaction_min_bytes=storage_cfg.get("compaction_min_bytes", 1024 * 1024)
+            )
+            if self.storage_path.exists():
+                counts = migrate_monolithic_vault(self.storage_path, self.key, store=self.segments)
+                if self.logger:
+                    self.logger.info(f"Migrated monolithic vault {self.storage_path} to segments: {counts}")
+        except Exception as e:
+            raise VaultError(f"Failed to initialize segmented storage: {e}")
+
     def _create_initial_storage(self):
         initial_data = {
             "persona": {},
@@ -156,8 +178,8 @@ class VaultEnhanced:
                 data_copy["metadata"]["updated_at"] = datetime.now().isoformat()
                 
                 # Create backup before writing
+                backup_path = self.storage_path.with_suffix('.backup')
                 if self.storage_path.exists():
-                    backup_path = self.storage_path.with_suffix('.backup')
                     self.storage_path.rename(backup_path)
                 
                 # Write new data
@@ -186,6 +208,46 @@ class VaultEnhanced:
                 self._log("save_all", "system", None, "system", None, {}, result="failure", error=e)
                 raise VaultError(f"Failed to save Vault storage: {e}")
 
+    # Record-level access shared by both storage engines. Segments are
+    # authenticated per record by their GCM tag, so no whole-vault checksum.
+    def _get_record(self, kind: str, record_id: str) -> Optional[Dict[str, Any]]:
+        if self.segments is not None:
+            return self.segments.get(kind, record_id)
+        return self._load_all_atomic()[kind].get(record_id)
+
+    def _put_record(self, kind: str, record_id: str, record: Dict[str, Any]):
+        with self._lock:
+            if self.segments is not None:
+                self.segments.put(kind, record_id, record)
+            else:
+                all_data = self._load_all_atomic()
+                all_data[kind][record_id] = record
+                self._save_all_atomic(all_data)
+            self._cache.clear()
+
+    def _delete_record(self, kind: str, record_id: str):
+        with self._lock:
+            if self.segments is not None:
+                self.segments.delete(kind, record_id)
+            else:
+                all_data = self._load_all_atomic()
+                all_data[kind].pop(record_id, None)
+                self._save_all_atomic(all_data)
+            self._cache.clear()
+
+    def list_record_ids(self, kind: str) -> List[str]:
+        if self.segments is not None:
+            return self.segments.list_ids(kind)
+        return list(self._load_all_atomic()[kind].keys())
+
+    def _export_records(self) -> Dict[str, Any]:
+        """Materialize the full vault in the monolithic layout."""
+        if self.segments is not None:
+            data = self.segments.export_all()
+            data["metadata"] = {"schema_version": self.config["schema_version"], "engine": "segmented"}
+            return data
+        return self._load_all_atomic()
+
     def _get_cached(self, key: str) -> Optional[Dict[str, Any]]:
         """Get data from cache if available and not expired."""
         if key in self._cache:
@@ -203,10 +265,9 @@ class VaultEnhanced:
     # Enhanced Persona memory CRUD
     def create_or_update_persona(self, persona_id: str, user_id: str, memory_data: Dict[str, Any]):
         try:
-            all_data = self._load_all_atomic()
-            persona_memories = all_data["persona"]
+            mem = self._get_record("persona", persona_id)
             
-            if persona_id not in persona_memories:
+            if mem is None:
                 persona_mem = PersonaMemory(
                     persona_id=persona_id,
                     user_id=user_id,
@@ -216,16 +277,16 @@ class VaultEnhanced:
                     schema_version=self.config["schema_version"],
                     audit_log=[]
                 )
-                persona_memories[persona_id] = asdict(persona_mem)
+                mem = asdict(persona_mem)
             else:
                 # Validate existing data
-                if not self._validate_schema(persona_memories[persona_id], "persona"):
+                if not self._validate_schema(mem, "persona"):
                     raise VaultValidationError(f"Invalid schema for persona {persona_id}")
                 
-                persona_memories[persona_id]["data"] = memory_data
-                persona_memories[persona_id]["updated_at"] = datetime.now().isoformat()
+                mem["data"] = memory_data
+                mem["updated_at"] = datetime.now().isoformat()
             
-            self._save_all_atomic(all_data)
+            self._put_record("persona", persona_id, mem)
             self._log("create_or_update_persona", user_id, persona_id, "persona", None, {"memory_data": memory_data})
         except Exception as e:
             self._log("create_or_update_persona", user_id, persona_id, "persona", None, {"memory_data": memory_data}, result="failure", error=e)
@@ -239,9 +300,7 @@ class VaultEnhanced:
             if cached:
                 return cached
             
-            all_data = self._load_all_atomic()
-            persona_memories = all_data["persona"]
-            mem = persona_memories.get(persona_id)
+            mem = self._get_record("persona", persona_id)
             
             if mem and mem["user_id"] == user_id:
                 if not self._validate_schema(mem, "persona"):
@@ -259,18 +318,10 @@ class VaultEnhanced:
 
     def delete_persona(self, persona_id: str, user_id: str):
         try:
-            all_data = self._load_all_atomic()
-            persona_memories = all_data["persona"]
-            mem = persona_memories.get(persona_id)
+            mem = self._get_record("persona", persona_id)
             
             if mem and mem["user_id"] == user_id:
-                del persona_memories[persona_id]
-                self._save_all_atomic(all_data)
-                
-                # Clear cache
-                cache_key = f"persona:{persona_id}:{user_id}"
-                if cache_key in self._cache:
-                    del self._cache[cache_key]
+                self._delete_record("persona", persona_id)
                 
                 self._log("delete_persona", user_id, persona_id, "persona", None, {})
             else:
@@ -348,7 +399,7 @@ class VaultEnhanced:
         """Verify data integrity and return status with any issues found."""
         issues = []
         try:
-            data = self._load_all_atomic()
+            data = self._export_records()
             
             # Check persona data integrity
             for persona_id, persona_data in data.get("persona", {}).items():
@@ -368,7 +419,7 @@ class VaultEnhanced:
     def create_backup(self, backup_path: str) -> bool:
         """Create a backup of the current vault data."""
         try:
-            data = self._load_all_atomic()
+            data = self._export_records()
             backup_data = {
                 "backup_created_at": datetime.now().isoformat(),
                 "original_checksum": data.get("metadata", {}).get("checksum"),
@@ -391,7 +442,11 @@ class VaultEnhanced:
                 backup_data = json.load(f)
             
             data = backup_data["data"]
-            self._save_all_atomic(data)
+            if self.segments is not None:
+                self.segments.replace_all(data)
+                self._cache.clear()
+            else:
+                self._save_all_atomic(data)
             
             self._log("restore_backup", "system", None, "system", None, {"backup_path": backup_path})
             return True
@@ -0,0 +1,240 @@
+"""
+In-memory vector index for RAG/CAG memory retrieval
+
+Holds the embeddings of one (persona, user) scope as a contiguous float32
+matrix of L2-normalized rows so cosine similarity against every stored slice
+is a single matrix-vector product, with top-k selected by argpartition.
+Large scopes can optionally be partitioned IVF-style: rows are bucketed under
+k-means centroids and a query only scans the closest few buckets.
+"""
+
+import threading
+from typing import Dict, Any, Optional, List, Tuple, Iterable, Callable
+
+import numpy as np
+
+
+def normalize_vector(vector) -> np.ndarray:
+    """Return a float32 unit vector (zero vectors are returned unchanged)."""
+    vec = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0 else vec
+
+
+class EmbeddingIndex:
+    """Exact (flat) cosine index with an optional IVF partition for large scopes."""
+
+    def __init__(self, dimension: Optional[int] = None, ivf_min_size: Optional[int] = None,
+                 ivf_probe: int = 8, initial_capacity: int = 256):
+        self.dimension = dimension
+        self.ivf_min_size = ivf_min_size
+        self.ivf_probe = ivf_probe
+        self._lock = threading.RLock()
+        self._capacity = initial_capacity
+        self._matrix: Optional[np.ndarray] = None
+        self._type_codes = np.zeros(initial_capacity, dtype=np.int32)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._type_lookup: Dict[str, int] = {}
+
+        # IVF state
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(initial_capacity, dtype=np.int32)
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, slice_id: str) -> bool:
+        return slice_id in self._rows
+
+    # Storage management
+    def _ensure_capacity(self, needed: int):
+        if self._matrix is None:
+            self._matrix = np.zeros((self._capacity, self.dimension), dtype=np.float32)
+        if needed <= self._capacity:
+            return
+        new_capacity = max(needed, self._capacity * 2)
+        matrix = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+        self._matrix = matrix
+        self._type_codes = np.resize(self._type_codes, new_capacity)
+        self._assignments = np.resize(self._assignments, new_capacity)
+        self._capacity = new_capacity
+
+    def _type_code(self, memory_type: str) -> int:
+        if memory_type not in self._type_lookup:
+            self._type_lookup[memory_type] = len(self._type_lookup)
+        return self._type_lookup[memory_type]
+
+    def add(self, slice_id: str, vector, memory_type: str = "episodic"):
+        """Insert or replace a slice embedding."""
+        vec = normalize_vector(vector)
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vec.shape[0]
+            if vec.shape[0] != self.dimension:
+                raise ValueError(f"Embedding dimension {vec.shape[0]} does not match index dimension {self.dimension}")
+
+            row = self._rows.get(slice_id)
+            if row is None:
+                row = len(self._ids)
+                self._ensure_capacity(row + 1)
+                self._ids.append(slice_id)
+                self._rows[slice_id] = row
+            self._matrix[row] = vec
+            self._type_codes[row] = self._type_code(memory_type)
+            if self._centroids is not None:
+                self._assignments[row] = int(np.argmax(self._centroids @ vec))
+            self._maybe_train()
+
+    def add_many(self, entries: Iterable[Tuple[str, Any, str]]):
+        for slice_id, vector, memory_type in entries:
+            self.add(slice_id, vector, memory_type)
+
+    def remove(self, slice_id: str) -> bool:
+        """Remove a slice by moving the last row into its place."""
+        with self._lock:
+            row = self._rows.pop(slice_id, None)
+            if row is None:
+                return False
+            last = len(self._ids) - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._type_codes[row] = self._type_codes[last]
+                self._assignments[row] = self._assignments[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._ids.pop()
+            return True
+
+    def vector(self, slice_id: str) -> Optional[np.ndarray]:
+        row = self._rows.get(slice_id)
+        return None if row is None else self._matrix[row].copy()
+
+    # IVF partitioning
+    def _maybe_train(self):
+        size = len(self._ids)
+        if not self.ivf_min_size or size < self.ivf_min_size:
+            return
+        if self._centroids is None or size >= 2 * self._trained_size:
+            self._train(size)
+
+    def _train(self, size: int, iterations: int = 8):
+        """Fit k-means centroids (spherical, on normalized rows) and assign every row."""
+        data = self._matrix[:size]
+        n_lists = max(1, int(np.sqrt(size)))
+        rng = np.random.default_rng(0)
+        sample = data[rng.choice(size, size=min(size, n_lists * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = normalize_vector(members.sum(axis=0))
+        self._centroids = centroids
+        self._assignments[:size] = np.argmax(data @ centroids.T, axis=1)
+        self._trained_size = size
+
+    # Query
+    def search(self, query, k: int, min_similarity: float = -1.0,
+               memory_types: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """Return up to k (slice_id, cosine similarity) pairs, best first."""
+        q = normalize_vector(query)
+        with self._lock:
+            size = len(self._ids)
+            if size == 0 or k <= 0 or q.shape[0] != self.dimension:
+                return []
+
+            candidates = None
+            if self._centroids is not None:
+                n_probe = min(self.ivf_probe, len(self._centroids))
+                probe = np.argpartition(-(self._centroids @ q), n_probe - 1)[:n_probe]
+                candidates = np.flatnonzero(np.isin(self._assignments[:size], probe))
+            if memory_types is not None:
+                codes = [self._type_lookup[t] for t in memory_types if t in self._type_lookup]
+                type_rows = np.flatnonzero(np.isin(self._type_codes[:size], codes))
+                candidates = type_rows if candidates is None else np.intersect1d(candidates, type_rows)
+
+            if candidates is None:
+                scores = self._matrix[:size] @ q
+                rows = None
+            else:
+                if len(candidates) == 0:
+                    return []
+                scores = self._matrix[candidates] @ q
+                rows = candidates
+
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            results = []
+            for i in top:
+                score = float(scores[i])
+                if score < min_similarity:
+                    break
+                row = int(i) if rows is None else int(rows[i])
+                results.append((self._ids[row], score))
+            return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._ids),
+            "dimension": self.dimension,
+            "ivf_lists": 0 if self._centroids is None else len(self._centroids),
+        }
+
+
+class VectorIndexRegistry:
+    """Lazily built per-(persona, user) EmbeddingIndex instances."""
+
+    def __init__(self, loader: Callable[[str, str], Iterable[Tuple[str, Any, str]]],
+                 dimension: Optional[int] = None, ivf_min_size: Optional[int] = None, ivf_probe: int = 8):
+        self._loader = loader
+        self._dimension = dimension
+        self._ivf_min_size = ivf_min_size
+        self._ivf_probe = ivf_probe
+        self._indexes: Dict[Tuple[str, str], EmbeddingIndex] = {}
+        self._lock = threading.RLock()
+
+    def get(self, persona_id: str, user_id: str) -> EmbeddingIndex:
+        key = (persona_id, user_id)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = EmbeddingIndex(self._dimension, self._ivf_min_size, self._ivf_probe)
+                index.add_many(self._loader(persona_id, user_id))
+                self._indexes[key] = index
+            return index
+
+    def loaded_dimension(self, persona_id: str, user_id: str) -> Optional[int]:
+        """Dimension of the scope's index if it is loaded and non-empty, else None."""
+        with self._lock:
+            index = self._indexes.get((persona_id, user_id))
+        return index.dimension if index is not None else None
+
+    def add(self, persona_id: str, user_id: str, slice_id: str, vector, memory_type: str):
+        """Apply an insert to an already-loaded index; unloaded scopes pick it up on first use."""
+        with self._lock:
+            index = self._indexes.get((persona_id, user_id))
+        if index is not None:
+            index.add(slice_id, vector, memory_type)
+
+    def remove(self, persona_id: str, user_id: str, slice_id: str):
+        with self._lock:
+            index = self._indexes.get((persona_id, user_id))
+        if index is not None:
+            index.remove(slice_id)
+
+    def invalidate(self, persona_id: Optional[str] = None, user_id: Optional[str] = None):
+        with self._lock:
+            if persona_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop((persona_id, user_id), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {f"{p}:{u}": index.stats() for (p, u), index in self._indexes.items()}
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Embedding Storage Benchmark
+Compares SQLite file size and full-scan decode throughput for JSON-text
+embeddings against float32 and int8-quantized BLOBs.
+"""
+
+import json
+import sqlite3
+import time
+import argparse
+import tempfile
+import sys
+from pathlib import Path
+from typing import Dict, Any
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+from vault.embedding_codec import encode_embedding, decode_embedding
+
+
+def build_db(path: Path, vectors: np.ndarray, encoding: str):
+    with sqlite3.connect(str(path)) as conn:
+        conn.execute("CREATE TABLE memory_vectors (slice_id TEXT PRIMARY KEY, embedding_vector BLOB, embedding_format TEXT)")
+        rows = []
+        for i, vec in enumerate(vectors):
+            if encoding == "json":
+                rows.append((f"slice_{i}", json.dumps(vec.tolist()), None))
+            else:
+                blob, fmt = encode_embedding(vec, encoding)
+                rows.append((f"slice_{i}", blob, fmt))
+        conn.executemany("INSERT INTO memory_vectors VALUES (?, ?, ?)", rows)
+        conn.commit()
+        conn.execute("VACUUM")
+
+
+def scan(path: Path) -> float:
+    start = time.perf_counter()
+    with sqlite3.connect(str(path)) as conn:
+        for _, embedding, fmt in conn.execute("SELECT slice_id, embedding_vector, embedding_format FROM memory_vectors"):
+            decode_embedding(embedding, fmt)
+    return time.perf_counter() - start
+
+
+def run(rows: int, dimension: int) -> Dict[str, Any]:
+    vectors = np.random.default_rng(0).normal(size=(rows, dimension)).astype(np.float32)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for encoding in ("json", "float32", "int8"):
+            path = Path(tmp) / f"{encoding}.db"
+            build_db(path, vectors, encoding)
+            elapsed = scan(path)
+            results[encoding] = {
+                "file_size_mb": path.stat().st_size / (1024 * 1024),
+                "scan_seconds": elapsed,
+                "rows_per_second": rows / elapsed,
+            }
+            print(f"  {encoding:<8} {results[encoding]['file_size_mb']:8.1f} MB   "
+                  f"{results[encoding]['rows_per_second']:12.0f} rows/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding storage format benchmark")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--output", default="embedding_storage_benchmark_results.json")
+    args = parser.parse_args()
+
+    print(f"🧮 Embedding storage benchmark ({args.rows} rows x {args.dimension} dims)")
+    results = run(args.rows, args.dimension)
+
+    json_result = results["json"]
+    for encoding in ("float32", "int8"):
+        print(f"\n📊 {encoding}: {json_result['file_size_mb'] / results[encoding]['file_size_mb']:.1f}x smaller, "
+              f"{results[encoding]['rows_per_second'] / json_result['rows_per_second']:.1f}x faster scan")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
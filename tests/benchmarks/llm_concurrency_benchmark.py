@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Local LLM Concurrency Benchmark
+Measures generation throughput against a stub Ollama server with fixed
+per-generation latency: the blocking LocalLLMClient called from an event
+loop (requests serialize) versus AsyncLocalLLMClient at increasing
+concurrency limits.
+"""
+
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+from main import HearthlinkLogger
+from llm.local_llm_client import LocalLLMClient, LLMConfig, LLMRequest
+from llm.async_llm_client import AsyncLocalLLMClient, close_connection_pools
+
+
+def start_stub_server(latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, data):
+            body = json.dumps(data).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._reply({"models": [{"name": "stub"}]})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(latency)
+            self._reply({"response": "ok", "done": True, "prompt_eval_count": 1, "eval_count": 1})
+
+    class Server(ThreadingHTTPServer):
+        # Room for every connection a wide concurrency limit opens at once
+        request_queue_size = 128
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_blocking(client: LocalLLMClient, requests: int) -> float:
+    async def call():
+        # A blocking generate() inside a coroutine stalls the whole loop
+        return client.generate(LLMRequest(prompt="hi"))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    return time.perf_counter() - started
+
+
+async def run_async(client: AsyncLocalLLMClient, requests: int) -> float:
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(client.generate(LLMRequest(prompt="hi")) for _ in range(requests)))
+    finally:
+        await close_connection_pools()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local LLM concurrency benchmark")
+    parser.add_argument("--requests", type=int, default=32, help="Generations per run")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub generation latency (s)")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated async concurrency limits")
+    parser.add_argument("--output", default="llm_concurrency_benchmark_results.json")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    logger = HearthlinkLogger(log_dir=tempfile.mkdtemp())
+    results: Dict[str, Any] = {}
+
+    print(f"🧠 LLM concurrency benchmark ({args.requests} generations, {args.latency * 1000:.0f}ms each)")
+
+    sync_client = LocalLLMClient(LLMConfig(engine="ollama", base_url=base_url, model="stub"), logger)
+    elapsed = asyncio.run(run_blocking(sync_client, args.requests))
+    results["blocking"] = {"elapsed_s": elapsed, "requests_per_sec": args.requests / elapsed}
+    print(f"  blocking     {args.requests / elapsed:>8.1f} req/s  ({elapsed:.2f}s)")
+
+    for limit in (int(c) for c in args.concurrency.split(",")):
+        config = LLMConfig(engine="ollama", base_url=base_url, model=f"stub-{limit}", max_concurrency=limit)
+        elapsed = asyncio.run(run_async(AsyncLocalLLMClient(config, logger), args.requests))
+        results[f"async_{limit}"] = {"elapsed_s": elapsed, "requests_per_sec": args.requests / elapsed}
+        print(f"  async x{limit:<5} {args.requests / elapsed:>8.1f} req/s  ({elapsed:.2f}s)")
+
+    server.shutdown()
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Memory Search Benchmark
+Compares DatabaseManager.search_memories over the LIKE scan path and the
+FTS5 index on a large memory_slices table.
+"""
+
+import json
+import time
+import itertools
+import random
+import argparse
+import tempfile
+import statistics
+import sys
+from pathlib import Path
+from typing import Dict, Any, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+from database.database_manager import DatabaseManager, DatabaseConfig, DatabaseSchema
+
+# Zipf-distributed vocabulary so term selectivity resembles natural text
+VOCABULARY = [f"term{i}" for i in range(20000)]
+CUM_WEIGHTS = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+# One very common term (worst case for ranking every match) plus typical ones
+QUERIES = ["term2", "term150", "term400 term90", "term2500", "term7000"]
+
+
+def populate(db: DatabaseManager, rows: int, batch_size: int = 50000) -> Dict[str, str]:
+    """Bulk-load synthetic memories for one user/agent pair."""
+    rng = random.Random(0)
+    user_id = db.create_user("bench_user")
+    agent_id = db.create_agent(user_id, "Alden", "assistant")
+
+    with db.transaction() as conn:
+        for start in range(0, rows, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, rows)):
+                words = rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=12)
+                batch.append((f"mem-{i}", agent_id, user_id, "episodic", " ".join(words), rng.random()))
+            conn.executemany("""
+                INSERT INTO memory_slices (id, agent_id, user_id, slice_type, content, importance)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, batch)
+            conn.commit()
+
+    return {"user_id": user_id, "agent_id": agent_id}
+
+
+def time_queries(db: DatabaseManager, ids: Dict[str, str], repeats: int) -> Dict[str, List[float]]:
+    timings: Dict[str, List[float]] = {}
+    for _ in range(repeats):
+        for query in QUERIES:
+            start = time.perf_counter()
+            db.search_memories(ids["agent_id"], ids["user_id"], query, limit=10)
+            timings.setdefault(query, []).append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings: Dict[str, List[float]]) -> Dict[str, Any]:
+    everything = sorted(t for per_query in timings.values() for t in per_query)
+    return {
+        "mean_ms": statistics.mean(everything),
+        "p50_ms": everything[len(everything) // 2],
+        "per_query_ms": {query: statistics.median(values) for query, values in timings.items()},
+    }
+
+
+def run(rows: int, repeats: int) -> Dict[str, Any]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        config = DatabaseConfig(db_path=str(Path(tmp) / "bench.db"), backup_path=str(Path(tmp) / "backups"))
+        db = DatabaseManager(config)
+
+        # Load rows into a version 1 schema so the migration path is measured too
+        with db.transaction() as conn:
+            for statement in DatabaseSchema.get_schema_version_1():
+                conn.execute(statement)
+        ids = populate(db, rows)
+
+        db._fts_enabled = False
+        results["like"] = summarize(time_queries(db, ids, repeats))
+
+        start = time.perf_counter()
+        db.migrate_to_fts()
+        results["migration_seconds"] = time.perf_counter() - start
+
+        results["fts"] = summarize(time_queries(db, ids, repeats))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory search LIKE vs FTS5 benchmark")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default="memory_search_benchmark_results.json")
+    args = parser.parse_args()
+
+    if not DatabaseManager.fts5_available():
+        print("❌ SQLite was built without FTS5")
+        sys.exit(1)
+
+    print(f"🔎 Memory search benchmark ({args.rows} rows, {args.repeats}x{len(QUERIES)} queries)")
+    results = run(args.rows, args.repeats)
+
+    print(f"  {'query':<16} {'LIKE ms':>10} {'FTS ms':>10}")
+    for query in QUERIES:
+        print(f"  {query:<16} {results['like']['per_query_ms'][query]:10.2f} "
+              f"{results['fts']['per_query_ms'][query]:10.2f}")
+    for path in ("like", "fts"):
+        print(f"  {path:<5} mean {results[path]['mean_ms']:9.2f} ms   p50 {results[path]['p50_ms']:9.2f} ms")
+    print(f"\n🏗️  FTS migration: {results['migration_seconds']:.1f}s")
+    print(f"📊 FTS is {results['like']['mean_ms'] / results['fts']['mean_ms']:.1f}x faster on average")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
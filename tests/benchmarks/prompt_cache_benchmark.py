@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Prompt Prefix Reuse Benchmark
+Replays a long chat session through LocalLLMClient and measures time to
+first token (max_tokens=1) per turn: sending the full history every turn
+versus Ollama session context continuation. Runs against a stub server
+whose prompt processing cost is proportional to the tokens it has to
+evaluate, or against a real Ollama with --base-url.
+"""
+
+import json
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+from main import HearthlinkLogger
+from llm.local_llm_client import LocalLLMClient, LLMConfig, LLMRequest
+
+SYSTEM = "You are Alden, a concise AI companion providing executive function support. " * 4
+
+
+def start_stub_server(ms_per_token: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, data):
+            body = json.dumps(data).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._reply({"models": [{"name": "stub"}]})
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            # Tokens already in the context are served from the KV cache
+            new_tokens = len((payload.get("system", "") + payload["prompt"]).split())
+            time.sleep(new_tokens * ms_per_token / 1000)
+            context = payload.get("context", []) + [0] * (new_tokens + 1)
+            self._reply({"response": "ok", "done": True, "context": context,
+                         "prompt_eval_count": new_tokens, "eval_count": 1,
+                         "prompt_eval_duration": int(new_tokens * ms_per_token * 1e6)})
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_session(client: LocalLLMClient, turns: int, continuation: bool) -> List[float]:
+    """Per-turn latency (ms) of one session whose history grows every turn."""
+    history = ""
+    session_id = f"bench-{continuation}-{time.time()}"
+    timings = []
+    for i in range(turns):
+        message = f"User: this is message number {i} about planning my week and my tasks.\n"
+        request = LLMRequest(prompt=history + message, system_message=SYSTEM, max_tokens=1,
+                             session_id=session_id if continuation else None,
+                             continuation_prompt=message, volatile_context=f"Turn: {i}")
+        started = time.perf_counter()
+        response = client.generate(request)
+        timings.append((time.perf_counter() - started) * 1000)
+        history += message + f"Alden: {response.content}\n"
+    return timings
+
+
+def summarize(timings: List[float]) -> Dict[str, Any]:
+    return {
+        "mean_ms": statistics.mean(timings),
+        "first_ms": timings[0],
+        "last_ms": timings[-1],
+        "p50_ms": statistics.median(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt prefix reuse benchmark")
+    parser.add_argument("--turns", type=int, default=40, help="Turns in the session")
+    parser.add_argument("--ms-per-token", type=float, default=0.5, help="Stub prompt processing cost")
+    parser.add_argument("--base-url", default=None, help="Real Ollama endpoint instead of the stub")
+    parser.add_argument("--model", default="llama3.2:3b")
+    parser.add_argument("--output", default="prompt_cache_benchmark_results.json")
+    args = parser.parse_args()
+
+    server: Optional[ThreadingHTTPServer] = None
+    if args.base_url:
+        base_url, model = args.base_url, args.model
+    else:
+        server = start_stub_server(args.ms_per_token)
+        base_url, model = f"http://127.0.0.1:{server.server_address[1]}", "stub"
+
+    config = LLMConfig(engine="ollama", base_url=base_url, model=model, timeout=300,
+                       keep_alive="30m", session_context_tokens=32768, coalesce_requests=False)
+    client = LocalLLMClient(config, HearthlinkLogger(log_dir=tempfile.mkdtemp()))
+
+    print(f"⏱️  Prompt prefix benchmark ({args.turns} turns against {'stub' if server else base_url})")
+    results: Dict[str, Any] = {}
+    for name, continuation in (("full_prompt", False), ("continuation", True)):
+        results[name] = summarize(run_session(client, args.turns, continuation))
+        print(f"  {name:<13} mean {results[name]['mean_ms']:8.1f} ms   "
+              f"first {results[name]['first_ms']:8.1f} ms   last {results[name]['last_ms']:8.1f} ms")
+    results["prompt_cache"] = client.prompt_sessions.get_stats()
+
+    print(f"\n📊 Last-turn time to first token is "
+          f"{results['full_prompt']['last_ms'] / results['continuation']['last_ms']:.1f}x lower with continuation")
+
+    if server:
+        server.shutdown()
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
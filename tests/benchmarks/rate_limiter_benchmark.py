@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Synapse Rate Limiter Benchmark
+Measures per-check latency of the SecurityManager RateLimiter at a paced
+10k checks/sec and at full speed, for the in-process and shared SQLite
+counter stores, against the previous list-of-timestamps implementation.
+"""
+
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+from synapse.security_manager import RateLimiter, RateLimitConfig, PermissionType
+from synapse.rate_limit_store import LocalRateLimitStore, SQLiteRateLimitStore
+
+
+class ListRateLimiter:
+    """The previous implementation: a list of request timestamps per agent/permission."""
+
+    def __init__(self):
+        self.request_counts = defaultdict(list)
+        self.blocked_agents = {}
+
+    def check_rate_limit(self, agent_id, permission_type, config):
+        current_time = time.time()
+        if agent_id in self.blocked_agents:
+            if current_time - self.blocked_agents[agent_id] < config.cooldown_seconds:
+                return False
+            del self.blocked_agents[agent_id]
+        key = f"{agent_id}_{permission_type.value}"
+        requests = [t for t in self.request_counts[key] if current_time - t < 3600]
+        self.request_counts[key] = requests
+        if len([t for t in requests if current_time - t < 60]) >= config.requests_per_minute:
+            self.blocked_agents[agent_id] = current_time
+            return False
+        if len(requests) >= config.requests_per_hour:
+            self.blocked_agents[agent_id] = current_time
+            return False
+        if len([t for t in requests if current_time - t < 10]) >= config.burst_limit:
+            return False
+        requests.append(current_time)
+        return True
+
+
+def make_limiter(engine: str, workdir: Path):
+    if engine == "list":
+        return ListRateLimiter()
+    if engine == "sqlite":
+        return RateLimiter(SQLiteRateLimitStore(str(workdir / "rate_limits.db")))
+    return RateLimiter(LocalRateLimitStore())
+
+
+def run_checks(limiter, checks: int, agents: int, rate: float) -> Dict[str, Any]:
+    # Generous limits so every check does the full amount of work
+    config = RateLimitConfig(requests_per_minute=10**9, requests_per_hour=10**9, burst_limit=10**9)
+    interval = 1.0 / rate if rate else 0.0
+    latencies = []
+    started = time.perf_counter()
+    for n in range(checks):
+        if interval:
+            target = started + n * interval
+            while time.perf_counter() < target:
+                pass
+        t0 = time.perf_counter()
+        limiter.check_rate_limit(f"agent-{n % agents}", PermissionType.API_EXTERNAL, config)
+        latencies.append((time.perf_counter() - t0) * 1e6)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "checks": checks,
+        "achieved_per_sec": checks / elapsed,
+        "mean_us": statistics.mean(latencies),
+        "p50_us": latencies[len(latencies) // 2],
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synapse rate limiter benchmark")
+    parser.add_argument("--engines", default="list,local,sqlite", help="Comma-separated engines")
+    parser.add_argument("--checks", type=int, default=50000, help="Checks per run")
+    parser.add_argument("--agents", type=int, default=10, help="Distinct agent ids")
+    parser.add_argument("--rate", type=float, default=10000, help="Paced checks/sec (0 = unpaced)")
+    parser.add_argument("--output", default="rate_limiter_benchmark_results.json")
+    args = parser.parse_args()
+
+    print(f"🚦 Rate limiter benchmark ({args.checks} checks, {args.agents} agents)")
+    results = {}
+    for engine in args.engines.split(","):
+        results[engine] = {}
+        for label, rate in (("paced", args.rate), ("unpaced", 0)):
+            with tempfile.TemporaryDirectory() as tmp:
+                row = run_checks(make_limiter(engine, Path(tmp)), args.checks, args.agents, rate)
+            results[engine][label] = row
+            print(f"  {engine:<7} {label:<8} {row['achieved_per_sec']:>10.0f} checks/s  "
+                  f"p50 {row['p50_us']:.1f}µs  p99 {row['p99_us']:.1f}µs")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Vault Update Latency Benchmark
+Compares single-record update latency of the monolithic vault file against the
+segmented append-only store as the vault grows from 10 to 100k records.
+"""
+
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import sys
+from pathlib import Path
+from typing import List, Dict, Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+from vault.vault import Vault
+
+
+def make_record(i: int) -> Dict[str, Any]:
+    return {
+        "memory_id": f"mem-{i}",
+        "data": {"content": f"benchmark memory {i}", "tags": ["bench", str(i % 10)]},
+        "created_at": "2025-01-01T00:00:00",
+        "updated_at": "2025-01-01T00:00:00",
+        "schema_version": "1.0.0",
+        "audit_log": []
+    }
+
+
+def make_vault(workdir: Path, engine: str, fsync: bool) -> Vault:
+    config = {
+        "encryption": {"key_env_var": None, "key_file": str(workdir / "vault.key")},
+        "storage": {"file_path": str(workdir / "vault.db"), "engine": engine, "fsync": fsync},
+        "schema_version": "1.0.0"
+    }
+    return Vault(config)
+
+
+def populate(vault: Vault, size: int):
+    records = {f"mem-{i}": make_record(i) for i in range(size)}
+    if vault.segments is not None:
+        vault.segments.put_many("communal", records)
+    else:
+        data = vault._load_all()
+        data["communal"].update(records)
+        vault._save_all(data)
+
+
+def time_updates(vault: Vault, size: int, updates: int) -> List[float]:
+    latencies = []
+    for n in range(updates):
+        memory_id = f"mem-{(n * 7919) % size}"
+        start = time.perf_counter()
+        vault.create_or_update_communal(memory_id, {"content": f"update {n}"}, "bench")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def run(sizes: List[int], updates: int, engines: List[str], monolithic_limit: int, fsync: bool) -> Dict[str, Any]:
+    results = {}
+    for engine in engines:
+        results[engine] = []
+        for size in sizes:
+            if engine == "monolithic" and size > monolithic_limit:
+                continue
+            with tempfile.TemporaryDirectory() as tmp:
+                vault = make_vault(Path(tmp), engine, fsync)
+                populate(vault, size)
+                latencies = time_updates(vault, size, updates)
+                row = {
+                    "records": size,
+                    "mean_ms": statistics.mean(latencies),
+                    "p50_ms": statistics.median(latencies),
+                    "p95_ms": sorted(latencies)[int(len(latencies) * 0.95) - 1],
+                }
+                if vault.segments is not None:
+                    row["store"] = vault.segments.stats()
+                    vault.segments.close()
+                results[engine].append(row)
+                print(f"  {engine:<11} {size:>7} records: mean {row['mean_ms']:.3f}ms  p95 {row['p95_ms']:.3f}ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vault update latency benchmark")
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000", help="Comma-separated vault sizes")
+    parser.add_argument("--updates", type=int, default=200, help="Updates timed per size")
+    parser.add_argument("--engines", default="monolithic,segmented", help="Comma-separated storage engines")
+    parser.add_argument("--monolithic-limit", type=int, default=10000,
+                        help="Skip monolithic runs above this size (each update rewrites the whole vault)")
+    parser.add_argument("--fsync", action="store_true", help="fsync every segmented append")
+    parser.add_argument("--output", default="vault_segment_benchmark_results.json")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    engines = args.engines.split(",")
+
+    print(f"🔐 Vault update latency benchmark ({args.updates} updates per size)")
+    results = run(sizes, args.updates, engines, args.monolithic_limit, args.fsync)
+
+    segmented = results.get("segmented", [])
+    if len(segmented) > 1:
+        growth = segmented[-1]["mean_ms"] / max(segmented[0]["mean_ms"], 1e-9)
+        print(f"\n📊 Segmented latency growth {segmented[0]['records']} → {segmented[-1]['records']} records: {growth:.2f}x")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
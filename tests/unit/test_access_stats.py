@@ -0,0 +1,101 @@
+"""
+Unit tests for src.utils.access_stats
+"""
+
+import asyncio
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from utils.access_stats import AccessStatsAccumulator
+except ImportError as e:
+    pytest.skip(f"Cannot import access_stats: {e}", allow_module_level=True)
+
+
+@pytest.fixture
+def accumulator():
+    instance = AccessStatsAccumulator(flush_interval=3600)
+    yield instance
+    instance.close()
+
+
+class TestAccessStatsAccumulator:
+    def test_hits_are_aggregated_per_item(self, accumulator):
+        batches = []
+        accumulator.register("store", batches.append)
+        early = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        late = early + timedelta(minutes=5)
+
+        accumulator.record("store", ["a", "b"], at=late)
+        accumulator.record("store", ["a"], at=early)
+        accumulator.record("unregistered", ["a"])
+        assert accumulator.pending_count("store", "a") == 2
+        assert batches == []
+
+        assert accumulator.flush() == 2
+        records = {record.item_id: record for record in batches[0]}
+        assert records["a"].count == 2 and records["a"].last_accessed == late
+        assert records["b"].count == 1
+        assert accumulator.pending_count("store", "a") == 0
+        assert accumulator.flush() == 0
+
+    def test_failed_flush_keeps_hits(self, accumulator):
+        calls = []
+
+        def flaky(records):
+            calls.append(records)
+            if len(calls) == 1:
+                raise RuntimeError("database is locked")
+
+        accumulator.register("store", flaky)
+        accumulator.record("store", ["a"])
+        assert accumulator.flush("store") == 0
+        accumulator.record("store", ["a"])
+
+        assert accumulator.flush("store") == 1
+        assert calls[1][0].count == 2
+        assert accumulator.get_stats()["failed_flushes"] == 1
+
+    def test_backlog_wakes_flush_thread(self):
+        accumulator = AccessStatsAccumulator(flush_interval=3600, max_pending=3)
+        flushed = threading.Event()
+        accumulator.register("store", lambda records: flushed.set())
+        try:
+            accumulator.record("store", ["a", "b", "c"])
+            assert flushed.wait(2)
+        finally:
+            accumulator.close()
+
+    def test_async_store_flushes_on_its_own_loop(self, accumulator):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        seen = []
+
+        async def apply(records):
+            seen.append((asyncio.get_running_loop(), records))
+
+        try:
+            accumulator.register("pg", apply, loop=loop)
+            accumulator.record("pg", ["a"])
+            assert accumulator.flush("pg") == 1
+            assert seen[0][0] is loop
+
+            accumulator.record("pg", ["b"])
+            assert asyncio.run_coroutine_threadsafe(accumulator.flush_async("pg"), loop).result(2) == 1
+            assert seen[1][1][0].item_id == "b"
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(2)
+            loop.close()
+
+        # With its loop gone the store keeps hits instead of blocking
+        accumulator.record("pg", ["c"])
+        assert accumulator.flush("pg") == 0
+        assert accumulator.pending_count("pg", "c") == 1
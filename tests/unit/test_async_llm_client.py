@@ -0,0 +1,149 @@
+"""
+Unit tests for src.llm.async_llm_client against a local stub Ollama server
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from src.llm.async_llm_client import AsyncLocalLLMClient, AIOHTTP_AVAILABLE, close_connection_pools
+    from src.llm.local_llm_client import LLMConfig, LLMRequest, LLMError
+    from main import HearthlinkLogger
+except ImportError as e:
+    pytest.skip(f"Cannot import async_llm_client: {e}", allow_module_level=True)
+
+if not AIOHTTP_AVAILABLE:
+    pytest.skip("aiohttp not installed", allow_module_level=True)
+
+GENERATION_SECONDS = 0.2
+
+
+class StubOllama:
+    """Ollama /api/generate stub that records how many generations run at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.requests = 0
+        self.failures_left = 0
+        self.connections = set()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests += 1
+                    stub.connections.add(self.client_address)
+                    fail = stub.failures_left > 0
+                    stub.failures_left -= fail
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                try:
+                    if fail:
+                        self.send_response(503)
+                        body = b"{}"
+                    else:
+                        time.sleep(GENERATION_SECONDS)
+                        self.send_response(200)
+                        body = json.dumps({"response": f"echo: {payload['prompt']}", "done": True,
+                                           "prompt_eval_count": 1, "eval_count": 2}).encode()
+                finally:
+                    with stub.lock:
+                        stub.active -= 1
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def stub():
+    server = StubOllama()
+    yield server
+    server.server.shutdown()
+
+
+def make_client(stub, tmp_path, **overrides):
+    settings = dict(engine="ollama", base_url=stub.url, model="stub", max_concurrency=4,
+                    max_retries=0, retry_delay=0.01)
+    settings.update(overrides)
+    return AsyncLocalLLMClient(LLMConfig(**settings), HearthlinkLogger(log_dir=str(tmp_path / "logs")))
+
+
+class TestAsyncLocalLLMClient:
+    def test_concurrent_generations_overlap_up_to_limit(self, stub, tmp_path):
+        client = make_client(stub, tmp_path)
+
+        async def run():
+            try:
+                started = time.perf_counter()
+                responses = await asyncio.gather(*(client.generate(LLMRequest(prompt=str(i))) for i in range(8)))
+                return responses, time.perf_counter() - started
+            finally:
+                await close_connection_pools()
+
+        responses, elapsed = asyncio.run(run())
+        assert [r.content for r in responses] == [f"echo: {i}" for i in range(8)]
+        assert stub.peak == 4
+        # Two waves of four rather than eight generations in a row
+        assert elapsed < GENERATION_SECONDS * 4
+
+    def test_clients_share_pool_and_limit_per_model(self, stub, tmp_path):
+        first = make_client(stub, tmp_path, max_concurrency=2)
+        second = make_client(stub, tmp_path, max_concurrency=2)
+
+        async def run():
+            try:
+                await asyncio.gather(*(c.generate(LLMRequest(prompt="x")) for c in (first, second) * 3))
+                await asyncio.gather(*(c.generate(LLMRequest(prompt="y")) for c in (first, second)))
+                return first._session() is second._session()
+            finally:
+                await close_connection_pools()
+
+        assert asyncio.run(run())
+        assert stub.peak == 2
+        # Keep-alive: later requests reuse the connections opened by the first wave
+        assert len(stub.connections) <= 2
+
+    def test_retries_transient_errors(self, stub, tmp_path):
+        client = make_client(stub, tmp_path, max_retries=2)
+        stub.failures_left = 2
+
+        response = client.generate_blocking(LLMRequest(prompt="again"))
+        assert response.content == "echo: again"
+        assert stub.requests == 3
+
+    def test_backoff_is_jittered(self, stub, tmp_path):
+        client = make_client(stub, tmp_path, retry_delay=1.0)
+        delays = {round(client._backoff_delay(2), 6) for _ in range(20)}
+        assert len(delays) > 1
+        assert all(2.0 <= d <= 4.0 for d in delays)
+
+    def test_exhausted_retries_raise_llm_error(self, stub, tmp_path):
+        client = make_client(stub, tmp_path, max_retries=1, enable_circuit_breaker=False)
+        stub.failures_left = 5
+
+        with pytest.raises(LLMError):
+            client.generate_blocking(LLMRequest(prompt="fail"))
+        assert stub.requests == 2
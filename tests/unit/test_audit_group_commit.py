@@ -0,0 +1,87 @@
+"""
+Unit tests for the group-commit writer in src.synapse.audit_logger
+"""
+
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from synapse_modules import bare_synapse_package
+    with bare_synapse_package():
+        from src.synapse.audit_logger import AuditLogger
+except ImportError as e:
+    pytest.skip(f"Cannot import audit_logger: {e}", allow_module_level=True)
+
+
+def make_logger(tmp_path, **kwargs):
+    return AuditLogger(log_file=str(tmp_path / "synapse-actions.json"), **kwargs)
+
+
+def check(audit, i):
+    return audit.log_permission_check("alden", "persona", "network", "fetch", f"https://x/{i}", True)
+
+
+def read_events(audit):
+    lines = audit.log_file.read_text(encoding="utf-8").splitlines()
+    return [json.loads(line) for line in lines[1:]]
+
+
+class TestGroupCommitWriter:
+    def test_concurrent_events_are_batched_and_chained(self, tmp_path):
+        audit = make_logger(tmp_path)
+        threads = [threading.Thread(target=lambda t=t: [check(audit, t * 100 + i) for i in range(50)])
+                   for t in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        result = audit.verify_log_integrity()
+        assert result["total_events"] == 200 and result["valid_signatures"] == 200
+        assert result["chain_breaks"] == 0
+
+        stats = audit.get_writer_stats()
+        assert stats["events_committed"] == 200 and stats["queue_depth"] == 0
+        assert stats["batches_committed"] <= 200 and stats["fsyncs"] == stats["batches_committed"]
+        audit.close()
+
+    def test_close_flushes_queued_events(self, tmp_path):
+        audit = make_logger(tmp_path, fsync_policy="never")
+        ids = [check(audit, i) for i in range(20)]
+        audit.close()
+
+        assert [e["event_id"] for e in read_events(audit)] == ids
+        # Logging after close falls back to inline writes
+        check(audit, 99)
+        assert len(read_events(audit)) == 21
+
+    def test_removed_event_breaks_chain(self, tmp_path):
+        audit = make_logger(tmp_path, group_commit=False)
+        for i in range(3):
+            check(audit, i)
+        audit.close()
+
+        lines = audit.log_file.read_text(encoding="utf-8").splitlines()
+        audit.log_file.write_text("\n".join(lines[:2] + lines[3:]) + "\n", encoding="utf-8")
+        result = audit.verify_log_integrity()
+        assert result["valid_signatures"] == 2 and result["chain_breaks"] == 1
+
+    def test_chain_continues_after_restart(self, tmp_path):
+        first = make_logger(tmp_path, group_commit=False)
+        check(first, 0)
+        first.close()
+
+        second = make_logger(tmp_path)
+        check(second, 1)
+        assert second.verify_log_integrity()["chain_breaks"] == 0
+        second.close()
+
+    def test_rejects_unknown_fsync_policy(self, tmp_path):
+        with pytest.raises(ValueError):
+            make_logger(tmp_path, fsync_policy="sometimes")
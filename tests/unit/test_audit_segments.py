@@ -0,0 +1,114 @@
+"""
+Unit tests for sealed, indexed audit log segments (src.synapse.audit_segments)
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from synapse_modules import bare_synapse_package
+    with bare_synapse_package():
+        from src.synapse.audit_logger import AuditLogger
+        from src.synapse.audit_segments import index_path, load_index, scan_segment
+except ImportError as e:
+    pytest.skip(f"Cannot import audit_logger: {e}", allow_module_level=True)
+
+
+def make_logger(tmp_path, **kwargs):
+    kwargs.setdefault("group_commit", False)
+    return AuditLogger(log_file=str(tmp_path / "synapse-actions.json"), **kwargs)
+
+
+def check(audit, agent="alden", granted=True):
+    return audit.log_permission_check(agent, "persona", "network", "fetch", "https://x", granted)
+
+
+def sealed_segments(tmp_path):
+    return sorted(tmp_path.glob("synapse-actions.*.json"))
+
+
+class TestAuditSegments:
+    def test_seal_writes_index_matching_segment(self, tmp_path):
+        audit = make_logger(tmp_path)
+        for i in range(4):
+            check(audit, granted=i % 2 == 0)
+        audit._seal_active_segment()
+
+        [segment] = sealed_segments(tmp_path)
+        index = load_index(index_path(segment))
+        scanned = scan_segment(segment)
+        for key in ("event_count", "successful", "event_types", "levels", "agents"):
+            assert index[key] == scanned[key]
+        assert index["event_count"] == 4 and index["successful"] == 2
+        assert index["segment_hmac"]
+
+    def test_summary_merges_indexes_and_active_segment(self, tmp_path):
+        audit = make_logger(tmp_path)
+        check(audit, "alden")
+        check(audit, "mimic", granted=False)
+        audit._seal_active_segment()
+        check(audit, "alden")
+
+        summary = audit.get_audit_summary(hours=1)
+        assert summary["summary"]["total_events"] == 3
+        assert summary["summary"]["failed_events"] == 1
+        assert summary["agent_activity"] == {"alden": 2, "mimic": 1}
+
+        # Reopening rebuilds the active aggregate from disk
+        audit.close()
+        assert make_logger(tmp_path).get_audit_summary(hours=1)["summary"] == summary["summary"]
+
+    def test_time_bucket_rollover_seals_segment(self, tmp_path):
+        audit = make_logger(tmp_path, segment_seconds=1)
+        check(audit)
+        time.sleep(1.05)
+        check(audit)
+        assert len(sealed_segments(tmp_path)) == 1
+
+    def test_tampered_segment_is_detected(self, tmp_path):
+        audit = make_logger(tmp_path)
+        for _ in range(2):
+            check(audit)
+            audit._seal_active_segment()
+        check(audit)
+
+        clean = audit.verify_log_integrity(workers=1)
+        assert clean["segments_verified"] == 3 and clean["segments_tampered"] == 0
+        assert clean["valid_signatures"] == 3 and clean["segment_chain_breaks"] == 0
+
+        segment = sealed_segments(tmp_path)[0]
+        lines = segment.read_text(encoding="utf-8").splitlines()
+        event = json.loads(lines[1])
+        event["success"] = False
+        segment.write_text("\n".join([lines[0], json.dumps(event)]) + "\n", encoding="utf-8")
+
+        result = audit.verify_log_integrity(workers=2)
+        assert result["segments_tampered"] == 1 and result["invalid_signatures"] == 1
+
+    def test_removed_segment_breaks_segment_chain(self, tmp_path):
+        audit = make_logger(tmp_path)
+        for _ in range(3):
+            check(audit)
+            audit._seal_active_segment()
+
+        middle = sealed_segments(tmp_path)[1]
+        middle.unlink()
+        index_path(middle).unlink()
+
+        assert make_logger(tmp_path).verify_log_integrity(workers=1)["segment_chain_breaks"] == 1
+
+    def test_legacy_backup_is_indexed_on_start(self, tmp_path):
+        audit = make_logger(tmp_path)
+        check(audit)
+        audit.close()
+        (tmp_path / "synapse-actions.json").rename(tmp_path / "synapse-actions.20200101_000000.json")
+
+        reopened = make_logger(tmp_path)
+        assert index_path(tmp_path / "synapse-actions.20200101_000000.json").exists()
+        assert reopened.verify_log_integrity(workers=1)["total_events"] == 1
@@ -0,0 +1,112 @@
+"""
+Unit tests for src.personas.conversation_window
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+# Importing personas loads Alden, whose performance optimizer opens its cache database
+os.environ.setdefault("HEARTHLINK_RESPONSE_CACHE_DB", os.path.join(tempfile.mkdtemp(), "response_cache.db"))
+
+try:
+    from personas.conversation_window import (
+        ConversationWindow, ConversationWindowRegistry, extractive_summary, ConversationTurn
+    )
+except ImportError as e:
+    pytest.skip(f"Cannot import conversation_window: {e}", allow_module_level=True)
+
+
+def wait_for_summary(window, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with window.lock:
+            if not window.summarizing and not window.evicted:
+                return
+        time.sleep(0.01)
+    raise AssertionError("summary did not settle")
+
+
+class TestConversationWindow:
+    def test_render_keeps_recent_turns_in_order(self):
+        window = ConversationWindow("u:s", max_turns=4)
+        assert window.render() == ""
+        for i in range(3):
+            window.append("user", f"question {i}")
+            window.append("assistant", f"answer {i}")
+
+        assert [t["content"] for t in window.get_turns()][0] == "question 1"
+        rendered = window.render()
+        assert rendered.index("question 1") < rendered.index("answer 1") < rendered.index("question 2")
+        assert len(window) == 4
+
+        wait_for_summary(window)
+        assert "question 0" in window.summary
+        assert window.render().startswith("Previous conversation in this session:\n(Earlier: ")
+
+    def test_token_budget_evicts_oldest(self):
+        window = ConversationWindow("u:s", max_turns=100, max_tokens=60)
+        for i in range(10):
+            window.append("user", f"message {i} " + "x" * 60)
+        wait_for_summary(window)
+
+        assert window.token_count <= 60
+        assert window.get_turns()[-1]["content"].startswith("message 9")
+        assert window.stats["evicted"] == 10 - len(window)
+
+    def test_summarizer_runs_off_the_append_path(self):
+        release = threading.Event()
+        calls = []
+
+        def slow_summarizer(previous, turns):
+            release.wait(2)
+            calls.append([t.content for t in turns])
+            return (previous + " " if previous else "") + ",".join(t.content for t in turns)
+
+        window = ConversationWindow("u:s", max_turns=1, summarizer=slow_summarizer)
+        start = time.perf_counter()
+        for i in range(5):
+            window.append("user", f"m{i}")
+        assert time.perf_counter() - start < 0.5
+
+        release.set()
+        wait_for_summary(window)
+        # Evictions queued while the first summary ran are folded in one batch
+        assert sum(len(batch) for batch in calls) == 4
+        assert window.summary.replace(" ", ",").split(",") == ["m0", "m1", "m2", "m3"]
+
+    def test_failing_summarizer_falls_back_to_extractive(self):
+        def broken(previous, turns):
+            raise RuntimeError("model unavailable")
+
+        window = ConversationWindow("u:s", max_turns=1, summarizer=broken)
+        window.append("user", "First topic. More detail here.")
+        window.append("user", "Second topic.")
+        wait_for_summary(window)
+        assert window.summary == "User: First topic."
+
+    def test_extractive_summary_is_bounded(self):
+        turns = [ConversationTurn("assistant", "word " * 100) for _ in range(20)]
+        summary = extractive_summary("", turns, max_chars=200)
+        assert len(summary) == 200 and summary.startswith("...")
+
+
+class TestConversationWindowRegistry:
+    def test_lru_bound_and_prune(self):
+        registry = ConversationWindowRegistry(max_sessions=2)
+        first = registry.get("a")
+        registry.get("b")
+        assert registry.get("a") is first
+        registry.get("c")
+        assert registry.peek("b") is None and registry.peek("a") is first
+
+        first.last_active -= 7200
+        assert registry.prune(idle_seconds=3600) == 1
+        assert len(registry) == 1
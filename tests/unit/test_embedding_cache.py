@@ -0,0 +1,142 @@
+"""
+Unit tests for src.embedding.embedding_cache and src.embedding.embedding_batcher
+"""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    import numpy as np
+    from src.embedding.embedding_cache import LRUEmbeddingCache, DiskEmbeddingStore, content_key
+    from src.embedding.embedding_batcher import EmbeddingBatcher, Histogram
+except ImportError as e:
+    pytest.skip(f"Cannot import embedding cache modules: {e}", allow_module_level=True)
+
+
+class TestLRUEmbeddingCache:
+    def test_evicts_least_recently_used_by_bytes(self):
+        cache = LRUEmbeddingCache(max_bytes=3 * 16)
+        for i in range(3):
+            cache.put(bytes([i]), np.full(4, i, dtype=np.float32))
+        cache.get(bytes([0]))
+        cache.put(bytes([3]), np.zeros(4, dtype=np.float32))
+
+        assert bytes([1]) not in cache
+        assert bytes([0]) in cache
+        assert cache.size_bytes == 48
+        assert cache.evictions == 1
+
+
+class TestDiskEmbeddingStore:
+    def test_persists_across_reopen(self, tmp_path):
+        key = content_key("model-a", "hello")
+        store = DiskEmbeddingStore(tmp_path, "model-a", 4)
+        store.put(key, np.arange(4, dtype=np.float32))
+
+        reopened = DiskEmbeddingStore(tmp_path, "model-a", 4)
+        np.testing.assert_array_equal(reopened.get(key), np.arange(4, dtype=np.float32))
+        assert DiskEmbeddingStore(tmp_path, "model-b", 4).get(key) is None
+
+    def test_shrinks_to_most_recent_half(self, tmp_path):
+        store = DiskEmbeddingStore(tmp_path, "m", 2, max_bytes=4 * 8)
+        keys = [content_key("m", str(i)) for i in range(5)]
+        for i, key in enumerate(keys):
+            store.put(key, np.full(2, i, dtype=np.float32))
+
+        assert len(store) <= 4
+        assert store.get(keys[0]) is None
+        np.testing.assert_array_equal(store.get(keys[4]), [4.0, 4.0])
+
+    def test_stores_sharing_a_directory_never_return_another_row(self, tmp_path):
+        first = DiskEmbeddingStore(tmp_path, "m", 2)
+        second = DiskEmbeddingStore(tmp_path, "m", 2)
+        keys = [content_key("m", str(i)) for i in range(4)]
+        for i, key in enumerate(keys):
+            (first if i % 2 else second).put(key, np.full(2, i, dtype=np.float32))
+
+        for store in (first, second):
+            for i, key in enumerate(keys):
+                np.testing.assert_array_equal(store.get(key), [i, i])
+
+    def test_rows_rewritten_by_another_store_are_misses(self, tmp_path):
+        reader = DiskEmbeddingStore(tmp_path, "m", 2)
+        writer = DiskEmbeddingStore(tmp_path, "m", 2, max_bytes=4 * 8)
+        keys = [content_key("m", str(i)) for i in range(5)]
+        for i, key in enumerate(keys[:4]):
+            writer.put(key, np.full(2, i, dtype=np.float32))
+        np.testing.assert_array_equal(reader.get(keys[1]), [1.0, 1.0])
+
+        # Shrinking drops rows 0-1 and moves rows 2-3 down
+        writer.put(keys[4], np.full(2, 4, dtype=np.float32))
+        assert reader.get(keys[1]) is None
+        np.testing.assert_array_equal(reader.get(keys[3]), [3.0, 3.0])
+
+    def test_shared_returns_one_store_per_directory(self, tmp_path):
+        store = DiskEmbeddingStore.shared(tmp_path, "m", 2)
+        assert DiskEmbeddingStore.shared(tmp_path, "m", 2) is store
+        assert DiskEmbeddingStore.shared(tmp_path, "m", 3) is not store
+
+
+class TestEmbeddingBatcher:
+    def test_concurrent_submits_share_one_batch(self):
+        calls = []
+
+        def encode(texts):
+            calls.append(list(texts))
+            return np.array([[len(t), 0.0] for t in texts], dtype=np.float32)
+
+        async def scenario():
+            batcher = EmbeddingBatcher(encode, max_batch_size=16, max_wait_ms=20)
+            results = await asyncio.gather(*(batcher.submit(t) for t in ["a", "bb", "a", "ccc"]))
+            return batcher, results
+
+        batcher, results = asyncio.run(scenario())
+        assert calls == [["a", "bb", "ccc"]]
+        assert [r[0] for r in results] == [1, 2, 1, 3]
+        stats = batcher.get_statistics()
+        assert stats["batch_size_histogram"]["count"] == 1
+        assert stats["queue_wait_ms_histogram"]["count"] == 4
+
+    def test_errors_propagate_to_waiters(self):
+        def encode(texts):
+            raise RuntimeError("model failed")
+
+        async def scenario():
+            batcher = EmbeddingBatcher(encode, max_wait_ms=1)
+            await batcher.submit("x")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(scenario())
+
+    def test_submits_from_several_loops_resolve_on_their_own_loop(self):
+        batcher = EmbeddingBatcher(lambda texts: np.array([[len(t)] for t in texts], dtype=np.float32),
+                                   max_batch_size=4, max_wait_ms=5)
+        results = {}
+
+        def worker(name):
+            async def scenario():
+                texts = [name * n for n in range(1, 9)]
+                return [v[0] for v in await asyncio.gather(*(batcher.submit(t) for t in texts))]
+            results[name] = asyncio.run(scenario())
+
+        threads = [threading.Thread(target=worker, args=(name,)) for name in "abc"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {name: list(range(1, 9)) for name in "abc"}
+        assert batcher.get_statistics()["pending"] == 0
+
+
+def test_histogram_buckets():
+    histogram = Histogram([1, 10])
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+    assert histogram.snapshot()["buckets"] == {"<=1": 2, "<=10": 1, ">10": 1}
@@ -0,0 +1,42 @@
+"""
+Unit tests for src.vault.embedding_codec
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    import numpy as np
+    from src.vault.embedding_codec import encode_embedding, decode_embedding
+except ImportError as e:
+    pytest.skip(f"Cannot import embedding_codec: {e}", allow_module_level=True)
+
+
+class TestEmbeddingCodec:
+    def test_float32_round_trip(self):
+        vec = [0.25, -1.5, 3.0]
+        blob, fmt = encode_embedding(vec)
+        assert fmt == "float32"
+        assert len(blob) == 12
+        np.testing.assert_array_equal(decode_embedding(blob, fmt), np.array(vec, dtype=np.float32))
+
+    def test_int8_round_trip_within_quantization_error(self):
+        vec = np.random.default_rng(0).normal(size=384)
+        blob, fmt = encode_embedding(vec, "int8")
+        assert fmt == "int8"
+        assert len(blob) == 4 + 384
+        decoded = decode_embedding(blob, fmt)
+        assert np.max(np.abs(decoded - vec)) <= np.max(np.abs(vec)) / 127
+
+    def test_legacy_json_rows(self):
+        assert decode_embedding(json.dumps([1.0, 2.0]), None).tolist() == [1.0, 2.0]
+        assert decode_embedding(None) is None
+
+    def test_unknown_encoding(self):
+        with pytest.raises(ValueError):
+            encode_embedding([1.0], "float16")
@@ -0,0 +1,146 @@
+"""
+Unit tests for src.api.endpoint_health and the health-aware routing in
+EnhancedConnectionManager
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).parent.parent.parent / 'src'
+sys.path.insert(0, str(SRC / 'api'))
+
+try:
+    from endpoint_health import EndpointHealthTracker, EndpointStatus
+except ImportError as e:
+    pytest.skip(f"Cannot import endpoint_health: {e}", allow_module_level=True)
+
+DEAD = "http://127.0.0.1:9"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.hits += 1
+        if self.server.fail:
+            self.send_response(503)
+            body = b"{}"
+        else:
+            self.send_response(200)
+            body = json.dumps({"version": "stub", "models": []}).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.hits = 0
+    server.fail = False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+
+
+class TestEndpointHealthTracker:
+    def test_routes_to_fastest_healthy_endpoint(self):
+        tracker = EndpointHealthTracker(["http://a", "http://b", "http://c"])
+        assert tracker.select() == "http://a"
+
+        tracker.record_success("http://a", 0.3)
+        tracker.record_success("http://b", 0.1)
+        tracker.record_failure("http://c", RuntimeError("refused"))
+        assert tracker.ranked_endpoints() == ["http://b", "http://a", "http://c"]
+
+    def test_passive_failures_mark_endpoint_down(self):
+        tracker = EndpointHealthTracker(["http://a", "http://b"], down_after_failures=2)
+        tracker.record_success("http://a", 0.1)
+        tracker.record_failure("http://a", RuntimeError("refused"))
+        assert tracker.states["http://a"].status == EndpointStatus.DEGRADED
+
+        tracker.record_failure("http://a", RuntimeError("refused"))
+        assert tracker.states["http://a"].status == EndpointStatus.DOWN
+        assert tracker.ranked_endpoints() == ["http://b"]
+        assert tracker.ranked_endpoints(include_down=True)[-1] == "http://a"
+
+        tracker.record_success("http://a")
+        assert tracker.states["http://a"].status == EndpointStatus.HEALTHY
+
+    def test_least_outstanding_requests_wins(self):
+        tracker = EndpointHealthTracker(["http://a", "http://b"])
+        tracker.record_success("http://a", 0.1)
+        tracker.record_success("http://b", 0.2)
+
+        with tracker.track("http://a"):
+            assert tracker.select() == "http://b"
+            with tracker.track("http://b"), tracker.track("http://b"):
+                assert tracker.select() == "http://a"
+        assert tracker.select() == "http://a"
+
+    def test_ewma_latency_and_degraded_threshold(self):
+        tracker = EndpointHealthTracker(["http://a"], ewma_alpha=0.5, degraded_latency=1.0)
+        tracker.record_success("http://a", 0.4)
+        tracker.record_success("http://a", 2.0)
+        tracker.record_success("http://a")  # no latency sample
+        assert tracker.states["http://a"].ewma_latency == pytest.approx(1.2)
+        assert tracker.states["http://a"].status == EndpointStatus.DEGRADED
+        assert tracker.snapshot()["http://a"]["ewma_latency_ms"] == 1200.0
+
+    def test_background_prober_updates_state(self, stub_server):
+        tracker = EndpointHealthTracker([stub_server.url, DEAD], probe_interval=0.05, probe_timeout=0.5)
+        tracker.start()
+        try:
+            deadline = time.time() + 5
+            while tracker.states[DEAD].status != EndpointStatus.DOWN and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            tracker.stop()
+
+        assert tracker.states[stub_server.url].status == EndpointStatus.HEALTHY
+        assert tracker.states[DEAD].status == EndpointStatus.DOWN
+        assert tracker.select() == stub_server.url
+
+
+class TestConnectionManagerRouting:
+    @pytest.fixture
+    def api(self, tmp_path, monkeypatch):
+        pytest.importorskip("flask")
+        pytest.importorskip("flask_cors")
+        # The offline manager keeps its data relative to the working directory
+        monkeypatch.chdir(tmp_path)
+        import local_llm_api
+        return local_llm_api
+
+    def test_fails_over_without_inline_probe(self, api, stub_server):
+        manager = api.EnhancedConnectionManager([DEAD, stub_server.url], start_prober=False)
+
+        response = manager.make_request('GET', '/api/tags', timeout=2)
+        assert response.json()["version"] == "stub"
+        assert stub_server.hits == 1
+        assert manager.current_endpoint == stub_server.url
+
+        # The dead primary is now ranked last and no longer tried first
+        manager.make_request('GET', '/api/tags', timeout=2)
+        assert manager.health.ranked_endpoints(include_down=True)[0] == stub_server.url
+        assert manager.health.states[DEAD].total_requests == 1
+
+    def test_server_errors_count_as_failures(self, api, stub_server):
+        manager = api.EnhancedConnectionManager([stub_server.url], start_prober=False)
+        manager.session = api.requests.Session()  # no retries
+        stub_server.fail = True
+
+        with pytest.raises(api.requests.HTTPError):
+            manager.make_request('GET', '/api/version', timeout=2)
+        assert manager.health.states[stub_server.url].total_failures == 1
@@ -0,0 +1,69 @@
+"""
+Unit tests for src.vault.lexical_index
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from src.vault.lexical_index import BM25Index, LexicalIndexRegistry
+except ImportError as e:
+    pytest.skip(f"Cannot import lexical_index: {e}", allow_module_level=True)
+
+
+class TestBM25Index:
+    def test_ranks_by_term_rarity_and_frequency(self):
+        index = BM25Index()
+        index.add("s1", ["python", "memory", "vault"], "episodic")
+        index.add("s2", ["python", "python", "python"], "episodic")
+        index.add("s3", ["garden", "tomato"], "episodic")
+        index.add("s4", ["memory", "garden"], "episodic")
+
+        results = index.search(["python"], 10)
+        assert [sid for sid, _ in results] == ["s2", "s1"]
+        assert all(0.0 < score <= 1.0 for _, score in results)
+        assert index.search(["tomato"], 10)[0][0] == "s3"
+        assert index.search(["unknown"], 10) == []
+
+    def test_top_k_and_type_filter(self):
+        index = BM25Index()
+        for i in range(20):
+            index.add(f"s{i}", ["shared"] + ["extra"] * i, "semantic" if i % 2 else "episodic")
+
+        assert len(index.search(["shared"], 5)) == 5
+        assert {sid for sid, _ in index.search(["shared"], 20, ["semantic"])} == {f"s{i}" for i in range(1, 20, 2)}
+
+    def test_remove_and_replace_update_statistics(self):
+        index = BM25Index()
+        index.add("s1", ["alpha", "beta"], "episodic")
+        index.add("s1", ["gamma"], "episodic")
+        assert index.search(["alpha"], 5) == []
+        assert index.search(["gamma"], 5)[0][0] == "s1"
+
+        assert index.remove("s1") is True
+        assert index.remove("s1") is False
+        assert len(index) == 0
+        assert index.stats()["terms"] == 0
+
+
+class TestLexicalIndexRegistry:
+    def test_lazy_load_and_incremental_add(self):
+        calls = []
+
+        def loader(persona_id, user_id):
+            calls.append((persona_id, user_id))
+            return [("s1", ["alpha"], "episodic")]
+
+        registry = LexicalIndexRegistry(loader)
+        index = registry.get("alden", "u1")
+        registry.add("alden", "u1", "s2", ["alpha", "beta"], "episodic")
+        registry.get("alden", "u1")
+
+        assert calls == [("alden", "u1")]
+        assert "s2" in index
+        registry.remove("alden", "u1", "s1")
+        assert "s1" not in index
@@ -0,0 +1,132 @@
+"""
+Unit tests for prompt assembly and Ollama session context continuation in
+src.llm.local_llm_client, run against a local stub server
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from src.llm.local_llm_client import (
+        LocalLLMClient, LLMConfig, LLMRequest, LLMError, PromptSessionCache, build_generation_request
+    )
+    from main import HearthlinkLogger
+except ImportError as e:
+    pytest.skip(f"Cannot import local_llm_client: {e}", allow_module_level=True)
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Ollama /api/generate that returns a growing context and records payloads."""
+
+    protocol_version = "HTTP/1.1"
+    payloads = []
+    fail = False
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json({"models": [{"name": "stub:latest"}]})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.payloads.append(payload)
+        if self.fail:
+            self._send_json({"error": "model crashed"}, status=500)
+            return
+        # One token per word; the reply's context is everything evaluated so far
+        new_tokens = len(payload["prompt"].split())
+        context = payload.get("context", []) + list(range(new_tokens + 2))
+        self._send_json({"response": "ok", "done": True, "context": context,
+                         "prompt_eval_count": new_tokens, "eval_count": 2,
+                         "prompt_eval_duration": new_tokens * 1000000})
+
+
+@pytest.fixture
+def stub(tmp_path):
+    StubOllamaHandler.payloads = []
+    StubOllamaHandler.fail = False
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config = LLMConfig(engine="ollama", base_url=f"http://127.0.0.1:{server.server_address[1]}",
+                       model="stub", max_retries=0, keep_alive="30m", session_context_tokens=40)
+    yield LocalLLMClient(config, HearthlinkLogger(log_dir=str(tmp_path / "logs")))
+    server.shutdown()
+
+
+def turn(text, history=""):
+    return LLMRequest(prompt=history + text, system_message="You are Alden.", session_id="s1",
+                      continuation_prompt=text, volatile_context="Time: 10:00")
+
+
+class TestPromptAssembly:
+    def test_volatile_context_goes_last(self):
+        config = LLMConfig(engine="lmstudio", base_url="http://localhost", model="m")
+        _, payload = build_generation_request(config, LLMRequest(prompt="hello", volatile_context="Time: now"), False)
+        assert payload["messages"][-1]["content"] == "hello\n\nTime: now"
+
+    def test_prefix_reuse_statistics(self):
+        cache = PromptSessionCache()
+        cache.begin("s", "sys", "one two", can_continue=False)
+        cache.begin("s", "sys", "one two three", can_continue=False)
+        stats = cache.get_stats()
+        assert stats["prefix_misses"] == 2
+        assert stats["miss_reasons"] == {"new_session": 1, "no_continuation_prompt": 1}
+        # "sys\none two" (11 chars) repeated out of 11 + 17 sent
+        assert stats["prefix_reuse"] == pytest.approx(11 / 28)
+
+
+class TestSessionContinuation:
+    def test_follow_up_turn_sends_only_new_text_with_context(self, stub):
+        stub.generate(turn("hello there", history="earlier words "))
+        stub.generate(turn("how are you"))
+
+        first, second = StubOllamaHandler.payloads
+        assert first["prompt"] == "earlier words hello there\n\nTime: 10:00"
+        assert "context" not in first and first["keep_alive"] == "30m"
+        assert second["prompt"] == "how are you\n\nTime: 10:00"
+        assert second["context"] == list(range(8))
+        assert second["system"] == "You are Alden."
+
+        stats = stub.get_status()["prompt_cache"]
+        assert stats["prefix_hits"] == 1 and stats["prefix_misses"] == 1
+        assert stats["avg_prompt_eval_ms_hit"] < stats["avg_prompt_eval_ms_miss"]
+
+    def test_context_restarts_when_too_long_or_system_changes(self, stub):
+        for i in range(6):
+            stub.generate(turn("word " * 6))
+        contexts = [len(p.get("context", [])) for p in StubOllamaHandler.payloads]
+        # Context grows until it passes session_context_tokens, then starts over
+        assert contexts[:4] == [0, 10, 20, 30] and 0 in contexts[4:]
+
+        request = turn("hi")
+        request.system_message = "You are Alden, updated."
+        stub.generate(request)
+        assert "context" not in StubOllamaHandler.payloads[-1]
+        assert stub.prompt_sessions.get_stats()["miss_reasons"]["system_changed"] == 1
+
+    def test_failed_turn_resets_session(self, stub):
+        stub.generate(turn("hello"))
+        StubOllamaHandler.fail = True
+        with pytest.raises(LLMError):
+            stub.generate(turn("again"))
+        StubOllamaHandler.fail = False
+
+        stub.generate(turn("again", history="hello ok "))
+        assert StubOllamaHandler.payloads[-1]["prompt"].startswith("hello ok again")
+        assert "context" not in StubOllamaHandler.payloads[-1]
@@ -0,0 +1,169 @@
+"""
+Unit tests for streamed generation in src.llm.local_llm_client and the
+streaming /api/chat variant of src.api.local_llm_api, run against a local
+stub server that emits chunked output
+"""
+
+import importlib
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).parent.parent.parent / 'src'
+sys.path.insert(0, str(SRC))
+
+try:
+    from src.llm.local_llm_client import (
+        LocalLLMClient, LLMConfig, LLMRequest, iter_ndjson_stream, iter_sse_stream
+    )
+    from main import HearthlinkLogger
+except ImportError as e:
+    pytest.skip(f"Cannot import local_llm_client: {e}", allow_module_level=True)
+
+TOKENS = ["Hel", "lo", " wor", "ld"]
+TOKEN_DELAY = 0.1
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """Ollama and OpenAI-style endpoints that emit one chunk per token."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunked(self, content_type, pieces):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for piece in pieces:
+            data = piece.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+            time.sleep(TOKEN_DELAY)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            self._send_json({"version": "stub"})
+        elif self.path == "/api/tags":
+            self._send_json({"models": [{"name": "stub:latest"}]})
+        elif self.path == "/v1/models":
+            self._send_json({"data": [{"id": "stub", "object": "model"}]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/api/generate":
+            if not payload.get("stream"):
+                self._send_json({"model": "stub:latest", "response": "".join(TOKENS), "done": True})
+                return
+            lines = [json.dumps({"model": "stub:latest", "response": t, "done": False}) + "\n" for t in TOKENS]
+            lines.append(json.dumps({"model": "stub:latest", "response": "", "done": True,
+                                     "prompt_eval_count": 3, "eval_count": len(TOKENS)}) + "\n")
+            self._send_chunked("application/x-ndjson", lines)
+        elif self.path == "/v1/chat/completions":
+            events = [f"data: {json.dumps({'choices': [{'delta': {'content': t}}]})}\n\n" for t in TOKENS]
+            events.append(f"data: {json.dumps({'choices': [{'delta': {}, 'finish_reason': 'stop'}]})}\n\n")
+            events.append("data: [DONE]\n\n")
+            self._send_chunked("text/event-stream", events)
+        else:
+            self.send_error(404)
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubLLMHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def make_client(engine, url, tmp_path):
+    config = LLMConfig(engine=engine, base_url=url, model="stub", max_retries=0)
+    return LocalLLMClient(config, HearthlinkLogger(log_dir=str(tmp_path / "logs")))
+
+
+class TestStreamParsers:
+    def test_ndjson_stream(self):
+        lines = [json.dumps({"response": "a", "done": False}), "",
+                 json.dumps({"response": "b", "done": True, "prompt_eval_count": 2, "eval_count": 2})]
+        chunks = list(iter_ndjson_stream(lines))
+        assert [c.content for c in chunks] == ["a", "b"]
+        assert chunks[-1].done and chunks[-1].usage["total_tokens"] == 4
+
+    def test_sse_stream_with_comments_and_multiline_data(self):
+        lines = [": keep-alive", "",
+                 'data: {"choices": [{"delta": {"content": "a"}}]}', "",
+                 'data: {"choices": [{"delta":', 'data: {"content": "b"}, "finish_reason": "length"}]}', "",
+                 "data: [DONE]", ""]
+        chunks = list(iter_sse_stream(lines))
+        assert [c.content for c in chunks] == ["a", "b", ""]
+        assert chunks[-1].done and chunks[-1].finish_reason == "length"
+
+
+class TestClientStreaming:
+    @pytest.mark.parametrize("engine", ["ollama", "lmstudio"])
+    def test_tokens_arrive_before_completion(self, engine, stub_url, tmp_path):
+        client = make_client(engine, stub_url, tmp_path)
+        started = time.time()
+        arrivals = []
+        for chunk in client.generate_stream(LLMRequest(prompt="hi")):
+            if chunk.content:
+                arrivals.append((time.time() - started, chunk.content))
+
+        assert "".join(text for _, text in arrivals) == "".join(TOKENS)
+        # The first token is seen while the rest are still being generated
+        assert arrivals[-1][0] - arrivals[0][0] >= TOKEN_DELAY * (len(TOKENS) - 1) * 0.8
+        metrics = client.get_stream_metrics()
+        assert metrics["streams_completed"] == 1
+        assert metrics["last_time_to_first_token"] < arrivals[-1][0]
+
+    def test_generate_with_stream_flag_collects_response(self, stub_url, tmp_path):
+        client = make_client("ollama", stub_url, tmp_path)
+        response = client.generate(LLMRequest(prompt="hi", stream=True))
+        assert response.content == "".join(TOKENS)
+        assert response.usage["completion_tokens"] == len(TOKENS)
+        assert 0 < response.time_to_first_token < response.response_time
+
+
+class TestChatStreamEndpoint:
+    @pytest.fixture
+    def api(self, stub_url, tmp_path, monkeypatch):
+        pytest.importorskip("flask")
+        pytest.importorskip("flask_cors")
+        # The offline manager keeps its data relative to the working directory
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.syspath_prepend(str(SRC / 'api'))
+        module = importlib.import_module("local_llm_api")
+        manager = module.connection_manager
+        endpoints = [manager.primary_endpoint] + manager.fallback_endpoints
+        manager.configure_endpoints([stub_url])
+        yield module
+        manager.configure_endpoints(endpoints)
+
+    def test_chat_streams_server_sent_events(self, api):
+        client = api.app.test_client()
+        response = client.post("/api/chat", json={"message": "hi", "stream": True})
+        assert response.mimetype == "text/event-stream"
+
+        events = [json.loads(block[len("data: "):]) for block in response.get_data(as_text=True).split("\n\n") if block]
+        assert "".join(e.get("token", "") for e in events) == "".join(TOKENS)
+        assert events[-1]["done"] and events[-1]["time_to_first_token"] is not None
+        assert api.service_status["metrics"]["streamed_requests"] >= 1
@@ -0,0 +1,190 @@
+"""
+Unit tests for src.database.memory_change_feed and event-driven memory sync
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from src.database.memory_change_feed import (
+        LocalChangeBus, MemoryChangeEvent, ChangeSubscription, PostgresChangeFeed
+    )
+except ImportError as e:
+    pytest.skip(f"Cannot import memory_change_feed: {e}", allow_module_level=True)
+
+
+def event(record_id, table="alden_memory"):
+    return MemoryChangeEvent(table=table, record_id=record_id, operation="insert")
+
+
+class TestChangeSubscription:
+    def test_coalesces_by_record_and_keeps_oldest_publish_time(self):
+        subscription = ChangeSubscription()
+        first = event("mem_1")
+        first.published_at = 100.0
+        subscription.offer(first)
+        subscription.offer(event("mem_1"))
+        subscription.offer(event("mem_2"))
+
+        events, overflowed = subscription.drain()
+        assert [e.record_id for e in events] == ["mem_1", "mem_2"]
+        assert events[0].published_at == 100.0
+        assert not overflowed and subscription.coalesced == 1
+        assert subscription.drain() == ([], False)
+
+    def test_overflow_drops_and_flags_without_blocking(self):
+        wakeups = []
+        subscription = ChangeSubscription(max_events=2, on_event=lambda: wakeups.append(1))
+        results = [subscription.offer(event(f"mem_{i}")) for i in range(4)]
+
+        assert results == [True, True, False, False]
+        assert len(wakeups) == 4
+        events, overflowed = subscription.drain()
+        assert len(events) == 2 and overflowed
+
+    def test_table_filter(self):
+        bus = LocalChangeBus()
+        subscription = bus.subscribe(tables=["alden_memory"])
+        asyncio.run(bus.publish(event("slice_1", table="memory_slices")))
+        asyncio.run(bus.publish(event("mem_1")))
+
+        assert [e.record_id for e in subscription.drain()[0]] == ["mem_1"]
+        bus.unsubscribe(subscription)
+        asyncio.run(bus.publish(event("mem_2")))
+        assert len(subscription) == 0
+
+
+class TestPostgresChangeFeedReconnect:
+    def test_dropped_listener_reconnects_and_flags_missed_events(self):
+        class FakeConnection:
+            async def remove_listener(self, channel, callback):
+                pass
+
+            async def close(self):
+                pass
+
+        async def scenario():
+            feed = PostgresChangeFeed(pgvector_client=object(), reconnect_delay=0)
+            attempts = []
+
+            async def connect():
+                attempts.append(1)
+                if len(attempts) == 2:
+                    raise OSError("connection refused")
+                feed._listen_conn = FakeConnection()
+            feed._connect = connect
+            wakeups = []
+            subscription = feed.subscribe(on_event=lambda: wakeups.append(1))
+
+            await feed.start()
+            feed._on_terminated(feed._listen_conn)
+            assert feed.stats()["listening"] is False
+            await feed._reconnect_task
+
+            assert len(attempts) == 3 and feed.reconnects == 1
+            assert feed.stats()["listening"] is True
+            assert subscription.drain() == ([], True) and wakeups == [1]
+            await feed.stop()
+            assert feed.stats()["listening"] is False
+
+        asyncio.run(scenario())
+
+
+class TestEventDrivenSync:
+    def test_safety_sweep_defaults_to_sync_interval(self):
+        try:
+            from src.services.memory_sync_service import MemorySyncService
+            from test_memory_sync_engine import FakeMemoryManager
+        except ImportError as e:
+            pytest.skip(f"Cannot import memory_sync_service: {e}")
+
+        service = MemorySyncService(memory_manager=FakeMemoryManager([]), sync_interval_seconds=7,
+                                    change_feed=LocalChangeBus())
+        assert service._idle_timeout() == 7
+
+    def test_change_event_syncs_without_polling(self):
+        try:
+            from src.services.memory_sync_service import MemorySyncService
+            from test_memory_sync_engine import FakeMemoryManager, make_memory
+        except ImportError as e:
+            pytest.skip(f"Cannot import memory_sync_service: {e}")
+
+        async def scenario():
+            bus = LocalChangeBus()
+            manager = FakeMemoryManager([])
+            service = MemorySyncService(memory_manager=manager, sync_interval_seconds=3600, change_feed=bus)
+            await service.initialize()
+            try:
+                deadline = time.time() + 2
+                while not manager.reads and time.time() < deadline:
+                    await asyncio.sleep(0.005)
+                idle_reads = len(manager.reads)
+                await asyncio.sleep(0.1)
+                assert len(manager.reads) == idle_reads
+
+                memory = make_memory("mem_e1", age_seconds=0)
+                manager.memories.append(memory)
+                await bus.publish(event("mem_e1"))
+
+                deadline = time.time() + 2
+                while memory.sync_status != "synced" and time.time() < deadline:
+                    await asyncio.sleep(0.005)
+                assert memory.sync_status == "synced"
+                assert service.stats["change_events_consumed"] == 1
+                assert service.stats["last_event_lag_ms"] < 1000
+            finally:
+                await service.cleanup()
+
+        asyncio.run(scenario())
+
+
+class TestCoordinatorChangeFeed:
+    def test_coordinator_shares_one_postgres_feed(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("HEARTHLINK_RESPONSE_CACHE_DB", str(tmp_path / "response_cache.db"))
+        try:
+            from services import multi_agent_memory_coordinator as coordinator_module
+            from database.alden_memory_manager import AldenMemoryManager
+            from database.memory_change_feed import PostgresChangeFeed
+        except ImportError as e:
+            pytest.skip(f"Cannot import multi_agent_memory_coordinator: {e}")
+
+        calls = {}
+
+        class FakeService:
+            async def cleanup(self):
+                pass
+
+        async def fake_factory(name, **kwargs):
+            calls[name] = kwargs
+            return FakeService()
+
+        monkeypatch.setattr(coordinator_module, "create_alden_memory_manager",
+                            lambda **kwargs: fake_factory("memory_manager", **kwargs))
+        monkeypatch.setattr(coordinator_module, "create_memory_sync_service",
+                            lambda **kwargs: fake_factory("sync_service", **kwargs))
+
+        coordinator = coordinator_module.MultiAgentMemoryCoordinator(database_url="postgresql://db/test")
+        assert asyncio.run(coordinator.initialize())
+
+        feed = coordinator.change_feed
+        assert isinstance(feed, PostgresChangeFeed)
+        assert calls["memory_manager"]["change_feed"] is feed
+        assert calls["sync_service"]["change_feed"] is feed
+
+        stopped = []
+
+        async def stop():
+            stopped.append(True)
+        feed.stop = stop
+        asyncio.run(coordinator.cleanup())
+        assert stopped
+
+        # The memory manager binds the unbound feed to its own pool client
+        manager = AldenMemoryManager("postgresql://db/test", change_feed=feed)
+        assert feed.pgvector_client is manager.pgvector_client
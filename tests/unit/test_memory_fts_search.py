@@ -0,0 +1,108 @@
+"""
+Unit tests for FTS5-backed memory search in src.database.database_manager
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from src.database.database_manager import DatabaseManager, DatabaseConfig, DatabaseSchema
+except ImportError as e:
+    pytest.skip(f"Cannot import database_manager: {e}", allow_module_level=True)
+
+if not DatabaseManager.fts5_available():
+    pytest.skip("SQLite built without FTS5", allow_module_level=True)
+
+
+def make_manager(tmp_path, **kwargs):
+    config = DatabaseConfig(db_path=str(tmp_path / "hearthlink.db"),
+                            backup_path=str(tmp_path / "backups"), pool_size=2, **kwargs)
+    return DatabaseManager(config)
+
+
+@pytest.fixture
+def seeded(tmp_path):
+    db = make_manager(tmp_path)
+    db.initialize_schema()
+    user_id = db.create_user("fts_user")
+    agent_id = db.create_agent(user_id, "Alden", "assistant")
+    return db, user_id, agent_id
+
+
+class TestMemoryFTSSearch:
+    def test_ranked_search_with_importance_boost(self, seeded):
+        db, user_id, agent_id = seeded
+        db.store_memory(agent_id, user_id, "episodic", "Went hiking in the mountains", importance=0.1)
+        db.store_memory(agent_id, user_id, "episodic", "Hiking plans for the mountains", importance=0.9)
+        db.store_memory(agent_id, user_id, "episodic", "Recipe for lentil soup", importance=1.0)
+
+        results = db.search_memories(agent_id, user_id, "hike mountain")
+        assert [r["content"] for r in results] == [
+            "Hiking plans for the mountains",
+            "Went hiking in the mountains",
+        ]
+        assert results[0]["score"] >= results[1]["score"]
+        assert results[0]["access_count"] == 0
+        db.flush_access_stats()
+        assert db.search_memories(agent_id, user_id, "hiking")[0]["access_count"] == 1
+
+    def test_snippet_highlight_and_unsafe_query(self, seeded):
+        db, user_id, agent_id = seeded
+        db.store_memory(agent_id, user_id, "semantic", "The user prefers dark roast coffee")
+
+        result = db.search_memories(agent_id, user_id, "coffee", highlight=True)[0]
+        assert "<mark>coffee</mark>" in result["snippet"]
+        # FTS operators in user input are treated as plain words
+        assert db.search_memories(agent_id, user_id, 'coffee" OR NEAR(') == []
+        assert db.search_memories(agent_id, user_id, "coffee -roast*")[0]["id"] == result["id"]
+
+    def test_triggers_track_updates_and_deletes(self, seeded):
+        db, user_id, agent_id = seeded
+        memory_id = db.store_memory(agent_id, user_id, "episodic", "Meeting about budgets")
+
+        with db.transaction() as conn:
+            conn.execute("UPDATE memory_slices SET content = ? WHERE id = ?",
+                         ("Meeting about hiring", memory_id))
+        assert db.search_memories(agent_id, user_id, "budgets") == []
+        assert db.search_memories(agent_id, user_id, "hiring")[0]["id"] == memory_id
+
+        with db.transaction() as conn:
+            conn.execute("DELETE FROM memory_slices WHERE id = ?", (memory_id,))
+        assert db.search_memories(agent_id, user_id, "hiring") == []
+
+    def test_migration_indexes_existing_rows_in_chunks(self, tmp_path):
+        db = make_manager(tmp_path, fts_migration_chunk_size=7)
+        with db.transaction() as conn:
+            for statement in DatabaseSchema.get_schema_version_1():
+                conn.execute(statement)
+        user_id = db.create_user("legacy")
+        agent_id = db.create_agent(user_id, "Alden", "assistant")
+        for i in range(30):
+            db.store_memory(agent_id, user_id, "episodic", f"legacy note {i} about gardening")
+        assert db.get_schema_version() == 1
+
+        db.initialize_schema()
+        assert db.get_schema_version() == 2
+        assert len(db.search_memories(agent_id, user_id, "gardening", limit=100)) == 30
+
+        # Rerunning the migration must not index rows twice
+        db.migrate_to_fts(chunk_size=4)
+        with db.pool.get_connection() as conn:
+            count = conn.execute(
+                "SELECT COUNT(*) FROM memory_slices_fts WHERE memory_slices_fts MATCH 'gardening'"
+            ).fetchone()[0]
+        assert count == 30
+
+    def test_vacuum_keeps_index_consistent(self, seeded):
+        db, user_id, agent_id = seeded
+        ids = [db.store_memory(agent_id, user_id, "episodic", f"note {i} topic{i}") for i in range(5)]
+        with db.transaction() as conn:
+            conn.execute("DELETE FROM memory_slices WHERE id = ?", (ids[1],))
+
+        db.vacuum_database()
+        assert db.search_memories(agent_id, user_id, "topic4")[0]["id"] == ids[4]
+        assert db.search_memories(agent_id, user_id, "topic1") == []
@@ -0,0 +1,194 @@
+"""
+Unit tests for src.personas.memory_write_queue
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+# Importing personas loads Alden, whose performance optimizer opens its cache database
+os.environ.setdefault("HEARTHLINK_RESPONSE_CACHE_DB", os.path.join(tempfile.mkdtemp(), "response_cache.db"))
+
+try:
+    from personas.memory_write_queue import MemoryWriteQueue
+except ImportError as e:
+    pytest.skip(f"Cannot import memory_write_queue: {e}", allow_module_level=True)
+
+
+def make_queue(tmp_path, process, **kwargs):
+    kwargs.setdefault("retry_delay", 0.01)
+    kwargs.setdefault("fsync", False)
+    return MemoryWriteQueue(process, str(tmp_path / "spool" / "memories.jsonl"), **kwargs)
+
+
+class TestMemoryWriteQueue:
+    def test_jobs_are_batched_and_spool_is_compacted(self, tmp_path):
+        batches = []
+
+        async def process(jobs):
+            batches.append([job["n"] for job in jobs])
+            return [True] * len(jobs)
+
+        async def scenario():
+            queue = make_queue(tmp_path, process, batch_size=4, batch_wait=0.05)
+            for n in range(6):
+                await queue.enqueue({"n": n})
+            await queue.close()
+            return queue
+
+        queue = asyncio.run(scenario())
+        assert [n for batch in batches for n in batch] == list(range(6))
+        assert max(len(batch) for batch in batches) == 4
+        assert queue.get_stats()["stored"] == 6
+        assert not queue.spool_path.exists()
+
+    def test_failures_retry_then_dead_letter(self, tmp_path):
+        attempts = {}
+
+        async def process(jobs):
+            results = []
+            for job in jobs:
+                attempts[job["n"]] = attempts.get(job["n"], 0) + 1
+                # Job 0 succeeds on its second attempt, job 1 never does
+                results.append(job["n"] == 0 and attempts[0] == 2)
+            return results
+
+        async def scenario():
+            queue = make_queue(tmp_path, process, max_attempts=3)
+            await queue.enqueue({"n": 0})
+            await queue.enqueue({"n": 1})
+            for _ in range(100):
+                if queue.get_stats()["active_jobs"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            await queue.close()
+            return queue
+
+        queue = asyncio.run(scenario())
+        stats = queue.get_stats()
+        assert attempts == {0: 2, 1: 3}
+        assert stats["stored"] == 1 and stats["dead_lettered"] == 1
+        dead = [json.loads(line) for line in queue.dead_letter_path.read_text().splitlines()]
+        assert dead[0]["payload"] == {"n": 1}
+
+    def test_spooled_jobs_are_recovered_after_crash(self, tmp_path):
+        stored = []
+
+        async def stuck(jobs):
+            await asyncio.Event().wait()
+
+        async def process(jobs):
+            stored.extend(job["n"] for job in jobs)
+            return [True] * len(jobs)
+
+        async def crash():
+            queue = make_queue(tmp_path, stuck)
+            for n in range(3):
+                await queue.enqueue({"n": n})
+            await asyncio.sleep(0.1)
+            # Simulate dying mid-append after the last acknowledged job
+            with open(queue.spool_path, "a") as f:
+                f.write('{"op":"put","job":{"id":"torn"')
+
+        async def restart():
+            queue = make_queue(tmp_path, process)
+            recovered = await queue.start()
+            await queue.close()
+            return recovered
+
+        asyncio.run(crash())
+        assert asyncio.run(restart()) == 3
+        assert sorted(stored) == [0, 1, 2]
+
+    def test_torn_record_does_not_hide_later_jobs(self, tmp_path):
+        stored = []
+
+        async def stuck(jobs):
+            await asyncio.Event().wait()
+
+        async def process(jobs):
+            stored.extend(job["n"] for job in jobs)
+            return [True] * len(jobs)
+
+        async def run(process, jobs=()):
+            queue = make_queue(tmp_path, process)
+            recovered = await queue.start()
+            for n in jobs:
+                await queue.enqueue({"n": n})
+            await asyncio.sleep(0.05)
+            if process is not stuck:
+                await queue.close()
+            return queue, recovered
+
+        queue, _ = asyncio.run(run(stuck, jobs=[0]))
+        with open(queue.spool_path, "a") as f:
+            f.write('{"op":"put","job":{"id":"torn"')
+        # Restarted after the crash: the torn tail is cut before new appends
+        asyncio.run(run(stuck, jobs=[1, 2]))
+        lines = queue.spool_path.read_text().splitlines()
+        assert len(lines) == 3 and all(json.loads(line)["op"] == "put" for line in lines)
+
+        # A torn record in the middle of the spool is skipped, not the end of it
+        with open(queue.spool_path, "w") as f:
+            f.write("\n".join([lines[0], '{"op":"put","job":{"id":"x"', lines[1], lines[2]]) + "\n")
+        _, recovered = asyncio.run(run(process))
+        assert recovered == 3
+        assert sorted(stored) == [0, 1, 2]
+        assert not queue.spool_path.exists()
+
+    def test_full_queue_keeps_jobs_in_spool(self, tmp_path):
+        release = None
+        stored = []
+
+        async def process(jobs):
+            await release.wait()
+            stored.extend(job["n"] for job in jobs)
+            return [True] * len(jobs)
+
+        async def scenario():
+            nonlocal release
+            release = asyncio.Event()
+            queue = make_queue(tmp_path, process, max_queue=2, batch_size=1)
+            for n in range(6):
+                await queue.enqueue({"n": n})
+            overflowed = queue.get_stats()["overflowed"]
+            release.set()
+            for _ in range(100):
+                if len(stored) == 6:
+                    break
+                await asyncio.sleep(0.01)
+            await queue.close()
+            return overflowed
+
+        assert asyncio.run(scenario()) > 0
+        assert sorted(stored) == list(range(6))
+
+    def test_spool_writes_run_off_the_event_loop(self, tmp_path):
+        writer_threads = []
+
+        async def process(jobs):
+            return [True] * len(jobs)
+
+        async def scenario():
+            queue = make_queue(tmp_path, process)
+            append = queue._append_many
+
+            def recording_append(records):
+                writer_threads.append(threading.current_thread())
+                append(records)
+            queue._append_many = recording_append
+            await queue.enqueue({"n": 0})
+            await queue.close()
+            return threading.current_thread()
+
+        loop_thread = asyncio.run(scenario())
+        # One put and one done record, neither written on the loop's thread
+        assert len(writer_threads) == 2 and loop_thread not in writer_threads
@@ -0,0 +1,118 @@
+"""
+Unit tests for src.core.metrics_store and Core's performance metric queries
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from src.core.metrics_store import MetricSeries, MetricsStore
+except ImportError as e:
+    pytest.skip(f"Cannot import metrics_store: {e}", allow_module_level=True)
+
+
+class TestMetricSeries:
+    def test_ring_overwrites_oldest_and_keeps_lifetime_totals(self):
+        series = MetricSeries(capacity=4)
+        for i in range(10):
+            series.append(float(i), float(i))
+
+        timestamps, values, _ = series.window()
+        assert len(series) == 4
+        assert values.tolist() == [6.0, 7.0, 8.0, 9.0]
+        assert timestamps.tolist() == sorted(timestamps.tolist())
+        aggregates = series.aggregates()
+        assert aggregates["count"] == 4 and aggregates["mean"] == 7.5
+        assert aggregates["lifetime_count"] == 10 and aggregates["lifetime_mean"] == 4.5
+
+    def test_window_across_wraparound(self):
+        series = MetricSeries(capacity=5)
+        for i in range(8):
+            series.append(100.0 + i, float(i), {"n": i})
+
+        _, values, meta = series.window(since=103.0, until=106.0)
+        assert values.tolist() == [4.0, 5.0, 6.0]
+        assert [m["n"] for m in meta] == [4, 5, 6]
+        assert series.window(since=200.0)[1].size == 0
+
+    def test_backwards_clock_is_clamped(self):
+        series = MetricSeries(capacity=8)
+        series.append(10.0, 1.0)
+        series.append(5.0, 2.0)
+        assert series.window()[0].tolist() == [10.0, 10.0]
+
+    def test_prune_and_cached_percentiles(self):
+        series = MetricSeries(capacity=200)
+        for i in range(1, 101):
+            series.append(float(i), float(i))
+        first = series.aggregates()
+        assert series.aggregates() is first
+        assert first["p50"] == pytest.approx(50.5)
+        assert first["p99"] == pytest.approx(99.01)
+
+        assert series.prune_before(50.0) == 50
+        assert series.aggregates()["min"] == 51.0
+        assert series.aggregates(since=90.0)["count"] == 10
+
+
+class TestMetricsStore:
+    def test_series_count_is_bounded(self):
+        store = MetricsStore(capacity_per_series=8, max_series=2)
+        for session in ("s1", "s2", "s3"):
+            store.append(session, "throughput", 1.0, 1.0)
+
+        assert store.sessions() == ["s2", "s3"]
+        assert store.stats()["series_evicted"] == 1
+
+    def test_recent_merges_metric_types_in_time_order(self):
+        store = MetricsStore(capacity_per_series=8)
+        store.append("s1", "throughput", 1.0, 10.0)
+        store.append("s1", "error_rate", 2.0, 0.1)
+        store.append("s1", "throughput", 3.0, 12.0)
+        store.append("s2", "throughput", 4.0, 99.0)
+
+        rows = store.recent("s1", limit=2)
+        assert [(r["metric_type"], r["value"]) for r in rows] == [("error_rate", 0.1), ("throughput", 12.0)]
+        assert store.count("s1") == 3
+
+        assert store.prune_before(2.0) == 2
+        assert store.metric_types("s1") == ["throughput"]
+
+
+class TestCoreMetrics:
+    def test_record_and_query(self, tmp_path):
+        try:
+            from src.core.core import Core, PerformanceMetricType
+            from src.vault.vault import Vault
+        except ImportError as e:
+            pytest.skip(f"Cannot import core: {e}")
+
+        vault = Vault({
+            "encryption": {"key_env_var": None, "key_file": str(tmp_path / "vault.key")},
+            "storage": {"file_path": str(tmp_path / "vault.db")},
+            "schema_version": "1.0.0"
+        })
+        core = Core({"metrics_capacity_per_series": 16}, vault)
+        for i in range(20):
+            core.record_metric(PerformanceMetricType.THROUGHPUT, "s1", float(i), "ops", participant_id="alden")
+
+        trends = core.get_performance_trends("s1", PerformanceMetricType.THROUGHPUT, time_window_hours=1)
+        assert [t["value"] for t in trends] == [float(i) for i in range(4, 20)]
+        assert trends[0]["participant_id"] == "alden" and trends[0]["unit"] == "ops"
+
+        aggregates = core.get_metric_aggregates("s1", PerformanceMetricType.THROUGHPUT)
+        assert aggregates["count"] == 16 and aggregates["lifetime_count"] == 20
+
+        export = core.export_performance_data("s1")
+        assert export["metrics_count"] == 16
+        assert export["metrics"][0]["metric_type"] == "throughput"
+
+        core.metrics_retention_days = 0
+        time.sleep(0.01)
+        core.cleanup_old_metrics()
+        assert core.metrics_store.count("s1") == 0
@@ -0,0 +1,100 @@
+"""
+Unit tests for the PermissionManager grant index/decision cache and the
+SecurityManager success logging policy
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from synapse_modules import bare_synapse_package
+    with bare_synapse_package():
+        from src.synapse.permissions import PermissionManager
+        from src.synapse.security_manager import SecurityManager, AgentType, PermissionType
+except ImportError as e:
+    pytest.skip(f"Cannot import permissions: {e}", allow_module_level=True)
+
+
+def grant(manager, plugin_id, permissions):
+    request_id = manager.request_permissions(plugin_id, "user", permissions)
+    assert manager.approve_permissions(request_id, "admin")
+    return manager.get_plugin_grants(plugin_id)[-1]
+
+
+class TestPermissionDecisionCache:
+    def test_repeat_checks_hit_cache(self):
+        manager = PermissionManager()
+        grant(manager, "weather", ["network_access"])
+
+        assert manager.check_permission("weather", "network_access")
+        assert manager.check_permission("weather", "network_access")
+        assert not manager.check_permission("weather", "file_system")
+        assert not manager.check_permission("weather", "file_system")
+        assert manager.cache_stats["hits"] == 2 and manager.cache_stats["index_rebuilds"] == 1
+
+    def test_approve_and_revoke_invalidate_decisions(self):
+        manager = PermissionManager()
+        assert not manager.check_permission("weather", "read_vault")
+
+        grant(manager, "weather", ["read_vault"])
+        grant(manager, "notes", ["read_vault"])
+        assert manager.check_permission("weather", "read_vault")
+
+        assert manager.revoke_permissions("weather", "admin", "test")
+        assert not manager.check_permission("weather", "read_vault")
+        assert manager.check_permission("notes", "read_vault")
+        assert manager.get_plugin_grants("weather") == []
+
+    def test_expired_grants_are_ignored(self):
+        manager = PermissionManager()
+        expired = grant(manager, "weather", ["network_access"])
+        expired.expires_at = (datetime.now() - timedelta(minutes=1)).isoformat()
+        manager.invalidate_cache()
+        assert not manager.check_permission("weather", "network_access")
+
+        # A later grant of the same permission still counts
+        live = grant(manager, "weather", ["network_access"])
+        live.expires_at = (datetime.now() + timedelta(hours=1)).isoformat()
+        manager.invalidate_cache()
+        assert manager.check_permission("weather", "network_access")
+        assert manager.get_plugin_permissions("weather") == ["network_access"]
+
+    def test_import_rebuilds_index(self):
+        manager = PermissionManager()
+        grant(manager, "weather", ["read_core"])
+        exported = manager.export_permissions()
+
+        restored = PermissionManager()
+        assert not restored.check_permission("weather", "read_core")
+        assert restored.import_permissions(exported)
+        assert restored.check_permission("weather", "read_core")
+
+
+class TestSuccessLogSampling:
+    def check(self, manager, permission=PermissionType.BROWSER_PREVIEW):
+        return manager.check_permission("alden", AgentType.ALDEN, permission, "preview", "https://x")
+
+    def test_first_success_per_interval_is_logged(self, tmp_path):
+        manager = SecurityManager(log_file=str(tmp_path / "security.json"),
+                                  success_log_interval=60, success_log_sample_rate=0)
+        for _ in range(3):
+            assert self.check(manager)
+        assert self.check(manager, PermissionType.API_EXTERNAL)
+        assert not self.check(manager, PermissionType.FILE_SYSTEM)
+
+        assert len(manager.security_events) == 3
+        assert len((tmp_path / "security.json").read_text().splitlines()) == 3
+        decisions = manager.get_security_summary()["decisions"]
+        assert decisions["allowed"] == 4 and decisions["denied"] == 1
+        assert decisions["successes_sampled_out"] == 2
+
+    def test_zero_interval_logs_every_success(self, tmp_path):
+        manager = SecurityManager(log_file=str(tmp_path / "security.json"), success_log_interval=0)
+        for _ in range(3):
+            assert self.check(manager)
+        assert len(manager.security_events) == 3
@@ -0,0 +1,96 @@
+"""
+Unit tests for src.synapse.rate_limit_store and the SecurityManager RateLimiter
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from synapse_modules import bare_synapse_package
+    with bare_synapse_package():
+        from src.synapse.rate_limit_store import SlidingWindowCounter, LocalRateLimitStore, SQLiteRateLimitStore
+        from src.synapse import security_manager
+        from src.synapse.security_manager import RateLimiter, RateLimitConfig, PermissionType
+except ImportError as e:
+    pytest.skip(f"Cannot import rate_limit_store: {e}", allow_module_level=True)
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestSlidingWindowCounter:
+    def test_buckets_expire_as_window_slides(self):
+        counter = SlidingWindowCounter(buckets=60, bucket_seconds=1)
+        for second in range(100, 130):
+            counter.add(float(second))
+
+        assert counter.count(129.5) == 30
+        assert counter.recent(129.5, 10) == 10
+        assert counter.count(169.0) == 20
+        assert counter.count(500.0) == 0
+
+
+@pytest.fixture(params=["local", "sqlite"])
+def limiter(request, tmp_path):
+    store = LocalRateLimitStore() if request.param == "local" else SQLiteRateLimitStore(str(tmp_path / "rate.db"))
+    clock = Clock()
+    with patch.object(security_manager.time, "time", clock):
+        yield RateLimiter(store), clock
+
+
+class TestRateLimiter:
+    def test_burst_limit_rejects_without_blocking(self, limiter):
+        rate_limiter, clock = limiter
+        config = RateLimitConfig(requests_per_minute=100, requests_per_hour=1000, burst_limit=3)
+
+        results = [rate_limiter.check_rate_limit("alden", PermissionType.API_EXTERNAL, config) for _ in range(4)]
+        assert results == [True, True, True, False]
+        assert not rate_limiter.blocked_agents
+
+        clock.now += 11
+        assert rate_limiter.check_rate_limit("alden", PermissionType.API_EXTERNAL, config)
+
+    def test_minute_limit_blocks_for_cooldown(self, limiter):
+        rate_limiter, clock = limiter
+        config = RateLimitConfig(requests_per_minute=5, requests_per_hour=1000, burst_limit=100, cooldown_seconds=300)
+
+        for _ in range(5):
+            assert rate_limiter.check_rate_limit("alden", PermissionType.NETWORK_ACCESS, config)
+            clock.now += 1
+        assert not rate_limiter.check_rate_limit("alden", PermissionType.NETWORK_ACCESS, config)
+        assert "alden" in rate_limiter.blocked_agents
+
+        clock.now += 120
+        assert not rate_limiter.check_rate_limit("alden", PermissionType.NETWORK_ACCESS, config)
+        clock.now += 200
+        assert rate_limiter.check_rate_limit("alden", PermissionType.NETWORK_ACCESS, config)
+
+    def test_hour_limit_and_status(self, limiter):
+        rate_limiter, clock = limiter
+        config = RateLimitConfig(requests_per_minute=1000, requests_per_hour=10, burst_limit=1000)
+
+        for _ in range(10):
+            assert rate_limiter.check_rate_limit("mimic", PermissionType.BROWSER_PREVIEW, config)
+            clock.now += 90
+        status = rate_limiter.get_rate_limit_status("mimic", PermissionType.BROWSER_PREVIEW)
+        assert status["requests_last_hour"] == 10 and status["requests_last_minute"] == 0
+        assert not rate_limiter.check_rate_limit("mimic", PermissionType.BROWSER_PREVIEW, config)
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    config = RateLimitConfig(requests_per_minute=100, requests_per_hour=1000, burst_limit=4)
+    db = str(tmp_path / "rate.db")
+    workers = [RateLimiter(SQLiteRateLimitStore(db)) for _ in range(2)]
+
+    results = [workers[i % 2].check_rate_limit("alden", PermissionType.API_EXTERNAL, config) for i in range(6)]
+    assert results.count(True) == 4
@@ -0,0 +1,162 @@
+"""
+Unit tests for src.vault.segmented_store
+"""
+
+import asyncio
+import json
+import secrets
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from src.vault.segmented_store import (
+        SegmentedVaultStore, SegmentedStoreError, migrate_monolithic_vault, rekey_segment_directory,
+        segment_directory_for
+    )
+except ImportError as e:
+    pytest.skip(f"Cannot import segmented_store: {e}", allow_module_level=True)
+
+
+@pytest.fixture
+def key():
+    return AESGCM.generate_key(bit_length=256)
+
+
+class TestSegmentedVaultStore:
+    def test_put_get_delete(self, tmp_path, key):
+        store = SegmentedVaultStore(tmp_path, key, fsync=False)
+        store.put("persona", "alden", {"user_id": "u1", "data": {"a": 1}})
+        assert store.get("persona", "alden")["data"] == {"a": 1}
+        assert store.list_ids("persona") == ["alden"]
+
+        assert store.delete("persona", "alden") is True
+        assert store.get("persona", "alden") is None
+        assert store.delete("persona", "alden") is False
+
+    def test_reopen_replays_log(self, tmp_path, key):
+        store = SegmentedVaultStore(tmp_path, key, fsync=False)
+        store.put("communal", "m1", {"v": 1})
+        store.put("communal", "m1", {"v": 2})
+        store.put("communal", "m2", {"v": 3})
+        store.delete("communal", "m2")
+        store.close()
+
+        reopened = SegmentedVaultStore(tmp_path, key, fsync=False)
+        assert reopened.get("communal", "m1") == {"v": 2}
+        assert reopened.get("communal", "m2") is None
+
+    def test_torn_trailing_frame_is_truncated(self, tmp_path, key):
+        store = SegmentedVaultStore(tmp_path, key, fsync=False)
+        store.put("communal", "m1", {"v": 1})
+        size = store.stats()["total_bytes"]
+        store.close()
+        log_path = next(tmp_path.glob("vault-*.log"))
+        with open(log_path, "ab") as f:
+            f.write(b"\x00\x00\x01\x00partial")
+
+        reopened = SegmentedVaultStore(tmp_path, key, fsync=False)
+        assert reopened.get("communal", "m1") == {"v": 1}
+        assert log_path.stat().st_size == size
+
+    def test_compaction_drops_dead_frames(self, tmp_path, key):
+        store = SegmentedVaultStore(tmp_path, key, fsync=False, compaction_min_bytes=1 << 30)
+        for i in range(20):
+            store.put("communal", "hot", {"v": i})
+        store.put("persona", "p", {"user_id": "u"})
+        before = store.stats()
+        store.compact()
+        after = store.stats()
+
+        assert after["generation"] == before["generation"] + 1
+        assert after["total_bytes"] == after["live_bytes"] < before["total_bytes"]
+        assert store.get("communal", "hot") == {"v": 19}
+        assert len(list(tmp_path.glob("vault-*.log"))) == 1
+
+    def test_wrong_key_rejected(self, tmp_path, key):
+        store = SegmentedVaultStore(tmp_path, key, fsync=False)
+        store.put("communal", "m1", {"v": 1})
+        store.close()
+        with pytest.raises(SegmentedStoreError):
+            SegmentedVaultStore(tmp_path, AESGCM.generate_key(bit_length=256), fsync=False)
+        assert SegmentedVaultStore(tmp_path, key, fsync=False).get("communal", "m1") == {"v": 1}
+
+    def test_unknown_kind(self, tmp_path, key):
+        store = SegmentedVaultStore(tmp_path, key, fsync=False)
+        with pytest.raises(SegmentedStoreError):
+            store.put("unknown", "x", {})
+
+
+class TestMigrateMonolithicVault:
+    def test_migration_moves_all_records(self, tmp_path, key):
+        vault_file = tmp_path / "vault.db"
+        data = {"persona": {"alden": {"user_id": "u1"}}, "communal": {"m1": {"v": 1}, "m2": {"v": 2}}}
+        nonce = secrets.token_bytes(12)
+        vault_file.write_bytes(nonce + AESGCM(key).encrypt(nonce, json.dumps(data).encode(), None))
+
+        counts = migrate_monolithic_vault(vault_file, key)
+
+        assert counts == {"persona": 1, "communal": 2}
+        assert not vault_file.exists()
+        assert (tmp_path / "vault.db.migrated").exists()
+        store = SegmentedVaultStore(segment_directory_for(vault_file), key)
+        assert store.export_all() == data
+        assert migrate_monolithic_vault(vault_file, key) == {"persona": 0, "communal": 0}
+
+
+class TestSegmentKeyRotation:
+    def test_rekey_reseals_live_frames(self, tmp_path, key):
+        store = SegmentedVaultStore(tmp_path, key, fsync=False)
+        store.put("communal", "m1", {"v": 1})
+        store.put("communal", "m1", {"v": 2})
+        store.close()
+
+        new_key = AESGCM.generate_key(bit_length=256)
+        assert rekey_segment_directory(tmp_path, key, new_key) == {"persona": 0, "communal": 1}
+        assert SegmentedVaultStore(tmp_path, new_key, fsync=False).get("communal", "m1") == {"v": 2}
+        with pytest.raises(SegmentedStoreError):
+            SegmentedVaultStore(tmp_path, key, fsync=False)
+
+    def test_rekey_rotates_stores_open_in_process(self, tmp_path, key):
+        live = SegmentedVaultStore(tmp_path, key, fsync=False)
+        other = SegmentedVaultStore(tmp_path, key, fsync=False)
+        live.put("communal", "m1", {"v": 1})
+        other.reopen()
+
+        new_key = AESGCM.generate_key(bit_length=256)
+        rekey_segment_directory(tmp_path, key, new_key)
+
+        for store in (live, other):
+            assert store.get("communal", "m1") == {"v": 1}
+        live.put("communal", "m2", {"v": 2})
+        live.close()
+        other.close()
+        assert SegmentedVaultStore(tmp_path, new_key, fsync=False).export_all()["communal"] == {
+            "m1": {"v": 1}, "m2": {"v": 2}
+        }
+
+    def test_rotate_then_reopen_segmented_vault(self, tmp_path):
+        pytest.importorskip("prometheus_client")
+        from src.vault.key_rotation import VaultKeyRotationManager
+
+        vault_file = tmp_path / "vault.db"
+        manager = VaultKeyRotationManager({"storage": {"file_path": str(vault_file)}})
+        old_key = manager.get_current_key().key_data
+        nonce = secrets.token_bytes(12)
+        data = {"persona": {"alden": {"user_id": "u1"}}, "communal": {"m1": {"v": 1}}}
+        vault_file.write_bytes(nonce + AESGCM(old_key).encrypt(nonce, json.dumps(data).encode(), None))
+        migrate_monolithic_vault(vault_file, old_key)
+
+        result = asyncio.run(manager.rotate_key("test", force=True))
+
+        assert result["success"] is True
+        new_key = manager.get_current_key().key_data
+        store = SegmentedVaultStore(segment_directory_for(vault_file), new_key)
+        assert store.export_all() == data
+        store.close()
+        with pytest.raises(SegmentedStoreError):
+            SegmentedVaultStore(segment_directory_for(vault_file), old_key)
@@ -0,0 +1,128 @@
+"""
+Unit tests for the exact and semantic response caches in
+src.utils.performance_optimizer
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+# The module creates a global optimizer (and its cache database) on import
+os.environ.setdefault("HEARTHLINK_RESPONSE_CACHE_DB", os.path.join(tempfile.mkdtemp(), "response_cache.db"))
+
+try:
+    from src.utils.performance_optimizer import ResponseCache, SemanticResponseCache, normalize_prompt
+except ImportError as e:
+    pytest.skip(f"Cannot import performance_optimizer: {e}", allow_module_level=True)
+
+
+class BagOfWordsEmbedder:
+    """Stands in for SemanticEmbeddingService: one dimension per known word."""
+
+    VOCAB = ["what", "time", "is", "it", "now", "right", "the", "current", "tell", "me", "weather", "today"]
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_embedding(self, text):
+        self.calls += 1
+        words = text.lower().replace("?", "").split()
+        vector = [float(words.count(w)) for w in self.VOCAB]
+
+        class Result:
+            embedding = vector
+        return Result()
+
+
+def test_normalize_prompt_strips_volatile_fields():
+    first = "You are Alden.\n\nCurrent Date/Time: Monday, October 12, 2026 at 09:15 AM\nRules: be brief."
+    second = "You are Alden.\n\nCurrent Date/Time: Friday, October 16, 2026 at 04:40 PM\nRules:  be brief."
+    assert normalize_prompt(first) == normalize_prompt(second)
+    assert normalize_prompt("Current time: Friday, October 16, 2026 at 04:40 PM. Hi") == "Current time:. Hi"
+    # Dates and times written by the user are never stripped
+    assert normalize_prompt("logged 2026-10-16T16:40:01Z") != normalize_prompt("logged 2026-10-15 08:00")
+    assert normalize_prompt("Current date: March 4") == "Current date: March 4"
+
+
+def test_exact_cache_keeps_user_dates_apart(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    cache.cache_response("Cancel my meeting at 2025-03-04 09:30", "Cancelled the 4th", "m", response_time=1.0)
+
+    assert cache.get_cached_response("Cancel my meeting at 2025-03-05 09:30", "m") is None
+    assert cache.get_cached_response("Cancel my meeting at 2025-03-04 09:30", "m")["response"] == "Cancelled the 4th"
+
+
+def test_exact_cache_persistent_connection_and_lru(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_entries=10)
+    for i in range(10):
+        cache.cache_response(f"prompt {i}", f"answer {i}", "m", response_time=1.0)
+    for i in range(10):
+        cache.conn.execute("UPDATE response_cache SET last_used = last_used - 100 + ? WHERE prompt_text = ?",
+                           (i, f"prompt {i}"))
+    assert cache.get_cached_response("prompt 0", "m")["response"] == "answer 0"
+
+    cache.cache_response("prompt 10", "answer 10", "m", response_time=1.0)
+    # Evicted down to the low-water mark, keeping the recently used entry
+    assert cache.entry_count == 9
+    assert cache.get_cached_response("prompt 0", "m") is not None
+    assert cache.get_cached_response("prompt 1", "m") is None
+    assert cache.get_cached_response("prompt 2", "m") is None
+    assert cache.get_cached_response("prompt 0", "other-model") is None
+
+    stats = cache.get_stats()
+    assert stats["exact_hits"] == 2 and stats["misses"] == 3
+    assert stats["evictions"] == 2
+    assert 1.0 < stats["latency_saved"] < 2.0
+
+
+def test_expired_entries_are_not_served(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    cache.cache_response("hello", "hi", "m", response_time=0.5)
+    cache.conn.execute("UPDATE response_cache SET expires_at = ?", (int(time.time()) - 1,))
+    assert cache.get_cached_response("hello", "m") is None
+    cache.cleanup_expired()
+    assert cache.entry_count == 0
+
+
+def test_semantic_hit_above_threshold_per_namespace(tmp_path):
+    embedder = BagOfWordsEmbedder()
+    cache = SemanticResponseCache(str(tmp_path / "cache.db"), similarity_threshold=0.8,
+                                  embedding_service=embedder)
+
+    async def run():
+        await cache.acache_response("What time is it right now?", "It's noon.", "m", response_time=2.0)
+        reworded = await cache.aget_cached_response("what time is it now", "m")
+        other_model = await cache.aget_cached_response("what time is it now", "other")
+        unrelated = await cache.aget_cached_response("tell me the weather today", "m")
+        return reworded, other_model, unrelated
+
+    reworded, other_model, unrelated = asyncio.run(run())
+    assert reworded["response"] == "It's noon." and reworded["cache_match"] == "semantic"
+    assert reworded["similarity"] >= 0.8
+    assert other_model is None and unrelated is None
+    assert cache.get_stats()["semantic_hits"] == 1
+
+    # Embeddings persist with the entries
+    reopened = SemanticResponseCache(str(tmp_path / "cache.db"), similarity_threshold=0.8,
+                                     embedding_service=embedder)
+    assert asyncio.run(reopened.aget_cached_response("what time is it now", "m"))["cache_match"] == "semantic"
+
+
+def test_semantic_cache_without_embeddings_falls_back_to_exact(tmp_path):
+    cache = SemanticResponseCache(str(tmp_path / "cache.db"))
+    cache._embedding_unavailable = True
+
+    async def run():
+        await cache.acache_response("hello", "hi", "m", response_time=0.5)
+        return await cache.aget_cached_response("hello", "m"), await cache.aget_cached_response("hello there", "m")
+
+    exact, reworded = asyncio.run(run())
+    assert exact["cache_match"] == "exact"
+    assert reworded is None
@@ -0,0 +1,195 @@
+"""
+Unit tests for src.utils.single_flight and request coalescing in LocalLLMClient
+"""
+
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).parent.parent.parent / 'src'
+sys.path.insert(0, str(SRC))
+
+try:
+    from src.utils.single_flight import SingleFlight, request_key
+    from src.llm.local_llm_client import LocalLLMClient, LLMConfig, LLMRequest
+    from main import HearthlinkLogger
+except ImportError as e:
+    pytest.skip(f"Cannot import single_flight: {e}", allow_module_level=True)
+
+TOKENS = ["a", "b", "c"]
+
+
+def slow_tokens(log, delay=0.05):
+    log.append("opened")
+    try:
+        for token in TOKENS:
+            time.sleep(delay)
+            yield token
+    finally:
+        log.append("closed")
+
+
+class TestSingleFlight:
+    def test_request_key_ignores_dict_order(self):
+        assert request_key("u", {"a": 1, "b": {"x": 1, "y": 2}}) == request_key("u", {"b": {"y": 2, "x": 1}, "a": 1})
+        assert request_key("u", {"a": 1}) != request_key("u", {"a": 2})
+
+    def test_concurrent_calls_share_one_result(self):
+        flight = SingleFlight()
+        calls = []
+
+        def generate():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"content": "shared"}
+
+        with ThreadPoolExecutor(5) as pool:
+            results = list(pool.map(lambda _: flight.do("k", generate), range(5)))
+
+        assert len(calls) == 1
+        assert all(r == {"content": "shared"} for r in results)
+        assert flight.get_stats()["deduplicated"] == 4
+        # Once finished, the next call generates again
+        flight.do("k", generate)
+        assert len(calls) == 2
+
+    def test_errors_reach_every_waiter(self):
+        flight = SingleFlight()
+
+        def fail():
+            time.sleep(0.1)
+            raise RuntimeError("upstream down")
+
+        def call(_):
+            try:
+                flight.do("k", fail)
+            except RuntimeError as e:
+                return str(e)
+
+        with ThreadPoolExecutor(3) as pool:
+            assert list(pool.map(call, range(3))) == ["upstream down"] * 3
+
+    def test_stream_fans_out_to_all_subscribers(self):
+        flight = SingleFlight()
+        log = []
+        first = flight.stream("k", lambda: slow_tokens(log))
+        assert next(first) == "a"
+
+        # A late subscriber replays what was already produced
+        second = flight.stream("k", lambda: slow_tokens(log))
+        results = {}
+        threads = [threading.Thread(target=lambda n=n, s=s: results.setdefault(n, list(s)))
+                   for n, s in (("first", first), ("second", second))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results["first"] == ["b", "c"]
+        assert results["second"] == TOKENS
+        assert log == ["opened", "closed"]
+        assert flight.get_stats()["in_flight_streams"] == 0
+
+    def test_upstream_closed_when_all_subscribers_leave(self):
+        flight = SingleFlight()
+        log = []
+        first = flight.stream("k", lambda: slow_tokens(log))
+        second = flight.stream("k", lambda: slow_tokens(log))
+        assert next(first) == "a" and next(second) == "a"
+
+        first.close()
+        assert log == ["opened"]
+        second.close()
+        assert log == ["opened", "closed"]
+        assert flight.get_stats()["cancelled"] == 1
+
+        # A new request starts a fresh upstream stream
+        assert list(flight.stream("k", lambda: slow_tokens(log, 0))) == TOKENS
+
+
+class CountingOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    generations = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({"models": [{"name": "stub"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).generations += 1
+        if payload.get("stream"):
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, token in enumerate(TOKENS):
+                line = json.dumps({"response": token, "done": i == len(TOKENS) - 1}).encode() + b"\n"
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+                time.sleep(0.05)
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        time.sleep(0.2)
+        body = json.dumps({"response": f"echo: {payload['prompt']}", "done": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def client(tmp_path):
+    CountingOllama.generations = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config = LLMConfig(engine="ollama", base_url=f"http://127.0.0.1:{server.server_address[1]}",
+                       model="stub", max_retries=0)
+    llm = LocalLLMClient(config, HearthlinkLogger(log_dir=str(tmp_path / "logs")))
+    llm.single_flight = SingleFlight()
+    yield llm
+    server.shutdown()
+
+
+class TestClientCoalescing:
+    def test_identical_generations_share_upstream_call(self, client):
+        with ThreadPoolExecutor(4) as pool:
+            responses = list(pool.map(lambda i: client.generate(LLMRequest(prompt="same", request_id=f"r{i}")),
+                                      range(4)))
+
+        assert CountingOllama.generations == 1
+        assert {r.content for r in responses} == {"echo: same"}
+        assert [r.request_id for r in responses] == ["r0", "r1", "r2", "r3"]
+
+        client.generate(LLMRequest(prompt="different"))
+        assert CountingOllama.generations == 2
+
+    def test_identical_streams_share_upstream_stream(self, client):
+        def consume(i):
+            chunks = list(client.generate_stream(LLMRequest(prompt="same", request_id=f"s{i}")))
+            return "".join(c.content for c in chunks), {c.request_id for c in chunks}
+
+        with ThreadPoolExecutor(3) as pool:
+            results = list(pool.map(consume, range(3)))
+
+        assert CountingOllama.generations == 1
+        assert [text for text, _ in results] == ["abc"] * 3
+        assert [ids for _, ids in results] == [{"s0"}, {"s1"}, {"s2"}]
+        assert client.get_status()["deduplication"]["deduplicated"] == 2
+
+    def test_coalescing_can_be_disabled(self, client):
+        client.config.coalesce_requests = False
+        with ThreadPoolExecutor(2) as pool:
+            list(pool.map(lambda _: client.generate(LLMRequest(prompt="same")), range(2)))
+        assert CountingOllama.generations == 2
@@ -0,0 +1,78 @@
+"""
+Unit tests for the ring-buffer storage and indexes in src.synapse.traffic_logger
+"""
+
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from synapse_modules import bare_synapse_package
+    with bare_synapse_package():
+        from src.synapse.traffic_logger import TrafficLogger, TrafficType
+except ImportError as e:
+    pytest.skip(f"Cannot import traffic_logger: {e}", allow_module_level=True)
+
+
+def log(logger, i, **kwargs):
+    return logger.log_traffic(TrafficType.PLUGIN_EXECUTE, "plugin_manager",
+                              plugin_id=f"plugin-{i % 3}", user_id=f"user-{i % 2}", **kwargs)
+
+
+class TestTrafficLoggerBuffer:
+    def test_bounded_with_index_eviction(self):
+        logger = TrafficLogger(max_entries=10)
+        for i in range(25):
+            log(logger, i)
+
+        assert len(logger) == 10
+        assert logger.traffic_counters["evicted"] == 15
+        # Only buffered sequence numbers remain indexed
+        assert sum(len(seqs) for seqs in logger.plugin_index.values()) == 10
+        assert logger.get_traffic_statistics()["total_events"] == 25
+
+    def test_filters_return_newest_first(self):
+        logger = TrafficLogger(max_entries=100)
+        ids = [log(logger, i) for i in range(12)]
+        logger.log_traffic(TrafficType.ERROR, "api", plugin_id="plugin-0", user_id="user-0")
+
+        logs = logger.get_traffic_logs(plugin_id="plugin-0", user_id="user-0",
+                                       traffic_type=TrafficType.PLUGIN_EXECUTE)
+        assert [e.entry_id for e in logs] == [ids[6], ids[0]]
+        assert len(logger.get_traffic_logs(plugin_id="plugin-1", limit=2)) == 2
+        assert logger.get_traffic_logs(plugin_id="missing") == []
+
+    def test_time_range_lookup(self):
+        logger = TrafficLogger(max_entries=100)
+        for i in range(6):
+            log(logger, i)
+        entries = logger.traffic_logs
+
+        logs = logger.get_traffic_logs(start_time=entries[2].timestamp, end_time=entries[4].timestamp)
+        assert entries[2] in logs and entries[4] in logs
+        assert entries[5] not in logs or entries[5].timestamp == entries[4].timestamp
+        assert logger.get_traffic_logs(start_time=datetime(2100, 1, 1).isoformat()) == []
+
+    def test_retention_evicts_expired_entries(self):
+        logger = TrafficLogger(max_entries=100, retention_days=0)
+        log(logger, 0)
+        time.sleep(0.001)
+        log(logger, 1)
+        assert len(logger) == 1
+
+    def test_evicted_entries_spill_to_disk(self, tmp_path):
+        logger = TrafficLogger(max_entries=4, spill_dir=str(tmp_path), spill_batch_size=2)
+        ids = [log(logger, i) for i in range(9)]
+        logger.flush()
+
+        assert logger.traffic_counters["spilled"] == 5
+        in_memory = logger.get_traffic_logs()
+        everything = logger.get_traffic_logs(include_spilled=True)
+        assert len(in_memory) == 4
+        assert [e.entry_id for e in everything] == list(reversed(ids))
+        assert everything[-1].traffic_type == TrafficType.PLUGIN_EXECUTE
@@ -0,0 +1,127 @@
+"""
+Unit tests for the worker pool and scheduler in src.synapse.traffic_manager
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    from synapse_modules import bare_synapse_package
+    with bare_synapse_package():
+        from src.synapse.traffic_manager import SynapseTrafficManager, AgentPriority, QueuedRequest
+except ImportError as e:
+    pytest.skip(f"Cannot import traffic_manager: {e}", allow_module_level=True)
+
+
+def submit(manager, request_id, agent_type, **kwargs):
+    return asyncio.run(manager.submit_request(request_id, agent_type, {"n": request_id}, **kwargs))
+
+
+@pytest.fixture
+def manager():
+    managers = []
+
+    def build(**config):
+        instance = SynapseTrafficManager(config, executor=config.pop('executor', None))
+        managers.append(instance)
+        return instance
+
+    yield build
+    for instance in managers:
+        instance.shutdown()
+
+
+class TestTrafficManagerDispatch:
+    def test_future_resolves_with_executor_result(self, manager):
+        tm = manager(max_workers=2, executor=lambda request: request.payload["n"].upper())
+
+        submission = submit(tm, "req-a", "alden")
+        assert submission["success"]
+        assert submission["future"].result(timeout=2) == "REQ-A"
+        assert tm.processed_requests == 1
+
+    def test_executor_exception_propagates(self, manager):
+        def fail(request):
+            raise ValueError("boom")
+
+        tm = manager(max_workers=1)
+        tm.register_executor("plugin", fail)
+        submission = submit(tm, "req-b", "alden", metadata={"executor": "plugin"})
+
+        with pytest.raises(ValueError, match="boom"):
+            submission["future"].result(timeout=2)
+
+    def test_missing_executor_fails_request(self, manager):
+        tm = manager(max_workers=1)
+        result = asyncio.run(tm.execute_request("req-c", "alden", {}))
+        assert not result["success"]
+        assert "No executor" in result["error"]
+
+    def test_async_executor_and_execute_request(self, manager):
+        async def work(request):
+            await asyncio.sleep(0)
+            return request.request_id
+
+        tm = manager(max_workers=1)
+        tm.register_executor("alden", work)
+        result = asyncio.run(tm.execute_request("req-d", "alden", {}, timeout=2))
+        assert result["success"]
+        assert result["result"] == "req-d"
+
+    def test_pool_runs_requests_concurrently(self, manager):
+        barrier = threading.Barrier(3, timeout=2)
+        tm = manager(max_workers=3, executor=lambda request: barrier.wait())
+
+        futures = [submit(tm, f"req-{i}", "alden")["future"] for i in range(3)]
+        # Would raise BrokenBarrierError if the workers ran one at a time
+        for future in futures:
+            future.result(timeout=3)
+
+    def test_weighted_fair_scheduling(self, manager):
+        tm = manager(max_workers=1, priority_weights={"alden": 3, "external": 1})
+        tm.shutdown()
+
+        for i in range(8):
+            tm.priority_queues[AgentPriority.ALDEN].append(
+                QueuedRequest(f"a{i}", "alden", AgentPriority.ALDEN, {}, None))
+            tm.priority_queues[AgentPriority.EXTERNAL].append(
+                QueuedRequest(f"e{i}", "claude", AgentPriority.EXTERNAL, {}, None))
+        tm.priority_queues[AgentPriority.SYSTEM].append(
+            QueuedRequest("s0", "system", AgentPriority.SYSTEM, {}, None))
+
+        order = [tm._get_next_request().request_id for _ in range(9)]
+        assert order[0] == "s0"
+        # External gets one slot in every four rather than waiting for Alden to drain
+        assert sum(1 for rid in order[1:] if rid.startswith("e")) == 2
+
+    def test_wait_estimate_uses_measured_service_time(self, manager):
+        tm = manager(max_workers=2, executor=lambda request: time.sleep(0.05))
+        submit(tm, "req-e", "alden")["future"].result(timeout=2)
+
+        measured = tm.service_times[AgentPriority.ALDEN]
+        assert 0.04 < measured < 0.5
+        with tm.queue_condition:
+            tm.priority_queues[AgentPriority.ALDEN].extend(["x"] * 4)
+            assert tm._estimate_wait_time(AgentPriority.ALDEN) == pytest.approx(4 * measured / 2)
+            tm.priority_queues[AgentPriority.ALDEN].clear()
+
+    def test_shutdown_cancels_queued_requests(self, manager):
+        release = threading.Event()
+        tm = manager(max_workers=1, executor=lambda request: release.wait(2))
+
+        running = submit(tm, "req-f", "alden")["future"]
+        while not running.running():
+            time.sleep(0.01)
+        queued = submit(tm, "req-g", "alden")["future"]
+
+        threading.Timer(0.1, release.set).start()
+        tm.shutdown()
+        assert queued.cancelled()
+        assert running.done() and not running.cancelled()
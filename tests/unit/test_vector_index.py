@@ -0,0 +1,95 @@
+"""
+Unit tests for src.vault.vector_index
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'src'))
+
+try:
+    import numpy as np
+    from src.vault.vector_index import EmbeddingIndex, VectorIndexRegistry
+except ImportError as e:
+    pytest.skip(f"Cannot import vector_index: {e}", allow_module_level=True)
+
+
+def brute_force(vectors, query, k):
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    q = np.asarray(query, dtype=np.float32)
+    q /= np.linalg.norm(q)
+    return list(np.argsort(-(matrix @ q))[:k])
+
+
+class TestEmbeddingIndex:
+    def test_search_matches_brute_force(self):
+        rng = np.random.default_rng(1)
+        vectors = rng.normal(size=(500, 32))
+        index = EmbeddingIndex()
+        index.add_many((f"s{i}", v, "episodic") for i, v in enumerate(vectors))
+
+        query = rng.normal(size=32)
+        results = index.search(query, 10)
+        assert [sid for sid, _ in results] == [f"s{i}" for i in brute_force(vectors, query, 10)]
+        assert all(a[1] >= b[1] for a, b in zip(results, results[1:]))
+
+    def test_min_similarity_and_type_filter(self):
+        index = EmbeddingIndex()
+        index.add("a", [1.0, 0.0], "episodic")
+        index.add("b", [0.0, 1.0], "semantic")
+        index.add("c", [1.0, 0.1], "semantic")
+
+        assert [sid for sid, _ in index.search([1.0, 0.0], 5, min_similarity=0.9)] == ["a", "c"]
+        assert [sid for sid, _ in index.search([1.0, 0.0], 5, memory_types=["semantic"])] == ["c", "b"]
+        assert index.search([1.0, 0.0], 5, memory_types=["procedural"]) == []
+
+    def test_remove_and_replace(self):
+        index = EmbeddingIndex()
+        for i in range(5):
+            index.add(f"s{i}", [float(i + 1), 1.0], "episodic")
+        assert index.remove("s0") is True
+        assert index.remove("s0") is False
+        index.add("s4", [-1.0, 0.0], "episodic")
+
+        assert len(index) == 4
+        assert "s0" not in index
+        assert index.search([-1.0, 0.0], 1)[0][0] == "s4"
+
+    def test_ivf_partition_recall(self):
+        rng = np.random.default_rng(2)
+        vectors = rng.normal(size=(2000, 16))
+        index = EmbeddingIndex(ivf_min_size=1000, ivf_probe=12)
+        index.add_many((f"s{i}", v, "episodic") for i, v in enumerate(vectors))
+        assert index.stats()["ivf_lists"] > 0
+
+        query = vectors[123] + rng.normal(scale=0.01, size=16)
+        assert index.search(query, 1)[0][0] == "s123"
+
+
+class TestVectorIndexRegistry:
+    def test_lazy_load_and_incremental_add(self):
+        calls = []
+
+        def loader(persona_id, user_id):
+            calls.append((persona_id, user_id))
+            return [("s1", [1.0, 0.0], "episodic")]
+
+        registry = VectorIndexRegistry(loader)
+        registry.add("alden", "u1", "ignored", [0.0, 1.0], "episodic")
+        index = registry.get("alden", "u1")
+        registry.add("alden", "u1", "s2", [0.0, 1.0], "episodic")
+        registry.get("alden", "u1")
+
+        assert calls == [("alden", "u1")]
+        assert len(index) == 2 and "ignored" not in index
+        registry.remove("alden", "u1", "s1")
+        assert "s1" not in index
+
+    def test_loaded_dimension(self):
+        registry = VectorIndexRegistry(lambda persona_id, user_id: [("s1", [1.0, 0.0, 0.0], "episodic")])
+        assert registry.loaded_dimension("alden", "u1") is None
+        registry.get("alden", "u1")
+        assert registry.loaded_dimension("alden", "u1") == 3